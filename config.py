@@ -89,8 +89,21 @@ class Config:
     #    - Datasets above this limit: cache remains static
     #      (manual refresh via admin endpoint)
     COUNT_LIMIT = int(os.environ["COUNT_LIMIT"])
+    # Seconds after which class counts are recounted in the background
+    CLASS_COUNTS_MAX_AGE = int(os.environ.get("CLASS_COUNTS_MAX_AGE", "60"))
     MAX_WORKERS = int(os.environ["MAX_WORKERS"])
     GUNICORN_WORKERS = _gunicorn_workers
+    # Keep-alive connections each process keeps open to every SPARQL endpoint
+    SPARQL_POOL_SIZE = int(os.environ.get("SPARQL_POOL_SIZE", "10"))
+    # Queries a single page may run at once, and the seconds they may take
+    # altogether, when independent queries are fanned out
+    QUERY_CONCURRENCY = int(os.environ.get("QUERY_CONCURRENCY", "4"))
+    QUERY_DEADLINE = float(os.environ.get("QUERY_DEADLINE", "60"))
+    # Bytes and statements each update request of a save may carry, and how
+    # many of those requests may be in flight at once
+    UPDATE_BATCH_BYTES = int(os.environ.get("UPDATE_BATCH_BYTES", "1000000"))
+    UPDATE_BATCH_STATEMENTS = int(os.environ.get("UPDATE_BATCH_STATEMENTS", "10000"))
+    UPDATE_CONCURRENCY = int(os.environ.get("UPDATE_CONCURRENCY", "2"))
 
     DATASET_DB_TRIPLESTORE = os.environ["DATASET_DB_TRIPLESTORE"]
     DATASET_DB_TEXT_INDEX_ENABLED = (
@@ -113,6 +126,8 @@ class Config:
     PRIMARY_SOURCE = os.environ["PRIMARY_SOURCE"]
     SHACL_PATH = _BASE_DIR / "shacl.ttl"
     DISPLAY_RULES_PATH = _BASE_DIR / "display_rules.yaml"
+    # Seconds between checks for changes to the SHACL file, 0 to never reload it
+    SHACL_RELOAD_INTERVAL = float(os.environ.get("SHACL_RELOAD_INTERVAL", "5"))
 
     ORCID_CLIENT_ID = os.environ["ORCID_CLIENT_ID"]
     ORCID_CLIENT_SECRET = os.environ["ORCID_CLIENT_SECRET"]
@@ -128,6 +143,18 @@ class Config:
         ProxyHandlingStrategy, os.environ["PROXY_HANDLING_STRATEGY"].upper()
     )
 
+    # Shared cache of fetchUriDisplay labels: entry lifetime in seconds and the
+    # number of entries kept before the least recently used ones are evicted
+    LABEL_CACHE_TTL = int(os.environ.get("LABEL_CACHE_TTL", "86400"))
+    LABEL_CACHE_MAX_ENTRIES = int(os.environ.get("LABEL_CACHE_MAX_ENTRIES", "100000"))
+
+    # Reconstructed past states of entities kept in Redis: one snapshot every
+    # SNAPSHOT_CHECKPOINT_INTERVAL, for SNAPSHOT_CACHE_TTL seconds
+    SNAPSHOT_CHECKPOINT_INTERVAL = int(
+        os.environ.get("SNAPSHOT_CHECKPOINT_INTERVAL", "10")
+    )
+    SNAPSHOT_CACHE_TTL = int(os.environ.get("SNAPSHOT_CACHE_TTL", "604800"))
+
     CATALOGUE_DEFAULT_PER_PAGE = int(os.environ["CATALOGUE_DEFAULT_PER_PAGE"])
     CATALOGUE_ALLOWED_PER_PAGE: ClassVar[list[int]] = [
         int(x) for x in os.environ["CATALOGUE_ALLOWED_PER_PAGE"].split(",")
@@ -0,0 +1,158 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+"""
+Compare display rule lookups with a linear scan and with the compiled index.
+
+Replays the lookups that rendering a large about page makes for each of its
+triples: the predicate label, the class label of the linked entity, its
+priority and its visibility. The page is timed with the linear scan that
+find_matching_rule used to run and with the DisplayRuleIndex it uses now.
+Run with: python dev/benchmark_display_rules.py
+"""
+
+import argparse
+import timeit
+from pathlib import Path
+from unittest.mock import patch
+
+import yaml
+
+from heritrace.utils import display_rules_utils
+from heritrace.utils.display_rules_utils import (
+    get_class_priority,
+    is_entity_type_visible,
+)
+from heritrace.utils.filters import Filter
+
+DEFAULT_RULES = (
+    Path(__file__).resolve().parent.parent
+    / "example_configurations"
+    / "opencitations_meta"
+    / "display_rules.yaml"
+)
+
+UNKNOWN_SHAPE = "http://example.org/UnknownShape"
+
+
+def linear_match(
+    class_uri: str | None = None,
+    shape_uri: str | None = None,
+    rules: list[dict] | None = None,
+) -> dict | None:
+    """The scan find_matching_rule ran before the rules were indexed."""
+    if not rules:
+        rules = display_rules_utils.get_display_rules()
+    class_match = None
+    shape_match = None
+    highest_priority = float("inf")
+    for rule in rules:
+        target = rule["target"]
+        rule_priority = rule.get("priority", 0)
+        if (
+            class_uri
+            and shape_uri
+            and target.get("class") == str(class_uri)
+            and target.get("shape") == str(shape_uri)
+        ):
+            return rule
+        if (
+            class_uri
+            and "shape" not in target
+            and target.get("class") == str(class_uri)
+        ):
+            if class_match is None or rule_priority < highest_priority:
+                class_match = rule
+                highest_priority = rule_priority
+        elif (
+            shape_uri
+            and "class" not in target
+            and target.get("shape") == str(shape_uri)
+        ) and (shape_match is None or rule_priority < highest_priority):
+            shape_match = rule
+            highest_priority = rule_priority
+    if shape_match and (
+        class_match is None
+        or shape_match.get("priority", 0) <= class_match.get("priority", 0)
+    ):
+        return shape_match
+    return class_match
+
+
+def build_page(rules: list[dict], triples: int) -> list[tuple[str, tuple, tuple]]:
+    """
+    Triples of an about page, as (predicate, subject key, object key).
+
+    The subject is of the class with the most display properties, and the
+    objects cycle through the targets of all the rules.
+    """
+    subject_rule = max(rules, key=lambda rule: len(rule.get("displayProperties", [])))
+    subject_key = (
+        subject_rule["target"].get("class"),
+        subject_rule["target"].get("shape", UNKNOWN_SHAPE),
+    )
+    predicates = [
+        prop["property"]
+        for prop in subject_rule.get("displayProperties", [])
+        if "property" in prop
+    ] or ["http://example.org/property"]
+    object_keys = [
+        (rule["target"].get("class"), rule["target"].get("shape", UNKNOWN_SHAPE))
+        for rule in rules
+    ]
+    return [
+        (
+            predicates[i % len(predicates)],
+            subject_key,
+            object_keys[i % len(object_keys)],
+        )
+        for i in range(triples)
+    ]
+
+
+def render_page(custom_filter: Filter, page: list[tuple[str, tuple, tuple]]) -> None:
+    for predicate, subject_key, object_key in page:
+        custom_filter.human_readable_predicate(predicate, subject_key)
+        custom_filter.human_readable_class(object_key)
+        get_class_priority(object_key)
+        is_entity_type_visible(object_key)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rules", type=Path, default=DEFAULT_RULES)
+    parser.add_argument("--triples", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with args.rules.open() as rules_file:
+        rules = yaml.safe_load(rules_file)["rules"]
+    page = build_page(rules, args.triples)
+    custom_filter = Filter({}, rules, "http://localhost/sparql")
+
+    def time_page() -> float:
+        return min(
+            timeit.repeat(
+                lambda: render_page(custom_filter, page),
+                number=1,
+                repeat=args.repeat,
+            )
+        )
+
+    with patch.object(display_rules_utils, "get_display_rules", lambda: rules):
+        with patch.object(display_rules_utils, "find_matching_rule", linear_match):
+            linear_time = time_page()
+        indexed_time = time_page()
+
+    print(f"About page of {args.triples} triples, {len(rules)} display rules")
+    for name, elapsed in (
+        ("linear scan", linear_time),
+        ("compiled index", indexed_time),
+    ):
+        print(f"{name:>15}: {elapsed * 1000:8.1f} ms")
+    print(f"{'speedup':>15}: {linear_time / indexed_time:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
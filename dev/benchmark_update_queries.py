@@ -0,0 +1,92 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+"""
+Compare the parsers of provenance update queries.
+
+Builds update queries shaped like the ones rdflib-ocdm records, then times
+parsing them with rdflib, with the dedicated tokenizer, and through the LRU
+cache once it is warm. Run with: python dev/benchmark_update_queries.py
+"""
+
+import argparse
+import timeit
+
+from rdflib import XSD, Graph, Literal, URIRef
+
+from heritrace.utils.update_queries import (
+    _parse_cached,
+    _parse_ocdm_update,
+    _parse_with_rdflib,
+    parse_sparql_update,
+)
+
+DCTERMS = "http://purl.org/dc/terms/"
+
+
+def build_update_query(entity: int, triples: int) -> str:
+    subject = URIRef(f"https://w3id.org/oc/meta/br/{entity}")
+    graph = Graph()
+    graph.add(
+        (
+            subject,
+            URIRef("http://www.w3.org/1999/02/22-rdf-syntax-ns#type"),
+            URIRef("http://purl.org/spar/fabio/JournalArticle"),
+        )
+    )
+    for i in range(triples - 1):
+        if i % 3 == 0:
+            value = Literal(f'Title "{i}" of {entity}', lang="en")
+        elif i % 3 == 1:
+            value = Literal(f"{2000 + i}-01-01", datatype=XSD.date)
+        else:
+            value = URIRef(f"https://w3id.org/oc/meta/ra/{entity}{i}")
+        graph.add((subject, URIRef(f"{DCTERMS}p{i}"), value))
+    statements = graph.serialize(format="nt11").replace("\n", "")
+    graph_block = "GRAPH <https://w3id.org/oc/meta/br/>"
+    return (
+        f"DELETE DATA {{ {graph_block} {{ {statements} }} }}; "
+        f"INSERT DATA {{ {graph_block} {{ {statements} }} }}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--triples", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    queries = [build_update_query(i, args.triples) for i in range(args.queries)]
+
+    def time_parser(parse: object) -> float:
+        return min(
+            timeit.repeat(
+                lambda: [parse(query) for query in queries],  # type: ignore[operator]
+                number=1,
+                repeat=args.repeat,
+            )
+        )
+
+    rdflib_time = time_parser(_parse_with_rdflib)
+    tokenizer_time = time_parser(_parse_ocdm_update)
+    _parse_cached.cache_clear()
+    for query in queries:
+        parse_sparql_update(query)
+    cached_time = time_parser(parse_sparql_update)
+
+    print(f"{args.queries} update queries of {args.triples} triples each")
+    for name, elapsed in (
+        ("rdflib", rdflib_time),
+        ("tokenizer", tokenizer_time),
+        ("cached", cached_time),
+    ):
+        print(
+            f"{name:>10}: {elapsed * 1000:9.2f} ms "
+            f"({rdflib_time / elapsed:7.1f}x rdflib)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,36 @@
-# SPDX-FileCopyrightText: 2024-2025 Arcangelo Massari <arcangelo.massari@unibo.it>
+# SPDX-FileCopyrightText: 2024-2026 Arcangelo Massari <arcangelo.massari@unibo.it>
 #
 # SPDX-License-Identifier: ISC
 
 import logging
 import os
 import sys
+import time
+from functools import partial
 
 from flask import Flask
 from flask_babel import Babel
 from flask_login import LoginManager
 from redis import Redis
 
+from heritrace.batched_storer import (
+    DEFAULT_UPDATE_BATCH_BYTES,
+    DEFAULT_UPDATE_BATCH_STATEMENTS,
+    DEFAULT_UPDATE_CONCURRENCY,
+    configure_batched_upload,
+)
 from heritrace.cli import register_cli_commands
-from heritrace.extensions import init_extensions
+from heritrace.extensions import get_shared_cache, init_extensions
 from heritrace.routes import register_blueprints
+from heritrace.sparql import (
+    DEFAULT_SPARQL_POOL_SIZE,
+    configure_sparql_connection_pool,
+)
+from heritrace.utils.query_executor import (
+    DEFAULT_QUERY_CONCURRENCY,
+    DEFAULT_QUERY_DEADLINE,
+    configure_query_executor,
+)
 from heritrace.utils.sparql_utils import (
     configure_worker_pool,
     get_available_classes,
@@ -21,6 +38,9 @@ from heritrace.utils.sparql_utils import (
     warm_time_vault,
 )
 
+# Seconds during which a warm-up spares the workers starting after it
+STARTUP_WARM_UP_VALIDITY = 600
+
 
 def create_app(config_object: object = None) -> Flask:
     app = Flask(__name__)
@@ -49,19 +69,58 @@ def create_app(config_object: object = None) -> Flask:
         )
         app.logger.info("Connecting to Redis at: %s", redis_url)
         redis_client = Redis.from_url(redis_url, decode_responses=True)
+        sparql_pool_size = app.config.get("SPARQL_POOL_SIZE", DEFAULT_SPARQL_POOL_SIZE)
+        configure_sparql_connection_pool(sparql_pool_size)
+        configure_query_executor(
+            sparql_pool_size,
+            app.config.get("QUERY_CONCURRENCY", DEFAULT_QUERY_CONCURRENCY),
+            app.config.get("QUERY_DEADLINE", DEFAULT_QUERY_DEADLINE),
+        )
+        configure_batched_upload(
+            app.config.get("UPDATE_BATCH_BYTES", DEFAULT_UPDATE_BATCH_BYTES),
+            app.config.get("UPDATE_BATCH_STATEMENTS", DEFAULT_UPDATE_BATCH_STATEMENTS),
+            app.config.get("UPDATE_CONCURRENCY", DEFAULT_UPDATE_CONCURRENCY),
+        )
 
         with app.app_context():
             init_extensions(app, babel, login_manager, redis_client)
             configure_worker_pool(
                 app.config["MAX_WORKERS"], app.config["GUNICORN_WORKERS"]
             )
-
-            app.logger.info("[STARTUP] Pre-computing available classes cache...")
-            available_classes = get_available_classes()
-            app.logger.info("[STARTUP] Available classes cache computed successfully")
-            warm_catalogue(available_classes, app.config["CATALOGUE_DEFAULT_PER_PAGE"])
-            warm_time_vault()
+            warm_up(app)
 
         register_blueprints(app)
 
     return app
+
+
+def _run_warm_up(app: Flask) -> None:
+    app.logger.info("[STARTUP] Pre-computing available classes cache...")
+    available_classes = get_available_classes()
+    app.logger.info("[STARTUP] Available classes cache computed successfully")
+    warm_catalogue(available_classes, app.config["CATALOGUE_DEFAULT_PER_PAGE"])
+    warm_time_vault()
+
+
+def warm_up(app: Flask) -> None:
+    """Warm the shared caches once for all the workers starting together."""
+    started_at = time.monotonic()
+    shared_cache = get_shared_cache()
+    if shared_cache is None:
+        _run_warm_up(app)
+    elif not shared_cache.run_once(
+        "startup_warm_up", partial(_run_warm_up, app), STARTUP_WARM_UP_VALIDITY
+    ):
+        duration = shared_cache.last_run("startup_warm_up")
+        if duration is None:
+            app.logger.info("[STARTUP] Skipped the warm-up another worker is running")
+        else:
+            app.logger.info(
+                "[STARTUP] Skipped the warm-up another worker completed, "
+                "saving %.3f seconds",
+                duration,
+            )
+        return
+    app.logger.info(
+        "[STARTUP] Warm-up completed in %.3f seconds", time.monotonic() - started_at
+    )
@@ -0,0 +1,223 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+"""
+Upload of the changes of a save in bounded batches.
+
+rdflib-ocdm's Storer joins the update queries of ten entities at a time,
+however large they are, so a merge or a restoration touching big entities can
+send updates of several megabytes. BatchedStorer builds the same queries one
+entity at a time and groups them into batches bounded both in bytes and in
+statements. Batches are sent while the next ones are being built, with at most
+UPDATE_CONCURRENCY of them in flight, and the time each one took is logged and
+kept in the storer's timings.
+"""
+
+import logging
+import time
+from collections.abc import Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+
+from rdflib import Dataset, Graph
+from rdflib_ocdm.ocdm_graph import OCDMDataset, OCDMGraph
+from rdflib_ocdm.query_utils import get_update_query
+from SPARQLWrapper.SPARQLExceptions import SPARQLWrapperException
+
+from heritrace.sparql import SPARQLWrapperWithRetry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_UPDATE_BATCH_BYTES = 1_000_000
+DEFAULT_UPDATE_BATCH_STATEMENTS = 10_000
+DEFAULT_UPDATE_CONCURRENCY = 2
+# Seconds a single batch may take, well above the timeout of read queries
+UPDATE_TIMEOUT = 300.0
+
+_QUERY_SEPARATOR = " ; "
+
+
+@dataclass(slots=True)
+class _UploadSettings:
+    max_bytes: int = DEFAULT_UPDATE_BATCH_BYTES
+    max_statements: int = DEFAULT_UPDATE_BATCH_STATEMENTS
+    concurrency: int = DEFAULT_UPDATE_CONCURRENCY
+
+
+_upload_settings = _UploadSettings()
+
+
+def configure_batched_upload(
+    max_bytes: int, max_statements: int, concurrency: int
+) -> None:
+    """Set the size of the update batches and how many may be in flight."""
+    if max_bytes < 1:
+        msg = "UPDATE_BATCH_BYTES must be at least 1"
+        raise ValueError(msg)
+    if max_statements < 1:
+        msg = "UPDATE_BATCH_STATEMENTS must be at least 1"
+        raise ValueError(msg)
+    if concurrency < 1:
+        msg = "UPDATE_CONCURRENCY must be at least 1"
+        raise ValueError(msg)
+    _upload_settings.max_bytes = max_bytes
+    _upload_settings.max_statements = max_statements
+    _upload_settings.concurrency = concurrency
+
+
+@dataclass(frozen=True, slots=True)
+class UpdateBatch:
+    """The update queries of some entities, joined into one request."""
+
+    query: str
+    entities: int
+    statements: int
+    size: int
+
+
+@dataclass(frozen=True, slots=True)
+class BatchTiming:
+    """How the upload of a batch went."""
+
+    entities: int
+    statements: int
+    size: int
+    seconds: float
+    uploaded: bool
+
+
+def update_batches(
+    a_set: Graph | Dataset, *, max_bytes: int, max_statements: int
+) -> Iterator[UpdateBatch]:
+    """
+    Build the update queries of the changed entities, grouped into batches.
+
+    A batch closes before the entity that would take it over either budget.
+    The query of a single entity is never split, so an entity whose changes
+    exceed the budgets gets a batch of its own.
+    """
+    entity_type = "graph" if isinstance(a_set, (OCDMGraph, OCDMDataset)) else "prov"
+    queries: list[str] = []
+    size = 0
+    statements = 0
+    for entity in list(a_set.all_entities):  # type: ignore[union-attr]
+        query, added, removed = get_update_query(a_set, entity, entity_type)
+        if not query:
+            continue
+        query_size = len(query.encode())
+        query_statements = added + removed
+        if query_size > max_bytes:
+            logger.warning(
+                "The update of %s takes %d bytes, over the batch budget",
+                entity,
+                query_size,
+            )
+        if queries and (
+            size + len(_QUERY_SEPARATOR) + query_size > max_bytes
+            or statements + query_statements > max_statements
+        ):
+            yield _join(queries, size, statements)
+            queries, size, statements = [], 0, 0
+        size += query_size + (len(_QUERY_SEPARATOR) if queries else 0)
+        statements += query_statements
+        queries.append(query)
+    if queries:
+        yield _join(queries, size, statements)
+
+
+def _join(queries: list[str], size: int, statements: int) -> UpdateBatch:
+    return UpdateBatch(
+        query=_QUERY_SEPARATOR.join(queries),
+        entities=len(queries),
+        statements=statements,
+        size=size,
+    )
+
+
+class BatchedStorer:
+    """Upload the changes of a graph set or of its provenance in batches."""
+
+    def __init__(self, a_set: Graph | Dataset) -> None:
+        self.a_set = a_set
+        self.timings: list[BatchTiming] = []
+
+    def upload_all(self, endpoint: str) -> bool:
+        """
+        Upload every batch, even after one has failed.
+
+        Returns:
+            Whether every batch was uploaded
+        """
+        started = time.perf_counter()
+        batches = update_batches(
+            self.a_set,
+            max_bytes=_upload_settings.max_bytes,
+            max_statements=_upload_settings.max_statements,
+        )
+        if _upload_settings.concurrency == 1:
+            self.timings = [_upload(batch, endpoint) for batch in batches]
+        else:
+            self.timings = _upload_concurrently(
+                batches, endpoint, _upload_settings.concurrency
+            )
+        if self.timings:
+            logger.info(
+                "Uploaded %d update batches to %s in %.3f seconds",
+                len(self.timings),
+                endpoint,
+                time.perf_counter() - started,
+            )
+        return all(timing.uploaded for timing in self.timings)
+
+
+def _upload_concurrently(
+    batches: Iterator[UpdateBatch], endpoint: str, concurrency: int
+) -> list[BatchTiming]:
+    timings: list[BatchTiming] = []
+    in_flight: set[Future[BatchTiming]] = set()
+    with ThreadPoolExecutor(
+        max_workers=concurrency, thread_name_prefix="heritrace-update"
+    ) as executor:
+        for batch in batches:
+            if len(in_flight) == concurrency:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                timings.extend(future.result() for future in done)
+            in_flight.add(executor.submit(_upload, batch, endpoint))
+        timings.extend(future.result() for future in in_flight)
+    return timings
+
+
+def _upload(batch: UpdateBatch, endpoint: str) -> BatchTiming:
+    started = time.perf_counter()
+    sparql = SPARQLWrapperWithRetry(endpoint, timeout=UPDATE_TIMEOUT)
+    sparql.setQuery(batch.query)
+    try:
+        sparql.query()
+    except (SPARQLWrapperException, OSError):
+        logger.exception(
+            "Failed to upload %d statements of %d entities to %s",
+            batch.statements,
+            batch.entities,
+            endpoint,
+        )
+        uploaded = False
+    else:
+        uploaded = True
+    timing = BatchTiming(
+        entities=batch.entities,
+        statements=batch.statements,
+        size=batch.size,
+        seconds=time.perf_counter() - started,
+        uploaded=uploaded,
+    )
+    logger.debug(
+        "Update batch of %d statements of %d entities (%d bytes) sent to %s "
+        "in %.3f seconds",
+        timing.statements,
+        timing.entities,
+        timing.size,
+        endpoint,
+        timing.seconds,
+    )
+    return timing
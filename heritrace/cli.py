@@ -1,4 +1,4 @@
-# SPDX-FileCopyrightText: 2024-2025 Arcangelo Massari <arcangelo.massari@unibo.it>
+# SPDX-FileCopyrightText: 2024-2026 Arcangelo Massari <arcangelo.massari@unibo.it>
 #
 # SPDX-License-Identifier: ISC
 
@@ -8,8 +8,19 @@ from pathlib import Path
 import click
 from flask import Flask
 
+from heritrace.extensions import (
+    get_classes_with_multiple_shapes,
+    get_deletion_index,
+    get_shape_index,
+)
+from heritrace.utils.shape_membership import iter_shape_membership
+from heritrace.utils.sparql_utils import iter_deletion_records
+
 
 def register_cli_commands(app: Flask) -> None:
+    _register_shape_index_commands(app)
+    _register_deletion_index_commands(app)
+
     @app.cli.group()
     def translate() -> None:
         """Translation and localization commands."""
@@ -45,3 +56,42 @@ def register_cli_commands(app: Flask) -> None:
             msg = "init command failed"
             raise RuntimeError(msg)
         Path("messages.pot").unlink()
+
+
+def _register_shape_index_commands(app: Flask) -> None:
+    @app.cli.group("shape-index")
+    def shape_index() -> None:
+        """Shape index commands."""
+
+    @shape_index.command("build")
+    @click.option(
+        "--class",
+        "class_uris",
+        multiple=True,
+        help="Class to index. Defaults to every class with multiple shapes.",
+    )
+    def build_shape_index(class_uris: tuple[str, ...]) -> None:
+        """Index the shape of every entity of the classes with multiple shapes."""
+        index = get_shape_index()
+        if index is None:
+            msg = "The shape index is not available"
+            raise click.ClickException(msg)
+        for class_uri in class_uris or sorted(get_classes_with_multiple_shapes()):
+            indexed = index.build(class_uri, iter_shape_membership(class_uri))
+            click.echo(f"Indexed {indexed} entities of {class_uri}")
+
+
+def _register_deletion_index_commands(app: Flask) -> None:
+    @app.cli.group("deletion-index")
+    def deletion_index() -> None:
+        """Deletion index commands."""
+
+    @deletion_index.command("build")
+    def build_deletion_index() -> None:
+        """Index every deleted entity recorded in the provenance."""
+        index = get_deletion_index()
+        if index is None:
+            msg = "The deletion index is not available"
+            raise click.ClickException(msg)
+        indexed = index.build(iter_deletion_records())
+        click.echo(f"Indexed {indexed} deleted entities")
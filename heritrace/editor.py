@@ -2,17 +2,19 @@
 #
 # SPDX-License-Identifier: ISC
 
+from collections.abc import Iterable
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from typing import TYPE_CHECKING
 
-from rdflib import Literal, URIRef
+from rdflib import Dataset, Graph, Literal, URIRef
 from rdflib_ocdm.counter_handler.counter_handler import CounterHandler
 from rdflib_ocdm.ocdm_graph import OCDMDataset, OCDMGraph
 from rdflib_ocdm.reader import Reader
-from rdflib_ocdm.storer import Storer
 from SPARQLWrapper import JSON
+from SPARQLWrapper.SPARQLExceptions import SPARQLWrapperException
 
+from heritrace.batched_storer import BatchedStorer
 from heritrace.counter_handler import TransactionalCounterHandler
 from heritrace.sparql import SPARQLWrapperWithRetry, get_sparql_bindings
 
@@ -27,10 +29,30 @@ class EndpointConfig:
     is_quadstore: bool = True
 
 
+IMPORT_BATCH_SIZE = 100
+
+
 class EditorError(Exception):
     pass
 
 
+@dataclass(frozen=True, slots=True)
+class EntityImportResult:
+    """The outcome of importing a set of entities into the editor.
+
+    missing lists the entities with no triples in the dataset, failed the ones
+    whose query could not be run.
+    """
+
+    imported: tuple[URIRef, ...] = ()
+    missing: tuple[URIRef, ...] = ()
+    failed: tuple[URIRef, ...] = ()
+
+    @property
+    def not_imported(self) -> tuple[URIRef, ...]:
+        return self.missing + self.failed
+
+
 class Editor:
     def __init__(  # noqa: PLR0913
         self,
@@ -212,6 +234,59 @@ class Editor:
             [subject],  # type: ignore[arg-type]
         )
 
+    def import_entities(
+        self, subjects: Iterable[URIRef], batch_size: int = IMPORT_BATCH_SIZE
+    ) -> EntityImportResult:
+        """
+        Import many entities, reading them in chunks of batch_size subjects.
+
+        Entities already in the editor are not read again and count as
+        imported. A chunk whose query fails does not stop the import of the
+        others.
+
+        Returns:
+            The entities imported and the ones that could not be
+        """
+        imported: list[URIRef] = []
+        pending: list[URIRef] = []
+        for subject in sorted(set(subjects), key=str):
+            (imported if self._has_entity(subject) else pending).append(subject)
+        missing: list[URIRef] = []
+        failed: list[URIRef] = []
+        for start in range(0, len(pending), batch_size):
+            chunk = pending[start : start + batch_size]
+            try:
+                Reader.import_entities_from_triplestore(
+                    self.g_set,
+                    self.dataset_endpoint,
+                    chunk,  # type: ignore[arg-type]
+                )
+            except ValueError:
+                missing.extend(chunk)
+                continue
+            except (SPARQLWrapperException, OSError):
+                failed.extend(chunk)
+                continue
+            for subject in chunk:
+                (imported if self._has_entity(subject) else missing).append(subject)
+        return EntityImportResult(
+            imported=tuple(imported), missing=tuple(missing), failed=tuple(failed)
+        )
+
+    def _has_entity(self, subject: URIRef) -> bool:
+        if isinstance(self.g_set, Dataset):
+            return next(self.g_set.quads((subject, None, None, None)), None) is not None
+        return next(self.g_set.triples((subject, None, None)), None) is not None
+
+    def import_graph(self, graph: Graph | Dataset) -> None:
+        """Import entities whose triples were already read from the dataset."""
+        if isinstance(graph, Dataset):
+            for quad in graph.quads((None, None, None, None)):
+                self.g_set.add(quad)  # type: ignore[arg-type]
+        else:
+            for triple in graph:
+                self.g_set.add(triple)  # type: ignore[arg-type]
+
     def merge(
         self,
         keep_entity_uri: URIRef,
@@ -256,8 +331,8 @@ class Editor:
         self.begin_counter_transaction()
         try:
             self.g_set.generate_provenance()  # type: ignore[arg-type]
-            dataset_storer = Storer(self.g_set)  # type: ignore[arg-type]
-            prov_storer = Storer(self.g_set.provenance)  # type: ignore[attr-defined]
+            dataset_storer = BatchedStorer(self.g_set)  # type: ignore[arg-type]
+            prov_storer = BatchedStorer(self.g_set.provenance)  # type: ignore[attr-defined]
             self._upload_or_raise(
                 dataset_storer,
                 self.dataset_endpoint,
@@ -277,8 +352,10 @@ class Editor:
                 self._rollback_counter_transaction()
 
     @staticmethod
-    def _upload_or_raise(storer: Storer, endpoint: str, error_message: str) -> None:
-        if not storer.upload_all(endpoint):  # type: ignore[arg-type]
+    def _upload_or_raise(
+        storer: BatchedStorer, endpoint: str, error_message: str
+    ) -> None:
+        if not storer.upload_all(endpoint):
             raise EditorError(error_message)
 
     def begin_counter_transaction(self) -> None:
@@ -4,8 +4,11 @@
 
 import json
 import os
-from collections import defaultdict
-from dataclasses import dataclass
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from collections.abc import Mapping
+from dataclasses import dataclass, field, replace
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import cast
@@ -25,10 +28,44 @@ from time_agnostic_library.support import generate_config_file
 
 from heritrace.counter_handler import CounterInitializationPolicy
 from heritrace.models import User
+from heritrace.save_plugin import (
+    CacheUpdates,
+    ClassCountsAdjustment,
+    DeletionIndexUpdate,
+    LabelCacheInvalidation,
+    SavePlugin,
+    SavePlugins,
+    ShapeIndexUpdate,
+)
+from heritrace.services.class_counts import (
+    DEFAULT_CLASS_COUNTS_MAX_AGE,
+    DEFAULT_COUNT_LIMIT,
+    ClassCounts,
+)
+from heritrace.services.deletion_index import DeletionIndex
+from heritrace.services.label_cache import (
+    DEFAULT_LABEL_CACHE_MAX_ENTRIES,
+    DEFAULT_LABEL_CACHE_TTL,
+    LabelCache,
+)
 from heritrace.services.resource_lock_manager import ResourceLockManager
-from heritrace.sparql import SPARQLWrapperWithRetry, get_sparql_bindings, select_results
+from heritrace.services.shape_index import ShapeIndex
+from heritrace.services.shared_cache import SharedCache
+from heritrace.services.snapshot_cache import (
+    DEFAULT_SNAPSHOT_CACHE_TTL,
+    DEFAULT_SNAPSHOT_CHECKPOINT_INTERVAL,
+    SnapshotCache,
+)
+from heritrace.sparql import (
+    SPARQLWrapperWithRetry,
+    get_sparql_bindings,
+    resolve_thread_wrapper,
+)
 from heritrace.uri_generator.uri_generator import CounterBasedURIGenerator
+from heritrace.utils.display_rule_index import display_rule_index_for
 from heritrace.utils.filters import Filter, split_namespace
+from heritrace.utils.literal_validators import literal_validators_for
+from heritrace.utils.shacl_index import shacl_index_for
 
 
 @dataclass(frozen=True)
@@ -40,11 +77,19 @@ class AppState:
     change_tracking_config: dict
     custom_filter: Filter
     display_rules: list[dict]
-    form_fields_cache: dict
+    form_fields_cache: Mapping[tuple[str, str], dict]
     dataset_is_quadstore: bool
     shacl_graph: Graph
     classes_with_multiple_shapes: set[str]
     display_rules_use_inverse_relations: bool
+    label_cache: LabelCache | None = None
+    class_counts: ClassCounts = field(default_factory=ClassCounts)
+    shape_index: ShapeIndex | None = None
+    deletion_index: DeletionIndex | None = None
+    shared_cache: SharedCache | None = None
+    snapshot_cache: SnapshotCache | None = None
+    shacl_mtime_ns: int | None = None
+    form_fragments_cache: OrderedDict[tuple, str] = field(default_factory=OrderedDict)
 
 
 def get_app_state() -> AppState:
@@ -57,6 +102,9 @@ def init_extensions(
     from heritrace.utils.display_rules_utils import (  # noqa: PLC0415
         uses_inverse_relations,
     )
+    from heritrace.utils.shacl_utils import (  # noqa: PLC0415
+        determine_shape_for_entity_triples,
+    )
 
     babel.init_app(
         app=app,
@@ -76,6 +124,8 @@ def init_extensions(
         change_tracking_config,
     ) = init_sparql_services(app)
     initialize_counter_handler(app, redis, sparql, provenance_sparql)
+    # Read before parsing, so that a change made meanwhile is still reloaded.
+    shacl_mtime_ns = shacl_file_mtime_ns(app)
 
     app.extensions["heritrace"] = AppState(
         dataset_endpoint=dataset_endpoint,
@@ -99,7 +149,21 @@ def init_extensions(
         shacl_graph,
         classes_with_multiple_shapes,
     ) = initialize_global_variables(app)
-    custom_filter = init_filters(app, display_rules, dataset_endpoint)
+    label_cache = LabelCache(
+        redis,
+        ttl=app.config.get("LABEL_CACHE_TTL", DEFAULT_LABEL_CACHE_TTL),
+        max_entries=app.config.get(
+            "LABEL_CACHE_MAX_ENTRIES", DEFAULT_LABEL_CACHE_MAX_ENTRIES
+        ),
+    )
+    counts_max_age = app.config.get(
+        "CLASS_COUNTS_MAX_AGE", DEFAULT_CLASS_COUNTS_MAX_AGE
+    )
+    class_counts = ClassCounts(
+        limit=app.config.get("COUNT_LIMIT", DEFAULT_COUNT_LIMIT),
+        max_age=counts_max_age,
+    )
+    custom_filter = init_filters(app, display_rules, dataset_endpoint, label_cache)
     init_request_handlers(app, redis)
 
     app.extensions["heritrace"] = AppState(
@@ -115,6 +179,19 @@ def init_extensions(
         shacl_graph=shacl_graph,
         classes_with_multiple_shapes=classes_with_multiple_shapes,
         display_rules_use_inverse_relations=uses_inverse_relations(display_rules),
+        label_cache=label_cache,
+        class_counts=class_counts,
+        shape_index=ShapeIndex(redis, determine_shape_for_entity_triples),
+        deletion_index=DeletionIndex(redis),
+        shared_cache=SharedCache(redis, max_age=counts_max_age),
+        snapshot_cache=SnapshotCache(
+            redis,
+            checkpoint_interval=app.config.get(
+                "SNAPSHOT_CHECKPOINT_INTERVAL", DEFAULT_SNAPSHOT_CHECKPOINT_INTERVAL
+            ),
+            ttl=app.config.get("SNAPSHOT_CACHE_TTL", DEFAULT_SNAPSHOT_CACHE_TTL),
+        ),
+        shacl_mtime_ns=shacl_mtime_ns,
     )
     app.extensions["login_manager"] = login_manager
     app.extensions["redis_client"] = redis
@@ -297,6 +374,7 @@ def identify_classes_with_multiple_shapes(
         is_entity_type_visible,
     )
 
+    shacl_index = shacl_index_for(shacl_graph)
     class_to_shapes: defaultdict[str, set[str]] = defaultdict(set)
 
     for rule in display_rules:
@@ -304,28 +382,14 @@ def identify_classes_with_multiple_shapes(
 
         if "class" in target:
             class_uri = target["class"]
-            query_string = f"""
-                SELECT DISTINCT ?shape WHERE {{
-                    ?shape <http://www.w3.org/ns/shacl#targetClass> <{class_uri}> .
-                }}
-            """
-            results = shacl_graph.query(query_string)
-            for row in select_results(results):
-                shape_uri = str(row.shape)
+            for shape_uri in shacl_index.shapes_for_class(class_uri):
                 entity_key = (class_uri, shape_uri)
                 if is_entity_type_visible(entity_key):
                     class_to_shapes[class_uri].add(shape_uri)
 
         elif "shape" in target:
             shape_uri = target["shape"]
-            query_string = f"""
-                SELECT DISTINCT ?class WHERE {{
-                    <{shape_uri}> <http://www.w3.org/ns/shacl#targetClass> ?class .
-                }}
-            """
-            results = shacl_graph.query(query_string)
-            for row in select_results(results):
-                class_uri = str(row[0])
+            for class_uri in shacl_index.target_classes(shape_uri):
                 entity_key = (class_uri, shape_uri)
                 if is_entity_type_visible(entity_key):
                     class_to_shapes[class_uri].add(shape_uri)
@@ -337,7 +401,7 @@ def identify_classes_with_multiple_shapes(
 
 def initialize_global_variables(
     app: Flask,
-) -> tuple[list[dict], dict, bool, Graph, set[str]]:
+) -> tuple[list[dict], Mapping[tuple[str, str], dict], bool, Graph, set[str]]:
     try:
         dataset_is_quadstore = app.config.get("DATASET_IS_QUADSTORE", False)
 
@@ -353,13 +417,14 @@ def initialize_global_variables(
                     with app.config["DISPLAY_RULES_PATH"].open() as f:
                         yaml_content = yaml.safe_load(f)
                         display_rules = yaml_content["rules"]
+                    display_rule_index_for(display_rules)
                 except yaml.YAMLError as e:
                     app.logger.exception("Error loading display rules")
                     msg = f"Failed to load display rules: {e!s}"
                     raise RuntimeError(msg) from e
 
         shacl_graph = Graph()
-        form_fields_cache: dict = {}
+        form_fields_cache: Mapping[tuple[str, str], dict] = {}
         if app.config.get("SHACL_PATH"):
             if not app.config["SHACL_PATH"].exists():
                 app.logger.warning(
@@ -368,6 +433,8 @@ def initialize_global_variables(
             else:
                 try:
                     shacl_graph.parse(source=app.config["SHACL_PATH"], format="turtle")
+                    shacl_index_for(shacl_graph)
+                    literal_validators_for(shacl_graph)
 
                     from heritrace.utils.shacl_utils import (  # noqa: PLC0415
                         get_form_fields_from_shacl,
@@ -403,6 +470,68 @@ def initialize_global_variables(
         )
 
 
+def shacl_file_mtime_ns(app: Flask) -> int | None:
+    shacl_path = app.config.get("SHACL_PATH")
+    if not shacl_path:
+        return None
+    try:
+        return Path(shacl_path).stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+def reload_shacl_if_changed(app: Flask) -> bool:
+    """
+    Load the SHACL file again if it changed since it was last loaded.
+
+    The new graph, its constraint index, its literal validators, the form
+    fields and the classes with multiple shapes are all built before the
+    application state is replaced in a single assignment, so a request sees
+    either the old shapes or the new ones. The form fragments rendered from the
+    old shapes are dropped with them. A file that cannot be parsed is logged
+    and the old shapes are kept.
+
+    Returns:
+        Whether the shapes were reloaded
+    """
+    state: AppState = app.extensions["heritrace"]
+    mtime_ns = shacl_file_mtime_ns(app)
+    if mtime_ns is None or mtime_ns == state.shacl_mtime_ns:
+        return False
+
+    from heritrace.utils.shacl_utils import (  # noqa: PLC0415
+        get_form_fields_from_shacl,
+    )
+
+    shacl_path = app.config["SHACL_PATH"]
+    shacl_graph = Graph()
+    try:
+        shacl_graph.parse(source=shacl_path, format="turtle")
+        shacl_index_for(shacl_graph)
+        literal_validators_for(shacl_graph)
+        form_fields_cache = get_form_fields_from_shacl(
+            shacl_graph, state.display_rules, app=app
+        )
+        classes_with_multiple_shapes = identify_classes_with_multiple_shapes(
+            state.display_rules, shacl_graph
+        )
+    except (OSError, ValueError, SyntaxError):
+        app.logger.exception("Error reloading the SHACL file at %s", shacl_path)
+        app.extensions["heritrace"] = replace(state, shacl_mtime_ns=mtime_ns)
+        return False
+
+    app.extensions["heritrace"] = replace(
+        state,
+        shacl_graph=shacl_graph,
+        form_fields_cache=form_fields_cache,
+        form_fragments_cache=OrderedDict(),
+        classes_with_multiple_shapes=classes_with_multiple_shapes,
+        shacl_mtime_ns=mtime_ns,
+    )
+    app.logger.info("SHACL shapes reloaded from %s", shacl_path)
+    return True
+
+
 def init_sparql_services(
     app: Flask,
 ) -> tuple[str, str, SPARQLWrapperWithRetry, SPARQLWrapperWithRetry, dict]:
@@ -428,12 +557,17 @@ def init_sparql_services(
 
 
 def init_filters(
-    app: Flask, display_rules: list[dict], dataset_endpoint: str
+    app: Flask,
+    display_rules: list[dict],
+    dataset_endpoint: str,
+    label_cache: LabelCache | None = None,
 ) -> Filter:
     with (Path(__file__).parent / "utils" / "context.json").open() as config_file:
         context = json.load(config_file)["@context"]
 
-    custom_filter = Filter(context, display_rules or None, dataset_endpoint)
+    custom_filter = Filter(
+        context, display_rules or None, dataset_endpoint, label_cache
+    )
 
     app.jinja_env.filters["human_readable_predicate"] = (
         custom_filter.human_readable_predicate
@@ -455,11 +589,31 @@ def init_filters(
 
 
 def init_request_handlers(app: Flask, redis: Redis) -> None:
+    reload_interval = app.config.get("SHACL_RELOAD_INTERVAL", 0)
+    shacl_reload_lock = threading.Lock()
+    shacl_checked_at = time.monotonic()
+
     @app.before_request
     def initialize_lock_manager() -> None:
         if not hasattr(g, "resource_lock_manager"):
             g.resource_lock_manager = ResourceLockManager(redis)
 
+    @app.before_request
+    def reload_changed_shacl() -> None:
+        nonlocal shacl_checked_at
+        if reload_interval <= 0:
+            return
+        if time.monotonic() - shacl_checked_at < reload_interval:
+            return
+        # The other requests go on with the current shapes meanwhile.
+        if not shacl_reload_lock.acquire(blocking=False):
+            return
+        try:
+            shacl_checked_at = time.monotonic()
+            reload_shacl_if_changed(app)
+        finally:
+            shacl_reload_lock.release()
+
     @app.teardown_appcontext
     def close_redis_connection(_error: BaseException | None) -> None:
         if hasattr(g, "resource_lock_manager"):
@@ -496,7 +650,7 @@ def get_dataset_endpoint() -> str:
 
 
 def get_sparql() -> SPARQLWrapperWithRetry:
-    return get_app_state().sparql
+    return resolve_thread_wrapper(get_app_state().sparql)
 
 
 def get_provenance_endpoint() -> str:
@@ -504,7 +658,7 @@ def get_provenance_endpoint() -> str:
 
 
 def get_provenance_sparql() -> SPARQLWrapperWithRetry:
-    return get_app_state().provenance_sparql
+    return resolve_thread_wrapper(get_app_state().provenance_sparql)
 
 
 def get_counter_handler() -> CounterHandler:
@@ -520,6 +674,52 @@ def get_custom_filter() -> Filter:
     return get_app_state().custom_filter
 
 
+def get_label_cache() -> LabelCache | None:
+    return get_app_state().label_cache
+
+
+def get_save_plugin() -> SavePlugin:
+    """
+    Return the plugin every editor runs on save.
+
+    It runs the plugin of the configuration, then keeps the caches and indexes
+    of the app current with the entities saved. Only the plugin of the
+    configuration can fail the save.
+    """
+    label_cache = get_label_cache()
+    shape_index = get_shape_index()
+    deletion_index = get_deletion_index()
+    return SavePlugins(
+        current_app.config.get("SAVE_PLUGIN"),
+        CacheUpdates(
+            LabelCacheInvalidation(label_cache) if label_cache is not None else None,
+            ClassCountsAdjustment(get_class_counts()),
+            ShapeIndexUpdate(shape_index) if shape_index is not None else None,
+            DeletionIndexUpdate(deletion_index) if deletion_index is not None else None,
+        ),
+    )
+
+
+def get_class_counts() -> ClassCounts:
+    return get_app_state().class_counts
+
+
+def get_shape_index() -> ShapeIndex | None:
+    return get_app_state().shape_index
+
+
+def get_deletion_index() -> DeletionIndex | None:
+    return get_app_state().deletion_index
+
+
+def get_shared_cache() -> SharedCache | None:
+    return get_app_state().shared_cache
+
+
+def get_snapshot_cache() -> SnapshotCache | None:
+    return get_app_state().snapshot_cache
+
+
 def get_change_tracking_config() -> dict:
     return get_app_state().change_tracking_config
 
@@ -528,10 +728,14 @@ def get_display_rules() -> list[dict]:
     return get_app_state().display_rules
 
 
-def get_form_fields() -> dict:
+def get_form_fields() -> Mapping[tuple[str, str], dict]:
     return get_app_state().form_fields_cache
 
 
+def get_form_fragments() -> OrderedDict[tuple, str]:
+    return get_app_state().form_fragments_cache
+
+
 def get_dataset_is_quadstore() -> bool:
     return get_app_state().dataset_is_quadstore
 
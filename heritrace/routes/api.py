@@ -2,6 +2,8 @@
 #
 # SPDX-License-Identifier: ISC
 
+import re
+import threading
 import traceback
 from dataclasses import dataclass
 from typing import TypedDict, cast
@@ -15,9 +17,10 @@ from flask import (
     render_template_string,
     request,
 )
-from flask_babel import gettext
+from flask_babel import get_locale, gettext
 from flask_login import current_user, login_required
 from rdflib import RDF, XSD, Graph, Literal, URIRef
+from redis import RedisError
 
 from heritrace.apis.orcid import get_responsible_agent_uri
 from heritrace.editor import Editor, EndpointConfig
@@ -25,13 +28,26 @@ from heritrace.extensions import (
     get_custom_filter,
     get_dataset_endpoint,
     get_form_fields,
+    get_form_fragments,
+    get_label_cache,
     get_provenance_endpoint,
+    get_save_plugin,
+    get_shacl_graph,
 )
 from heritrace.services.resource_lock_manager import LockStatus
-from heritrace.utils.datatypes import DATATYPE_MAPPING
+from heritrace.utils.catalogue_cursor import InvalidCursorError
+from heritrace.utils.literal_validators import (
+    DATATYPE_VALIDATORS,
+    LiteralValidators,
+    literal_validators_for,
+)
 from heritrace.utils.primary_source_utils import save_user_default_primary_source
 from heritrace.utils.shacl_utils import determine_shape_for_classes
-from heritrace.utils.shacl_validation import validate_new_triple
+from heritrace.utils.shacl_validation import (
+    TripleChange,
+    TripleValidator,
+    validate_new_triple,
+)
 from heritrace.utils.sparql_utils import (
     CatalogQuery,
     DeletedEntitiesQuery,
@@ -55,14 +71,20 @@ class ChangeOperation:
     graph_uri: URIRef | None = None
     entity_type: str | None = None
     entity_shape: str | None = None
+    validator: TripleValidator | None = None
 
 
 api_bp = Blueprint("api", __name__)
 
+FORM_FRAGMENTS_MAX_ENTRIES = 512
+NESTED_FORM_MAX_DEPTH = 5
+
+_form_fragments_lock = threading.Lock()
+
 
 @api_bp.route("/catalogue")
 @login_required
-def catalogue_api() -> Response:
+def catalogue_api() -> Response | tuple[Response, int]:
     selected_class = request.args.get("class")
     selected_shape = request.args.get("shape")
     page = int(request.args.get("page", 1))
@@ -81,17 +103,21 @@ def catalogue_api() -> Response:
 
     available_classes = get_available_classes()
 
-    catalog_data = get_catalog_data(
-        CatalogQuery(
-            selected_class=selected_class,
-            page=page,
-            per_page=per_page,
-            sort_property=sort_property,
-            sort_direction=sort_direction,
-            selected_shape=selected_shape,
-        ),
-        available_classes,
-    )
+    try:
+        catalog_data = get_catalog_data(
+            CatalogQuery(
+                selected_class=selected_class,
+                page=page,
+                per_page=per_page,
+                sort_property=sort_property,
+                sort_direction=sort_direction,
+                selected_shape=selected_shape,
+                cursor=request.args.get("cursor") or None,
+            ),
+            available_classes,
+        )
+    except InvalidCursorError as e:
+        return jsonify({"error": str(e)}), 400
 
     catalog_data["available_classes"] = available_classes
     return jsonify(catalog_data)
@@ -355,10 +381,9 @@ def validate_literal() -> tuple[Response, int]:
     if not value:
         return jsonify({"error": gettext("Value is required.")}), 400
 
-    matching_datatypes = []
-    for datatype, validation_func, _ in DATATYPE_MAPPING:
-        if validation_func(value):
-            matching_datatypes.append(str(datatype))
+    matching_datatypes = literal_validators_for(get_shacl_graph()).matching_datatypes(
+        [value]
+    )[0]
 
     if not matching_datatypes:
         return jsonify({"error": gettext("No matching datatypes found.")}), 400
@@ -366,6 +391,101 @@ def validate_literal() -> tuple[Response, int]:
     return jsonify({"valid_datatypes": matching_datatypes}), 200
 
 
+def _is_literal_item(item: object) -> bool:
+    return (
+        isinstance(item, dict)
+        and isinstance(item.get("value"), str)
+        and isinstance(item.get("datatypes", []), list)
+        and all(
+            isinstance(item.get(key, ""), str)
+            for key in ("pattern", "shape", "property")
+        )
+    )
+
+
+def _item_patterns(validators: LiteralValidators, item: dict) -> tuple[str, ...]:
+    patterns = (item["pattern"],) if item.get("pattern") else ()
+    if item.get("shape") and item.get("property"):
+        patterns += validators.field_patterns(item["shape"], item["property"])
+    return patterns
+
+
+def _literal_results(
+    validators: LiteralValidators, items: list[dict]
+) -> list[dict[str, object]]:
+    values = [item["value"] for item in items]
+    matching_datatypes = validators.matching_datatypes(values)
+    item_patterns = [_item_patterns(validators, item) for item in items]
+
+    pattern_values: dict[str, list[str]] = {}
+    for item, patterns in zip(items, item_patterns, strict=True):
+        for pattern in patterns:
+            pattern_values.setdefault(pattern, []).append(item["value"])
+    pattern_matches: dict[str, dict[str, bool]] = {}
+    for pattern, matched_values in pattern_values.items():
+        distinct_values = list(dict.fromkeys(matched_values))
+        pattern_matches[pattern] = dict(
+            zip(
+                distinct_values,
+                validators.match(pattern, distinct_values),
+                strict=True,
+            )
+        )
+
+    results: list[dict[str, object]] = []
+    for item, datatypes, patterns in zip(
+        items, matching_datatypes, item_patterns, strict=True
+    ):
+        requested = item.get("datatypes")
+        valid_datatypes = (
+            [datatype for datatype in datatypes if datatype in requested]
+            if requested
+            else datatypes
+        )
+        results.append(
+            {
+                "valid_datatypes": valid_datatypes,
+                "valid": bool(valid_datatypes)
+                and all(
+                    pattern_matches[pattern][item["value"]] for pattern in patterns
+                ),
+            }
+        )
+    return results
+
+
+@api_bp.route("/validate-literals", methods=["POST"])
+@login_required
+def validate_literals() -> tuple[Response, int]:
+    """Validate many literal values in one request.
+
+    Request body:
+    {
+        "values": (list) Items with the "value" to check and, optionally, the
+        "datatypes" it may have, a "pattern" it must match and the "shape" and
+        "property" of its field, whose sh:pattern values it must match
+    }
+
+    Only the sh:pattern values of the shapes are accepted as patterns.
+
+    Responses:
+    200 OK: A result for every item, in order, with the datatypes that accept
+    the value and whether the value is valid
+    400 Bad Request: Missing values, or a pattern that is not a valid
+    sh:pattern of the shapes
+    """
+    payload = request.get_json(silent=True)
+    items = payload.get("values") if isinstance(payload, dict) else None
+    if not isinstance(items, list) or not all(map(_is_literal_item, items)):
+        return jsonify({"error": gettext("A list of values is required.")}), 400
+
+    try:
+        results = _literal_results(literal_validators_for(get_shacl_graph()), items)
+    except (KeyError, re.error):
+        return jsonify({"error": gettext("Invalid pattern.")}), 400
+    return jsonify({"results": results}), 200
+
+
 def _collect_affected_entities(
     changes: list[dict],
     entity_type: str,
@@ -605,7 +725,7 @@ def _setup_editor(
         resp_agent,
         URIRef(current_app.config["PRIMARY_SOURCE"]),
         current_app.config["DATASET_GENERATION_TIME"],
-        save_plugin=current_app.config.get("SAVE_PLUGIN"),
+        save_plugin=get_save_plugin(),
     )
 
     deletion_subjects = _collect_entity_deletion_subjects(
@@ -622,11 +742,13 @@ def _setup_editor(
             editor, deletion_subject, include_referencing_entities=True
         )
 
-    for change in changes:
-        if change["action"] == "create":
-            data = change.get("data")
-            if data:
-                import_referenced_entities(editor, data)
+    creation_data = [
+        change["data"]
+        for change in changes
+        if change["action"] == "create" and change.get("data")
+    ]
+    if creation_data:
+        import_referenced_entities(editor, creation_data)
 
     editor.preexisting_finished()
     editor.set_primary_source(URIRef(primary_source) if primary_source else None)
@@ -645,6 +767,7 @@ def _process_creates(
     changes: list[dict],
     graph_uri: URIRef | None,
     subject: URIRef,
+    validator: TripleValidator | None = None,
 ) -> tuple[dict[str, str], URIRef]:
     temp_id_to_uri: dict[str, str] = {}
     for change in changes:
@@ -662,6 +785,7 @@ def _process_creates(
                     graph_uri,
                     temp_id_to_uri=temp_id_to_uri,
                     parent_entity_type=None,
+                    validator=validator,
                 )
                 if change_subject is not None:
                     subject = created_subject
@@ -729,16 +853,58 @@ def _handle_affected_entities(
             deleted_entities.add(proxy_uri)
 
 
-def _process_remaining_changes(
+def _planned_triple_changes(
+    changes: list[dict],
+    deleted_entities: set[URIRef],
+) -> list[TripleChange]:
+    """Return the triples that the updates and deletions will validate."""
+    deleted = set(deleted_entities)
+    triple_changes: list[TripleChange] = []
+    for change in changes:
+        subject = URIRef(change["subject"])
+        if change["action"] == "update":
+            triple_changes.append(
+                _update_triple_change(
+                    subject,
+                    URIRef(change["predicate"]),
+                    change["object"],
+                    change["newObject"],
+                    change.get("entity_type"),
+                )
+            )
+        elif change["action"] == "delete" and not change.get("predicate"):
+            deleted.add(subject)
+        elif change["action"] == "delete" and change.get("object") is not None:
+            object_value = str(change["object"])
+            if object_value and not (
+                is_valid_url(object_value) and URIRef(object_value) in deleted
+            ):
+                triple_changes.append(
+                    _delete_triple_change(
+                        subject,
+                        URIRef(change["predicate"]),
+                        object_value,
+                        change.get("entity_type"),
+                    )
+                )
+    return triple_changes
+
+
+def _process_remaining_changes(  # noqa: PLR0913
     editor: Editor,
     changes: list[dict],
     graph_uri: URIRef | None,
     deleted_entities: set[URIRef],
     temp_id_to_uri: dict[str, str],
+    validator: TripleValidator | None = None,
 ) -> None:
+    if validator is not None:
+        validator.plan(_planned_triple_changes(changes, deleted_entities))
     for change in changes:
         if change["action"] == "delete":
-            _process_delete_change(editor, change, graph_uri, deleted_entities)
+            _process_delete_change(
+                editor, change, graph_uri, deleted_entities, validator
+            )
         elif change["action"] == "update":
             op = ChangeOperation(
                 editor=editor,
@@ -746,6 +912,7 @@ def _process_remaining_changes(
                 graph_uri=graph_uri,
                 entity_type=change.get("entity_type"),
                 entity_shape=change.get("entity_shape"),
+                validator=validator,
             )
             update_logic(
                 op,
@@ -773,6 +940,7 @@ def _process_delete_change(
     change: dict,
     graph_uri: URIRef | None,
     deleted_entities: set[URIRef],
+    validator: TripleValidator | None = None,
 ) -> None:
     change_subject = URIRef(change["subject"])
     change_predicate = URIRef(change["predicate"]) if change.get("predicate") else None
@@ -785,6 +953,7 @@ def _process_delete_change(
         graph_uri=graph_uri,
         entity_type=change.get("entity_type"),
         entity_shape=change.get("entity_shape"),
+        validator=validator,
     )
 
     if not change_predicate:
@@ -879,7 +1048,10 @@ def apply_changes() -> tuple[Response, int]:
             delete_affected=delete_affected,
         )
 
-        temp_id_to_uri, subject = _process_creates(editor, changes, graph_uri, subject)
+        validator = TripleValidator()
+        temp_id_to_uri, subject = _process_creates(
+            editor, changes, graph_uri, subject, validator
+        )
 
         deleted_entities: set[URIRef] = set()
         _handle_affected_entities(
@@ -890,7 +1062,7 @@ def apply_changes() -> tuple[Response, int]:
             deleted_entities=deleted_entities,
         )
         _process_remaining_changes(
-            editor, changes, graph_uri, deleted_entities, temp_id_to_uri
+            editor, changes, graph_uri, deleted_entities, temp_id_to_uri, validator
         )
 
         return _save_and_respond(editor)
@@ -931,9 +1103,7 @@ def get_graph_uri_from_context(graph_context: Graph | URIRef) -> URIRef:
 
 def determine_datatype(value: str, datatype_uris: list[str]) -> URIRef:
     for datatype_uri in datatype_uris:
-        validation_func = next(
-            (d[1] for d in DATATYPE_MAPPING if str(d[0]) == str(datatype_uri)), None
-        )
+        validation_func = DATATYPE_VALIDATORS.get(str(datatype_uri))
         if validation_func and validation_func(value):
             return URIRef(datatype_uri)
     # If none match, default to XSD.string
@@ -954,6 +1124,59 @@ class _CreateContext:
     graph_uri: URIRef | None
     entity_type: str | None
     temp_id_to_uri: dict[str, str] | None
+    validator: TripleValidator | None = None
+
+
+def _rdf_value(value: str) -> URIRef | Literal:
+    return URIRef(value) if is_valid_url(value) else Literal(value)
+
+
+def _update_triple_change(
+    subject: URIRef,
+    predicate: URIRef,
+    old_value: str,
+    new_value: str,
+    entity_type: str | None,
+) -> TripleChange:
+    return TripleChange(
+        subject, predicate, new_value, "update", _rdf_value(old_value), entity_type
+    )
+
+
+def _delete_triple_change(
+    subject: URIRef,
+    predicate: URIRef,
+    object_value: str,
+    entity_type: str | None,
+) -> TripleChange:
+    return TripleChange(
+        subject, predicate, None, "delete", _rdf_value(object_value), entity_type
+    )
+
+
+def _validate_triple(
+    validator: TripleValidator | None,
+    change: TripleChange,
+) -> tuple[URIRef | Literal | None, URIRef | Literal | None, str]:
+    """
+    Validate a triple, with the validator of the request when there is one.
+
+    The validator checks the change together with the ones planned for the
+    request, so an invalid change reports the errors of all of them at once.
+    """
+    if validator is None:
+        return validate_new_triple(
+            change.subject,
+            change.predicate,
+            change.new_value,
+            change.action,
+            change.old_value,
+            entity_types=change.entity_types,
+        )
+    validation = validator.validate(change)
+    if validation.error:
+        return validation.new_value, validation.old_value, "<br>".join(validator.errors)
+    return validation.as_tuple()
 
 
 def _handle_property_value(
@@ -964,6 +1187,8 @@ def _handle_property_value(
 ) -> None:
     if isinstance(value, dict) and "entity_type" in value:
         nested_subject = generate_unique_uri(value["entity_type"])
+        if ctx.validator is not None:
+            ctx.validator.add_new_subject(nested_subject)
         create_logic(
             ctx.editor,
             cast("CreateEntityData", value),
@@ -973,6 +1198,7 @@ def _handle_property_value(
             predicate,
             ctx.temp_id_to_uri,
             parent_entity_type=ctx.entity_type,
+            validator=ctx.validator,
         )
     elif isinstance(value, dict) and value.get("is_existing_entity", False):
         entity_uri = value.get("entity_uri")
@@ -993,12 +1219,11 @@ def _handle_property_value(
 
         ctx.editor.create(subject, predicate, object_value, ctx.graph_uri)
     else:
-        object_value, _, error_message = validate_new_triple(
-            subject,
-            predicate,
-            str(value),
-            "create",
-            entity_types=ctx.entity_type,
+        object_value, _, error_message = _validate_triple(
+            ctx.validator,
+            TripleChange(
+                subject, predicate, str(value), "create", None, ctx.entity_type
+            ),
         )
         if error_message:
             raise ValueError(error_message)
@@ -1014,8 +1239,11 @@ def _setup_parent_relations(
     parent_predicate: URIRef | None,
     parent_entity_type: str | None,
 ) -> None:
-    type_value, _, error_message = validate_new_triple(
-        subject, RDF.type, ctx.entity_type, "create", entity_types=ctx.entity_type
+    type_value, _, error_message = _validate_triple(
+        ctx.validator,
+        TripleChange(
+            subject, RDF.type, ctx.entity_type, "create", None, ctx.entity_type
+        ),
     )
     if error_message:
         raise ValueError(error_message)
@@ -1024,12 +1252,16 @@ def _setup_parent_relations(
         ctx.editor.create(subject, RDF.type, type_value, ctx.graph_uri)
 
     if parent_predicate:
-        parent_value, _, error_message = validate_new_triple(
-            parent_subject,
-            parent_predicate,
-            subject,
-            "create",
-            entity_types=parent_entity_type,
+        parent_value, _, error_message = _validate_triple(
+            ctx.validator,
+            TripleChange(
+                parent_subject,
+                parent_predicate,
+                subject,
+                "create",
+                None,
+                parent_entity_type,
+            ),
         )
         if error_message:
             raise ValueError(error_message)
@@ -1049,6 +1281,7 @@ def create_logic(  # noqa: PLR0913
     parent_predicate: URIRef | None = None,
     temp_id_to_uri: dict[str, str] | None = None,
     parent_entity_type: str | None = None,
+    validator: TripleValidator | None = None,
 ) -> URIRef:
     entity_type: str | None = data.get("entity_type")
     properties: dict = data.get("properties", {})
@@ -1056,11 +1289,13 @@ def create_logic(  # noqa: PLR0913
 
     if subject is None:
         subject = generate_unique_uri(entity_type, cast("dict", data))
+        if validator is not None:
+            validator.add_new_subject(subject)
 
     if temp_id and temp_id_to_uri is not None:
         temp_id_to_uri[temp_id] = str(subject)
 
-    ctx = _CreateContext(editor, graph_uri, entity_type, temp_id_to_uri)
+    ctx = _CreateContext(editor, graph_uri, entity_type, temp_id_to_uri, validator)
 
     if parent_subject is not None:
         _setup_parent_relations(
@@ -1082,16 +1317,11 @@ def update_logic(
     old_value: str,
     new_value: str,
 ) -> None:
-    old_value_rdf: URIRef | Literal = (
-        URIRef(old_value) if is_valid_url(old_value) else Literal(old_value)
-    )
-    validated_new, validated_old, error_message = validate_new_triple(
-        op.subject,
-        predicate,
-        new_value,
-        "update",
-        old_value_rdf,
-        entity_types=op.entity_type,
+    validated_new, validated_old, error_message = _validate_triple(
+        op.validator,
+        _update_triple_change(
+            op.subject, predicate, old_value, new_value, op.entity_type
+        ),
     )
     if error_message:
         raise ValueError(error_message)
@@ -1135,18 +1365,9 @@ def delete_logic(
 ) -> None:
     resolved_value: URIRef | Literal | None = None
     if predicate and object_value:
-        old_val_rdf: URIRef | Literal = (
-            URIRef(object_value)
-            if is_valid_url(object_value)
-            else Literal(object_value)
-        )
-        _, resolved_value, error_message = validate_new_triple(
-            op.subject,
-            predicate,
-            None,
-            "delete",
-            old_val_rdf,
-            entity_types=op.entity_type,
+        _, resolved_value, error_message = _validate_triple(
+            op.validator,
+            _delete_triple_change(op.subject, predicate, object_value, op.entity_type),
         )
         if error_message:
             raise ValueError(error_message)
@@ -1247,6 +1468,22 @@ def get_human_readable_entity() -> str | tuple[Response, int]:
     return filter_instance.human_readable_entity(uri, (entity_class, shape))
 
 
+@api_bp.route("/label-cache-stats")
+@login_required
+def get_label_cache_stats() -> Response | tuple[Response, int]:
+    label_cache = get_label_cache()
+    if label_cache is None:
+        return jsonify({"status": "error", "message": "Label cache disabled"}), 404
+    try:
+        stats = label_cache.get_stats()
+    except RedisError:
+        current_app.logger.exception("Error reading label cache statistics")
+        return jsonify(
+            {"status": "error", "message": "Label cache statistics unavailable"}
+        ), 503
+    return jsonify(stats)
+
+
 @api_bp.route("/form-fields", methods=["GET"])
 @login_required
 def get_form_fields_for_entity() -> Response | tuple[Response, int]:
@@ -1325,6 +1562,29 @@ def get_form_fields_for_entity() -> Response | tuple[Response, int]:
         ), 500
 
 
+def _render_form_fragment(key: tuple, template_string: str, **context: object) -> str:
+    """
+    Render a form fragment, reusing the HTML already rendered for the same key.
+
+    The fragments only depend on the shapes, which are fixed until the SHACL file
+    is reloaded, and on the locale, which is therefore part of the key. Only the
+    FORM_FRAGMENTS_MAX_ENTRIES most recently used fragments are kept.
+    """
+    fragments = get_form_fragments()
+    fragment_key = (*key, str(get_locale()))
+    with _form_fragments_lock:
+        html = fragments.get(fragment_key)
+        if html is not None:
+            fragments.move_to_end(fragment_key)
+            return html
+    html = render_template_string(template_string, **context)
+    with _form_fragments_lock:
+        fragments[fragment_key] = html
+        while len(fragments) > FORM_FRAGMENTS_MAX_ENTRIES:
+            fragments.popitem(last=False)
+    return html
+
+
 @api_bp.route("/render-form-fields", methods=["POST"])
 @login_required
 def render_form_fields_html() -> str | tuple[Response, int]:
@@ -1393,7 +1653,8 @@ def render_form_fields_html() -> str | tuple[Response, int]:
         </div>
         """
 
-        return render_template_string(
+        return _render_form_fragment(
+            ("form-fields", entity_class, entity_shape),
             template_string,
             entity_class=entity_class,
             entity_shape=entity_shape,
@@ -1409,7 +1670,7 @@ def render_form_fields_html() -> str | tuple[Response, int]:
         ), 500
 
 
-def _validate_nested_form_request() -> (
+def _validate_nested_form_request() -> (  # noqa: PLR0911
     tuple[str, str, str, str, str, int, bool, dict] | tuple[Response, int]
 ):
     data = request.get_json()
@@ -1440,8 +1701,13 @@ def _validate_nested_form_request() -> (
     entity_class = data["entity_class"]
     entity_shape = data["entity_shape"]
     predicate_uri = data["predicate_uri"]
-    depth = int(data["depth"])
-    is_template = data.get("is_template", False)
+    try:
+        depth = int(data["depth"])
+    except (TypeError, ValueError):
+        return jsonify({"status": "error", "message": "Invalid depth"}), 400
+    # Fields nested deeper than NESTED_FORM_MAX_DEPTH all render the same way.
+    depth = min(max(depth, 0), NESTED_FORM_MAX_DEPTH + 1)
+    is_template = data.get("is_template") is True
 
     all_form_fields = get_form_fields()
 
@@ -1540,16 +1806,27 @@ def render_nested_form_html() -> str | tuple[Response, int]:
         template_string = """
         {% from 'macros.jinja' import render_form_field with context %}
         {{ render_form_field(parent_entity_class, predicate_uri, shape_info,
-        all_form_fields, depth, is_template=is_template) }}
+        all_form_fields, depth, max_depth, is_template=is_template) }}
         """
 
-        return render_template_string(
+        return _render_form_fragment(
+            (
+                "nested-form",
+                parent_entity_class,
+                parent_entity_shape,
+                entity_class,
+                entity_shape,
+                predicate_uri,
+                depth,
+                is_template,
+            ),
             template_string,
             parent_entity_class=parent_entity_class,
             predicate_uri=predicate_uri,
             shape_info=target_details,
             all_form_fields=all_form_fields,
             depth=depth,
+            max_depth=NESTED_FORM_MAX_DEPTH,
             is_template=is_template,
         )
 
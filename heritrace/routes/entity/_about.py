@@ -4,7 +4,7 @@
 
 from flask import abort, current_app, render_template
 from flask_login import current_user, login_required
-from rdflib import RDF, Graph, Literal, URIRef
+from rdflib import RDF, Literal, URIRef
 from time_agnostic_library.agnostic_entity import AgnosticEntity
 
 from heritrace.extensions import (
@@ -24,8 +24,9 @@ from heritrace.utils.display_rules_utils import (
 from heritrace.utils.primary_source_utils import get_user_default_primary_source
 from heritrace.utils.shacl_utils import determine_shape_for_entity_triples
 from heritrace.utils.shacl_validation import get_valid_predicates
+from heritrace.utils.snapshot_graph import SnapshotGraph
 from heritrace.utils.sparql_utils import (
-    convert_to_rdflib_graphs,
+    convert_to_snapshot_graphs,
     fetch_data_graph_for_subject,
     get_triples_from_graph,
 )
@@ -38,7 +39,7 @@ def get_deleted_entity_context_info(
     sorted_timestamps: list[str],
     history: dict,
     subject: URIRef,
-) -> tuple[Graph | None, str | None, str | None]:
+) -> tuple[SnapshotGraph | None, str | None, str | None]:
     if is_deleted and len(sorted_timestamps) > 1:
         context_snapshot = history[str(subject)][sorted_timestamps[-2]]
 
@@ -154,7 +155,9 @@ def about(subject: str) -> str:
         include_reverse_relations=False,
     )
     history, provenance = agnostic_entity.get_history(include_prov_metadata=True)
-    history = convert_to_rdflib_graphs(history, is_quadstore=get_dataset_is_quadstore())
+    history = convert_to_snapshot_graphs(
+        history, is_quadstore=get_dataset_is_quadstore()
+    )
 
     is_deleted = False
     context_snapshot = None
@@ -17,14 +17,16 @@ from heritrace.extensions import (
     get_dataset_endpoint,
     get_form_fields,
     get_provenance_endpoint,
+    get_save_plugin,
 )
 from heritrace.routes.entity._blueprint import entity_bp
 from heritrace.routes.entity._validation import validate_entity_data
-from heritrace.utils.datatypes import DATATYPE_MAPPING, get_datatype_options
+from heritrace.utils.datatypes import get_datatype_options
 from heritrace.utils.display_rules_utils import (
     get_class_priority,
     is_entity_type_visible,
 )
+from heritrace.utils.literal_validators import DATATYPE_VALIDATORS
 from heritrace.utils.primary_source_utils import (
     get_user_default_primary_source,
     save_user_default_primary_source,
@@ -217,7 +219,7 @@ def _handle_create_entity_post(
         resp_agent,
         URIRef(current_app.config["PRIMARY_SOURCE"]),
         current_app.config["DATASET_GENERATION_TIME"],
-        save_plugin=current_app.config.get("SAVE_PLUGIN"),
+        save_plugin=get_save_plugin(),
     )
     entity_uri = generate_unique_uri(entity_type)
     default_graph_uri = (
@@ -502,9 +504,7 @@ def process_unordered_properties(
 
 def determine_datatype(value: str, datatype_uris: list[str]) -> URIRef:
     for datatype_uri in datatype_uris:
-        validation_func = next(
-            (d[1] for d in DATATYPE_MAPPING if str(d[0]) == str(datatype_uri)), None
-        )
+        validation_func = DATATYPE_VALIDATORS.get(str(datatype_uri))
         if validation_func and validation_func(value):
             return URIRef(datatype_uri)
     return XSD.string
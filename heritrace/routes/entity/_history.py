@@ -5,10 +5,11 @@
 import re
 from datetime import datetime
 
-from flask import abort, render_template
+from flask import Response, abort, jsonify, render_template, request, url_for
 from flask_babel import gettext
 from flask_login import login_required
-from rdflib import RDF, Graph, Literal, URIRef
+from rdflib import RDF, XSD, BNode, Literal, URIRef
+from rdflib.term import Node
 from SPARQLWrapper import JSON
 from time_agnostic_library.agnostic_entity import AgnosticEntity
 
@@ -18,10 +19,12 @@ from heritrace.extensions import (
     get_dataset_is_quadstore,
     get_display_rules_use_inverse_relations,
     get_provenance_sparql,
+    get_snapshot_cache,
 )
 from heritrace.routes.entity._blueprint import entity_bp
 from heritrace.routes.entity._rendering import generate_modification_text
 from heritrace.routes.entity._types import _DATETIME_MIN_UTC, HistoryContext
+from heritrace.services.snapshot_cache import SnapshotCache
 from heritrace.sparql import get_sparql_bindings
 from heritrace.utils.converters import convert_to_datetime
 from heritrace.utils.display_rules_utils import (
@@ -30,208 +33,565 @@ from heritrace.utils.display_rules_utils import (
 )
 from heritrace.utils.shacl_utils import determine_shape_for_entity_triples
 from heritrace.utils.shacl_validation import get_valid_predicates
+from heritrace.utils.snapshot_graph import N3TermDecoder, SnapshotGraph
 from heritrace.utils.sparql_utils import (
-    convert_to_rdflib_graphs,
+    OCO_HAS_UPDATE_QUERY,
+    PROV,
     determine_shape_for_classes,
     get_triples_from_graph,
-    parse_sparql_update,
 )
+from heritrace.utils.update_queries import parse_sparql_update
 from heritrace.utils.uri_utils import is_valid_url
 
+HISTORY_PAGE_SIZE = 10
 
-@entity_bp.route("/entity-history/<path:entity_uri>")
-@login_required
-def entity_history(entity_uri: str) -> str:
-    entity_uri_ref = URIRef(entity_uri)
-    custom_filter = get_custom_filter()
-    change_tracking_config = get_change_tracking_config()
 
+def _fetch_snapshot_metadata(entity_uri: str) -> list[tuple[str, dict]]:
+    """
+    Read the provenance metadata of every snapshot of an entity, oldest first.
+
+    Update queries are left out: they are only read for the events displayed.
+    The agent and the description are optional, and None when missing.
+    """
+    provenance_sparql = get_provenance_sparql()
+    provenance_sparql.setQuery(f"""
+        SELECT ?snapshot ?time ?agent ?source ?description ?invalidated ?derived
+        WHERE {{
+            ?snapshot <{PROV}specializationOf> <{entity_uri}>;
+                <{PROV}generatedAtTime> ?time.
+            OPTIONAL {{ ?snapshot <{PROV}wasAttributedTo> ?agent. }}
+            OPTIONAL {{
+                ?snapshot <http://purl.org/dc/terms/description> ?description.
+            }}
+            OPTIONAL {{ ?snapshot <{PROV}hadPrimarySource> ?source. }}
+            OPTIONAL {{ ?snapshot <{PROV}invalidatedAtTime> ?invalidated. }}
+            OPTIONAL {{ ?snapshot <{PROV}wasDerivedFrom> ?derived. }}
+        }}
+    """)
+    provenance_sparql.setReturnFormat(JSON)
+    bindings = get_sparql_bindings(provenance_sparql.query().convert())
+
+    metadata_by_snapshot: dict[str, dict] = {}
+    for binding in bindings:
+        generated_at = convert_to_datetime(binding["time"]["value"])
+        if generated_at is None:
+            continue
+        metadata = metadata_by_snapshot.setdefault(
+            binding["snapshot"]["value"],
+            {
+                "generatedAtTime": generated_at.isoformat(),
+                "invalidatedAtTime": binding.get("invalidated", {}).get("value"),
+                "wasAttributedTo": binding.get("agent", {}).get("value"),
+                "hadPrimarySource": binding.get("source", {}).get("value"),
+                "description": binding.get("description", {}).get("value"),
+                "hasUpdateQuery": None,
+                "wasDerivedFrom": [],
+            },
+        )
+        derived_from = binding.get("derived", {}).get("value")
+        if derived_from and derived_from not in metadata["wasDerivedFrom"]:
+            metadata["wasDerivedFrom"].append(derived_from)
+
+    for metadata in metadata_by_snapshot.values():
+        metadata["wasDerivedFrom"].sort()
+    return sorted(
+        metadata_by_snapshot.items(),
+        key=lambda item: (
+            convert_to_datetime(item[1]["generatedAtTime"]) or _DATETIME_MIN_UTC
+        ),
+    )
+
+
+def _fetch_update_queries(snapshot_uris: list[str]) -> dict[str, str]:
+    """Read the update queries of some snapshots, keyed by snapshot URI."""
+    if not snapshot_uris:
+        return {}
+    values = " ".join(f"<{snapshot_uri}>" for snapshot_uri in snapshot_uris)
+    provenance_sparql = get_provenance_sparql()
+    provenance_sparql.setQuery(f"""
+        SELECT ?snapshot ?query
+        WHERE {{
+            VALUES ?snapshot {{ {values} }}
+            ?snapshot <{OCO_HAS_UPDATE_QUERY}> ?query.
+        }}
+    """)
+    provenance_sparql.setReturnFormat(JSON)
+    return {
+        binding["snapshot"]["value"]: binding["query"]["value"]
+        for binding in get_sparql_bindings(provenance_sparql.query().convert())
+    }
+
+
+def _entities_changed_between(entity_uris: set[str], start: str, end: str) -> bool:
+    """Tell whether any of some entities has a snapshot in (start, end]."""
+    if not entity_uris:
+        return False
+    values = " ".join(f"<{entity_uri}>" for entity_uri in sorted(entity_uris))
+    provenance_sparql = get_provenance_sparql()
+    provenance_sparql.setQuery(f"""
+        SELECT ?snapshot
+        WHERE {{
+            VALUES ?entity {{ {values} }}
+            ?snapshot <{PROV}specializationOf> ?entity;
+                <{PROV}generatedAtTime> ?time.
+            FILTER(?time > "{start}"^^<{XSD.dateTime}>
+                && ?time <= "{end}"^^<{XSD.dateTime}>)
+        }}
+        LIMIT 1
+    """)
+    provenance_sparql.setReturnFormat(JSON)
+    return bool(get_sparql_bindings(provenance_sparql.query().convert()))
+
+
+def _links(graph: SnapshotGraph) -> set[tuple[Node, Node, Node]]:
+    return {
+        triple
+        for triple in graph.triples((None, None, None))
+        if triple[1] != RDF.type and isinstance(triple[2], URIRef | BNode)
+    }
+
+
+def _apply_update(graph: SnapshotGraph, update_query: str | None) -> SnapshotGraph:
+    """Return a copy of a state with the changes of an update query applied."""
+    if not update_query:
+        return graph
+    modifications = parse_sparql_update(update_query)
+    return graph.updated(
+        modifications.get("Deletions", []), modifications.get("Additions", [])
+    )
+
+
+def _replay_from_checkpoint(  # noqa: PLR0913
+    entity_uri: str,
+    sorted_metadata: list[tuple[str, dict]],
+    first: int,
+    last: int,
+    snapshot_cache: SnapshotCache,
+    decoder: N3TermDecoder,
+) -> tuple[dict[int, SnapshotGraph], dict[str, str]] | None:
+    """
+    Rebuild states from the checkpoint preceding them and the update queries of
+    the entity recorded since.
+
+    The update queries only record the changes of the entity itself, so the
+    states are only rebuilt if the entities they include stay the same: no
+    link to another entity changes, nor any entity already included, no entity
+    is merged into this one and reverse relations are not displayed.
+
+    Returns:
+        The graph of every snapshot by index and the update queries read, or
+        None if the states have to be reconstructed from the current state
+    """
+    base = snapshot_cache.checkpoint_before(first)
+    base_uri = sorted_metadata[base][0]
+    base_state = snapshot_cache.get_many(entity_uri, [base_uri]).get(base_uri)
+    if base_state is None:
+        return None
+    replayed = sorted_metadata[base + 1 : last + 1]
+    if replayed and (
+        get_display_rules_use_inverse_relations()
+        or any(len(metadata["wasDerivedFrom"]) > 1 for _, metadata in replayed)
+    ):
+        return None
+
+    graph = SnapshotGraph.from_n3(
+        base_state, decoder, is_quadstore=get_dataset_is_quadstore()
+    )
+    links = _links(graph)
+    if replayed:
+        included = {
+            str(node)
+            for triple in links
+            for node in (triple[0], triple[2])
+            if isinstance(node, URIRef)
+        } | {
+            str(triple[0])
+            for triple in graph.triples((None, None, None))
+            if isinstance(triple[0], URIRef)
+        }
+        included.discard(entity_uri)
+        if _entities_changed_between(
+            included,
+            sorted_metadata[base][1]["generatedAtTime"],
+            sorted_metadata[last][1]["generatedAtTime"],
+        ):
+            return None
+
+    update_queries = _fetch_update_queries(
+        [
+            snapshot_uri
+            for snapshot_uri, _ in sorted_metadata[min(first, base + 1) : last + 1]
+        ]
+    )
+    graphs = {base: graph}
+    for index in range(base + 1, last + 1):
+        graph = _apply_update(graph, update_queries.get(sorted_metadata[index][0]))
+        if _links(graph) != links:
+            return None
+        graphs[index] = graph
+    return (
+        {index: graph for index, graph in graphs.items() if index >= first},
+        update_queries,
+    )
+
+
+def _reconstruct_from_current(  # noqa: PLR0913
+    entity_uri: str,
+    sorted_metadata: list[tuple[str, dict]],
+    first: int,
+    last: int,
+    snapshot_cache: SnapshotCache | None,
+    decoder: N3TermDecoder,
+) -> tuple[dict[int, SnapshotGraph], dict[str, str]]:
+    """
+    Reconstruct states backwards from the current state of the entity, through
+    time-agnostic-library, caching the checkpoints met on the way.
+
+    Returns:
+        The graph of every snapshot by index and the update queries read
+    """
+    start = first if snapshot_cache is None else snapshot_cache.checkpoint_before(first)
     agnostic_entity = AgnosticEntity(
         res=entity_uri,
-        config=change_tracking_config,
+        config=get_change_tracking_config(),
         include_related_objects=True,
         include_merged_entities=True,
         include_reverse_relations=get_display_rules_use_inverse_relations(),
     )
-    history, provenance = agnostic_entity.get_history(include_prov_metadata=True)
-    history = convert_to_rdflib_graphs(history, is_quadstore=get_dataset_is_quadstore())
-
-    sorted_metadata = sorted(
-        provenance[entity_uri].items(),
-        key=lambda x: convert_to_datetime(x[1]["generatedAtTime"]) or _DATETIME_MIN_UTC,
+    states, metadata, _ = agnostic_entity.get_state_at_time(
+        (
+            sorted_metadata[start][1]["generatedAtTime"],
+            sorted_metadata[last][1]["generatedAtTime"],
+        ),
+        include_prov_metadata=True,
     )
-    sorted_timestamps: list[str] = [
-        dt.isoformat()
-        for _, meta in sorted_metadata
-        if (dt := convert_to_datetime(meta["generatedAtTime"])) is not None
-    ]
 
-    latest_metadata = sorted_metadata[-1][1] if sorted_metadata else None
-    is_latest_deletion = (
-        latest_metadata
-        and "invalidatedAtTime" in latest_metadata
-        and latest_metadata["invalidatedAtTime"]
+    index_by_time = {
+        snapshot_metadata["generatedAtTime"]: index
+        for index, (_, snapshot_metadata) in enumerate(sorted_metadata)
+    }
+    n3_states = {}
+    for timestamp, state in states.get(entity_uri, {}).items():
+        generated_at = convert_to_datetime(timestamp)
+        if generated_at is not None and generated_at.isoformat() in index_by_time:
+            n3_states[index_by_time[generated_at.isoformat()]] = state
+    if snapshot_cache is not None:
+        snapshot_cache.store(
+            entity_uri,
+            {
+                sorted_metadata[index][0]: state
+                for index, state in n3_states.items()
+                if snapshot_cache.is_checkpoint(index)
+            },
+        )
+
+    is_quadstore = get_dataset_is_quadstore()
+    graphs = {
+        index: SnapshotGraph.from_n3(state, decoder, is_quadstore=is_quadstore)
+        for index, state in n3_states.items()
+        if index >= first
+    }
+    update_queries = {
+        snapshot_uri: snapshot_metadata["hasUpdateQuery"]
+        for snapshot_uri, snapshot_metadata in metadata.get(entity_uri, {}).items()
+        if snapshot_metadata.get("hasUpdateQuery")
+    }
+    return graphs, update_queries
+
+
+def _reconstruct_snapshots(
+    entity_uri: str,
+    sorted_metadata: list[tuple[str, dict]],
+    first: int,
+    last: int,
+    decoder: N3TermDecoder | None = None,
+) -> tuple[dict[str, SnapshotGraph], dict[str, str]]:
+    """
+    Reconstruct the states of an entity, with its related entities, at the
+    snapshots between two indexes of its history.
+
+    The states are rebuilt from the nearest cached checkpoint preceding them
+    whenever replaying the changes recorded since gives the same result as
+    reconstructing them from the current state. The snapshots reconstructed
+    for one request can share their terms by sharing a decoder.
+
+    Returns:
+        The graph of every snapshot keyed by its generation time, and the update
+        queries of the snapshots keyed by snapshot URI
+    """
+    decoder = decoder or N3TermDecoder()
+    snapshot_cache = get_snapshot_cache()
+    reconstructed = None
+    if snapshot_cache is not None:
+        reconstructed = _replay_from_checkpoint(
+            entity_uri, sorted_metadata, first, last, snapshot_cache, decoder
+        )
+    if reconstructed is None:
+        reconstructed = _reconstruct_from_current(
+            entity_uri, sorted_metadata, first, last, snapshot_cache, decoder
+        )
+    graphs, update_queries = reconstructed
+    return {
+        sorted_metadata[index][1]["generatedAtTime"]: graph
+        for index, graph in graphs.items()
+    }, update_queries
+
+
+def _history_window(
+    entity_uri: str,
+    sorted_metadata: list[tuple[str, dict]],
+    offset: int,
+    limit: int,
+) -> tuple[list[dict], HistoryContext, SnapshotGraph]:
+    """
+    Render the events of a window of the history of an entity.
+
+    Only the snapshots of the window are reconstructed, along with the one
+    preceding it, which describes what the first event deleted, and the one the
+    entity is labelled from.
+
+    Returns:
+        The identifier and text of every event of the window, the history
+        context and the snapshot the entity is labelled from
+    """
+    sorted_timestamps = [metadata["generatedAtTime"] for _, metadata in sorted_metadata]
+    latest_metadata = sorted_metadata[-1][1]
+    context_index = len(sorted_metadata) - 1
+    if latest_metadata.get("invalidatedAtTime") and len(sorted_metadata) > 1:
+        context_index -= 1
+
+    window_end = min(offset + limit, len(sorted_metadata))
+    decoder = N3TermDecoder()
+    snapshots, update_queries = _reconstruct_snapshots(
+        entity_uri,
+        sorted_metadata,
+        max(offset - 1, 0),
+        max(window_end - 1, 0),
+        decoder,
     )
-    if is_latest_deletion and len(sorted_timestamps) > 1:
-        context_snapshot = history[entity_uri][sorted_timestamps[-2]]
-    else:
-        context_snapshot = history[entity_uri][sorted_timestamps[-1]]
+    context_timestamp = sorted_timestamps[context_index]
+    if context_timestamp not in snapshots:
+        context_snapshots, _ = _reconstruct_snapshots(
+            entity_uri, sorted_metadata, context_index, context_index, decoder
+        )
+        snapshots.update(context_snapshots)
+    context_snapshot = snapshots[context_timestamp]
 
+    entity_uri_ref = URIRef(entity_uri)
     entity_classes = [
         str(triple[2])
         for triple in get_triples_from_graph(
             context_snapshot, (entity_uri_ref, RDF.type, None)
         )
     ]
-    highest_priority_class = get_highest_priority_class(entity_classes)
-
-    snapshot_entity_shape = determine_shape_for_entity_triples(
-        list(get_triples_from_graph(context_snapshot, (entity_uri_ref, None, None)))
+    history_ctx = HistoryContext(
+        entity_uri=entity_uri,
+        highest_priority_class=get_highest_priority_class(entity_classes),
+        entity_shape=determine_shape_for_entity_triples(
+            list(get_triples_from_graph(context_snapshot, (entity_uri_ref, None, None)))
+        ),
+        history={entity_uri: snapshots},
+        sorted_timestamps=sorted_timestamps,
+        custom_filter=get_custom_filter(),
     )
 
     events = []
-    for i, (_snapshot_uri, metadata) in enumerate(sorted_metadata):
-        date = convert_to_datetime(metadata["generatedAtTime"])
-        if date is None:
-            msg = "date must not be None"
-            raise AssertionError(msg)
-        snapshot_graph = history[entity_uri][date.isoformat()]
-
-        responsible_agent = custom_filter.format_agent_reference(
-            metadata["wasAttributedTo"]
-        )
-        primary_source = custom_filter.format_source_reference(
-            metadata["hadPrimarySource"]
+    for i in range(offset, window_end):
+        snapshot_uri, metadata = sorted_metadata[i]
+        update_query = update_queries.get(snapshot_uri)
+        events.append(
+            {
+                "unique_id": f"snapshot-{i}",
+                "text": _format_event_text(
+                    {**metadata, "hasUpdateQuery": update_query},
+                    history_ctx,
+                    context_snapshot,
+                    i,
+                    can_restore=i + 1 < len(sorted_metadata),
+                ),
+            }
         )
+    return events, history_ctx, context_snapshot
 
-        history_ctx = HistoryContext(
-            entity_uri=entity_uri,
-            highest_priority_class=highest_priority_class,
-            entity_shape=snapshot_entity_shape,
-            history=history,
-            sorted_timestamps=sorted_timestamps,
-            custom_filter=custom_filter,
-        )
 
-        description = _format_snapshot_description(
-            metadata,
-            history_ctx,
-            context_snapshot,
-            i,
+def _format_event_text(
+    metadata: dict,
+    ctx: HistoryContext,
+    context_snapshot: SnapshotGraph,
+    index: int,
+    *,
+    can_restore: bool,
+) -> str:
+    timestamp = metadata["generatedAtTime"]
+    responsible_agent = ctx.custom_filter.format_agent_reference(
+        metadata["wasAttributedTo"]
+    )
+    primary_source = ctx.custom_filter.format_source_reference(
+        metadata["hadPrimarySource"]
+    )
+    description = _format_snapshot_description(
+        metadata,
+        ctx,
+        context_snapshot,
+        index,
+    )
+    description_text = ""
+    if description:
+        description_text = (
+            f"<p><strong>{gettext('Description')}:</strong> {description}</p>"
+        )
+    modifications = metadata.get("hasUpdateQuery", "")
+    modification_text = ""
+    if modifications:
+        parsed_modifications = parse_sparql_update(modifications)
+        modification_text = generate_modification_text(
+            parsed_modifications,
+            ctx,
+            ctx.history[ctx.entity_uri][timestamp],
+            timestamp,
         )
-        modifications = metadata.get("hasUpdateQuery", "")
-        modification_text = ""
-        if modifications:
-            parsed_modifications = parse_sparql_update(modifications)
-            modification_text = generate_modification_text(
-                parsed_modifications,
-                history_ctx,
-                snapshot_graph,
-                date.isoformat(),
-            )
 
-        can_restore = len(sorted_metadata) > 1 and i + 1 < len(sorted_metadata)
-        restore_button = ""
-        if can_restore:
-            restore_label = gettext("Restore")
-            restore_action = (
-                f"/restore-version/{entity_uri}/{metadata['generatedAtTime']}"
-            )
-            restore_button = f"""
-                <form action='{restore_action}'
-                method='post'
-                class='d-inline restore-form'>
-                    <button type='submit'
-                    class='btn btn-success restore-btn'>
-                        <i class='bi
-                        bi-arrow-counterclockwise
-                        me-1'></i>{restore_label}
-                    </button>
-                </form>
-            """
+    restore_button = ""
+    if can_restore:
+        restore_label = gettext("Restore")
+        restore_action = f"/restore-version/{ctx.entity_uri}/{timestamp}"
+        restore_button = f"""
+            <form action='{restore_action}'
+            method='post'
+            class='d-inline restore-form'>
+                <button type='submit'
+                class='btn btn-success restore-btn'>
+                    <i class='bi
+                    bi-arrow-counterclockwise
+                    me-1'></i>{restore_label}
+                </button>
+            </form>
+        """
+
+    return (
+        f"<p><strong>"
+        f"{gettext('Responsible agent')}"
+        f":</strong>"
+        f" {responsible_agent}</p>"
+        f"<p><strong>"
+        f"{gettext('Primary source')}"
+        f":</strong>"
+        f" {primary_source}</p>"
+        f"{description_text}"
+        f'<div class="modifications mb-3">'
+        f"{modification_text}"
+        f"</div>"
+        f'<div class="d-flex gap-2 mt-2">'
+        f"<a href='/entity-version/"
+        f"{ctx.entity_uri}/"
+        f"{timestamp}'"
+        f" class='btn btn-outline-primary"
+        f" view-version'"
+        f" target='_self'>"
+        f"{gettext('View version')}</a>"
+        f"{restore_button}"
+        f"</div>"
+    )
+
 
+def _timeline_date(timestamp: str) -> dict[str, int]:
+    date = convert_to_datetime(timestamp)
+    if date is None:
+        msg = "date must not be None"
+        raise AssertionError(msg)
+    return {
+        "year": date.year,
+        "month": date.month,
+        "day": date.day,
+        "hour": date.hour,
+        "minute": date.minute,
+        "second": date.second,
+    }
+
+
+@entity_bp.route("/entity-history/<path:entity_uri>")
+@login_required
+def entity_history(entity_uri: str) -> str:
+    sorted_metadata = _fetch_snapshot_metadata(entity_uri)
+    if not sorted_metadata:
+        abort(404)
+
+    loaded_events, history_ctx, context_snapshot = _history_window(
+        entity_uri, sorted_metadata, 0, HISTORY_PAGE_SIZE
+    )
+    loading_text = f"<p class='text-muted'>{gettext('Loading...')}</p>"
+
+    events = []
+    for i, (_snapshot_uri, metadata) in enumerate(sorted_metadata):
         event = {
-            "start_date": {
-                "year": date.year,
-                "month": date.month,
-                "day": date.day,
-                "hour": date.hour,
-                "minute": date.minute,
-                "second": date.second,
-            },
+            "unique_id": f"snapshot-{i}",
+            "start_date": _timeline_date(metadata["generatedAtTime"]),
             "text": {
                 "headline": gettext("Snapshot") + " " + str(i + 1),
                 "text": (
-                    f"<p><strong>"
-                    f"{gettext('Responsible agent')}"
-                    f":</strong>"
-                    f" {responsible_agent}</p>"
-                    f"<p><strong>"
-                    f"{gettext('Primary source')}"
-                    f":</strong>"
-                    f" {primary_source}</p>"
-                    f"<p><strong>"
-                    f"{gettext('Description')}"
-                    f":</strong>"
-                    f" {description}</p>"
-                    f'<div class="modifications mb-3">'
-                    f"{modification_text}"
-                    f"</div>"
-                    f'<div class="d-flex gap-2 mt-2">'
-                    f"<a href='/entity-version/"
-                    f"{entity_uri}/"
-                    f"{metadata['generatedAtTime']}'"
-                    f" class='btn btn-outline-primary"
-                    f" view-version'"
-                    f" target='_self'>"
-                    f"{gettext('View version')}</a>"
-                    f"{restore_button}"
-                    f"</div>"
+                    loaded_events[i]["text"] if i < len(loaded_events) else loading_text
                 ),
             },
             "autolink": False,
         }
-
         if i + 1 < len(sorted_metadata):
-            next_date = convert_to_datetime(
+            event["end_date"] = _timeline_date(
                 sorted_metadata[i + 1][1]["generatedAtTime"]
             )
-            if next_date is None:
-                msg = "next_date must not be None"
-                raise AssertionError(msg)
-            event["end_date"] = {
-                "year": next_date.year,
-                "month": next_date.month,
-                "day": next_date.day,
-                "hour": next_date.hour,
-                "minute": next_date.minute,
-                "second": next_date.second,
-            }
-
         events.append(event)
 
-    entity_label = custom_filter.human_readable_entity(
-        entity_uri, (highest_priority_class, snapshot_entity_shape), context_snapshot
+    entity_label = history_ctx.custom_filter.human_readable_entity(
+        entity_uri,
+        (history_ctx.highest_priority_class, history_ctx.entity_shape),
+        context_snapshot,
     )
+    entity_classes = [
+        str(triple[2])
+        for triple in get_triples_from_graph(
+            context_snapshot, (URIRef(entity_uri), RDF.type, None)
+        )
+    ]
 
     timeline_data = {
         "entityUri": entity_uri,
         "entityLabel": entity_label,
-        "entityClasses": list(entity_classes),
-        "entityShape": snapshot_entity_shape,
+        "entityClasses": entity_classes,
+        "entityShape": history_ctx.entity_shape,
         "events": events,
+        "loadedEvents": len(loaded_events),
+        "pageSize": HISTORY_PAGE_SIZE,
+        "eventsUrl": url_for("entity.entity_history_events", entity_uri=entity_uri),
     }
 
     return render_template("entity/history.jinja", timeline_data=timeline_data)
 
 
+@entity_bp.route("/entity-history-events/<path:entity_uri>")
+@login_required
+def entity_history_events(entity_uri: str) -> Response:
+    """Return the text of a window of the events of the history of an entity."""
+    offset = max(request.args.get("offset", 0, type=int), 0)
+    limit = min(
+        max(request.args.get("limit", HISTORY_PAGE_SIZE, type=int), 1),
+        HISTORY_PAGE_SIZE,
+    )
+    sorted_metadata = _fetch_snapshot_metadata(entity_uri)
+    if offset >= len(sorted_metadata):
+        return jsonify({"events": [], "total": len(sorted_metadata)})
+
+    events, _, _ = _history_window(entity_uri, sorted_metadata, offset, limit)
+    return jsonify({"events": events, "total": len(sorted_metadata)})
+
+
 def _format_snapshot_description(
     metadata: dict,
     ctx: HistoryContext,
-    context_snapshot: Graph,
+    context_snapshot: SnapshotGraph,
     current_index: int,
 ) -> str:
-    description = metadata.get("description", "")
+    description = metadata.get("description")
+    if not description:
+        return ""
     is_merge_snapshot = False
     was_derived_from = metadata.get("wasDerivedFrom")
     if isinstance(was_derived_from, list) and len(was_derived_from) > 1:
@@ -324,36 +684,6 @@ def _resolve_timestamp(entity_uri: str, timestamp: str) -> tuple[str, datetime]:
     return generation_time, datetime.fromisoformat(generation_time)
 
 
-def _find_closest_metadata(
-    entity_metadata: dict,
-    timestamp_dt: datetime,
-    latest_timestamp: str,
-) -> tuple[dict | None, dict | None]:
-    closest_metadata = None
-    min_time_diff = None
-    latest_metadata = None
-
-    for meta in entity_metadata.values():
-        meta_time = convert_to_datetime(meta["generatedAtTime"])
-        if meta_time is None:
-            msg = "meta_time must not be None"
-            raise AssertionError(msg)
-        time_diff = abs((meta_time - timestamp_dt).total_seconds())
-
-        if (
-            closest_metadata is None
-            or min_time_diff is None
-            or time_diff < min_time_diff
-        ):
-            closest_metadata = meta
-            min_time_diff = time_diff
-
-        if meta["generatedAtTime"] == latest_timestamp:
-            latest_metadata = meta
-
-    return closest_metadata, latest_metadata
-
-
 def _compute_version_navigation(
     snapshot_times: list[datetime],
     timestamp_dt: datetime,
@@ -377,7 +707,7 @@ def _compute_version_navigation(
 def _prepare_modifications(
     closest_metadata: dict,
     ctx: HistoryContext,
-    context_version: Graph,
+    context_version: SnapshotGraph,
     closest_timestamp: str,
     sorted_timestamps: list[str],
 ) -> tuple[str, dict]:
@@ -414,77 +744,55 @@ def _prepare_modifications(
 def entity_version(entity_uri: str, timestamp: str) -> str:
     entity_uri_ref = URIRef(entity_uri)
     custom_filter = get_custom_filter()
-    change_tracking_config = get_change_tracking_config()
 
     timestamp, timestamp_dt = _resolve_timestamp(entity_uri, timestamp)
 
-    agnostic_entity = AgnosticEntity(
-        res=entity_uri,
-        config=change_tracking_config,
-        include_related_objects=True,
-        include_merged_entities=True,
-        include_reverse_relations=get_display_rules_use_inverse_relations(),
-    )
-    history, provenance = agnostic_entity.get_history(include_prov_metadata=True)
-    history = convert_to_rdflib_graphs(history, is_quadstore=get_dataset_is_quadstore())
-    main_entity_history = history.get(entity_uri, {})
-    sorted_timestamps = sorted(
-        main_entity_history.keys(),
-        key=lambda t: convert_to_datetime(t) or _DATETIME_MIN_UTC,
-    )
-
-    if not sorted_timestamps:
+    sorted_metadata = _fetch_snapshot_metadata(entity_uri)
+    if not sorted_metadata:
         abort(404)
-
-    closest_timestamp = min(
-        sorted_timestamps,
-        key=lambda t: abs(
-            (convert_to_datetime(t) or _DATETIME_MIN_UTC).astimezone()
+    sorted_timestamps = [metadata["generatedAtTime"] for _, metadata in sorted_metadata]
+
+    closest_index = min(
+        range(len(sorted_timestamps)),
+        key=lambda i: abs(
+            (
+                convert_to_datetime(sorted_timestamps[i]) or _DATETIME_MIN_UTC
+            ).astimezone()
             - timestamp_dt.astimezone()
         ),
     )
+    closest_timestamp = sorted_timestamps[closest_index]
+    snapshots, update_queries = _reconstruct_snapshots(
+        entity_uri, sorted_metadata, max(closest_index - 1, 0), closest_index
+    )
 
-    version = main_entity_history[closest_timestamp]
+    version = snapshots[closest_timestamp]
     triples: list[tuple[URIRef, URIRef, URIRef | Literal]] = [
         (URIRef(str(s)), URIRef(str(p)), URIRef(str(o)) if isinstance(o, URIRef) else o)  # type: ignore[misc]
         for s, p, o in get_triples_from_graph(version, (entity_uri_ref, None, None))
     ]
 
-    entity_metadata = provenance.get(entity_uri, {})
-    latest_timestamp = max(sorted_timestamps)
-    closest_metadata, latest_metadata = _find_closest_metadata(
-        entity_metadata, timestamp_dt, latest_timestamp
-    )
-
-    if closest_metadata is None or latest_metadata is None:
-        abort(404)
+    closest_snapshot, closest_metadata = sorted_metadata[closest_index]
+    closest_metadata = {
+        **closest_metadata,
+        "hasUpdateQuery": update_queries.get(closest_snapshot),
+    }
 
     is_deletion_snapshot = (
-        closest_timestamp == latest_timestamp
-        and "invalidatedAtTime" in latest_metadata
-        and latest_metadata["invalidatedAtTime"]
+        closest_index == len(sorted_metadata) - 1
+        and bool(closest_metadata.get("invalidatedAtTime"))
     ) or len(triples) == 0
 
     context_version = version
-    if is_deletion_snapshot and len(sorted_timestamps) > 1:
-        current_index = sorted_timestamps.index(closest_timestamp)
-        if current_index > 0:
-            context_version = main_entity_history[sorted_timestamps[current_index - 1]]
-
-    if is_deletion_snapshot and len(sorted_timestamps) > 1:
-        subject_classes = [
-            str(o)
-            for _, _, o in get_triples_from_graph(
-                context_version, (entity_uri_ref, RDF.type, None)
-            )
-        ]
-    else:
-        subject_classes = [
-            str(o)
-            for _, _, o in get_triples_from_graph(
-                version, (entity_uri_ref, RDF.type, None)
-            )
-        ]
+    if is_deletion_snapshot and closest_index > 0:
+        context_version = snapshots[sorted_timestamps[closest_index - 1]]
+
+    subject_classes = [
+        str(o)
+        for _, _, o in get_triples_from_graph(
+            context_version, (entity_uri_ref, RDF.type, None)
+        )
+    ]
 
     highest_priority_class = get_highest_priority_class(subject_classes)
 
@@ -504,13 +812,10 @@ def entity_version(entity_uri: str, timestamp: str) -> str:
         entity_key=(highest_priority_class, entity_shape),
     )
 
-    snapshot_times: list[datetime] = [
-        dt
-        for meta in entity_metadata.values()
-        if (dt := convert_to_datetime(meta["generatedAtTime"])) is not None
-    ]
-    snapshot_times = sorted(set(snapshot_times))
-    version_number = snapshot_times.index(timestamp_dt) + 1
+    snapshot_times: list[datetime] = sorted(
+        {dt for dt in map(convert_to_datetime, sorted_timestamps) if dt is not None}
+    )
+    version_number = closest_index + 1
 
     prev_snapshot_timestamp, next_snapshot_timestamp = _compute_version_navigation(
         snapshot_times, timestamp_dt
@@ -520,7 +825,7 @@ def entity_version(entity_uri: str, timestamp: str) -> str:
         entity_uri=entity_uri,
         highest_priority_class=highest_priority_class,
         entity_shape=entity_shape,
-        history=history,
+        history={entity_uri: snapshots},
         sorted_timestamps=sorted_timestamps,
         custom_filter=custom_filter,
     )
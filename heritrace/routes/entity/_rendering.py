@@ -3,7 +3,7 @@
 # SPDX-License-Identifier: ISC
 
 from flask_babel import gettext
-from rdflib import RDF, Graph, Literal, URIRef
+from rdflib import RDF, Literal, URIRef
 from rdflib.term import Node
 
 from heritrace.routes.entity._types import (
@@ -21,12 +21,13 @@ from heritrace.utils.shacl_utils import (
     determine_shape_for_entity_triples,
     get_entity_position_in_sequence,
 )
+from heritrace.utils.snapshot_graph import SnapshotGraph
 from heritrace.utils.sparql_utils import get_triples_from_graph
 from heritrace.utils.uri_utils import is_valid_url
 
 
 def determine_object_class_and_shape(
-    object_value: str, relevant_snapshot: Graph | None
+    object_value: str, relevant_snapshot: SnapshotGraph | None
 ) -> tuple[str | None, str | None]:
     if not is_valid_url(str(object_value)) or not relevant_snapshot:
         return None, None
@@ -53,7 +54,7 @@ def determine_object_class_and_shape(
 
 def _build_modification_caches(
     triples: list[tuple[Node, Node, Node]],
-    relevant_snapshot: Graph | None,
+    relevant_snapshot: SnapshotGraph | None,
 ) -> tuple[dict[str, str | None], dict[str, str | None]]:
     object_shapes_cache: dict[str, str | None] = {}
     object_classes_cache: dict[str, str | None] = {}
@@ -192,7 +193,7 @@ def _render_remaining_groups(
 def generate_modification_text(
     modifications: dict[str, list[tuple[Node, Node, Node]]],
     ctx: HistoryContext,
-    current_snapshot: Graph,
+    current_snapshot: SnapshotGraph,
     current_snapshot_timestamp: str,
 ) -> str:
     modification_text = "<p><strong>" + gettext("Modifications") + "</strong></p>"
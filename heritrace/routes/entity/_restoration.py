@@ -24,6 +24,7 @@ from heritrace.extensions import (
     get_dataset_endpoint,
     get_dataset_is_quadstore,
     get_provenance_endpoint,
+    get_save_plugin,
 )
 from heritrace.routes.entity._blueprint import entity_bp
 from heritrace.routes.entity._types import _DATETIME_MIN_UTC, _QUAD_LENGTH
@@ -221,7 +222,7 @@ def restore_version(entity_uri: str, timestamp: str) -> Response:
         resp_agent,
         URIRef(source_uri) if source_uri else None,
         current_app.config["DATASET_GENERATION_TIME"],
-        save_plugin=current_app.config.get("SAVE_PLUGIN"),
+        save_plugin=get_save_plugin(),
     )
 
     if get_dataset_is_quadstore():
@@ -5,9 +5,8 @@
 from dataclasses import dataclass
 from datetime import datetime, timezone
 
-from rdflib import Graph
-
 from heritrace.utils.filters import Filter
+from heritrace.utils.snapshot_graph import SnapshotGraph
 
 _QUAD_LENGTH = 4
 _DATETIME_MIN_UTC = datetime.min.replace(tzinfo=timezone.utc)
@@ -18,7 +17,7 @@ class EntityRenderContext:
     entity_uri: str
     entity_shape: str | None
     highest_priority_class: str | None
-    relevant_snapshot: Graph | None
+    relevant_snapshot: SnapshotGraph | None
     predicate_ordering_cache: dict[str, str | None]
     entity_position_cache: dict[tuple[str, str], int | None]
     object_shapes_cache: dict[str, str | None]
@@ -31,7 +30,7 @@ class EntityIdentity:
     entity_uri: str
     highest_priority_class: str | None
     entity_shape: str | None
-    relevant_snapshot: Graph | None
+    relevant_snapshot: SnapshotGraph | None
 
 
 @dataclass(frozen=True, slots=True)
@@ -39,6 +38,6 @@ class HistoryContext:
     entity_uri: str
     highest_priority_class: str | None
     entity_shape: str | None
-    history: dict[str, dict[str, Graph]]
+    history: dict[str, dict[str, SnapshotGraph]]
     sorted_timestamps: list[str]
     custom_filter: Filter
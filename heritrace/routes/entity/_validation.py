@@ -2,17 +2,25 @@
 #
 # SPDX-License-Identifier: ISC
 
+from collections.abc import Callable
 from dataclasses import dataclass
 
 from flask_babel import gettext
 from rdflib import RDF, URIRef
 
 from heritrace.extensions import get_custom_filter, get_form_fields
-from heritrace.utils.datatypes import DATATYPE_MAPPING
 from heritrace.utils.filters import Filter
+from heritrace.utils.literal_validators import DATATYPE_VALIDATORS
 from heritrace.utils.shacl_utils import find_matching_form_field
 
 
+@dataclass(frozen=True, slots=True)
+class _ValueRules:
+    datatypes: list[str]
+    validators: list[Callable[[object], bool]]
+    optional_values: list
+
+
 @dataclass(frozen=True, slots=True)
 class PropertyValidationInput:
     matching_field_def: dict
@@ -20,6 +28,33 @@ class PropertyValidationInput:
     prop_uri: str
     entity_key: tuple
     custom_filter: Filter
+    value_rules: dict[tuple, _ValueRules]
+
+
+def _value_rules(prop_input: PropertyValidationInput) -> _ValueRules:
+    """
+    Return the datatype validators and allowed values of a property.
+
+    They are resolved once per entity type, property and field definition, and
+    shared by all the values of the payload, nested entities included.
+    """
+    field_def = prop_input.matching_field_def
+    key = (prop_input.entity_key, prop_input.prop_uri, id(field_def))
+    rules = prop_input.value_rules.get(key)
+    if rules is None:
+        datatypes = field_def.get("datatypes", [])
+        validators = [
+            DATATYPE_VALIDATORS[str(dtype)]
+            for dtype in datatypes
+            if str(dtype) in DATATYPE_VALIDATORS
+        ]
+        rules = _ValueRules(
+            datatypes=datatypes,
+            validators=validators,
+            optional_values=field_def.get("optionalValues", []),
+        )
+        prop_input.value_rules[key] = rules
+    return rules
 
 
 def _validate_property_cardinality(
@@ -73,22 +108,16 @@ def _validate_property_values(
     errors: list[str],
     prop_input: PropertyValidationInput,
 ) -> None:
+    rules = _value_rules(prop_input)
     for value in prop_input.normalized_prop_values:
         if isinstance(value, dict) and "entity_type" in value:
-            nested_errors = validate_entity_data(value)
-            errors.extend(nested_errors)
+            _validate_entity(value, errors, prop_input.value_rules)
         else:
-            datatypes = prop_input.matching_field_def.get("datatypes", [])
+            datatypes = rules.datatypes
             if datatypes:
-                is_valid_datatype = False
-                for dtype in datatypes:
-                    validation_func = next(
-                        (d[1] for d in DATATYPE_MAPPING if d[0] == URIRef(dtype)),
-                        None,
-                    )
-                    if validation_func and validation_func(value):
-                        is_valid_datatype = True
-                        break
+                is_valid_datatype = any(
+                    validation_func(value) for validation_func in rules.validators
+                )
                 if not is_valid_datatype:
                     expected_types = ", ".join(
                         [
@@ -111,7 +140,7 @@ def _validate_property_values(
                         )
                     )
 
-            optional_values = prop_input.matching_field_def.get("optionalValues", [])
+            optional_values = rules.optional_values
             if optional_values and value not in optional_values:
                 acceptable_values = ", ".join(
                     [
@@ -195,16 +224,25 @@ def _find_matching_field_definition(
 
 
 def validate_entity_data(structured_data: dict) -> list[str]:
+    errors: list[str] = []
+    _validate_entity(structured_data, errors, {})
+    return errors
+
+
+def _validate_entity(
+    structured_data: dict,
+    errors: list[str],
+    value_rules: dict[tuple, _ValueRules],
+) -> None:
     custom_filter = get_custom_filter()
     form_fields = get_form_fields()
 
-    errors = []
     entity_type = structured_data.get("entity_type")
     entity_shape = structured_data.get("entity_shape")
 
     if not entity_type:
         errors.append(gettext("Entity type is required"))
-        return errors
+        return
 
     entity_key = find_matching_form_field(entity_type, entity_shape, form_fields)
 
@@ -213,7 +251,7 @@ def validate_entity_data(structured_data: dict) -> list[str]:
             f"No form fields found for entity type: {entity_type}"
             + (f" and shape: {entity_shape}" if entity_shape else "")
         )
-        return errors
+        return
 
     entity_fields = form_fields[entity_key]
     properties = structured_data.get("properties", {})
@@ -251,6 +289,7 @@ def validate_entity_data(structured_data: dict) -> list[str]:
                 prop_uri=prop_uri,
                 entity_key=entity_key,
                 custom_filter=custom_filter,
+                value_rules=value_rules,
             )
             _validate_property_cardinality(errors, prop_input)
             _validate_property_values(errors, prop_input)
@@ -262,5 +301,3 @@ def validate_entity_data(structured_data: dict) -> list[str]:
         entity_key,
         custom_filter,
     )
-
-    return errors
@@ -3,6 +3,7 @@
 # SPDX-License-Identifier: ISC
 
 import traceback
+from collections import defaultdict
 
 from flask import Blueprint, Response, current_app, jsonify, request
 from flask_babel import gettext
@@ -241,9 +242,6 @@ def get_paginated_inverse_references(
                 final_highest_priority_type = highest_priority_type
                 final_shape = shape
 
-            label = custom_filter.human_readable_entity(
-                final_subject, (final_highest_priority_type, final_shape)
-            )
             type_label = (
                 custom_filter.human_readable_class(
                     (final_highest_priority_type, final_shape)
@@ -260,10 +258,12 @@ def get_paginated_inverse_references(
                         final_predicate, (final_highest_priority_type, final_shape)
                     ),
                     "type_label": type_label,
-                    "label": label,
+                    "entity_key": (final_highest_priority_type, final_shape),
                 }
             )
 
+        _label_references(references)
+
     except Exception:
         traceback.format_exc()
         current_app.logger.exception(
@@ -274,6 +274,21 @@ def get_paginated_inverse_references(
         return references, has_more
 
 
+def _label_references(references: list[dict]) -> None:
+    """Label the references of a page with one batch per entity type."""
+    custom_filter = get_custom_filter()
+    references_by_key: defaultdict[tuple, list[dict]] = defaultdict(list)
+    for reference in references:
+        references_by_key[reference.pop("entity_key")].append(reference)
+
+    for entity_key, grouped_references in references_by_key.items():
+        labels = custom_filter.human_readable_entities(
+            [reference["subject"] for reference in grouped_references], entity_key
+        )
+        for reference, label in zip(grouped_references, labels, strict=True):
+            reference["label"] = label
+
+
 @linked_resources_bp.route("/", methods=["GET"])
 @login_required
 def get_linked_resources_api() -> Response | tuple[Response, int]:
@@ -33,6 +33,7 @@ from heritrace.extensions import (
     get_dataset_endpoint,
     get_dataset_is_quadstore,
     get_provenance_endpoint,
+    get_save_plugin,
     get_sparql,
 )
 from heritrace.sparql import get_sparql_bindings
@@ -203,7 +204,7 @@ def execute_merge() -> WerkzeugResponse:
             resp_agent,
             URIRef(current_app.config["PRIMARY_SOURCE"]),
             current_app.config["DATASET_GENERATION_TIME"],
-            save_plugin=current_app.config.get("SAVE_PLUGIN"),
+            save_plugin=get_save_plugin(),
         )
 
         editor = import_entity_graph(editor, entity1_uri)
@@ -500,16 +501,15 @@ def _transform_results(
     entity_type: str,
     shape_uri: str | None,
 ) -> list[dict[str, str]]:
-    custom_filter = get_custom_filter()
-    transformed: list[dict[str, str]] = []
-    for uri in uris:
-        readable_label = (
-            custom_filter.human_readable_entity(uri, (entity_type, shape_uri))
-            if entity_type
-            else uri
-        )
-        transformed.append({"uri": uri, "label": readable_label or uri})
-    return transformed
+    labels = (
+        get_custom_filter().human_readable_entities(uris, (entity_type, shape_uri))
+        if entity_type
+        else uris
+    )
+    return [
+        {"uri": uri, "label": label or uri}
+        for uri, label in zip(uris, labels, strict=True)
+    ]
 
 
 @merge_bp.route("/find_similar", methods=["GET"])
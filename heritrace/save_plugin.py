@@ -2,10 +2,139 @@
 #
 # SPDX-License-Identifier: ISC
 
-from typing import Protocol
+import logging
+from collections import Counter
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Protocol
 
+from rdflib import RDF, Dataset, Graph
+from rdflib.term import Node
 from rdflib_ocdm.ocdm_graph import OCDMGraphCommons
 
+from heritrace.services.deletion_index import deletion_records
+
+if TYPE_CHECKING:
+    from heritrace.services.class_counts import ClassCounts
+    from heritrace.services.deletion_index import DeletionIndex
+    from heritrace.services.label_cache import LabelCache
+    from heritrace.services.shape_index import ShapeIndex
+
+logger = logging.getLogger(__name__)
+
+
+def _typed_entities(graph: Graph | Dataset) -> set[tuple[Node, Node]]:
+    if isinstance(graph, Dataset):
+        return {(s, o) for s, _, o, _ in graph.quads((None, RDF.type, None, None))}
+    return set(graph.subject_objects(RDF.type))
+
+
+def _entity_triples(
+    graph: Graph | Dataset, subject: Node
+) -> list[tuple[Node, Node, Node]]:
+    if isinstance(graph, Dataset):
+        return [(s, p, o) for s, p, o, _ in graph.quads((subject, None, None, None))]
+    return list(graph.triples((subject, None, None)))
+
 
 class SavePlugin(Protocol):
     def persist(self, graph_set: OCDMGraphCommons) -> None: ...
+
+
+class SavePlugins:
+    """Several plugins run in order on every save."""
+
+    def __init__(self, *plugins: SavePlugin | None) -> None:
+        self.plugins = tuple(plugin for plugin in plugins if plugin is not None)
+
+    def persist(self, graph_set: OCDMGraphCommons) -> None:
+        for plugin in self.plugins:
+            plugin.persist(graph_set)
+
+
+class CacheUpdates(SavePlugins):
+    """
+    Plugins that keep caches and indexes current with the saved entities.
+
+    They run once the save has been uploaded, so a failing one is logged and
+    the others still run, rather than failing a save already written.
+    """
+
+    def persist(self, graph_set: OCDMGraphCommons) -> None:
+        for plugin in self.plugins:
+            try:
+                plugin.persist(graph_set)
+            except Exception:  # noqa: PERF203
+                logger.exception("Save plugin %s failed", type(plugin).__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class LabelCacheInvalidation:
+    """Invalidates the cached labels computed from the saved entities."""
+
+    label_cache: "LabelCache"
+
+    def persist(self, graph_set: OCDMGraphCommons) -> None:
+        self.label_cache.invalidate(list(graph_set.entity_index))
+
+
+@dataclass(frozen=True, slots=True)
+class ClassCountsAdjustment:
+    """Adjusts the class counts by the instances the save created and deleted."""
+
+    class_counts: "ClassCounts"
+
+    def persist(self, graph_set: OCDMGraphCommons) -> None:
+        before = _typed_entities(graph_set.preexisting_graph)  # type: ignore[attr-defined]
+        after = _typed_entities(graph_set)  # type: ignore[arg-type]
+        deltas: Counter[str] = Counter()
+        for _subject, class_uri in after - before:
+            deltas[str(class_uri)] += 1
+        for _subject, class_uri in before - after:
+            deltas[str(class_uri)] -= 1
+        if deltas:
+            self.class_counts.adjust(deltas)
+
+
+@dataclass(frozen=True, slots=True)
+class ShapeIndexUpdate:
+    """Records the classes and shapes of the saved entities in the shape index."""
+
+    shape_index: "ShapeIndex"
+
+    def persist(self, graph_set: OCDMGraphCommons) -> None:
+        saved = set(graph_set.entity_index)
+        previous_classes: dict[str, set[str]] = {
+            str(subject): set() for subject in saved
+        }
+        for subject, class_uri in _typed_entities(graph_set.preexisting_graph):  # type: ignore[attr-defined]
+            if subject in saved:
+                previous_classes[str(subject)].add(str(class_uri))
+        current_triples = {
+            str(subject): _entity_triples(graph_set, subject)  # type: ignore[arg-type]
+            for subject in saved
+        }
+        self.shape_index.record_saves(previous_classes, current_triples)
+
+
+@dataclass(frozen=True, slots=True)
+class DeletionIndexUpdate:
+    """Records the entities the save deleted and restored in the deletion index."""
+
+    deletion_index: "DeletionIndex"
+
+    def persist(self, graph_set: OCDMGraphCommons) -> None:
+        entity_index = graph_set.entity_index
+        deleted = [
+            subject
+            for subject, metadata in entity_index.items()
+            if metadata["to_be_deleted"]
+        ]
+        restored = [
+            str(subject)
+            for subject, metadata in entity_index.items()
+            if metadata["is_restored"]
+        ]
+        self.deletion_index.record_saves(
+            deletion_records(graph_set.provenance, deleted),  # type: ignore[attr-defined]
+            restored,
+        )
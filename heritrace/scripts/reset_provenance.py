@@ -1,10 +1,11 @@
-# SPDX-FileCopyrightText: 2025 Arcangelo Massari <arcangelo.massari@unibo.it>
+# SPDX-FileCopyrightText: 2025-2026 Arcangelo Massari <arcangelo.massari@unibo.it>
 #
 # SPDX-License-Identifier: ISC
 
 import argparse
 import importlib.util
 import logging
+import os
 import sys
 import types
 from datetime import datetime, timezone
@@ -12,9 +13,11 @@ from urllib.parse import urlparse
 
 from rdflib import URIRef
 from rdflib_ocdm.counter_handler.counter_handler import CounterHandler
+from redis import Redis
 from SPARQLWrapper import JSON
 from SPARQLWrapper.SPARQLExceptions import SPARQLWrapperException
 
+from heritrace.services.snapshot_cache import SnapshotCache
 from heritrace.sparql import SPARQLWrapperWithRetry, get_sparql_bindings
 from heritrace.utils.converters import convert_to_datetime
 
@@ -264,13 +267,20 @@ def reset_entity_provenance(
     entity_uri: URIRef,
     provenance_endpoint: str,
     counter_handler: CounterHandler,
+    snapshot_cache: SnapshotCache | None = None,
 ) -> bool:
     resetter = ProvenanceResetter(
         provenance_endpoint=provenance_endpoint,
         counter_handler=counter_handler,
     )
 
-    return resetter.reset_entity_provenance(entity_uri)
+    success = resetter.reset_entity_provenance(entity_uri)
+    # The cached past states of the entity, including the ones held by the
+    # checkpoints of other entities, were reconstructed from the snapshots
+    # just deleted
+    if success and snapshot_cache is not None:
+        snapshot_cache.invalidate(str(entity_uri))
+    return success
 
 
 def load_config(config_path: str) -> types.ModuleType:
@@ -341,10 +351,18 @@ def main() -> int:
 
     counter_handler = config.Config.COUNTER_HANDLER
 
+    redis_url = (
+        getattr(config.Config, "REDIS_URL", None)
+        or os.environ.get("REDIS_URL")
+        or "redis://localhost:6379/0"
+    )
+    snapshot_cache = SnapshotCache(Redis.from_url(redis_url, decode_responses=True))
+
     success = reset_entity_provenance(
         entity_uri=URIRef(args.entity_uri),
         provenance_endpoint=provenance_endpoint,
         counter_handler=counter_handler,
+        snapshot_cache=snapshot_cache,
     )
 
     if success:
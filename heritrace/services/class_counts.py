@@ -0,0 +1,134 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+import contextvars
+import logging
+import threading
+import time
+from collections.abc import Callable, Mapping, Sequence
+
+from heritrace.sparql import use_private_wrappers
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_COUNT_LIMIT = 10000
+DEFAULT_CLASS_COUNTS_MAX_AGE = 60
+
+
+class ClassCounts:
+    """Instance counts of the catalogue classes, kept current without blocking.
+
+    Counts are taken once synchronously, then recounted in a background thread
+    whenever they are older than max_age, while readers keep getting the
+    previous values. Saves adjust the counts of the classes they touched right
+    away, so the catalogue does not wait for the next recount to reflect them.
+
+    Counts are capped: the counting function is asked for at most limit + 1
+    instances of a class, and a capped count is left alone by adjustments,
+    since its exact value is unknown until the next recount. The generation
+    changes whenever a count does, so that views built from the counts can
+    tell when they are out of date.
+    """
+
+    def __init__(
+        self,
+        limit: int = DEFAULT_COUNT_LIMIT,
+        max_age: float = DEFAULT_CLASS_COUNTS_MAX_AGE,
+    ) -> None:
+        self.limit = limit
+        self.max_age = max_age
+        self._counts: dict[str, int] = {}
+        self._counted_at: float | None = None
+        self._refreshing = False
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @property
+    def generation(self) -> int:
+        with self._lock:
+            return self._generation
+
+    def get(
+        self,
+        class_uris: Sequence[str],
+        recount: Callable[[list[str], int], dict[str, int]],
+    ) -> dict[str, int]:
+        """
+        Return the count of every class, recounting in the background if stale.
+
+        Args:
+            class_uris: URIs of the classes to report
+            recount: Counts the instances of the given classes in one go, up
+                to the given limit. It runs in a copy of the caller's context.
+
+        Returns:
+            The count of every class, 0 for classes not counted yet
+        """
+        with self._lock:
+            counted_at = self._counted_at
+            missing = any(class_uri not in self._counts for class_uri in class_uris)
+            start_refresh = (
+                counted_at is not None
+                and not self._refreshing
+                and (missing or time.monotonic() - counted_at >= self.max_age)
+            )
+            if start_refresh:
+                self._refreshing = True
+
+        if counted_at is None:
+            self._store(recount(list(class_uris), self.limit + 1))
+        elif start_refresh:
+            context = contextvars.copy_context()
+            threading.Thread(
+                target=context.run,
+                args=(self._refresh, list(class_uris), recount),
+                name="heritrace-class-counts",
+                daemon=True,
+            ).start()
+
+        with self._lock:
+            return {
+                class_uri: self._counts.get(class_uri, 0) for class_uri in class_uris
+            }
+
+    def _refresh(
+        self,
+        class_uris: list[str],
+        recount: Callable[[list[str], int], dict[str, int]],
+    ) -> None:
+        # The recount queries alongside the request thread.
+        use_private_wrappers()
+        try:
+            self._store(recount(class_uris, self.limit + 1))
+        except Exception:
+            logger.exception("Background recount of class instances failed")
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def _store(self, counts: Mapping[str, int]) -> None:
+        with self._lock:
+            self._counts.update(counts)
+            self._counted_at = time.monotonic()
+            self._generation += 1
+
+    def adjust(self, deltas: Mapping[str, int]) -> None:
+        """
+        Apply the instances created (positive) and deleted (negative) by a save.
+
+        Classes not counted yet are left to the next recount.
+        """
+        with self._lock:
+            for class_uri, delta in deltas.items():
+                count = self._counts.get(class_uri)
+                if count is None or count > self.limit or not delta:
+                    continue
+                self._counts[class_uri] = max(count + delta, 0)
+                self._generation += 1
+
+    def display(self, count: int) -> tuple[str, int]:
+        """Return the label and numeric value of a count, marking capped ones."""
+        if count > self.limit:
+            return f"{self.limit}+", self.limit
+        return str(count), count
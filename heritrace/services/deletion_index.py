@@ -0,0 +1,295 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+import json
+import logging
+import re
+import uuid
+from collections.abc import Iterable
+from dataclasses import asdict, dataclass
+from datetime import datetime
+
+from rdflib import Graph, Namespace, URIRef
+from redis import Redis, RedisError
+
+from heritrace.utils.converters import convert_to_datetime
+
+logger = logging.getLogger(__name__)
+
+PROV = Namespace("http://www.w3.org/ns/prov#")
+OCO_HAS_UPDATE_QUERY = URIRef("https://w3id.org/oc/ontology/hasUpdateQuery")
+RDF_TYPE_STATEMENT = "<http://www.w3.org/1999/02/22-rdf-syntax-ns#type>"
+DELETION_INDEX_WRITE_BATCH = 1000
+
+
+@dataclass(frozen=True, slots=True)
+class DeletionRecord:
+    """A deleted entity, as listed by the Time Vault.
+
+    deletion_time is an ISO 8601 timestamp with its UTC offset. The time of the
+    last valid snapshot is read along with the page that displays the entity.
+    """
+
+    entity: str
+    snapshot: str
+    classes: tuple[str, ...]
+    deletion_time: str
+    agent: str | None
+    last_valid_snapshot: str
+
+    def score(self) -> float:
+        return datetime.fromisoformat(self.deletion_time).timestamp()
+
+
+def deleted_entity_types(entity_uri: str, update_query: str) -> list[str]:
+    """Read the entity types out of the DELETE DATA recorded by the snapshot."""
+    statement = re.escape(f"<{entity_uri}> {RDF_TYPE_STATEMENT} ")
+    return re.findall(f"{statement}<([^>]+)>", update_query)
+
+
+def deletion_records(
+    provenance: Graph, entity_uris: Iterable[URIRef]
+) -> list[DeletionRecord]:
+    """
+    Describe the deletions recorded by a provenance graph about to be stored.
+
+    A deletion snapshot is the one of an entity generated and invalidated at the
+    same instant. Snapshots not derived from a previous one are left out, as the
+    Time Vault cannot show the state they deleted.
+    """
+    records = []
+    for entity_uri in entity_uris:
+        for snapshot in provenance.subjects(PROV.specializationOf, entity_uri):
+            invalidated_at = provenance.value(snapshot, PROV.invalidatedAtTime)
+            if invalidated_at is None or invalidated_at != provenance.value(
+                snapshot, PROV.generatedAtTime
+            ):
+                continue
+            deletion_time = convert_to_datetime(str(invalidated_at))
+            last_valid_snapshot = provenance.value(snapshot, PROV.wasDerivedFrom)
+            if deletion_time is None or last_valid_snapshot is None:
+                continue
+            agent = provenance.value(snapshot, PROV.wasAttributedTo)
+            update_query = provenance.value(snapshot, OCO_HAS_UPDATE_QUERY)
+            records.append(
+                DeletionRecord(
+                    entity=str(entity_uri),
+                    snapshot=str(snapshot),
+                    classes=tuple(
+                        deleted_entity_types(str(entity_uri), str(update_query or ""))
+                    ),
+                    deletion_time=deletion_time.isoformat(),
+                    agent=str(agent) if agent is not None else None,
+                    last_valid_snapshot=str(last_valid_snapshot),
+                )
+            )
+    return records
+
+
+class DeletionIndex:
+    """Persistent index of the deleted entities of every class, stored in Redis.
+
+    It serves the Time Vault, whose counts and pages would otherwise scan the
+    whole provenance store for deletion snapshots. The index is built once by
+    the deletion-index build command and then kept current by the editor,
+    which records the entities every save deletes or restores.
+
+    Each build writes a new generation of keys and switches to it only once
+    complete, so readers never see a partial index. It uses the following
+    Redis key patterns:
+    - deletion_index:generation - Generation currently served
+    - deletion_index:building - Generation being built, if any
+    - deletion_index:{generation}:records - Hash of the record of every deleted
+    entity, as JSON
+    - deletion_index:{generation}:classes - Set of the classes with deletions
+    - deletion_index:{generation}:class:{class_uri} - Deleted entities of a
+    class, as a sorted set scored by deletion time
+    """
+
+    def __init__(self, redis_client: Redis) -> None:  # type: ignore[type-arg]
+        self.redis: Redis[str] = redis_client  # type: ignore[assignment]
+        self.generation_key = "deletion_index:generation"
+        self.building_key = "deletion_index:building"
+
+    def _records_key(self, generation: str) -> str:
+        return f"deletion_index:{generation}:records"
+
+    def _classes_key(self, generation: str) -> str:
+        return f"deletion_index:{generation}:classes"
+
+    def _class_key(self, generation: str, class_uri: str) -> str:
+        return f"deletion_index:{generation}:class:{class_uri}"
+
+    def build(self, records: Iterable[Iterable[DeletionRecord]]) -> int:
+        """
+        Index every deletion from scratch and start serving the new index.
+
+        Args:
+            records: The record of every deleted entity, in chunks
+
+        Returns:
+            The number of entities indexed
+        """
+        generation = uuid.uuid4().hex
+        self.redis.set(self.building_key, generation)
+        indexed = 0
+        try:
+            for chunk in records:
+                chunk_records = list(chunk)
+                for start in range(0, len(chunk_records), DELETION_INDEX_WRITE_BATCH):
+                    self._write(
+                        generation,
+                        chunk_records[start : start + DELETION_INDEX_WRITE_BATCH],
+                        {},
+                    )
+                indexed += len(chunk_records)
+        except BaseException:
+            self.redis.delete(self.building_key)
+            self._drop(generation)
+            raise
+
+        pipe = self.redis.pipeline()
+        pipe.getset(self.generation_key, generation)
+        pipe.delete(self.building_key)
+        previous, _deleted = pipe.execute()
+        if previous:
+            self._drop(previous)
+        return indexed
+
+    def _drop(self, generation: str) -> None:
+        classes = self.redis.smembers(self._classes_key(generation))
+        self.redis.delete(
+            self._records_key(generation),
+            self._classes_key(generation),
+            *[self._class_key(generation, class_uri) for class_uri in classes],
+        )
+
+    def _write(
+        self,
+        generation: str,
+        records: list[DeletionRecord],
+        previous: dict[str, DeletionRecord],
+        restored: Iterable[str] = (),
+    ) -> None:
+        pipe = self.redis.pipeline()
+        for entity_uri in restored:
+            if entity_uri in previous:
+                for class_uri in previous[entity_uri].classes:
+                    pipe.zrem(self._class_key(generation, class_uri), entity_uri)
+            pipe.hdel(self._records_key(generation), entity_uri)
+        for record in records:
+            if record.entity in previous:
+                for class_uri in previous[record.entity].classes:
+                    pipe.zrem(self._class_key(generation, class_uri), record.entity)
+            for class_uri in record.classes:
+                pipe.zadd(
+                    self._class_key(generation, class_uri),
+                    {record.entity: record.score()},
+                )
+                pipe.sadd(self._classes_key(generation), class_uri)
+        if records:
+            pipe.hset(
+                self._records_key(generation),
+                mapping={
+                    record.entity: json.dumps(asdict(record)) for record in records
+                },
+            )
+        pipe.execute()
+
+    def is_built(self) -> bool:
+        """Tell whether an index is being served."""
+        try:
+            return self.redis.get(self.generation_key) is not None
+        except RedisError:
+            logger.exception("Error reading the deletion index")
+            return False
+
+    def count(self, class_uri: str) -> int | None:
+        """
+        Count the deleted entities of a class.
+
+        Returns:
+            The count, or None if no index is served or Redis could not be
+            reached
+        """
+        try:
+            generation = self.redis.get(self.generation_key)
+            if generation is None:
+                return None
+            return self.redis.zcard(self._class_key(generation, class_uri))
+        except RedisError:
+            logger.exception("Error reading the deletion index of %s", class_uri)
+            return None
+
+    def page(
+        self, class_uri: str, *, offset: int, limit: int, descending: bool
+    ) -> list[DeletionRecord] | None:
+        """
+        Read a page of the deleted entities of a class, ordered by deletion time.
+
+        Returns:
+            The records of the page, or None if no index is served or Redis
+            could not be reached
+        """
+        try:
+            generation = self.redis.get(self.generation_key)
+            if generation is None:
+                return None
+            key = self._class_key(generation, class_uri)
+            stop = offset + limit - 1
+            entity_uris = (
+                self.redis.zrevrange(key, offset, stop)
+                if descending
+                else self.redis.zrange(key, offset, stop)
+            )
+            if not entity_uris:
+                return []
+            raw_records = self.redis.hmget(self._records_key(generation), entity_uris)
+        except RedisError:
+            logger.exception("Error reading the deletion index of %s", class_uri)
+            return None
+        return [_load_record(raw_record) for raw_record in raw_records if raw_record]
+
+    def record_saves(
+        self, deletions: list[DeletionRecord], restored: list[str]
+    ) -> None:
+        """
+        Bring the index up to date with the entities of a save.
+
+        Args:
+            deletions: The entities the save deleted
+            restored: URIs of the entities the save restored
+        """
+        if not deletions and not restored:
+            return
+        try:
+            generations = [
+                generation
+                for generation in self.redis.mget(
+                    [self.generation_key, self.building_key]
+                )
+                if generation
+            ]
+            # Saves also reach the generation being built, if any, which would
+            # otherwise miss the entities it had already read.
+            for generation in generations:
+                entity_uris = [record.entity for record in deletions] + restored
+                raw_records = self.redis.hmget(
+                    self._records_key(generation), entity_uris
+                )
+                previous = {
+                    entity_uri: _load_record(raw_record)
+                    for entity_uri, raw_record in zip(
+                        entity_uris, raw_records, strict=True
+                    )
+                    if raw_record
+                }
+                self._write(generation, deletions, previous, restored)
+        except RedisError:
+            logger.exception("Error updating the deletion index")
+
+
+def _load_record(raw_record: str) -> DeletionRecord:
+    data = json.loads(raw_record)
+    return DeletionRecord(**{**data, "classes": tuple(data["classes"])})
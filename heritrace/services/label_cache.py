@@ -0,0 +1,236 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+import hashlib
+import json
+import logging
+import time
+from collections.abc import Iterable
+from functools import lru_cache
+
+from redis import Redis, RedisError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LABEL_CACHE_TTL = 86400
+DEFAULT_LABEL_CACHE_MAX_ENTRIES = 100000
+
+
+@lru_cache(maxsize=256)
+def _rule_hash(fetch_uri_display: str) -> str:
+    return hashlib.sha256(fetch_uri_display.encode("utf-8")).hexdigest()[:16]
+
+
+class LabelCache:
+    """Shared cache of fetchUriDisplay labels, stored in Redis.
+
+    Each entry records the version of every entity its label was computed
+    from. Saving an entity bumps its version, so any label that depended on it
+    stops matching and is recomputed on the next read. It uses the following
+    Redis key patterns:
+    - label_cache:entry:{digest} - Label and dependency versions, where the
+    digest covers the entity URI, class, shape and display rule
+    - label_cache:index - Sorted set of entry keys by last access, for eviction
+    - label_cache:version:{entity_uri} - Current version of an entity
+    - label_cache:hits, label_cache:misses - Lookup counters
+    """
+
+    def __init__(
+        self,
+        redis_client: Redis,  # type: ignore[type-arg]
+        ttl: int = DEFAULT_LABEL_CACHE_TTL,
+        max_entries: int = DEFAULT_LABEL_CACHE_MAX_ENTRIES,
+    ) -> None:
+        self.redis: Redis[str] = redis_client  # type: ignore[assignment]
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entry_prefix = "label_cache:entry:"
+        self.version_prefix = "label_cache:version:"
+        self.index_key = "label_cache:index"
+        self.hits_key = "label_cache:hits"
+        self.misses_key = "label_cache:misses"
+
+    def generate_entry_key(
+        self,
+        uri: str,
+        entity_key: tuple[str | None, str | None],
+        fetch_uri_display: str,
+    ) -> str:
+        """Generate the Redis key of the label of an entity under a rule."""
+        identity = json.dumps(
+            [uri, entity_key[0], entity_key[1], _rule_hash(fetch_uri_display)]
+        )
+        digest = hashlib.sha256(identity.encode("utf-8")).hexdigest()
+        return f"{self.entry_prefix}{digest}"
+
+    def generate_version_key(self, uri: str) -> str:
+        """Generate the Redis key holding the version of an entity."""
+        return f"{self.version_prefix}{uri}"
+
+    def get_many(
+        self,
+        uris: Iterable[str],
+        entity_key: tuple[str | None, str | None],
+        fetch_uri_display: str,
+    ) -> dict[str, str]:
+        """
+        Look up the cached labels of many entities of the same type.
+
+        Args:
+            uris: URIs of the entities to label
+            entity_key: (class_uri, shape_uri) of the entities
+            fetch_uri_display: The fetchUriDisplay query of the matching rule
+
+        Returns:
+            Labels of the entities that have a valid entry, keyed by URI
+        """
+        unique_uris = list(dict.fromkeys(uris))
+        if not unique_uris:
+            return {}
+        keys = {
+            uri: self.generate_entry_key(uri, entity_key, fetch_uri_display)
+            for uri in unique_uris
+        }
+        try:
+            raw_entries = self.redis.mget(list(keys.values()))
+            entries = {
+                uri: json.loads(raw_entry)
+                for uri, raw_entry in zip(unique_uris, raw_entries, strict=True)
+                if raw_entry
+            }
+            versions = self._read_versions(
+                sorted(
+                    {
+                        dependency
+                        for entry in entries.values()
+                        for dependency in entry["dependencies"]
+                    }
+                )
+            )
+            labels = {
+                uri: entry["label"]
+                for uri, entry in entries.items()
+                if all(
+                    versions[dependency] == version
+                    for dependency, version in entry["dependencies"].items()
+                )
+            }
+
+            pipe = self.redis.pipeline()
+            if labels:
+                now = time.time()
+                pipe.zadd(self.index_key, {keys[uri]: now for uri in labels})
+            pipe.incrby(self.hits_key, len(labels))
+            pipe.incrby(self.misses_key, len(unique_uris) - len(labels))
+            pipe.execute()
+        except (RedisError, ValueError, KeyError):
+            logger.exception("Error reading cached labels")
+            return {}
+        else:
+            return labels
+
+    def get_versions(self, uris: Iterable[str]) -> dict[str, int] | None:
+        """
+        Read the current version of many entities.
+
+        Versions must be read before the labels depending on them are computed,
+        so that a save landing in between makes the stored entry stale rather
+        than hiding the change.
+
+        Returns:
+            Versions keyed by URI, or None if Redis could not be reached
+        """
+        try:
+            return self._read_versions(uris)
+        except RedisError:
+            logger.exception("Error reading entity versions")
+            return None
+
+    def _read_versions(self, uris: Iterable[str]) -> dict[str, int]:
+        unique_uris = list(dict.fromkeys(uris))
+        if not unique_uris:
+            return {}
+        raw_versions = self.redis.mget(
+            [self.generate_version_key(uri) for uri in unique_uris]
+        )
+        return {
+            uri: int(raw_version) if raw_version else 0
+            for uri, raw_version in zip(unique_uris, raw_versions, strict=True)
+        }
+
+    def set_many(
+        self,
+        labels: dict[str, str],
+        dependencies: dict[str, dict[str, int]],
+        entity_key: tuple[str | None, str | None],
+        fetch_uri_display: str,
+    ) -> None:
+        """
+        Store freshly computed labels.
+
+        Args:
+            labels: Labels keyed by entity URI
+            dependencies: For each URI, the versions of the entities its label
+                was computed from, as returned by get_versions
+            entity_key: (class_uri, shape_uri) of the entities
+            fetch_uri_display: The fetchUriDisplay query of the matching rule
+        """
+        if not labels:
+            return
+        try:
+            now = time.time()
+            index_entries = {}
+            pipe = self.redis.pipeline()
+            for uri, label in labels.items():
+                key = self.generate_entry_key(uri, entity_key, fetch_uri_display)
+                entry = {"label": label, "dependencies": dependencies[uri]}
+                pipe.set(key, json.dumps(entry), ex=self.ttl)
+                index_entries[key] = now
+            pipe.zadd(self.index_key, index_entries)
+            pipe.execute()
+            self._evict(now)
+        except RedisError:
+            logger.exception("Error caching labels")
+
+    def _evict(self, now: float) -> None:
+        # Entries unread for a whole TTL have expired on their own, so only
+        # their index members are left to drop.
+        self.redis.zremrangebyscore(self.index_key, "-inf", now - self.ttl)
+        excess = self.redis.zcard(self.index_key) - self.max_entries
+        if excess <= 0:
+            return
+        evicted = self.redis.zpopmin(self.index_key, excess)
+        if evicted:
+            self.redis.delete(*[key for key, _score in evicted])
+
+    def invalidate(self, uris: Iterable[str]) -> None:
+        """Invalidate every cached label computed from any of the entities."""
+        unique_uris = list(dict.fromkeys(str(uri) for uri in uris))
+        if not unique_uris:
+            return
+        try:
+            pipe = self.redis.pipeline()
+            for uri in unique_uris:
+                version_key = self.generate_version_key(uri)
+                pipe.incr(version_key)
+                # A version only has to outlive the entries that recorded it.
+                pipe.expire(version_key, self.ttl)
+            pipe.execute()
+        except RedisError:
+            logger.exception("Error invalidating cached labels")
+
+    def get_stats(self) -> dict[str, int | float]:
+        """Return hit and miss counters and the current number of entries."""
+        hits, misses = self.redis.mget([self.hits_key, self.misses_key])
+        hit_count = int(hits) if hits else 0
+        miss_count = int(misses) if misses else 0
+        lookups = hit_count + miss_count
+        return {
+            "hits": hit_count,
+            "misses": miss_count,
+            "hit_rate": hit_count / lookups if lookups else 0.0,
+            "entries": self.redis.zcard(self.index_key),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+        }
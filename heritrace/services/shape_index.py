@@ -0,0 +1,318 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+import logging
+import uuid
+from collections.abc import Callable, Iterable, Mapping
+
+from redis import Redis, RedisError
+
+logger = logging.getLogger(__name__)
+
+RDF_TYPE = "http://www.w3.org/1999/02/22-rdf-syntax-ns#type"
+SHAPE_INDEX_WRITE_BATCH = 1000
+
+Triple = tuple[object, object, object]
+
+
+class ShapeIndex:
+    """Persistent index of the shape of every entity of a class, stored in Redis.
+
+    It serves the classes with multiple shapes, whose shape-filtered listings
+    and per-shape counts would otherwise require classifying every entity of
+    the class. An index is built once per class by the shape-index build
+    command and then kept current from the entities saved by the editor.
+
+    Each build writes a new generation of keys and switches to it only once
+    complete, so readers never see a partial index. It uses the following
+    Redis key patterns:
+    - shape_index:generation:{class_uri} - Generation currently served
+    - shape_index:building:{class_uri} - Generation being built, if any
+    - shape_index:{generation}:shape:{class_uri} - Hash of the shape of every
+    entity, empty for entities matching no shape
+    - shape_index:{generation}:shapes:{class_uri} - Set of the shapes in use
+    - shape_index:{generation}:members:{class_uri}:{shape_uri} - Entities of a
+    shape, as a sorted set with equal scores so that they are ordered by URI
+    """
+
+    def __init__(
+        self,
+        redis_client: Redis,  # type: ignore[type-arg]
+        classify: Callable[[list[Triple]], str | None],
+    ) -> None:
+        self.redis: Redis[str] = redis_client  # type: ignore[assignment]
+        self.classify = classify
+        self.generation_prefix = "shape_index:generation:"
+        self.building_prefix = "shape_index:building:"
+
+    def _shape_key(self, generation: str, class_uri: str) -> str:
+        return f"shape_index:{generation}:shape:{class_uri}"
+
+    def _shapes_key(self, generation: str, class_uri: str) -> str:
+        return f"shape_index:{generation}:shapes:{class_uri}"
+
+    def _members_key(self, generation: str, class_uri: str, shape_uri: str) -> str:
+        return f"shape_index:{generation}:members:{class_uri}:{shape_uri}"
+
+    def _generation(self, class_uri: str) -> str | None:
+        return self.redis.get(f"{self.generation_prefix}{class_uri}")
+
+    def build(
+        self, class_uri: str, memberships: Iterable[Mapping[str, str | None]]
+    ) -> int:
+        """
+        Index a class from scratch and start serving the new index.
+
+        Args:
+            class_uri: URI of the class
+            memberships: The shape of every entity of the class, in chunks
+
+        Returns:
+            The number of entities indexed
+        """
+        generation = uuid.uuid4().hex
+        building_key = f"{self.building_prefix}{class_uri}"
+        self.redis.set(building_key, generation)
+        indexed = 0
+        try:
+            for chunk in memberships:
+                items = list(chunk.items())
+                for start in range(0, len(items), SHAPE_INDEX_WRITE_BATCH):
+                    self._write(
+                        generation,
+                        class_uri,
+                        dict(items[start : start + SHAPE_INDEX_WRITE_BATCH]),
+                        {},
+                    )
+                indexed += len(items)
+        except BaseException:
+            self.redis.delete(building_key)
+            self._drop(generation, class_uri)
+            raise
+
+        pipe = self.redis.pipeline()
+        pipe.getset(f"{self.generation_prefix}{class_uri}", generation)
+        pipe.delete(building_key)
+        previous, _deleted = pipe.execute()
+        if previous:
+            self._drop(previous, class_uri)
+        return indexed
+
+    def _drop(self, generation: str, class_uri: str) -> None:
+        shapes = self.redis.smembers(self._shapes_key(generation, class_uri))
+        self.redis.delete(
+            self._shape_key(generation, class_uri),
+            self._shapes_key(generation, class_uri),
+            *[self._members_key(generation, class_uri, shape) for shape in shapes],
+        )
+
+    def _write(
+        self,
+        generation: str,
+        class_uri: str,
+        shapes: Mapping[str, str | None],
+        previous: Mapping[str, str | None],
+        removed: Iterable[str] = (),
+    ) -> None:
+        pipe = self.redis.pipeline()
+        for subject in removed:
+            old_shape = previous.get(subject)
+            if old_shape:
+                pipe.zrem(self._members_key(generation, class_uri, old_shape), subject)
+            pipe.hdel(self._shape_key(generation, class_uri), subject)
+        for subject, shape in shapes.items():
+            old_shape = previous.get(subject)
+            if old_shape and old_shape != shape:
+                pipe.zrem(self._members_key(generation, class_uri, old_shape), subject)
+            if shape:
+                pipe.zadd(self._members_key(generation, class_uri, shape), {subject: 0})
+                pipe.sadd(self._shapes_key(generation, class_uri), shape)
+        if shapes:
+            pipe.hset(
+                self._shape_key(generation, class_uri),
+                mapping={subject: shape or "" for subject, shape in shapes.items()},
+            )
+        pipe.execute()
+
+    def counts(self, class_uri: str) -> dict[str, int] | None:
+        """
+        Count the entities of every shape in use by a class.
+
+        Returns:
+            Counts keyed by shape, or None if the class is not indexed or
+            Redis could not be reached
+        """
+        try:
+            generation = self._generation(class_uri)
+            if generation is None:
+                return None
+            shapes_key = self._shapes_key(generation, class_uri)
+            shapes = sorted(self.redis.smembers(shapes_key))
+            pipe = self.redis.pipeline()
+            for shape in shapes:
+                pipe.zcard(self._members_key(generation, class_uri, shape))
+            return dict(zip(shapes, pipe.execute(), strict=True))
+        except RedisError:
+            logger.exception("Error reading the shape index of %s", class_uri)
+            return None
+
+    def shapes_of(
+        self, class_uri: str, subjects: list[str]
+    ) -> dict[str, str | None] | None:
+        """
+        Look up the shape of some entities of a class.
+
+        Returns:
+            The shape of the indexed entities among the given ones, or None if
+            the class is not indexed or Redis could not be reached
+        """
+        try:
+            generation = self._generation(class_uri)
+            if generation is None:
+                return None
+            if not subjects:
+                return {}
+            raw_shapes = self.redis.hmget(
+                self._shape_key(generation, class_uri), subjects
+            )
+        except RedisError:
+            logger.exception("Error reading the shape index of %s", class_uri)
+            return None
+        return {
+            subject: shape or None
+            for subject, shape in zip(subjects, raw_shapes, strict=True)
+            if shape is not None
+        }
+
+    def members(  # noqa: PLR0913
+        self,
+        class_uri: str,
+        shape_uri: str,
+        *,
+        after: str | None,
+        skip: int,
+        limit: int,
+        descending: bool,
+    ) -> list[str] | None:
+        """
+        Read a page of the entities of a shape, ordered by URI.
+
+        Args:
+            class_uri: URI of the class
+            shape_uri: URI of the shape
+            after: URI of the entity the page follows, if any
+            skip: Entities to skip after the start of the page
+            limit: Maximum number of entities to return
+            descending: Whether URIs are ordered from the last
+
+        Returns:
+            The URIs of the page, or None if the class is not indexed or Redis
+            could not be reached
+        """
+        try:
+            generation = self._generation(class_uri)
+            if generation is None:
+                return None
+            key = self._members_key(generation, class_uri, shape_uri)
+            if descending:
+                return self.redis.zrevrangebylex(
+                    key, f"({after}" if after else "+", "-", skip, limit
+                )
+            return self.redis.zrangebylex(
+                key, f"({after}" if after else "-", "+", skip, limit
+            )
+        except RedisError:
+            logger.exception("Error reading the shape index of %s", class_uri)
+            return None
+
+    def record(self, class_uri: str, shapes: Mapping[str, str | None]) -> None:
+        """Record the shape of entities of an indexed class classified elsewhere."""
+        try:
+            generations = self._live_generations([class_uri])
+            for generation in generations[class_uri]:
+                self._update(generation, class_uri, shapes, [])
+        except RedisError:
+            logger.exception("Error updating the shape index of %s", class_uri)
+
+    def record_saves(
+        self,
+        previous_classes: Mapping[str, set[str]],
+        current_triples: Mapping[str, list[Triple]],
+    ) -> None:
+        """
+        Bring the indexed classes up to date with the entities of a save.
+
+        Args:
+            previous_classes: For each saved entity, its classes before the save
+            current_triples: For each saved entity, its triples after the save
+        """
+        current_classes = {
+            subject: {str(o) for _s, p, o in triples if str(p) == RDF_TYPE}
+            for subject, triples in current_triples.items()
+        }
+        classes = sorted(
+            set().union(*previous_classes.values(), *current_classes.values())
+        )
+        if not classes:
+            return
+        try:
+            live_generations = self._live_generations(classes)
+            classified: dict[str, str | None] = {}
+            for class_uri, generations in live_generations.items():
+                if not generations:
+                    continue
+                shapes = {}
+                removed = []
+                for subject in previous_classes.keys() | current_classes.keys():
+                    if class_uri in current_classes.get(subject, set()):
+                        if subject not in classified:
+                            classified[subject] = self.classify(
+                                current_triples[subject]
+                            )
+                        shapes[subject] = classified[subject]
+                    elif class_uri in previous_classes.get(subject, set()):
+                        removed.append(subject)
+                for generation in generations:
+                    self._update(generation, class_uri, shapes, removed)
+        except RedisError:
+            logger.exception("Error updating the shape index")
+
+    def _live_generations(self, classes: list[str]) -> dict[str, list[str]]:
+        # Saves also reach the generation being built, if any, which would
+        # otherwise miss the entities it had already read.
+        raw_generations = self.redis.mget(
+            [
+                key
+                for class_uri in classes
+                for key in (
+                    f"{self.generation_prefix}{class_uri}",
+                    f"{self.building_prefix}{class_uri}",
+                )
+            ]
+        )
+        return {
+            class_uri: [
+                generation
+                for generation in raw_generations[2 * position : 2 * position + 2]
+                if generation
+            ]
+            for position, class_uri in enumerate(classes)
+        }
+
+    def _update(
+        self,
+        generation: str,
+        class_uri: str,
+        shapes: Mapping[str, str | None],
+        removed: list[str],
+    ) -> None:
+        subjects = [*shapes, *removed]
+        if not subjects:
+            return
+        raw_shapes = self.redis.hmget(self._shape_key(generation, class_uri), subjects)
+        previous = {
+            subject: shape or None
+            for subject, shape in zip(subjects, raw_shapes, strict=True)
+        }
+        self._write(generation, class_uri, shapes, previous, removed)
@@ -0,0 +1,228 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+import contextvars
+import json
+import logging
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+
+from redis import Redis, RedisError
+from redis.lock import Lock
+
+from heritrace.sparql import use_private_wrappers
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SHARED_CACHE_MAX_AGE = 60
+DEFAULT_SHARED_CACHE_LOCK_TIMEOUT = 300
+DEFAULT_SHARED_CACHE_WAIT_TIMEOUT = 5
+SHARED_CACHE_RETENTION = 86400
+SHARED_CACHE_POLL_INTERVAL = 0.1
+
+
+class SharedCache:
+    """Values computed by one worker and served to all of them, stored in Redis.
+
+    A value older than max_age is still served while a single worker, the one
+    that takes the refresh lock, recomputes it in a background thread. Only a
+    missing value makes a request wait: the worker holding the lock computes
+    it, and the others poll until it is published, for at most wait_timeout
+    seconds before serving their own last copy or computing it themselves. If
+    Redis cannot be reached, each worker falls back to its own copy of the
+    values. It uses the following Redis key patterns:
+    - shared_cache:value:{name} - Latest value and when it was computed
+    - shared_cache:lock:{name} - Lock of the worker computing the value, or
+    running the task, of that name
+    - shared_cache:run:{name} - Duration of the latest run of a task run once
+    for all the workers
+    """
+
+    def __init__(
+        self,
+        redis_client: Redis,  # type: ignore[type-arg]
+        max_age: float = DEFAULT_SHARED_CACHE_MAX_AGE,
+        lock_timeout: float = DEFAULT_SHARED_CACHE_LOCK_TIMEOUT,
+        wait_timeout: float = DEFAULT_SHARED_CACHE_WAIT_TIMEOUT,
+    ) -> None:
+        self.redis: Redis[str] = redis_client  # type: ignore[assignment]
+        self.max_age = max_age
+        self.lock_timeout = lock_timeout
+        self.wait_timeout = wait_timeout
+        self.value_prefix = "shared_cache:value:"
+        self.lock_prefix = "shared_cache:lock:"
+        self.run_prefix = "shared_cache:run:"
+        self._local: dict[str, tuple[Any, float]] = {}
+
+    def get(self, name: str, compute: Callable[[], Any]) -> Any:  # noqa: ANN401
+        """
+        Return a value, computing it only if no worker has published it yet.
+
+        Args:
+            name: Name of the value
+            compute: Computes the value, which must be JSON serialisable. A
+                refresh runs it in a copy of the caller's context.
+
+        Returns:
+            The latest published value, even if stale
+        """
+        deadline = time.monotonic() + self.wait_timeout
+        try:
+            while True:
+                entry = self._read(name)
+                if entry is not None:
+                    value, computed_at = entry
+                    if time.time() - computed_at >= self.max_age:
+                        self._refresh_in_background(name, compute)
+                    return value
+                lock = self._lock(name)
+                if lock.acquire(blocking=False):
+                    try:
+                        return self._compute(name, compute)
+                    finally:
+                        self._release(lock)
+                if time.monotonic() >= deadline:
+                    logger.warning(
+                        "Stopped waiting for another worker to compute %s", name
+                    )
+                    return self._get_last_local(name, compute)
+                time.sleep(SHARED_CACHE_POLL_INTERVAL)
+        except RedisError:
+            logger.exception("Error reading the shared cache entry %s", name)
+            return self._get_local(name, compute)
+
+    def refresh(self, name: str, compute: Callable[[], Any]) -> None:
+        """
+        Recompute a value in the background and publish it, whether stale or
+        not. Nothing happens if another worker is already recomputing it.
+        """
+        try:
+            self._refresh_in_background(name, compute)
+        except RedisError:
+            logger.exception("Error refreshing the shared cache entry %s", name)
+
+    def invalidate(self, name: str) -> None:
+        """Drop a value, so that the next read computes it again."""
+        self._local.pop(name, None)
+        try:
+            self.redis.delete(f"{self.value_prefix}{name}")
+        except RedisError:
+            logger.exception("Error invalidating the shared cache entry %s", name)
+
+    def run_once(self, name: str, task: Callable[[], object], validity: float) -> bool:
+        """
+        Run a task in a single worker, unless another one is running it or ran
+        it less than validity seconds ago.
+
+        Returns:
+            Whether the task ran in this worker
+        """
+        try:
+            if self.redis.exists(f"{self.run_prefix}{name}"):
+                return False
+            lock = self._lock(name)
+            if not lock.acquire(blocking=False):
+                return False
+        except RedisError:
+            logger.exception("Error coordinating the run of %s", name)
+            task()
+            return True
+
+        try:
+            started_at = time.monotonic()
+            task()
+            self.redis.set(
+                f"{self.run_prefix}{name}",
+                time.monotonic() - started_at,
+                ex=max(int(validity), 1),
+            )
+        except RedisError:
+            logger.exception("Error recording the run of %s", name)
+        finally:
+            self._release(lock)
+        return True
+
+    def last_run(self, name: str) -> float | None:
+        """Return how long the latest run of a task took, if still recorded."""
+        try:
+            duration = self.redis.get(f"{self.run_prefix}{name}")
+        except RedisError:
+            logger.exception("Error reading the run of %s", name)
+            return None
+        return float(duration) if duration is not None else None
+
+    def _read(self, name: str) -> tuple[Any, float] | None:
+        raw_entry = self.redis.get(f"{self.value_prefix}{name}")
+        if raw_entry is None:
+            return None
+        entry = json.loads(raw_entry)
+        self._local[name] = (entry["value"], entry["computed_at"])
+        return entry["value"], entry["computed_at"]
+
+    def _compute(self, name: str, compute: Callable[[], Any]) -> Any:  # noqa: ANN401
+        value = compute()
+        computed_at = time.time()
+        self._local[name] = (value, computed_at)
+        self.redis.set(
+            f"{self.value_prefix}{name}",
+            json.dumps({"value": value, "computed_at": computed_at}),
+            ex=SHARED_CACHE_RETENTION,
+        )
+        return value
+
+    def _get_local(self, name: str, compute: Callable[[], Any]) -> Any:  # noqa: ANN401
+        entry = self._local.get(name)
+        if entry is not None and time.time() - entry[1] < self.max_age:
+            return entry[0]
+        value = compute()
+        self._local[name] = (value, time.time())
+        return value
+
+    def _get_last_local(self, name: str, compute: Callable[[], Any]) -> Any:  # noqa: ANN401
+        entry = self._local.get(name)
+        if entry is not None:
+            return entry[0]
+        value = compute()
+        self._local[name] = (value, time.time())
+        return value
+
+    def _lock(self, name: str) -> Lock:
+        return self.redis.lock(
+            f"{self.lock_prefix}{name}", timeout=self.lock_timeout, blocking=False
+        )
+
+    def _release(self, lock: Lock) -> None:
+        try:
+            lock.release()
+        except RedisError:
+            logger.warning("Could not release the shared cache lock %s", lock.name)
+
+    def _refresh_in_background(self, name: str, compute: Callable[[], Any]) -> None:
+        lock = self._lock(name)
+        if not lock.acquire(blocking=False):
+            return
+        context = contextvars.copy_context()
+        threading.Thread(
+            target=context.run,
+            args=(self._refresh_holding, name, compute, lock),
+            name=f"heritrace-shared-cache-{name}",
+            daemon=True,
+        ).start()
+
+    def _refresh_holding(
+        self,
+        name: str,
+        compute: Callable[[], Any],
+        lock: Lock,
+    ) -> None:
+        # The refresh queries alongside the request thread.
+        use_private_wrappers()
+        try:
+            self._compute(name, compute)
+        except Exception:
+            logger.exception("Background refresh of %s failed", name)
+        finally:
+            self._release(lock)
@@ -0,0 +1,122 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+import json
+import logging
+from collections.abc import Iterable, Mapping
+
+from redis import Redis, RedisError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SNAPSHOT_CHECKPOINT_INTERVAL = 10
+DEFAULT_SNAPSHOT_CACHE_TTL = 604800
+
+
+class SnapshotCache:
+    """Checkpoints of the reconstructed past states of entities, stored in Redis.
+
+    Provenance is append-only, so the state of an entity at one of its
+    snapshots never changes once reconstructed. Only the states of every
+    checkpoint_interval-th snapshot of an entity, counting from its first, are
+    kept; the others are rebuilt from the nearest checkpoint preceding them.
+    A state is stored as the list of the N3 terms of its quads, as returned by
+    time-agnostic-library. It also holds the states of the related entities, so
+    every entity found as a subject records which checkpoints depend on it.
+    It uses the following Redis key patterns:
+    - snapshot_cache:{entity_uri} - Hash of the checkpoints of an entity by
+    snapshot URI
+    - snapshot_cache:related:{entity_uri} - Set of the other entities whose
+    checkpoints hold states of that entity
+    """
+
+    def __init__(
+        self,
+        redis_client: Redis,  # type: ignore[type-arg]
+        checkpoint_interval: int = DEFAULT_SNAPSHOT_CHECKPOINT_INTERVAL,
+        ttl: int = DEFAULT_SNAPSHOT_CACHE_TTL,
+    ) -> None:
+        self.redis: Redis[str] = redis_client  # type: ignore[assignment]
+        self.checkpoint_interval = max(checkpoint_interval, 1)
+        self.ttl = ttl
+        self.prefix = "snapshot_cache:"
+        self.related_prefix = "snapshot_cache:related:"
+
+    def checkpoint_before(self, index: int) -> int:
+        """Return the index of the checkpoint at or before a snapshot index."""
+        return index - index % self.checkpoint_interval
+
+    def is_checkpoint(self, index: int) -> bool:
+        """Tell whether the state of the snapshot at an index is kept."""
+        return index % self.checkpoint_interval == 0
+
+    def get_many(
+        self, entity_uri: str, snapshot_uris: Iterable[str]
+    ) -> dict[str, set[tuple[str, ...]]]:
+        """
+        Look up the checkpoints of an entity at some of its snapshots.
+
+        Returns:
+            The state of every snapshot found in the cache, by snapshot URI
+        """
+        snapshot_uris = list(snapshot_uris)
+        if not snapshot_uris:
+            return {}
+        try:
+            raw_states = self.redis.hmget(f"{self.prefix}{entity_uri}", snapshot_uris)
+        except RedisError:
+            logger.exception("Error reading the snapshots of %s", entity_uri)
+            return {}
+        return {
+            snapshot_uri: {tuple(quad) for quad in json.loads(raw_state)}
+            for snapshot_uri, raw_state in zip(snapshot_uris, raw_states, strict=True)
+            if raw_state is not None
+        }
+
+    def store(
+        self, entity_uri: str, states: Mapping[str, set[tuple[str, ...]]]
+    ) -> None:
+        """Store the checkpoints of an entity, by snapshot URI."""
+        if not states:
+            return
+        key = f"{self.prefix}{entity_uri}"
+        related_uris = {
+            quad[0][1:-1]
+            for state in states.values()
+            for quad in state
+            if quad[0].startswith("<") and quad[0] != f"<{entity_uri}>"
+        }
+        try:
+            pipe = self.redis.pipeline()
+            pipe.hset(
+                key,
+                mapping={
+                    snapshot_uri: json.dumps(sorted(state))
+                    for snapshot_uri, state in states.items()
+                },
+            )
+            pipe.expire(key, self.ttl)
+            for related_uri in sorted(related_uris):
+                related_key = f"{self.related_prefix}{related_uri}"
+                pipe.sadd(related_key, entity_uri)
+                pipe.expire(related_key, self.ttl)
+            pipe.execute()
+        except RedisError:
+            logger.exception("Error storing the snapshots of %s", entity_uri)
+
+    def invalidate(self, entity_uri: str) -> None:
+        """
+        Drop the checkpoints of an entity whose provenance was rewritten, and
+        those of the other entities that hold its states as a related entity.
+        """
+        related_key = f"{self.related_prefix}{entity_uri}"
+        try:
+            dependents = self.redis.smembers(related_key)
+            self.redis.delete(
+                f"{self.prefix}{entity_uri}",
+                related_key,
+                *(f"{self.prefix}{dependent}" for dependent in sorted(dependents)),
+            )
+        except RedisError:
+            logger.exception("Error invalidating the snapshots of %s", entity_uri)
@@ -2,14 +2,107 @@
 #
 # SPDX-License-Identifier: ISC
 
+import io
 import logging
+import os
+import threading
 import time
+import urllib.error
 from collections.abc import Iterator
+from dataclasses import dataclass, field
 from typing import TypedDict, cast
 
+import urllib3
 from rdflib.query import Result, ResultRow
-from SPARQLWrapper import POST, QueryResult, SPARQLWrapper
-from SPARQLWrapper.SPARQLExceptions import SPARQLWrapperException
+from SPARQLWrapper import DIGEST, POST, QueryResult, SPARQLWrapper
+from SPARQLWrapper.SPARQLExceptions import (
+    EndPointInternalError,
+    EndPointNotFound,
+    QueryBadFormed,
+    SPARQLWrapperException,
+    Unauthorized,
+    URITooLong,
+)
+
+DEFAULT_SPARQL_POOL_SIZE = 10
+
+_HTTP_ERRORS: dict[int, type[SPARQLWrapperException]] = {
+    400: QueryBadFormed,
+    401: Unauthorized,
+    404: EndPointNotFound,
+    414: URITooLong,
+    500: EndPointInternalError,
+}
+
+
+@dataclass(slots=True)
+class _ConnectionPool:
+    pool_size: int = DEFAULT_SPARQL_POOL_SIZE
+    manager: urllib3.PoolManager | None = None
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+_connection_pool = _ConnectionPool()
+
+
+def configure_sparql_connection_pool(pool_size: int) -> None:
+    """Set how many keep-alive connections each endpoint keeps per process."""
+    if pool_size < 1:
+        msg = "SPARQL_POOL_SIZE must be at least 1"
+        raise ValueError(msg)
+    with _connection_pool.lock:
+        if _connection_pool.manager is not None:
+            _connection_pool.manager.clear()
+            _connection_pool.manager = None
+        _connection_pool.pool_size = pool_size
+
+
+def _get_pool_manager() -> urllib3.PoolManager:
+    with _connection_pool.lock:
+        if _connection_pool.manager is None:
+            # Retries stay with SPARQLWrapperWithRetry, which backs off between
+            # attempts; the pool only reuses connections.
+            _connection_pool.manager = urllib3.PoolManager(
+                maxsize=_connection_pool.pool_size, retries=False
+            )
+        return _connection_pool.manager
+
+
+def _forget_inherited_connections() -> None:
+    # Sockets opened by the parent must not be shared with a forked worker.
+    _connection_pool.manager = None
+    _connection_pool.lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_forget_inherited_connections)
+
+_thread_wrappers = threading.local()
+
+
+class _PooledResponse:
+    """Expose a pooled urllib3 response through the urllib interface that
+    QueryResult reads from."""
+
+    def __init__(self, response: urllib3.BaseHTTPResponse, url: str) -> None:
+        self._body = io.BytesIO(response.data)
+        self._headers = response.headers
+        self._status = response.status
+        self._url = url
+
+    def read(self, amt: int | None = None) -> bytes:
+        return self._body.read(amt)
+
+    def info(self) -> urllib3.HTTPHeaderDict:
+        return self._headers
+
+    def geturl(self) -> str:
+        return self._url
+
+    def getcode(self) -> int:
+        return self._status
+
+    def __iter__(self) -> Iterator[bytes]:
+        return iter(self._body)
 
 
 class SPARQLWrapperWithRetry(SPARQLWrapper):
@@ -31,9 +124,55 @@ class SPARQLWrapperWithRetry(SPARQLWrapper):
         self.setTimeout(int(timeout))
         self.setMethod(POST)
 
+    def copy(self) -> "SPARQLWrapperWithRetry":
+        """Return a wrapper with the same endpoint, retry policy and credentials."""
+        clone = SPARQLWrapperWithRetry(
+            self.endpoint,
+            max_attempts=self.max_attempts,
+            initial_delay=self.initial_delay,
+            backoff_factor=self.backoff_factor,
+            timeout=self.timeout,
+        )
+        clone.updateEndpoint = self.updateEndpoint
+        clone.setMethod(self.method)
+        clone.setReturnFormat(self.returnFormat)
+        clone.setCredentials(self.user, self.passwd)
+        clone.setHTTPAuth(self.http_auth)
+        return clone
+
     def query(self) -> QueryResult:
         return self._query_with_retry()
 
+    def _query(self) -> tuple[_PooledResponse, str]:  # type: ignore[override]
+        # Digest authentication is negotiated by a urllib opener, so it keeps
+        # the original transport.
+        if self.user and self.passwd and self.http_auth == DIGEST:
+            return super()._query()  # type: ignore[return-value]
+
+        request = self._createRequest()
+        try:
+            response = _get_pool_manager().request(
+                request.get_method(),
+                request.full_url,
+                body=request.data,  # type: ignore[arg-type]
+                headers=dict(request.header_items()),
+                timeout=self.timeout or None,
+            )
+        except urllib3.exceptions.HTTPError as e:
+            raise urllib.error.URLError(e) from e
+
+        if response.status in _HTTP_ERRORS:
+            raise _HTTP_ERRORS[response.status](response.data)
+        if response.status >= 400:  # noqa: PLR2004
+            raise urllib.error.HTTPError(
+                request.full_url,
+                response.status,
+                response.reason or "",
+                response.headers,  # type: ignore[arg-type]
+                io.BytesIO(response.data),
+            )
+        return _PooledResponse(response, request.full_url), self.returnFormat
+
     def _query_with_retry(self) -> QueryResult:
         logger = logging.getLogger(__name__)
 
@@ -61,6 +200,30 @@ class SPARQLWrapperWithRetry(SPARQLWrapper):
         raise last_exception  # type: ignore[misc]
 
 
+def use_private_wrappers() -> None:
+    """Give the calling thread its own copy of every wrapper it resolves.
+
+    A wrapper holds the query it is about to send, so threads that query
+    alongside the request thread must not share the application's wrappers.
+    """
+    _thread_wrappers.copies = {}
+
+
+def resolve_thread_wrapper(
+    shared: SPARQLWrapperWithRetry,
+) -> SPARQLWrapperWithRetry:
+    copies: dict[int, tuple[SPARQLWrapperWithRetry, SPARQLWrapperWithRetry]] | None = (
+        getattr(_thread_wrappers, "copies", None)
+    )
+    if copies is None:
+        return shared
+    entry = copies.get(id(shared))
+    if entry is None or entry[0] is not shared:
+        entry = (shared, shared.copy())
+        copies[id(shared)] = entry
+    return entry[1]
+
+
 class _SparqlJsonResults(TypedDict):
     bindings: list[dict[str, dict[str, str]]]
 
@@ -40,7 +40,8 @@ const CatalogueInterface = ({
     currentPage: parseInt(getUrlParam('page', initialPage)),
     currentPerPage: parseInt(getUrlParam('per_page', initialPerPage)),
     sortProperty: getUrlParam('sort_property', initialSortProperty),
-    totalPages: initialTotalPages
+    totalPages: initialTotalPages,
+    nextCursor: null
   });
 
   if (state.classes.length === 0) {
@@ -83,6 +84,9 @@ const CatalogueInterface = ({
         sort_property: params.sortProperty || state.sortProperty,
         sort_direction: params.sortDirection || state.itemsSortDirection
       });
+      if (params.cursor) {
+        queryParams.set('cursor', params.cursor);
+      }
 
       const response = await fetch(`${apiEndpoint}?${queryParams}`);
       const data = await response.json();
@@ -95,7 +99,8 @@ const CatalogueInterface = ({
         currentPage: data.current_page,
         currentPerPage: data.per_page,
         sortProperty: data.sort_property || prev.sortProperty,
-        itemsSortDirection: data.sort_direction || prev.itemsSortDirection
+        itemsSortDirection: data.sort_direction || prev.itemsSortDirection,
+        nextCursor: data.next_cursor || null
       }));
 
       updateUrl({
@@ -134,7 +139,10 @@ const CatalogueInterface = ({
 
   const handlePageChange = (page) => {
     if (page === state.currentPage) return;
-    fetchData({ page });
+    // Moving forward one page seeks from the last entity shown instead of
+    // skipping every earlier entity again.
+    const cursor = page === state.currentPage + 1 ? state.nextCursor : null;
+    fetchData({ page, cursor });
   };
 
   const handlePerPageChange = (perPage) => {
@@ -1,12 +1,20 @@
-// SPDX-FileCopyrightText: 2024 Arcangelo Massari <arcangelo.massari@unibo.it>
+// SPDX-FileCopyrightText: 2024-2026 Arcangelo Massari <arcangelo.massari@unibo.it>
 //
 // SPDX-License-Identifier: ISC
 
 import React, { useEffect } from 'react';
 
+const EVENT_ID_PREFIX = 'snapshot-';
+
 function EntityTimeline({ timelineData }) {
   useEffect(() => {
-    new TL.Timeline('timeline-container', {
+    const { eventsUrl, pageSize, loadedEvents } = timelineData;
+    const requestedOffsets = new Set();
+    for (let offset = 0; offset < loadedEvents; offset += pageSize) {
+      requestedOffsets.add(offset);
+    }
+
+    const timeline = new TL.Timeline('timeline-container', {
       events: timelineData.events.map((event, index, array) => {
         if (index === array.length - 1 && event.end_date === "Present") {
           return {
@@ -20,6 +28,48 @@ function EntityTimeline({ timelineData }) {
       })
     });
 
+    // Only the first events come with their text: the others are rendered by
+    // the server one window at a time, when the timeline reaches them.
+    const loadWindow = (index) => {
+      const offset = Math.floor(index / pageSize) * pageSize;
+      if (requestedOffsets.has(offset)) {
+        return;
+      }
+      requestedOffsets.add(offset);
+
+      fetch(`${eventsUrl}?offset=${offset}&limit=${pageSize}`)
+        .then(response => {
+          if (!response.ok) {
+            throw new Error(`HTTP ${response.status}`);
+          }
+          return response.json();
+        })
+        .then(({ events }) => {
+          events.forEach(({ unique_id: uniqueId, text }) => {
+            const data = timeline.getDataById(uniqueId);
+            if (data) {
+              data.text.text = text;
+            }
+            const content = document
+              .getElementById(uniqueId)
+              ?.querySelector('.tl-text-content');
+            if (content) {
+              content.innerHTML = text;
+            }
+          });
+        })
+        .catch(error => {
+          requestedOffsets.delete(offset);
+          console.error('Error loading the history events:', error);
+        });
+    };
+
+    timeline.on('change', ({ unique_id: uniqueId }) => {
+      if (uniqueId && uniqueId.startsWith(EVENT_ID_PREFIX)) {
+        loadWindow(Number(uniqueId.slice(EVENT_ID_PREFIX.length)));
+      }
+    });
+
     return () => {
       const container = document.getElementById('timeline-container');
       if (container) {
@@ -35,4 +85,4 @@ function EntityTimeline({ timelineData }) {
   );
 }
 
-export default EntityTimeline
\ No newline at end of file
+export default EntityTimeline
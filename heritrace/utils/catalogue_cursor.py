@@ -0,0 +1,202 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+"""
+Keyset pagination of the catalogue.
+
+A page is located by the (sortValue, subject) pair of the last entity of the
+previous page rather than by an OFFSET, so the triplestore does not have to
+walk every preceding entity again and deep pages cost as much as the first.
+Cursors are opaque to clients: they carry the position together with a
+fingerprint of the listing they belong to, so that a cursor taken with one
+class or ordering is never applied to another.
+"""
+
+import base64
+import binascii
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import cast
+
+from rdflib import Literal, URIRef
+from rdflib.util import from_n3
+
+CURSOR_MEMO_TTL_SECONDS = 300
+CURSOR_MEMO_MAX_ENTRIES = 4096
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+@dataclass(frozen=True, slots=True)
+class CatalogueListing:
+    selected_class: str
+    selected_shape: str | None
+    sort_property: str | None
+    descending: bool
+    lexical_sort: bool = True
+    """Whether sort values are ranked by their lexical form rather than by
+    their typed value, as numbers and dates are."""
+
+    @property
+    def sort_expression(self) -> str:
+        # Entities without a sort value rank as an empty string, which also
+        # keeps the expression from failing on them.
+        return 'COALESCE(STR(?sortValue), "")' if self.lexical_sort else "?sortValue"
+
+    def fingerprint(self) -> str:
+        identity = json.dumps(
+            [
+                self.selected_class,
+                self.selected_shape,
+                self.sort_property,
+                self.descending,
+                self.lexical_sort,
+            ]
+        )
+        return hashlib.sha256(identity.encode("utf-8")).hexdigest()[:16]
+
+
+@dataclass(frozen=True, slots=True)
+class CatalogueCursor:
+    subject: str
+    sort_value: str | None = None
+    """N3 form of the sort value, or None when the entity has none."""
+
+
+def cursor_from_binding(
+    binding: dict[str, dict[str, str]], listing: CatalogueListing
+) -> CatalogueCursor:
+    sort_binding = binding.get("sortValue") if listing.sort_property else None
+    return CatalogueCursor(
+        subject=binding["subject"]["value"],
+        sort_value=_binding_n3(sort_binding) if sort_binding else None,
+    )
+
+
+def _binding_n3(binding: dict[str, str]) -> str:
+    if binding.get("type") in {"uri", "bnode"}:
+        return URIRef(binding["value"]).n3()
+    if "datatype" in binding:
+        return Literal(binding["value"], datatype=URIRef(binding["datatype"])).n3()
+    return Literal(binding["value"], lang=binding.get("xml:lang")).n3()
+
+
+def encode_cursor(cursor: CatalogueCursor, listing: CatalogueListing) -> str:
+    payload = json.dumps(
+        [listing.fingerprint(), cursor.subject, cursor.sort_value],
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(token: str, listing: CatalogueListing) -> CatalogueCursor:
+    """
+    Decode a cursor issued for the same listing.
+
+    Raises:
+        InvalidCursorError: If the cursor is malformed or belongs to another listing
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token.encode("ascii")))
+    except (binascii.Error, UnicodeError, ValueError) as e:
+        msg = "Malformed catalogue cursor"
+        raise InvalidCursorError(msg) from e
+    match payload:
+        case [str() as fingerprint, str() as subject, str() | None as sort_value]:
+            pass
+        case _:
+            msg = "Malformed catalogue cursor"
+            raise InvalidCursorError(msg)
+    if fingerprint != listing.fingerprint():
+        msg = "Catalogue cursor does not match the requested listing"
+        raise InvalidCursorError(msg)
+    return CatalogueCursor(subject=subject, sort_value=sort_value)
+
+
+def build_order_clause(listing: CatalogueListing) -> str:
+    direction = "DESC" if listing.descending else "ASC"
+    if listing.sort_property:
+        return f"ORDER BY {direction}({listing.sort_expression}) {direction}(?subject)"
+    return f"ORDER BY {direction}(?subject)"
+
+
+def build_keyset_filter(cursor: CatalogueCursor, listing: CatalogueListing) -> str:
+    """
+    Build the FILTER that keeps the entities ordered after the cursor.
+
+    The comparisons mirror build_order_clause, and ties are broken by subject
+    IRI, which SPARQL orders by its string form.
+    """
+    after = "<" if listing.descending else ">"
+    subject_after = f"STR(?subject) {after} {Literal(cursor.subject).n3()}"
+    if not listing.sort_property:
+        return f"FILTER({subject_after})"
+
+    expression = listing.sort_expression
+    if listing.lexical_sort:
+        lexical_value = str(from_n3(cursor.sort_value)) if cursor.sort_value else ""
+        value = Literal(lexical_value).n3()
+        return (
+            f"FILTER({expression} {after} {value}"
+            f" || ({expression} = {value} && {subject_after}))"
+        )
+
+    # Typed values cannot be compared with a missing one, so entities without
+    # a sort value are handled apart: SPARQL ranks them before any value.
+    if cursor.sort_value is None:
+        unbound_after = f"(!BOUND(?sortValue) && {subject_after})"
+        if listing.descending:
+            return f"FILTER{unbound_after}"
+        return f"FILTER({unbound_after} || BOUND(?sortValue))"
+    value = cast("Literal", from_n3(cursor.sort_value)).n3()
+    bound_after = (
+        f"({expression} {after} {value} || ({expression} = {value} && {subject_after}))"
+    )
+    if listing.descending:
+        return f"FILTER(!BOUND(?sortValue) || {bound_after})"
+    return f"FILTER(BOUND(?sortValue) && {bound_after})"
+
+
+@dataclass(slots=True)
+class _CursorMemo:
+    entries: OrderedDict[tuple[str, int, int], tuple[str, float]] = field(
+        default_factory=OrderedDict
+    )
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+_cursor_memo = _CursorMemo()
+
+
+def remember_page_cursor(
+    listing: CatalogueListing, per_page: int, page: int, token: str
+) -> None:
+    """Remember where a page starts, so that asking for it by number seeks."""
+    key = (listing.fingerprint(), per_page, page)
+    with _cursor_memo.lock:
+        _cursor_memo.entries[key] = (token, time.monotonic())
+        _cursor_memo.entries.move_to_end(key)
+        while len(_cursor_memo.entries) > CURSOR_MEMO_MAX_ENTRIES:
+            _cursor_memo.entries.popitem(last=False)
+
+
+def recall_page_cursor(
+    listing: CatalogueListing, per_page: int, page: int
+) -> str | None:
+    key = (listing.fingerprint(), per_page, page)
+    with _cursor_memo.lock:
+        entry = _cursor_memo.entries.get(key)
+        if entry is None:
+            return None
+        token, remembered_at = entry
+        if time.monotonic() - remembered_at >= CURSOR_MEMO_TTL_SECONDS:
+            del _cursor_memo.entries[key]
+            return None
+        return token
@@ -26,6 +26,28 @@ _MAX_HOUR = 23
 _MAX_MINUTE = 59
 _MAX_SECOND = 60
 
+_DURATION_PATTERN = re.compile(
+    r"^P(?=\d|T\d)(?:(\d+)Y)?(?:(\d+)M)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+(?:\.\d+?)?)S)?)?$"
+)
+_DAY_TIME_DURATION_PATTERN = re.compile(
+    r"^P(?:\d+D)?(?:T(?:\d+H)?(?:\d+M)?(?:\d+(?:\.\d+)?S)?)?$"
+)
+_YEAR_MONTH_DURATION_PATTERN = re.compile(r"^P(?:\d+Y)?(?:\d+M)?$")
+_G_YEAR_MONTH_PATTERN = re.compile(r"^(\d{4})-(\d{2})$")
+_G_YEAR_PATTERN = re.compile(r"^\d{4}$")
+_DATE_TIME_PATTERN = re.compile(
+    r"^-?\d{4,}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(?:\.\d+)?(?:Z|[+-]\d{2}:\d{2})?$"
+)
+_DATE_TIME_STAMP_PATTERN = re.compile(
+    r"^-?\d{4,}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(?:\.\d+)?(Z|[+-]\d{2}:\d{2})$"
+)
+_TIME_PATTERN = re.compile(r"^([01]\d|2[0-3]):?([0-5]\d):?([0-5]\d)$")
+_TIMEZONE_OFFSET_PATTERN = re.compile(r"^[+-]\d{2}:\d{2}$")
+_QNAME_PATTERN = re.compile(r"^(?:[a-zA-Z_][\w.-]*:)?[a-zA-Z_][\w.-]*$")
+_NCNAME_PATTERN = re.compile(r"^[a-zA-Z_][\w.-]*$")
+_NMTOKEN_PATTERN = re.compile(r"^[\w.-]+$")
+_NAME_PATTERN = re.compile(r"^[a-zA-Z_:][\w.-]*$")
+
 
 def validate_string(value: str) -> bool:
     try:
@@ -172,34 +194,28 @@ def validate_decimal(value: str) -> bool:
 
 def validate_duration(value: str) -> bool:
     try:
-        duration_pattern = re.compile(
-            r"^P(?=\d|T\d)(?:(\d+)Y)?(?:(\d+)M)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+(?:\.\d+?)?)S)?)?$"
-        )
-        return bool(duration_pattern.match(value))
+        return bool(_DURATION_PATTERN.match(value))
     except TypeError:
         return False
 
 
 def validate_day_time_duration(value: str) -> bool:
     try:
-        pattern = re.compile(r"^P(?:\d+D)?(?:T(?:\d+H)?(?:\d+M)?(?:\d+(?:\.\d+)?S)?)?$")
-        return bool(pattern.match(value))
+        return bool(_DAY_TIME_DURATION_PATTERN.match(value))
     except TypeError:
         return False
 
 
 def validate_year_month_duration(value: str) -> bool:
     try:
-        pattern = re.compile(r"^P(?:\d+Y)?(?:\d+M)?$")
-        return bool(pattern.match(value))
+        return bool(_YEAR_MONTH_DURATION_PATTERN.match(value))
     except TypeError:
         return False
 
 
 def validate_g_year_month(value: str) -> bool:
     try:
-        pattern = re.compile(r"^(\d{4})-(\d{2})$")
-        match = pattern.match(value)
+        match = _G_YEAR_MONTH_PATTERN.match(value)
     except TypeError:
         return False
     else:
@@ -211,8 +227,7 @@ def validate_g_year_month(value: str) -> bool:
 
 def validate_g_year(value: str) -> bool:
     try:
-        pattern = re.compile(r"^\d{4}$")
-        match = pattern.match(value)
+        match = _G_YEAR_PATTERN.match(value)
     except TypeError:
         return False
     else:
@@ -224,20 +239,14 @@ def validate_g_year(value: str) -> bool:
 
 def validate_date_time(value: str) -> bool:
     try:
-        pattern = re.compile(
-            r"^-?\d{4,}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(?:\.\d+)?(?:Z|[+-]\d{2}:\d{2})?$"
-        )
-        return bool(pattern.match(value))
+        return bool(_DATE_TIME_PATTERN.match(value))
     except TypeError:
         return False
 
 
 def validate_date_time_stamp(value: str) -> bool:
     try:
-        pattern = re.compile(
-            r"^-?\d{4,}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(?:\.\d+)?(Z|[+-]\d{2}:\d{2})$"
-        )
-        return bool(pattern.match(value))
+        return bool(_DATE_TIME_STAMP_PATTERN.match(value))
     except TypeError:
         return False
 
@@ -253,7 +262,7 @@ def validate_date(value: str) -> bool:
 
 def validate_time(value: str) -> bool:
     try:
-        return bool(re.match(r"^([01]\d|2[0-3]):?([0-5]\d):?([0-5]\d)$", value))
+        return bool(_TIME_PATTERN.match(value))
     except TypeError:
         return False
 
@@ -281,8 +290,7 @@ def validate_second(value: str) -> bool:
 
 def validate_timezone_offset(value: str) -> bool:
     try:
-        pattern = re.compile(r"^[+-]\d{2}:\d{2}$")
-        return bool(pattern.match(value))
+        return bool(_TIMEZONE_OFFSET_PATTERN.match(value))
     except TypeError:
         return False
 
@@ -322,8 +330,7 @@ def validate_url(value: str) -> bool:
 
 def validate_qname(value: str) -> bool:
     try:
-        pattern = re.compile(r"^(?:[a-zA-Z_][\w.-]*:)?[a-zA-Z_][\w.-]*$")
-        return bool(pattern.match(value))
+        return bool(_QNAME_PATTERN.match(value))
     except TypeError:
         return False
 
@@ -331,7 +338,7 @@ def validate_qname(value: str) -> bool:
 def validate_entities(value: str) -> bool:
     try:
         entities = value.split()
-        return all(re.match(r"^[a-zA-Z_][\w.-]*$", entity) for entity in entities)
+        return all(_NCNAME_PATTERN.match(entity) for entity in entities)
     except (TypeError, AttributeError):
         return False
 
@@ -341,7 +348,7 @@ validate_entity = validate_entities
 
 def validate_id(value: str) -> bool:
     try:
-        return re.match(r"^[a-zA-Z_][\w.-]*$", value) is not None
+        return _NCNAME_PATTERN.match(value) is not None
     except TypeError:
         return False
 
@@ -353,7 +360,7 @@ validate_ncname = validate_id
 
 def validate_nmtoken(value: str) -> bool:
     try:
-        return re.match(r"^[\w.-]+$", value) is not None
+        return _NMTOKEN_PATTERN.match(value) is not None
     except TypeError:
         return False
 
@@ -361,7 +368,7 @@ def validate_nmtoken(value: str) -> bool:
 def validate_nmtokens(value: str) -> bool:
     try:
         tokens = value.split()
-        return all(re.match(r"^[\w.-]+$", token) for token in tokens)
+        return all(_NMTOKEN_PATTERN.match(token) for token in tokens)
     except (TypeError, AttributeError):
         return False
 
@@ -371,6 +378,6 @@ validate_notation = validate_qname
 
 def validate_name(value: str) -> bool:
     try:
-        return re.match(r"^[a-zA-Z_:][\w.-]*$", value) is not None
+        return _NAME_PATTERN.match(value) is not None
     except TypeError:
         return False
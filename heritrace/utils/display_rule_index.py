@@ -0,0 +1,168 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+"""
+The display rules compiled into dictionaries.
+
+Labels, ordering, sorting and visibility all start by looking up the display
+rule of a (class, shape) pair, often thousands of times per page. Scanning the
+list of rules on each lookup is replaced by a DisplayRuleIndex, built once per
+list of rules, which keeps the rules targeting both a class and a shape, only a
+class and only a shape in separate tables, with their priorities resolved.
+display_rule_index_for compiles the index of a list of rules on first use and
+returns the same index afterwards. The index is keyed by the list itself, and
+the configured rules are a new list every time they are loaded, so a list of
+rules must not be changed in place: whoever changes one drops its index with
+forget_display_rule_index.
+"""
+
+import heapq
+import threading
+from collections import OrderedDict
+from collections.abc import Iterable
+from dataclasses import dataclass
+from types import MappingProxyType
+
+# Bounds the indexes kept for lists of rules other than the configured one.
+MAX_COMPILED_INDEXES = 8
+
+
+@dataclass(frozen=True, slots=True)
+class _RuleEntry:
+    """A rule targeting only a class or only a shape."""
+
+    position: int
+    priority: float
+    targets_class: bool
+    rule: dict
+
+    def __lt__(self, other: "_RuleEntry") -> bool:
+        return self.position < other.position
+
+
+def _select(entries: Iterable[_RuleEntry]) -> dict | None:
+    """
+    Choose among the class and shape rules matching a pair, in list order.
+
+    The scan mirrors the original one: a rule replaces the current match of its
+    kind when it has a lower priority than the last rule chosen of either kind,
+    and a shape rule wins a tie with a class rule.
+    """
+    class_match: _RuleEntry | None = None
+    shape_match: _RuleEntry | None = None
+    highest_priority = float("inf")
+    for entry in entries:
+        if entry.targets_class:
+            if class_match is None or entry.priority < highest_priority:
+                class_match = entry
+                highest_priority = entry.priority
+        elif shape_match is None or entry.priority < highest_priority:
+            shape_match = entry
+            highest_priority = entry.priority
+
+    if shape_match and (
+        class_match is None or shape_match.priority <= class_match.priority
+    ):
+        return shape_match.rule
+    if class_match:
+        return class_match.rule
+    return None
+
+
+class DisplayRuleIndex:
+    """Lookup tables over a list of display rules."""
+
+    __slots__ = ("_best_by_class", "_best_by_shape", "_by_class", "_by_shape", "_exact")
+
+    def __init__(self, rules: list[dict]) -> None:
+        exact: dict[tuple[str, str], dict] = {}
+        by_class: dict[str, list[_RuleEntry]] = {}
+        by_shape: dict[str, list[_RuleEntry]] = {}
+        for position, rule in enumerate(rules):
+            target = rule.get("target", {})
+            priority = rule.get("priority", 0)
+            if "class" in target and "shape" in target:
+                exact.setdefault((target["class"], target["shape"]), rule)
+            elif "class" in target:
+                by_class.setdefault(target["class"], []).append(
+                    _RuleEntry(position, priority, targets_class=True, rule=rule)
+                )
+            elif "shape" in target:
+                by_shape.setdefault(target["shape"], []).append(
+                    _RuleEntry(position, priority, targets_class=False, rule=rule)
+                )
+
+        self._exact = MappingProxyType(exact)
+        self._by_class = MappingProxyType(
+            {key: tuple(entries) for key, entries in by_class.items()}
+        )
+        self._by_shape = MappingProxyType(
+            {key: tuple(entries) for key, entries in by_shape.items()}
+        )
+        self._best_by_class = MappingProxyType(
+            {key: _select(entries) for key, entries in by_class.items()}
+        )
+        self._best_by_shape = MappingProxyType(
+            {key: _select(entries) for key, entries in by_shape.items()}
+        )
+
+    def match(self, class_uri: str | None, shape_uri: str | None) -> dict | None:
+        """
+        Return the rule of a class and/or shape, as find_matching_rule defines it.
+
+        A rule targeting both the class and the shape comes first. Otherwise the
+        rules targeting only the class or only the shape compete on priority.
+        """
+        class_key = str(class_uri) if class_uri else None
+        shape_key = str(shape_uri) if shape_uri else None
+        if class_key and shape_key:
+            rule = self._exact.get((class_key, shape_key))
+            if rule is not None:
+                return rule
+
+        class_entries = self._by_class.get(class_key, ()) if class_key else ()
+        shape_entries = self._by_shape.get(shape_key, ()) if shape_key else ()
+        if not shape_entries:
+            return self._best_by_class.get(class_key) if class_entries else None
+        if not class_entries:
+            return self._best_by_shape.get(shape_key)
+        return _select(heapq.merge(class_entries, shape_entries))
+
+
+@dataclass(slots=True)
+class _CompiledIndexes:
+    indexes: OrderedDict[int, tuple[list[dict], DisplayRuleIndex]]
+    lock: threading.Lock
+
+
+_compiled_indexes = _CompiledIndexes(OrderedDict(), threading.Lock())
+
+
+def display_rule_index_for(rules: list[dict]) -> DisplayRuleIndex:
+    """
+    Return the index of a list of display rules, compiling it on first use.
+
+    Lists cannot be weakly referenced, so the indexes are keyed by the identity
+    of the list and keep it alive. Only the last MAX_COMPILED_INDEXES lists are
+    kept.
+    """
+    entry = _compiled_indexes.indexes.get(id(rules))
+    if entry is not None and entry[0] is rules:
+        return entry[1]
+    with _compiled_indexes.lock:
+        entry = _compiled_indexes.indexes.get(id(rules))
+        if entry is None or entry[0] is not rules:
+            entry = (rules, DisplayRuleIndex(rules))
+            _compiled_indexes.indexes[id(rules)] = entry
+            while len(_compiled_indexes.indexes) > MAX_COMPILED_INDEXES:
+                _compiled_indexes.indexes.popitem(last=False)
+        return entry[1]
+
+
+def forget_display_rule_index(rules: list[dict]) -> None:
+    """Drop the index of a list of rules, so that it is compiled again."""
+    with _compiled_indexes.lock:
+        entry = _compiled_indexes.indexes.get(id(rules))
+        if entry is not None and entry[0] is rules:
+            del _compiled_indexes.indexes[id(rules)]
@@ -6,8 +6,8 @@ from __future__ import annotations
 
 import logging
 from collections import OrderedDict
-from dataclasses import dataclass
-from typing import TYPE_CHECKING
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, TypeVar
 from urllib.parse import unquote
 
 from pyparsing.exceptions import ParseException
@@ -22,12 +22,44 @@ from heritrace.extensions import (
     get_form_fields,
     get_sparql,
     get_sparql_bindings,
-    select_results,
 )
+from heritrace.sparql import select_results
+from heritrace.utils.display_rule_index import display_rule_index_for
+from heritrace.utils.query_executor import run_concurrently, runs_concurrently
 
 if TYPE_CHECKING:
+    from collections.abc import Callable
+
     from rdflib.query import ResultRow
 
+    from heritrace.utils.snapshot_graph import SnapshotGraph
+
+T = TypeVar("T")
+
+
+@dataclass(slots=True)
+class LiveQueryResults:
+    """Results of the queries of a live entity, fetched ahead of grouping."""
+
+    values: dict[tuple[str, str, str], tuple[str | None, str | None]] = field(
+        default_factory=dict
+    )
+    virtual_entities: dict[tuple[str, str | None], list[str]] = field(
+        default_factory=dict
+    )
+    orderings: dict[tuple[str, str | None], list[dict[str, dict[str, str]]]] = field(
+        default_factory=dict
+    )
+
+
+@dataclass(slots=True)
+class _LiveQueryKeys:
+    values: dict[tuple[str, str, str], None] = field(default_factory=dict)
+    virtual_configs: dict[tuple[str, str | None], list[dict]] = field(
+        default_factory=dict
+    )
+    orderings: dict[tuple[str, str | None], None] = field(default_factory=dict)
+
 
 @dataclass(slots=True)
 class GroupingContext:
@@ -36,9 +68,10 @@ class GroupingContext:
     grouped_triples: OrderedDict
     fetched_values_map: dict[str, str]
     relevant_properties: set
-    historical_snapshot: Graph | None
+    historical_snapshot: Graph | SnapshotGraph | None
     highest_priority_class: str | None
     highest_priority_shape: str | None
+    live_results: LiveQueryResults = field(default_factory=LiveQueryResults)
 
 
 _SUBJECT_LABEL_PAIR_LENGTH = 2
@@ -94,7 +127,8 @@ def find_matching_rule(
 ) -> dict | None:
     """
     Find the most appropriate rule for a given class and/or shape.
-    At least one of class_uri or shape_uri must be provided.
+    At least one of class_uri or shape_uri must be provided. The rules are
+    looked up in their compiled DisplayRuleIndex rather than scanned.
 
     Args:
         class_uri: Optional URI of the class
@@ -109,60 +143,7 @@ def find_matching_rule(
     if not rules:
         return None
 
-    # Initialize variables to track potential matches
-    class_match = None
-    shape_match = None
-    highest_priority = float("inf")
-
-    # Scan all rules to find the best match based on priority
-    for rule in rules:
-        rule_priority = rule.get("priority", 0)
-
-        # Case 1: Both class and shape match (exact match)
-        if (
-            class_uri
-            and shape_uri
-            and "class" in rule["target"]
-            and rule["target"]["class"] == str(class_uri)
-            and "shape" in rule["target"]
-            and rule["target"]["shape"] == str(shape_uri)
-        ):
-            # Exact match always takes highest precedence
-            return rule
-
-        # Case 2: Only class matches
-        if (
-            class_uri
-            and "class" in rule["target"]
-            and rule["target"]["class"] == str(class_uri)
-            and "shape" not in rule["target"]
-        ):
-            if class_match is None or rule_priority < highest_priority:
-                class_match = rule
-                highest_priority = rule_priority
-
-        # Case 3: Only shape matches
-        elif (
-            shape_uri
-            and "shape" in rule["target"]
-            and rule["target"]["shape"] == str(shape_uri)
-            and "class" not in rule["target"]
-        ) and (shape_match is None or rule_priority < highest_priority):
-            shape_match = rule
-            highest_priority = rule_priority
-
-    # Return the best match based on priority
-    # Shape rules typically have higher specificity,
-    # so prefer them if they have equal priority
-    if shape_match and (
-        class_match is None
-        or shape_match.get("priority", 0) <= class_match.get("priority", 0)
-    ):
-        return shape_match
-    if class_match:
-        return class_match
-
-    return None
+    return display_rule_index_for(rules).match(class_uri, shape_uri)
 
 
 def get_class_priority(entity_key: tuple[str, str | None]) -> float:
@@ -454,13 +435,7 @@ def _process_property_with_simple_config(
         )
 
 
-def _process_property_with_display_rules(
-    prop_uri: str,
-    matching_rule: dict,
-    matching_form_field: dict | None,
-    ctx: GroupingContext,
-) -> None:
-    current_prop_config = None
+def _find_property_config(matching_rule: dict, prop_uri: str) -> dict | None:
     for prop_config in matching_rule.get("displayProperties", []):
         config_identifier = (
             prop_config.get("displayName")
@@ -468,8 +443,17 @@ def _process_property_with_display_rules(
             else prop_config.get("property")
         )
         if config_identifier == prop_uri:
-            current_prop_config = prop_config
-            break
+            return prop_config
+    return None
+
+
+def _process_property_with_display_rules(
+    prop_uri: str,
+    matching_rule: dict,
+    matching_form_field: dict | None,
+    ctx: GroupingContext,
+) -> None:
+    current_prop_config = _find_property_config(matching_rule, prop_uri)
 
     current_form_field = (
         matching_form_field.get(prop_uri) if matching_form_field else None
@@ -507,7 +491,7 @@ def get_grouped_triples(
     subject: URIRef,
     triples: list[tuple[URIRef, URIRef, URIRef | Literal]],
     valid_predicates_info: list[str],
-    historical_snapshot: Graph | None = None,
+    historical_snapshot: Graph | SnapshotGraph | None = None,
     entity_key: tuple[str | None, str | None] = (None, None),
 ) -> tuple[OrderedDict, set]:
     highest_priority_class, highest_priority_shape = entity_key
@@ -550,6 +534,14 @@ def get_grouped_triples(
         if prop_uri not in ordered_properties:
             ordered_properties.append(prop_uri)
 
+    if (
+        display_rules
+        and matching_rule
+        and not historical_snapshot
+        and runs_concurrently()
+    ):
+        _prefetch_live_queries(ctx, matching_rule, ordered_properties)
+
     for prop_uri in ordered_properties:
         if display_rules and matching_rule:
             _process_property_with_display_rules(
@@ -574,6 +566,107 @@ def get_grouped_triples(
     return ctx.grouped_triples, ctx.relevant_properties
 
 
+def _collect_live_query_keys(
+    ctx: GroupingContext, matching_rule: dict, ordered_properties: list[str]
+) -> _LiveQueryKeys:
+    subject = str(ctx.subject)
+    keys = _LiveQueryKeys()
+    for prop_uri in ordered_properties:
+        prop_config = _find_property_config(matching_rule, prop_uri)
+        if prop_config is None:
+            continue
+        if prop_config.get("isVirtual"):
+            reference = _virtual_property_reference(prop_config)
+            if reference:
+                keys.virtual_configs.setdefault(reference, []).append(prop_config)
+            continue
+        if "orderedBy" in prop_config:
+            keys.orderings[(prop_config["property"], prop_config["orderedBy"])] = None
+        objects = [
+            str(triple[2]) for triple in ctx.triples if str(triple[1]) == prop_uri
+        ]
+        for rule in prop_config.get("displayRules", [prop_config]):
+            query = rule.get("fetchValueFromQuery")
+            if query:
+                keys.values.update(
+                    dict.fromkeys((query, subject, obj) for obj in objects)
+                )
+    return keys
+
+
+def _prefetch_live_queries(
+    ctx: GroupingContext, matching_rule: dict, ordered_properties: list[str]
+) -> None:
+    """
+    Run the queries that grouping would issue one by one all at once.
+
+    The values shown through fetchValueFromQuery, the entities behind virtual
+    properties and the order of ordered properties do not depend on each
+    other, so they are fetched concurrently. Values of virtual properties need
+    their entities first and are fetched in a second round.
+    """
+    keys = _collect_live_query_keys(ctx, matching_rule, ordered_properties)
+    results = ctx.live_results
+    virtual_keys = list(keys.virtual_configs)
+    fetched = run_concurrently(
+        [
+            *(
+                _bind_task(execute_sparql_query, query, subject, value)
+                for query, subject, value in keys.values
+            ),
+            *(
+                _bind_task(_fetch_virtual_property_entities, *key, ctx)
+                for key in virtual_keys
+            ),
+            *(
+                _bind_task(_fetch_order_results, ctx, prop_uri, order_property)
+                for prop_uri, order_property in keys.orderings
+            ),
+        ]
+    )
+    values_end = len(keys.values)
+    virtual_end = values_end + len(virtual_keys)
+    results.values.update(zip(keys.values, fetched[:values_end], strict=True))
+    results.virtual_entities.update(
+        zip(virtual_keys, fetched[values_end:virtual_end], strict=True)
+    )
+    results.orderings.update(zip(keys.orderings, fetched[virtual_end:], strict=True))
+
+    virtual_value_keys = {
+        (prop_config["fetchValueFromQuery"], str(ctx.subject), entity_uri): None
+        for key, prop_configs in keys.virtual_configs.items()
+        for prop_config in prop_configs
+        if prop_config.get("fetchValueFromQuery")
+        for entity_uri in results.virtual_entities[key]
+    }
+    pending = [key for key in virtual_value_keys if key not in results.values]
+    results.values.update(
+        zip(
+            pending,
+            run_concurrently(
+                [
+                    _bind_task(execute_sparql_query, query, subject, value)
+                    for query, subject, value in pending
+                ]
+            ),
+            strict=True,
+        )
+    )
+
+
+def _bind_task(function: Callable[..., T], *args: object) -> Callable[[], T]:
+    return lambda: function(*args)
+
+
+def _execute_live_query(
+    ctx: GroupingContext, query: str, value: str
+) -> tuple[str | None, str | None]:
+    key = (query, str(ctx.subject), value)
+    if key in ctx.live_results.values:
+        return ctx.live_results.values[key]
+    return execute_sparql_query(query, str(ctx.subject), value)
+
+
 def process_display_rule(
     display_name: str,
     prop_uri: str,
@@ -601,8 +694,8 @@ def process_display_rule(
                         ctx.historical_snapshot,
                     )
                 else:
-                    result, external_entity = execute_sparql_query(
-                        rule["fetchValueFromQuery"], ctx.subject, triple[2]
+                    result, external_entity = _execute_live_query(
+                        ctx, rule["fetchValueFromQuery"], str(triple[2])
                     )
                 if result:
                     ctx.fetched_values_map[str(result)] = str(triple[2])
@@ -647,6 +740,10 @@ def _fetch_virtual_property_entities(
     target_class: str | None,
     ctx: GroupingContext,
 ) -> list[str]:
+    prefetched = ctx.live_results.virtual_entities.get((reference_field, target_class))
+    if prefetched is not None and not ctx.historical_snapshot:
+        return prefetched
+
     decoded_subject = unquote(str(ctx.subject))
 
     query = f"""
@@ -702,8 +799,8 @@ def _build_virtual_property_triples(
                 ctx.historical_snapshot,
             )
         else:
-            result, external_entity = execute_sparql_query(
-                prop_config["fetchValueFromQuery"], str(ctx.subject), entity_uri
+            result, external_entity = _execute_live_query(
+                ctx, prop_config["fetchValueFromQuery"], entity_uri
             )
 
         if result:
@@ -720,24 +817,26 @@ def _build_virtual_property_triples(
             ctx.grouped_triples[display_name]["triples"].append(new_triple_data)
 
 
-def process_virtual_property_display(
-    display_name: str,
-    prop_config: dict,
-    ctx: GroupingContext,
-) -> None:
+def _virtual_property_reference(prop_config: dict) -> tuple[str, str | None] | None:
     implementation = prop_config.get("implementedVia", {})
     field_overrides = implementation.get("fieldOverrides", {})
-    target = implementation.get("target", {})
-    target_class = target.get("class")
-
-    reference_field = None
+    target_class = implementation.get("target", {}).get("class")
     for field_uri, override in field_overrides.items():
         if override.get("value") == "${currentEntity}":
-            reference_field = field_uri
-            break
+            return field_uri, target_class
+    return None
 
-    if not reference_field:
+
+def process_virtual_property_display(
+    display_name: str,
+    prop_config: dict,
+    ctx: GroupingContext,
+) -> None:
+    reference = _virtual_property_reference(prop_config)
+    if not reference:
         return
+    reference_field, target_class = reference
+    target = prop_config.get("implementedVia", {}).get("target", {})
 
     entity_uris = _fetch_virtual_property_entities(reference_field, target_class, ctx)
 
@@ -817,28 +916,7 @@ def process_ordering(
             all_sequences.append(sequence)
         return all_sequences
 
-    decoded_subject = unquote(ctx.subject)
-
-    sparql = get_sparql()
-
-    order_query = f"""
-        SELECT ?orderedEntity (COALESCE(?next, "NONE") AS ?nextValue)
-        WHERE {{
-            <{decoded_subject}> <{prop["property"]}> ?orderedEntity.
-            OPTIONAL {{
-                ?orderedEntity <{order_property}> ?next.
-            }}
-        }}
-    """
-    if ctx.historical_snapshot:
-        order_results: list[dict[str, dict[str, str]]] | list[ResultRow] = list(
-            select_results(ctx.historical_snapshot.query(order_query))
-        )
-    else:
-        sparql.setQuery(order_query)
-        sparql.setReturnFormat(JSON)
-        order_results = get_sparql_bindings(sparql.query().convert())
-
+    order_results = _fetch_order_results(ctx, prop["property"], order_property)
     order_sequences = get_ordered_sequence(order_results)
     for sequence in order_sequences:
         ctx.grouped_triples[display_name]["triples"].sort(
@@ -853,6 +931,31 @@ def process_ordering(
         )
 
 
+def _fetch_order_results(
+    ctx: GroupingContext, prop_uri: str, order_property: str | None
+) -> list[dict[str, dict[str, str]]] | list[ResultRow]:
+    decoded_subject = unquote(ctx.subject)
+    order_query = f"""
+        SELECT ?orderedEntity (COALESCE(?next, "NONE") AS ?nextValue)
+        WHERE {{
+            <{decoded_subject}> <{prop_uri}> ?orderedEntity.
+            OPTIONAL {{
+                ?orderedEntity <{order_property}> ?next.
+            }}
+        }}
+    """
+    if ctx.historical_snapshot:
+        return list(select_results(ctx.historical_snapshot.query(order_query)))
+
+    prefetched = ctx.live_results.orderings.get((prop_uri, order_property))
+    if prefetched is not None:
+        return prefetched
+    sparql = get_sparql()
+    sparql.setQuery(order_query)
+    sparql.setReturnFormat(JSON)
+    return get_sparql_bindings(sparql.query().convert())
+
+
 def process_default_property(
     prop_uri: str,
     triples: list[tuple[URIRef, URIRef, URIRef | Literal]],
@@ -881,7 +984,7 @@ def process_default_property(
 
 
 def execute_historical_query(
-    query: str, subject: str, value: str, historical_snapshot: Graph
+    query: str, subject: str, value: str, historical_snapshot: Graph | SnapshotGraph
 ) -> tuple[str | None, str | None]:
     decoded_subject = unquote(subject)
     decoded_value = unquote(value)
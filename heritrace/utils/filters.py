@@ -5,7 +5,8 @@
 from __future__ import annotations
 
 import threading
-from typing import TYPE_CHECKING
+from collections import defaultdict
+from typing import TYPE_CHECKING, cast
 from urllib.parse import quote, urlparse
 
 from dateutil import parser as dateutil_parser
@@ -20,19 +21,41 @@ from heritrace.sparql import (
     get_sparql_bindings,
     select_results,
 )
+from heritrace.utils.label_query_utils import (
+    BATCH_URI_VARIABLE,
+    build_batch_label_query,
+    build_label_dependency_query,
+    fill_batch_label_query,
+    label_query_predicates,
+)
 from heritrace.utils.uri_utils import is_valid_url
 
 if TYPE_CHECKING:
+    from collections.abc import Sequence
+
     from rdflib import Dataset, Graph, URIRef
 
+    from heritrace.services.label_cache import LabelCache
+    from heritrace.utils.snapshot_graph import SnapshotGraph
+
+LABEL_BATCH_SIZE = 100
+# How many links away from an entity a fetchUriDisplay query is followed when
+# recording what its cached label depends on.
+LABEL_DEPENDENCY_DEPTH = 4
+
 
 class Filter:
     def __init__(
-        self, context: dict, display_rules: list[dict] | None, sparql_endpoint: str
+        self,
+        context: dict,
+        display_rules: list[dict] | None,
+        sparql_endpoint: str,
+        label_cache: LabelCache | None = None,
     ) -> None:
         self.context = context
         self.display_rules = display_rules
         self.sparql_endpoint = sparql_endpoint
+        self.label_cache = label_cache
         self._thread_local = threading.local()
         self._query_lock = threading.Lock()
 
@@ -142,7 +165,7 @@ class Filter:
         self,
         uri: str | URIRef,
         entity_key: tuple[str | None, str | None],
-        graph: Graph | Dataset | None = None,
+        graph: Graph | Dataset | SnapshotGraph | None = None,
     ) -> str:
         from heritrace.utils.display_rules_utils import (  # noqa: PLC0415
             find_matching_rule,
@@ -154,6 +177,10 @@ class Filter:
             return uri_string
 
         if "fetchUriDisplay" in rule:
+            if graph is None and self.label_cache is not None:
+                return self._get_cached_fetch_uri_displays(
+                    [uri_string], entity_key, rule
+                )[0]
             return self.get_fetch_uri_display(uri_string, rule, graph)
 
         if "displayName" in rule:
@@ -161,11 +188,181 @@ class Filter:
 
         return uri_string
 
+    def human_readable_entities(
+        self,
+        uris: Sequence[str | URIRef],
+        entity_key: tuple[str | None, str | None],
+        graph: Graph | Dataset | SnapshotGraph | None = None,
+    ) -> list[str]:
+        """
+        Label many entities of the same type, in input order.
+
+        Equivalent to calling human_readable_entity on each URI, but a
+        fetchUriDisplay rule is resolved with one query per LABEL_BATCH_SIZE
+        URIs instead of one query per URI whenever it can be rewritten.
+        """
+        from heritrace.utils.display_rules_utils import (  # noqa: PLC0415
+            find_matching_rule,
+        )
+
+        uri_strings = [str(uri) for uri in uris]
+        rule = find_matching_rule(entity_key[0], entity_key[1], self.display_rules)
+        if not rule:
+            return uri_strings
+
+        if "fetchUriDisplay" in rule:
+            if graph is None and self.label_cache is not None:
+                return self._get_cached_fetch_uri_displays(
+                    uri_strings, entity_key, rule
+                )
+            return self.get_fetch_uri_displays(uri_strings, rule, graph)
+
+        if "displayName" in rule:
+            return [rule["displayName"]] * len(uri_strings)
+
+        return uri_strings
+
+    def can_batch_entity_labels(
+        self, entity_key: tuple[str | None, str | None]
+    ) -> bool:
+        from heritrace.utils.display_rules_utils import (  # noqa: PLC0415
+            find_matching_rule,
+        )
+
+        rule = find_matching_rule(entity_key[0], entity_key[1], self.display_rules)
+        if not rule or "fetchUriDisplay" not in rule:
+            return True
+        return build_batch_label_query(rule["fetchUriDisplay"]) is not None
+
+    def _get_cached_fetch_uri_displays(
+        self,
+        uris: list[str],
+        entity_key: tuple[str | None, str | None],
+        rule: dict,
+    ) -> list[str]:
+        label_cache = cast("LabelCache", self.label_cache)
+        fetch_uri_display = rule["fetchUriDisplay"]
+        labels = label_cache.get_many(uris, entity_key, fetch_uri_display)
+        missing = [uri for uri in dict.fromkeys(uris) if uri not in labels]
+        if not missing:
+            return [labels[uri] for uri in uris]
+
+        dependencies = self.get_label_dependencies(missing, rule)
+        versions = label_cache.get_versions(
+            dependency
+            for uri_dependencies in dependencies.values()
+            for dependency in uri_dependencies
+        )
+        computed = dict(
+            zip(
+                missing,
+                self.get_fetch_uri_displays(missing, rule)
+                if len(missing) > 1
+                else [self.get_fetch_uri_display(missing[0], rule)],
+                strict=True,
+            )
+        )
+        if versions is not None:
+            label_cache.set_many(
+                computed,
+                {
+                    uri: {
+                        dependency: versions[dependency]
+                        for dependency in dependencies[uri]
+                    }
+                    for uri in missing
+                },
+                entity_key,
+                fetch_uri_display,
+            )
+        labels.update(computed)
+        return [labels[uri] for uri in uris]
+
+    def get_label_dependencies(
+        self, uris: list[str], rule: dict
+    ) -> dict[str, set[str]]:
+        """
+        Find the entities each URI's fetchUriDisplay query can reach.
+
+        Links are followed forward through the predicates the query mentions,
+        up to LABEL_DEPENDENCY_DEPTH hops. Every URI depends on itself.
+        """
+        predicates = label_query_predicates(rule["fetchUriDisplay"])
+        dependencies = {uri: {uri} for uri in uris}
+        reached_from: dict[str, set[str]] = {uri: {uri} for uri in uris}
+        for _ in range(LABEL_DEPENDENCY_DEPTH):
+            if not reached_from or not predicates:
+                break
+            frontier = list(reached_from)
+            newly_reached: defaultdict[str, set[str]] = defaultdict(set)
+            for start in range(0, len(frontier), LABEL_BATCH_SIZE):
+                query = build_label_dependency_query(
+                    frontier[start : start + LABEL_BATCH_SIZE], predicates
+                )
+                sparql = self._get_sparql()
+                sparql.setQuery(query)
+                for binding in get_sparql_bindings(sparql.query().convert()):
+                    target = binding["target"]["value"]
+                    for root in reached_from[binding["source"]["value"]]:
+                        if target not in dependencies[root]:
+                            dependencies[root].add(target)
+                            newly_reached[target].add(root)
+            reached_from = newly_reached
+        return dependencies
+
+    def get_fetch_uri_displays(
+        self,
+        uris: Sequence[str | URIRef],
+        rule: dict,
+        graph: Graph | Dataset | SnapshotGraph | None = None,
+    ) -> list[str]:
+        uri_strings = [str(uri) for uri in uris]
+        labels: dict[str, str] = {}
+        batch_query = build_batch_label_query(rule["fetchUriDisplay"])
+        if batch_query is not None:
+            unique_uris = list(dict.fromkeys(uri_strings))
+            for start in range(0, len(unique_uris), LABEL_BATCH_SIZE):
+                chunk = unique_uris[start : start + LABEL_BATCH_SIZE]
+                query = fill_batch_label_query(batch_query, chunk)
+                labels.update(self._run_batch_label_query(query, graph))
+
+        # Whatever the batch left unlabelled goes through the single-URI path,
+        # which reports a missing label exactly as it always has.
+        return [
+            labels[uri]
+            if uri in labels
+            else self.get_fetch_uri_display(uri, rule, graph)
+            for uri in uri_strings
+        ]
+
+    def _run_batch_label_query(
+        self, query: str, graph: Graph | Dataset | SnapshotGraph | None
+    ) -> dict[str, str]:
+        labels: dict[str, str] = {}
+        if graph is not None:
+            with self._query_lock:
+                results = graph.query(query)
+            for row in select_results(results):
+                uri = row[BATCH_URI_VARIABLE]
+                display = row["display"]
+                if uri is not None and display is not None:
+                    labels.setdefault(str(uri), str(display))
+        else:
+            sparql = self._get_sparql()
+            sparql.setQuery(query)
+            for binding in get_sparql_bindings(sparql.query().convert()):
+                if BATCH_URI_VARIABLE in binding and "display" in binding:
+                    labels.setdefault(
+                        binding[BATCH_URI_VARIABLE]["value"],
+                        binding["display"]["value"],
+                    )
+        return labels
+
     def get_fetch_uri_display(
         self,
         uri: str | URIRef,
         rule: dict,
-        graph: Graph | Dataset | None = None,
+        graph: Graph | Dataset | SnapshotGraph | None = None,
     ) -> str:
         uri_string = str(uri)
         query = rule["fetchUriDisplay"].replace("[[uri]]", f"<{uri_string}>")
@@ -238,13 +435,13 @@ class Filter:
         # If not Zenodo, use the provided generic handler
         return self.human_readable_primary_source(url)
 
-    def format_agent_reference(self, url: str) -> str:
+    def format_agent_reference(self, url: str | None) -> str:
         """
         Format an agent reference for display, handling various URL types including
         ORCID and others.
 
         Args:
-            url (str): The agent URL or identifier to format
+            url (str | None): The agent URL or identifier to format
 
         Returns:
             str: Formatted HTML string representing the agent
@@ -0,0 +1,195 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+"""
+Rewriting of fetchUriDisplay queries so that a single query labels many URIs.
+
+A fetchUriDisplay query is written for one entity, referenced as [[uri]]. The
+rewrite turns [[uri]] into a variable bound by a VALUES block, projects that
+variable out of every SELECT so that each result row can be mapped back to the
+entity it labels, and groups by it wherever the query aggregates.
+"""
+
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+
+from pyparsing.exceptions import ParseException
+from rdflib.plugins.sparql.parser import parseQuery
+
+URI_PLACEHOLDER = "[[uri]]"
+VALUES_PLACEHOLDER = "[[values]]"
+BATCH_URI_VARIABLE = "heritraceUri"
+
+_VARIABLE = f"?{BATCH_URI_VARIABLE}"
+_PROBE = "<urn:heritrace:probe>"
+
+# String literals, IRIs and comments can contain braces and keywords that must
+# not be mistaken for query structure, so they are blanked out before scanning.
+_OPAQUE_TOKENS = re.compile(
+    r'"""[\s\S]*?"""'
+    r"|'''[\s\S]*?'''"
+    r'|"(?:[^"\\\n]|\\.)*"'
+    r"|'(?:[^'\\\n]|\\.)*'"
+    r"|<[^<>\"{}|^`\\\s]*>"
+    r"|#[^\n]*"
+)
+_SELECT = re.compile(r"\bSELECT\b(\s+(?:DISTINCT|REDUCED)\b)?", re.IGNORECASE)
+_GROUP_BY = re.compile(r"\s*GROUP\s+BY\b", re.IGNORECASE)
+_AGGREGATE = re.compile(
+    r"\b(?:COUNT|SUM|MIN|MAX|AVG|SAMPLE|GROUP_CONCAT)\s*\(", re.IGNORECASE
+)
+# A row limit applies to the whole batch rather than to each entity, so such
+# queries cannot share a round trip.
+_UNBATCHABLE = re.compile(r"\b(?:LIMIT|OFFSET)\b", re.IGNORECASE)
+_PREFIX_DECLARATION = re.compile(r"\bPREFIX\s+([\w-]*):\s*<([^>]*)>", re.IGNORECASE)
+_IRI = re.compile(r"<([^<>\"{}|^`\\\s]*)>")
+_PREFIXED_NAME = re.compile(r"(?<![\w?$])([A-Za-z][\w-]*)?:([\w-]+)")
+_RDF_TYPE = "http://www.w3.org/1999/02/22-rdf-syntax-ns#type"
+
+
+def _mask_opaque_tokens(query: str) -> str:
+    return _OPAQUE_TOKENS.sub(lambda match: " " * len(match.group()), query)
+
+
+def _matching_brace(masked: str, open_index: int) -> int | None:
+    depth = 0
+    for index in range(open_index, len(masked)):
+        char = masked[index]
+        if char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                return index
+    return None
+
+
+def _select_insertions(
+    query: str, masked: str, select: re.Match[str]
+) -> list[tuple[int, str]] | None:
+    where_open = masked.find("{", select.end())
+    if where_open == -1:
+        return None
+    where_close = _matching_brace(masked, where_open)
+    if where_close is None:
+        return None
+
+    insertions = []
+    projection = masked[select.end() : where_open]
+    if "*" not in projection:
+        insertions.append((select.end(), f" {_VARIABLE}"))
+
+    group_by = _GROUP_BY.match(masked, where_close + 1)
+    if group_by:
+        insertions.append((group_by.end(), f" {_VARIABLE}"))
+    elif _AGGREGATE.search(projection):
+        insertions.append((where_close + 1, f" GROUP BY {_VARIABLE}"))
+
+    if URI_PLACEHOLDER in query[where_open:where_close]:
+        insertions.append(
+            (where_open + 1, f" VALUES {_VARIABLE} {{ {VALUES_PLACEHOLDER} }}")
+        )
+    return insertions
+
+
+def _query_insertions(query: str, masked: str) -> list[tuple[int, str]] | None:
+    selects = list(_SELECT.finditer(masked))
+    if not selects:
+        return None
+    top_projection_end = masked.find("{", selects[0].end())
+    if "?display" not in masked[selects[0].end() : top_projection_end]:
+        return None
+
+    insertions: list[tuple[int, str]] = []
+    for select in selects:
+        select_insertions = _select_insertions(query, masked, select)
+        if select_insertions is None:
+            return None
+        insertions.extend(select_insertions)
+    return insertions
+
+
+@lru_cache(maxsize=256)
+def build_batch_label_query(fetch_uri_display: str) -> str | None:
+    """
+    Rewrite a fetchUriDisplay query to label every URI of a VALUES block at once.
+
+    Returns:
+        The rewritten query, with VALUES_PLACEHOLDER standing for the URIs to
+        label, or None when the query cannot be rewritten safely and has to be
+        run once per URI.
+    """
+    if URI_PLACEHOLDER not in fetch_uri_display:
+        return None
+    masked = _mask_opaque_tokens(fetch_uri_display)
+    if _UNBATCHABLE.search(masked) or _VARIABLE in masked:
+        return None
+
+    insertions = _query_insertions(fetch_uri_display, masked)
+    if insertions is None:
+        return None
+
+    rewritten = fetch_uri_display
+    for position, text in sorted(insertions, key=lambda item: item[0], reverse=True):
+        rewritten = rewritten[:position] + text + rewritten[position:]
+    rewritten = rewritten.replace(URI_PLACEHOLDER, _VARIABLE)
+
+    # Some triplestores accept syntax rdflib rejects, so only a query rdflib
+    # could parse before the rewrite is expected to parse after it.
+    if _parses(fetch_uri_display.replace(URI_PLACEHOLDER, _PROBE)) and not _parses(
+        rewritten.replace(VALUES_PLACEHOLDER, _PROBE)
+    ):
+        return None
+    return rewritten
+
+
+def _parses(query: str) -> bool:
+    try:
+        parseQuery(query)
+    except ParseException:
+        return False
+    return True
+
+
+def fill_batch_label_query(batch_query: str, uris: list[str]) -> str:
+    values = " ".join(f"<{uri}>" for uri in uris)
+    return batch_query.replace(VALUES_PLACEHOLDER, values)
+
+
+@lru_cache(maxsize=256)
+def label_query_predicates(fetch_uri_display: str) -> frozenset[str]:
+    """
+    Collect the IRIs a fetchUriDisplay query mentions, expanded from prefixes.
+
+    Every predicate the query can traverse is among them, which is what the
+    dependency tracking of cached labels needs. rdf:type is left out because
+    following it leads to classes rather than to the entities a label shows.
+    """
+    query = _OPAQUE_TOKENS.sub(
+        lambda match: match.group() if match.group().startswith("<") else " ",
+        fetch_uri_display,
+    )
+    prefixes = dict(_PREFIX_DECLARATION.findall(query))
+    body = _PREFIX_DECLARATION.sub(" ", query)
+    iris = set(_IRI.findall(body))
+    for prefix, local_name in _PREFIXED_NAME.findall(_IRI.sub(" ", body)):
+        if prefix in prefixes:
+            iris.add(prefixes[prefix] + local_name)
+    iris.discard(_RDF_TYPE)
+    return frozenset(iris)
+
+
+def build_label_dependency_query(sources: list[str], predicates: frozenset[str]) -> str:
+    source_values = " ".join(f"<{source}>" for source in sources)
+    predicate_values = " ".join(f"<{predicate}>" for predicate in sorted(predicates))
+    return f"""
+        SELECT DISTINCT ?source ?target WHERE {{
+            VALUES ?source {{ {source_values} }}
+            VALUES ?predicate {{ {predicate_values} }}
+            ?source ?predicate ?target .
+            FILTER(isIRI(?target))
+        }}
+    """
@@ -0,0 +1,145 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+"""
+Validators of literal values, resolved once.
+
+DATATYPE_VALIDATORS maps every datatype of DATATYPE_MAPPING to its validation
+function, so a value is checked without scanning the mapping. The sh:pattern
+values of a SHACL graph are compiled into a LiteralValidators registry when
+the graph is loaded, and literal_validators_for returns the registry of a
+graph, building it on first use. Only the patterns of the shapes are ever
+compiled, and the registry also knows which ones apply, unconditionally, to
+each property of a shape. The methods of the registry take lists of values,
+so a whole form is checked with one lookup per datatype or pattern.
+"""
+
+import re
+import threading
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from types import MappingProxyType
+from weakref import WeakKeyDictionary
+
+from rdflib import Graph
+
+from heritrace.utils.datatypes import DATATYPE_MAPPING
+from heritrace.utils.shacl_index import shacl_index_for
+
+
+def _datatype_validators() -> dict[str, Callable[[str], bool]]:
+    validators: dict[str, Callable[[str], bool]] = {}
+    for datatype, validation_func, _ in DATATYPE_MAPPING:
+        validators.setdefault(str(datatype), validation_func)
+    return validators
+
+
+DATATYPE_VALIDATORS = MappingProxyType(_datatype_validators())
+
+
+class LiteralValidators:
+    """The datatype validators and the compiled patterns of a SHACL graph."""
+
+    __slots__ = ("_field_patterns", "_patterns")
+
+    def __init__(
+        self,
+        patterns: dict[str, re.Pattern[str] | re.error],
+        field_patterns: dict[tuple[str, str], tuple[str, ...]] | None = None,
+    ) -> None:
+        self._patterns = MappingProxyType(patterns)
+        self._field_patterns = MappingProxyType(field_patterns or {})
+
+    def pattern(self, pattern: str) -> re.Pattern[str]:
+        """
+        Return a compiled sh:pattern of the shapes.
+
+        Raises:
+            KeyError: If the pattern is not a sh:pattern of the shapes
+            re.error: If the pattern does not compile
+        """
+        compiled = self._patterns[pattern]
+        if isinstance(compiled, re.error):
+            raise compiled
+        return compiled
+
+    def field_patterns(self, shape: str, prop: str) -> tuple[str, ...]:
+        """Return the sh:pattern values a property of a shape always has."""
+        return self._field_patterns.get((str(shape), str(prop)), ())
+
+    def validate(self, values: Sequence[str], datatype: str) -> list[bool]:
+        """
+        Check values against a datatype.
+
+        No value is valid for a datatype without a validation function.
+        """
+        validation_func = DATATYPE_VALIDATORS.get(str(datatype))
+        if validation_func is None:
+            return [False for _ in values]
+        results = {value: validation_func(value) for value in dict.fromkeys(values)}
+        return [results[value] for value in values]
+
+    def matching_datatypes(self, values: Sequence[str]) -> list[list[str]]:
+        """Return, for every value, the datatypes that accept it."""
+        matches: dict[str, list[str]] = {value: [] for value in values}
+        for datatype, validation_func in DATATYPE_VALIDATORS.items():
+            for value, datatypes in matches.items():
+                if validation_func(value):
+                    datatypes.append(datatype)
+        return [list(matches[value]) for value in values]
+
+    def match(self, pattern: str, values: Sequence[str]) -> list[bool]:
+        """Check values against a sh:pattern of the shapes, as re.match does."""
+        compiled = self.pattern(pattern)
+        return [
+            value is not None and compiled.match(str(value)) is not None
+            for value in values
+        ]
+
+
+def _compile(pattern: str) -> re.Pattern[str] | re.error:
+    try:
+        return re.compile(pattern)
+    except re.error as error:
+        return error
+
+
+def compile_literal_validators(shacl: Graph) -> LiteralValidators:
+    # A pattern that does not compile keeps its error, so that it is raised
+    # where the pattern is used.
+    shacl_index = shacl_index_for(shacl)
+    field_patterns: dict[tuple[str, str], tuple[str, ...]] = {}
+    for constraint in shacl_index.pattern_constraints():
+        # Patterns under sh:condition depend on the other fields of the form.
+        if not constraint.conditions:
+            key = (constraint.shape, constraint.path)
+            field_patterns[key] = (
+                *field_patterns.get(key, ()),
+                *constraint.patterns,
+            )
+    return LiteralValidators(
+        {pattern: _compile(pattern) for pattern in shacl_index.patterns()},
+        field_patterns,
+    )
+
+
+@dataclass(slots=True)
+class _CompiledValidators:
+    validators: WeakKeyDictionary[Graph, LiteralValidators]
+    lock: threading.Lock
+
+
+_compiled_validators = _CompiledValidators(WeakKeyDictionary(), threading.Lock())
+
+
+def literal_validators_for(shacl: Graph) -> LiteralValidators:
+    """Return the literal validators of a SHACL graph, building them once."""
+    validators = _compiled_validators.validators.get(shacl)
+    if validators is None:
+        with _compiled_validators.lock:
+            validators = _compiled_validators.validators.get(shacl)
+            if validators is None:
+                validators = compile_literal_validators(shacl)
+                _compiled_validators.validators[shacl] = validators
+    return validators
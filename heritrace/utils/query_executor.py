@@ -0,0 +1,153 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+"""
+Concurrent execution of the independent SPARQL queries of a single request.
+
+Worker threads are shared by the whole process, while each call to
+run_concurrently keeps at most QUERY_CONCURRENCY of its own queries in flight,
+so that one large page cannot monopolise the pool. Every call also has a total
+deadline, and the first failure cancels whatever has not started yet.
+"""
+
+import atexit
+import contextvars
+import os
+import threading
+import time
+from collections.abc import Callable, Sequence
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import TypeVar
+
+from heritrace.sparql import use_private_wrappers
+
+T = TypeVar("T")
+
+DEFAULT_QUERY_CONCURRENCY = 4
+DEFAULT_QUERY_DEADLINE = 60.0
+
+
+@dataclass(slots=True)
+class _QueryExecutor:
+    max_workers: int = 1
+    concurrency: int = 1
+    deadline: float = DEFAULT_QUERY_DEADLINE
+    executor: ThreadPoolExecutor | None = None
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+_query_executor = _QueryExecutor()
+
+
+def configure_query_executor(
+    max_workers: int, concurrency: int, deadline: float
+) -> None:
+    if max_workers < 1:
+        msg = "max_workers must be at least 1"
+        raise ValueError(msg)
+    if concurrency < 1:
+        msg = "QUERY_CONCURRENCY must be at least 1"
+        raise ValueError(msg)
+    if deadline <= 0:
+        msg = "QUERY_DEADLINE must be positive"
+        raise ValueError(msg)
+
+    shutdown_query_executor()
+    _query_executor.max_workers = max_workers
+    _query_executor.concurrency = min(concurrency, max_workers)
+    _query_executor.deadline = deadline
+
+
+def shutdown_query_executor() -> None:
+    with _query_executor.lock:
+        if _query_executor.executor is not None:
+            _query_executor.executor.shutdown(wait=False, cancel_futures=True)
+            _query_executor.executor = None
+
+
+atexit.register(shutdown_query_executor)
+
+
+def _forget_inherited_threads() -> None:
+    # Threads do not survive a fork, so a worker starts its own pool on demand.
+    _query_executor.executor = None
+    _query_executor.lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_forget_inherited_threads)
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    with _query_executor.lock:
+        if _query_executor.executor is None:
+            _query_executor.executor = ThreadPoolExecutor(
+                max_workers=_query_executor.max_workers,
+                thread_name_prefix="heritrace-query",
+                initializer=use_private_wrappers,
+            )
+        return _query_executor.executor
+
+
+def runs_concurrently() -> bool:
+    return _query_executor.concurrency > 1
+
+
+def run_concurrently(tasks: Sequence[Callable[[], T]]) -> list[T]:
+    """
+    Run independent queries concurrently and collect their results.
+
+    Each task runs in a copy of the caller's context, so the Flask application
+    and request stay available to it.
+
+    Args:
+        tasks: Callables without arguments, each issuing its own queries
+
+    Returns:
+        The result of every task, in the order of the tasks
+
+    Raises:
+        TimeoutError: If the tasks did not all finish within the deadline
+    """
+    deadline = time.monotonic() + _query_executor.deadline
+    if not runs_concurrently() or len(tasks) < 2:  # noqa: PLR2004
+        results = []
+        for task in tasks:
+            _check_deadline(deadline)
+            results.append(task())
+        return results
+
+    executor = _get_executor()
+    results_by_index: dict[int, T] = {}
+    in_flight: dict[Future[T], int] = {}
+    next_index = 0
+    try:
+        while next_index < len(tasks) or in_flight:
+            while (
+                next_index < len(tasks) and len(in_flight) < _query_executor.concurrency
+            ):
+                context = contextvars.copy_context()
+                in_flight[executor.submit(context.run, tasks[next_index])] = next_index
+                next_index += 1
+            done, _ = wait(
+                in_flight,
+                timeout=_check_deadline(deadline),
+                return_when=FIRST_COMPLETED,
+            )
+            for future in done:
+                results_by_index[in_flight.pop(future)] = future.result()
+    finally:
+        # Tasks already running cannot be interrupted and finish on their own,
+        # bounded by the SPARQL timeout; their results are discarded.
+        for future in in_flight:
+            future.cancel()
+    return [results_by_index[index] for index in range(len(tasks))]
+
+
+def _check_deadline(deadline: float) -> float:
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        msg = f"Queries did not complete within {_query_executor.deadline} seconds"
+        raise TimeoutError(msg)
+    return remaining
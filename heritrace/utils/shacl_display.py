@@ -4,8 +4,8 @@
 
 import json
 from collections import OrderedDict, defaultdict
-from collections.abc import Iterable
-from dataclasses import dataclass
+from collections.abc import Collection, Iterable
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import cast
 
@@ -17,6 +17,7 @@ from rdflib.query import Result, ResultRow
 
 from heritrace.sparql import select_results
 from heritrace.utils.filters import Filter
+from heritrace.utils.shacl_index import shacl_index_for
 
 
 @dataclass(slots=True)
@@ -25,6 +26,9 @@ class ShaclProcessingContext:
     display_rules: list[dict[str, object]] | None
     app: Flask
     processed_shapes: set[str]
+    expansions: dict[tuple[str, frozenset[str]], list[dict[str, object]]] = field(
+        default_factory=dict
+    )
 
 
 @dataclass(slots=True)
@@ -117,6 +121,19 @@ COMMON_SPARQL_QUERY = prepareQuery(
     },
 )
 
+FORM_FIELD_KEYS_QUERY = prepareQuery(
+    """
+    SELECT DISTINCT ?shape ?type
+    WHERE {
+        ?shape sh:targetClass ?type ;
+               sh:property ?property .
+        ?property sh:path ?predicate .
+        FILTER (isURI(?predicate))
+    }
+""",
+    initNs={"sh": "http://www.w3.org/ns/shacl#"},
+)
+
 
 def _parse_row(row: ResultRow) -> _ParsedRow:
     subject_shape = str(row.shape)
@@ -169,18 +186,18 @@ def _find_existing_field(
     fields: list[dict[str, object]],
     parsed: _ParsedRow,
 ) -> dict[str, object] | None:
-    for field in fields:
+    for candidate in fields:
         if (
-            field.get("nodeShape") == parsed.node_shape
-            and field.get("nodeShapes") == parsed.node_shapes
-            and field.get("subjectShape") == parsed.subject_shape
-            and field.get("hasValue") == parsed.has_value
-            and field.get("objectClass") == parsed.object_class
-            and field.get("min") == parsed.min_count
-            and field.get("max") == parsed.max_count
-            and field.get("optionalValues") == parsed.optional_values
+            candidate.get("nodeShape") == parsed.node_shape
+            and candidate.get("nodeShapes") == parsed.node_shapes
+            and candidate.get("subjectShape") == parsed.subject_shape
+            and candidate.get("hasValue") == parsed.has_value
+            and candidate.get("objectClass") == parsed.object_class
+            and candidate.get("min") == parsed.min_count
+            and candidate.get("max") == parsed.max_count
+            and candidate.get("optionalValues") == parsed.optional_values
         ):
-            return field
+            return candidate
     return None
 
 
@@ -308,6 +325,12 @@ def process_nested_shapes(
     if shape_uri in ctx.processed_shapes:
         return []
 
+    # The expansion depends on the shapes already being expanded, which are
+    # left out to break cycles, so it can only be reused along the same path.
+    expansion_key = (shape_uri, frozenset(ctx.processed_shapes))
+    if expansion_key in ctx.expansions:
+        return ctx.expansions[expansion_key]
+
     ctx.processed_shapes.add(shape_uri)
     init_bindings = {"shape": URIRef(shape_uri)}
     nested_results = execute_shacl_query(ctx.shacl, COMMON_SPARQL_QUERY, init_bindings)
@@ -330,6 +353,7 @@ def process_nested_shapes(
             nested_fields.extend(temp_form_fields[entity_type][predicate])
 
     ctx.processed_shapes.remove(shape_uri)
+    ctx.expansions[expansion_key] = nested_fields
     return nested_fields
 
 
@@ -398,10 +422,7 @@ def order_fields(
 
 
 def _find_matching_entity_keys(
-    form_fields: dict[
-        tuple[str, str],
-        dict[str, list[dict[str, object]]],
-    ],
+    form_fields: Collection[tuple[str, str]],
     entity_class: str | None,
     entity_shape: str | None,
 ) -> list[tuple[str, str]]:
@@ -495,6 +516,33 @@ def order_form_fields(
     return ordered_form_fields
 
 
+def order_entity_keys(
+    entity_keys: list[tuple[str, str]],
+    display_rules: list[dict[str, object]] | None,
+) -> list[tuple[str, str]]:
+    """
+    Order the entity keys as order_form_fields orders the form fields.
+
+    Args:
+        entity_keys: The (class, shape) pairs extracted from the SHACL shapes
+        display_rules: The display rules configuration
+
+    Returns:
+        list: The keys targeted by the display rules, in the order of the rules,
+        or all the keys when there are no display rules.
+    """
+    if not display_rules:
+        return entity_keys
+    ordered_keys: dict[tuple[str, str], None] = {}
+    for rule in display_rules:
+        target = cast("dict[str, str]", rule.get("target", {}))
+        for key in _find_matching_entity_keys(
+            entity_keys, target.get("class"), target.get("shape")
+        ):
+            ordered_keys.setdefault(key)
+    return list(ordered_keys)
+
+
 def apply_display_rules(
     shacl: Graph,
     form_fields: dict[
@@ -603,9 +651,9 @@ def apply_display_rules_to_nested_shapes(  # noqa: C901
 
     # Create a new list to avoid modifying the original
     result_fields = []
-    for field in nested_fields:
+    for nested_field in nested_fields:
         # Create a copy of the field to avoid modifying the original
-        new_field = field.copy()
+        new_field = nested_field.copy()
         result_fields.append(new_field)
 
     display_rules = cast("list[dict[str, object]]", parent_prop.get("displayRules", []))
@@ -614,14 +662,14 @@ def apply_display_rules_to_nested_shapes(  # noqa: C901
             nested_display_rules = cast(
                 "list[dict[str, object]]", rule["nestedDisplayRules"]
             )
-            for field in result_fields:
+            for nested_field in result_fields:
                 for nested_rule in nested_display_rules:
-                    field_key = field.get("predicate", field.get("uri"))
+                    field_key = nested_field.get("predicate", nested_field.get("uri"))
                     if field_key == nested_rule["property"]:
                         # Apply display properties from the rule to the field
                         for key, value in nested_rule.items():
                             if key != "property":
-                                field[key] = value
+                                nested_field[key] = value
             break
 
     return result_fields
@@ -824,63 +872,12 @@ def handle_sub_display_rules(
 
 
 def get_shape_target_class(shacl: Graph, shape_uri: str) -> str | None:
-    query = prepareQuery(
-        """
-        SELECT ?targetClass
-        WHERE {
-            ?shape sh:targetClass ?targetClass .
-        }
-    """,
-        initNs={"sh": "http://www.w3.org/ns/shacl#"},
-    )
-    results = execute_shacl_query(shacl, query, {"shape": URIRef(shape_uri)})
-    for row in select_results(results):
-        return str(row.targetClass)
-    return None
+    target_classes = shacl_index_for(shacl).target_classes(shape_uri)
+    return target_classes[0] if target_classes else None
 
 
 def get_object_class(shacl: Graph, shape_uri: str, predicate_uri: str) -> str | None:
-    query = prepareQuery(
-        """
-        SELECT DISTINCT ?targetClass
-        WHERE {
-            ?shape sh:property ?propertyShape .
-            ?propertyShape sh:path ?predicate .
-            {
-                # Caso 1: definizione diretta con sh:node
-                ?propertyShape sh:node ?nodeShape .
-                ?nodeShape sh:targetClass ?targetClass .
-            } UNION {
-                # Caso 2: definizione diretta con sh:class
-                ?propertyShape sh:class ?targetClass .
-            } UNION {
-                # Caso 3: definizione con sh:or che include node shapes
-                ?propertyShape sh:or ?orList .
-                ?orList rdf:rest*/rdf:first ?choice .
-                {
-                    ?choice sh:node ?nodeShape .
-                    ?nodeShape sh:targetClass ?targetClass .
-                } UNION {
-                    ?choice sh:class ?targetClass .
-                }
-            }
-        }
-    """,
-        initNs={
-            "sh": "http://www.w3.org/ns/shacl#",
-            "rdf": "http://www.w3.org/1999/02/22-rdf-syntax-ns#",
-        },
-    )
-
-    results = execute_shacl_query(
-        shacl, query, {"shape": URIRef(shape_uri), "predicate": URIRef(predicate_uri)}
-    )
-
-    # Prendiamo il primo risultato valido
-    for row in select_results(results):
-        if row.targetClass:
-            return str(row.targetClass)
-    return None
+    return shacl_index_for(shacl).object_class(shape_uri, predicate_uri)
 
 
 def extract_shacl_form_fields(
@@ -927,6 +924,53 @@ def extract_shacl_form_fields(
     )
 
 
+def extract_form_field_keys(shacl: Graph) -> list[tuple[str, str]]:
+    """
+    Extract the (class, shape) pairs that have form fields, without building them.
+
+    Args:
+        shacl: The SHACL graph
+
+    Returns:
+        list: The (class, shape) pairs, in the order the shapes are found.
+    """
+    results = execute_shacl_query(shacl, FORM_FIELD_KEYS_QUERY)
+    return list(
+        dict.fromkeys(
+            (str(row.type), str(row.shape)) for row in select_results(results)
+        )
+    )
+
+
+def extract_entity_form_fields(
+    ctx: ShaclProcessingContext,
+    entity_key: tuple[str, str],
+) -> dict[str, list[dict[str, object]]]:
+    """
+    Extract the form fields of a single (class, shape) pair.
+
+    Nested shapes are expanded through the context, so expansions already made
+    for another entity are reused. The display rules are applied to the result.
+
+    Args:
+        ctx: The processing context shared by all the entities
+        entity_key: The (class, shape) pair
+
+    Returns:
+        dict: The form fields of the entity, keyed by predicate.
+    """
+    entity_class, entity_shape = entity_key
+    results = execute_shacl_query(
+        ctx.shacl,
+        COMMON_SPARQL_QUERY,
+        {"type": URIRef(entity_class), "shape": URIRef(entity_shape)},
+    )
+    form_fields = process_query_results(ctx, select_results(results))
+    if ctx.display_rules:
+        form_fields = apply_display_rules(ctx.shacl, form_fields, ctx.display_rules)
+    return form_fields[entity_key]
+
+
 def execute_shacl_query(
     shacl: Graph,
     query: Query,
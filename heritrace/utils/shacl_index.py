@@ -0,0 +1,288 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+"""
+The SHACL shapes compiled into dictionaries.
+
+Pages, validation and forms keep asking the same questions about the shapes:
+which shapes target a class, which properties a shape constrains and with
+which datatypes, cardinalities, allowed values and patterns. Answering them
+with SPARQL over the shapes graph means running rdflib's query engine, with
+property paths over RDF lists, on every request. The graph is instead compiled
+once into a ShaclIndex, an immutable set of lookup tables. shacl_index_for
+compiles the index of a graph on first use and returns the same index
+afterwards, so a new graph, such as the one loaded when shacl.ttl changes,
+gets its own index.
+"""
+
+import threading
+from collections.abc import Iterable
+from dataclasses import dataclass
+from types import MappingProxyType
+from weakref import WeakKeyDictionary
+
+from rdflib import Graph, Namespace, URIRef
+from rdflib.term import Node
+
+SH = Namespace("http://www.w3.org/ns/shacl#")
+SH_CLASS_IN = SH["classIn"]
+
+
+@dataclass(frozen=True, slots=True)
+class OrMember:
+    """One of the alternatives of an sh:or list."""
+
+    datatypes: tuple[str, ...]
+    has_values: tuple[str, ...]
+    classes: tuple[str, ...]
+    node_classes: tuple[str, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class PropertyConstraint:
+    """The constraints of a property shape on one path.
+
+    Counts keep the lexical form of the SHACL literals. node_classes are the
+    classes targeted by the sh:node shapes, has_values include the ones of the
+    sh:qualifiedValueShape, and conditions pair the path and the value of every
+    sh:condition.
+    """
+
+    shape: str
+    path: str
+    path_is_iri: bool
+    datatypes: tuple[str, ...] = ()
+    min_counts: tuple[str, ...] = ()
+    max_counts: tuple[str, ...] = ()
+    has_values: tuple[str, ...] = ()
+    in_values: tuple[str, ...] = ()
+    or_members: tuple[OrMember, ...] = ()
+    qualified_or_members: tuple[OrMember, ...] = ()
+    classes: tuple[str, ...] = ()
+    class_in: tuple[str, ...] = ()
+    node_classes: tuple[str, ...] = ()
+    patterns: tuple[str, ...] = ()
+    messages: tuple[str, ...] = ()
+    conditions: tuple[tuple[str, str], ...] = ()
+
+
+class ShaclIndex:
+    """Lookup tables of the shapes of a SHACL graph."""
+
+    __slots__ = ("_classes_by_shape", "_properties_by_shape", "_shapes_by_class")
+
+    def __init__(
+        self,
+        shapes_by_class: dict[str, tuple[str, ...]],
+        classes_by_shape: dict[str, tuple[str, ...]],
+        properties_by_shape: dict[str, tuple[PropertyConstraint, ...]],
+    ) -> None:
+        self._shapes_by_class = MappingProxyType(shapes_by_class)
+        self._classes_by_shape = MappingProxyType(classes_by_shape)
+        self._properties_by_shape = MappingProxyType(properties_by_shape)
+
+    def shapes_for_class(self, class_uri: str) -> tuple[str, ...]:
+        return self._shapes_by_class.get(str(class_uri), ())
+
+    def target_classes(self, shape_uri: str) -> tuple[str, ...]:
+        return self._classes_by_shape.get(str(shape_uri), ())
+
+    def property_constraints(self, shape_uri: str) -> tuple[PropertyConstraint, ...]:
+        return self._properties_by_shape.get(str(shape_uri), ())
+
+    def shape_properties(self, shape_uri: str) -> set[str]:
+        return {constraint.path for constraint in self.property_constraints(shape_uri)}
+
+    def has_value_constraints(self, shape_uri: str) -> list[tuple[str, str]]:
+        return list(
+            dict.fromkeys(
+                (constraint.path, value)
+                for constraint in self.property_constraints(shape_uri)
+                for value in constraint.has_values
+            )
+        )
+
+    def patterns(self) -> tuple[str, ...]:
+        """Return every sh:pattern of the shapes."""
+        return tuple(
+            dict.fromkeys(
+                pattern
+                for constraint in self.pattern_constraints()
+                for pattern in constraint.patterns
+            )
+        )
+
+    def pattern_constraints(self) -> list[PropertyConstraint]:
+        """Return the property constraints with at least one sh:pattern."""
+        return [
+            constraint
+            for constraints in self._properties_by_shape.values()
+            for constraint in constraints
+            if constraint.patterns
+        ]
+
+    def class_constraints(self, class_uris: Iterable[str]) -> list[PropertyConstraint]:
+        """Return the property constraints of the shapes of some classes."""
+        shapes = dict.fromkeys(
+            shape
+            for class_uri in class_uris
+            for shape in self.shapes_for_class(class_uri)
+        )
+        return [
+            constraint
+            for shape in shapes
+            for constraint in self.property_constraints(shape)
+        ]
+
+    def constraints_for(
+        self, class_uris: Iterable[str], predicate: str
+    ) -> list[PropertyConstraint]:
+        """Return the constraints on a predicate of the shapes of some classes."""
+        return [
+            constraint
+            for constraint in self.class_constraints(class_uris)
+            if constraint.path == str(predicate)
+        ]
+
+    def object_class(self, shape_uri: str, predicate: str) -> str | None:
+        """
+        Return the class of the values of a property of a shape.
+
+        The class is read from sh:node, then sh:class, then the alternatives of
+        sh:or.
+        """
+        for constraint in self.property_constraints(shape_uri):
+            if constraint.path != str(predicate):
+                continue
+            candidates = [*constraint.node_classes, *constraint.classes]
+            for member in constraint.or_members:
+                candidates.extend(member.node_classes)
+                candidates.extend(member.classes)
+            if candidates:
+                return candidates[0]
+        return None
+
+
+def _unique(values: Iterable[Node]) -> tuple[str, ...]:
+    return tuple(dict.fromkeys(str(value) for value in values))
+
+
+def _list_items(shacl: Graph, node: Node, predicate: URIRef) -> list[Node]:
+    return [
+        item for head in shacl.objects(node, predicate) for item in shacl.items(head)
+    ]
+
+
+def _node_classes(shacl: Graph, node: Node) -> tuple[str, ...]:
+    return _unique(
+        class_uri
+        for node_shape in shacl.objects(node, SH.node)
+        for class_uri in shacl.objects(node_shape, SH.targetClass)
+    )
+
+
+def _or_members(shacl: Graph, node: Node) -> tuple[OrMember, ...]:
+    return tuple(
+        OrMember(
+            datatypes=_unique(shacl.objects(member, SH.datatype)),
+            has_values=_unique(shacl.objects(member, SH.hasValue)),
+            classes=_unique(shacl.objects(member, SH["class"])),
+            node_classes=_node_classes(shacl, member),
+        )
+        for member in _list_items(shacl, node, SH["or"])
+    )
+
+
+def _compile_property(
+    shacl: Graph, shape: Node, property_shape: Node, path: Node
+) -> PropertyConstraint:
+    qualified = list(shacl.objects(property_shape, SH.qualifiedValueShape))
+    return PropertyConstraint(
+        shape=str(shape),
+        path=str(path),
+        path_is_iri=isinstance(path, URIRef),
+        datatypes=_unique(shacl.objects(property_shape, SH.datatype)),
+        min_counts=_unique(
+            [
+                *shacl.objects(property_shape, SH.minCount),
+                *shacl.objects(property_shape, SH.qualifiedMinCount),
+            ]
+        ),
+        max_counts=_unique(
+            [
+                *shacl.objects(property_shape, SH.maxCount),
+                *shacl.objects(property_shape, SH.qualifiedMaxCount),
+            ]
+        ),
+        has_values=_unique(
+            [
+                *shacl.objects(property_shape, SH.hasValue),
+                *(
+                    value
+                    for node in qualified
+                    for value in shacl.objects(node, SH.hasValue)
+                ),
+            ]
+        ),
+        in_values=_unique(_list_items(shacl, property_shape, SH["in"])),
+        or_members=_or_members(shacl, property_shape),
+        qualified_or_members=tuple(
+            member for node in qualified for member in _or_members(shacl, node)
+        ),
+        classes=_unique(shacl.objects(property_shape, SH["class"])),
+        class_in=_unique(_list_items(shacl, property_shape, SH_CLASS_IN)),
+        node_classes=_node_classes(shacl, property_shape),
+        patterns=_unique(shacl.objects(property_shape, SH.pattern)),
+        messages=_unique(shacl.objects(property_shape, SH.message)),
+        conditions=tuple(
+            dict.fromkeys(
+                (str(condition_path), str(condition_value))
+                for condition in shacl.objects(property_shape, SH.condition)
+                for condition_path in shacl.objects(condition, SH.path)
+                for condition_value in shacl.objects(condition, SH.hasValue)
+            )
+        ),
+    )
+
+
+def compile_shacl_index(shacl: Graph) -> ShaclIndex:
+    shapes_by_class: dict[str, dict[str, None]] = {}
+    classes_by_shape: dict[str, dict[str, None]] = {}
+    for shape, class_uri in shacl.subject_objects(SH.targetClass):
+        shapes_by_class.setdefault(str(class_uri), {})[str(shape)] = None
+        classes_by_shape.setdefault(str(shape), {})[str(class_uri)] = None
+
+    properties_by_shape: dict[str, list[PropertyConstraint]] = {}
+    for shape, property_shape in shacl.subject_objects(SH.property):
+        properties_by_shape.setdefault(str(shape), []).extend(
+            _compile_property(shacl, shape, property_shape, path)
+            for path in shacl.objects(property_shape, SH.path)
+        )
+
+    return ShaclIndex(
+        {key: tuple(shapes) for key, shapes in shapes_by_class.items()},
+        {key: tuple(classes) for key, classes in classes_by_shape.items()},
+        {key: tuple(constraints) for key, constraints in properties_by_shape.items()},
+    )
+
+
+@dataclass(slots=True)
+class _CompiledIndexes:
+    indexes: WeakKeyDictionary[Graph, ShaclIndex]
+    lock: threading.Lock
+
+
+_compiled_indexes = _CompiledIndexes(WeakKeyDictionary(), threading.Lock())
+
+
+def shacl_index_for(shacl: Graph) -> ShaclIndex:
+    """Return the index of a SHACL graph, compiling it on first use."""
+    index = _compiled_indexes.indexes.get(shacl)
+    if index is None:
+        with _compiled_indexes.lock:
+            index = _compiled_indexes.indexes.get(shacl)
+            if index is None:
+                index = compile_shacl_index(shacl)
+                _compiled_indexes.indexes[shacl] = index
+    return index
@@ -2,11 +2,12 @@
 #
 # SPDX-License-Identifier: ISC
 
-from collections.abc import Iterable
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from threading import RLock
 from weakref import WeakKeyDictionary
 
 from flask import Flask
-from rdflib import RDF, Graph
+from rdflib import RDF, Graph, Literal, URIRef
 from SPARQLWrapper import JSON
 
 from heritrace.extensions import get_form_fields, get_shacl_graph, get_sparql
@@ -15,27 +16,85 @@ from heritrace.utils.display_rules_utils import get_class_priority
 from heritrace.utils.filters import format_uri_as_readable
 from heritrace.utils.shacl_display import (
     ShaclProcessingContext,
-    apply_display_rules,
-    extract_shacl_form_fields,
+    extract_entity_form_fields,
+    extract_form_field_keys,
+    order_entity_keys,
     order_form_fields,
-    process_nested_shapes,
 )
+from heritrace.utils.shacl_index import shacl_index_for
+from heritrace.utils.snapshot_graph import SnapshotGraph
 from heritrace.utils.virtual_properties import get_virtual_properties_for_entity
 
-_class_shapes_cache: WeakKeyDictionary[Graph, dict[str, list[str]]] = (
-    WeakKeyDictionary()
-)
-_shape_properties_cache: WeakKeyDictionary[Graph, dict[str, set[str]]] = (
-    WeakKeyDictionary()
-)
-_hasvalue_constraints_cache: WeakKeyDictionary[
-    Graph, dict[str, list[tuple[str, str]]]
+_shape_discriminators_cache: WeakKeyDictionary[
+    Graph, dict[tuple[str, str], str | None]
 ] = WeakKeyDictionary()
 
 
+class FormFields(Mapping[tuple[str, str], dict[str, list[dict]]]):
+    """
+    Form fields of each (class, shape) pair, built the first time they are read.
+
+    Only the keys are extracted up front. The fields of an entity are built on
+    first access, with the display rules, display names and virtual properties
+    applied, and kept for the lifetime of the mapping. Nested shapes expanded
+    for an entity are shared with the entities that nest the same shape.
+    """
+
+    def __init__(
+        self, shacl: Graph, display_rules: list[dict] | None, app: Flask
+    ) -> None:
+        self._ctx = ShaclProcessingContext(
+            shacl=shacl,
+            display_rules=display_rules,
+            app=app,
+            processed_shapes=set(),
+        )
+        self._entity_keys = dict.fromkeys(extract_form_field_keys(shacl))
+        self._keys = dict.fromkeys(
+            order_entity_keys(list(self._entity_keys), display_rules)
+        )
+        self._extracted: dict[tuple[str, str], dict[str, list[dict]]] = {}
+        self._fields: dict[tuple[str, str], dict[str, list[dict]]] = {}
+        # Reentrant, since virtual properties read the fields of other entities.
+        self._lock = RLock()
+
+    def __getitem__(self, key: tuple[str, str]) -> dict[str, list[dict]]:
+        fields = self._fields.get(key)
+        if fields is not None:
+            return fields
+        if key not in self._keys:
+            raise KeyError(key)
+        with self._lock:
+            if key not in self._fields:
+                self._fields[key] = self._build(key)
+            return self._fields[key]
+
+    def __iter__(self) -> Iterator[tuple[str, str]]:
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._keys
+
+    def _extract(self, key: tuple[str, str]) -> dict[str, list[dict]]:
+        if key not in self._extracted:
+            fields = extract_entity_form_fields(self._ctx, key)
+            ensure_display_names({key: fields})
+            self._extracted[key] = fields
+        return self._extracted[key]
+
+    def _build(self, key: tuple[str, str]) -> dict[str, list[dict]]:
+        fields = dict(self._extract(key))
+        _add_virtual_properties(key, fields, self._entity_keys, self._extract)
+        ordered = order_form_fields({key: fields}, self._ctx.display_rules)
+        return ordered.get(key, fields)
+
+
 def get_form_fields_from_shacl(
     shacl: Graph | None, display_rules: list[dict] | None, app: Flask
-) -> dict:
+) -> Mapping[tuple[str, str], dict[str, list[dict]]]:
     """
     Analyze SHACL shapes to extract form fields for each entity type.
 
@@ -45,46 +104,14 @@ def get_form_fields_from_shacl(
         app: Flask application instance
 
     Returns:
-        OrderedDict: A dictionary where the keys are tuples (class, shape) and the
-        values are dictionaries
-                     of form fields with their properties.
+        FormFields: A mapping where the keys are tuples (class, shape) and the
+        values are dictionaries of form fields with their properties, built
+        lazily per entity.
     """
     if not shacl:
         return {}
 
-    # Step 1: Get the initial form fields from SHACL shapes
-    form_fields = extract_shacl_form_fields(shacl, display_rules, app=app)
-
-    # Step 2: Process nested shapes for each field
-    processed_shapes: set[str] = set()
-    ctx = ShaclProcessingContext(
-        shacl=shacl,
-        display_rules=display_rules,
-        app=app,
-        processed_shapes=processed_shapes,
-    )
-    for entity_key in form_fields:
-        for predicate in form_fields[entity_key]:
-            for field_info in form_fields[entity_key][predicate]:
-                if field_info.get("nodeShape"):
-                    field_info["nestedShape"] = process_nested_shapes(
-                        ctx,
-                        str(field_info["nodeShape"]),
-                    )
-
-    # Step 3: Apply display rules to the form fields
-    if display_rules:
-        form_fields = apply_display_rules(shacl, form_fields, display_rules)
-
-    # Step 3.5: Ensure all form fields have displayName, using fallback for those
-    # without display rules
-    ensure_display_names(form_fields)
-
-    # Step 4: Add virtual properties to form_fields
-    enhanced_form_fields = add_virtual_properties_to_form_fields_internal(form_fields)
-
-    # Step 5: Order form fields (including virtual properties)
-    return order_form_fields(enhanced_form_fields, display_rules)
+    return FormFields(shacl, display_rules, app)
 
 
 def _apply_field_overrides(shape_data: dict, override: dict) -> dict:
@@ -99,7 +126,11 @@ def _apply_field_overrides(shape_data: dict, override: dict) -> dict:
     return nested_field
 
 
-def _build_nested_shape_entry(vp: dict, enhanced_form_fields: dict) -> list[dict]:
+def _build_nested_shape_entry(
+    vp: dict,
+    entity_keys: dict,
+    fields_for: Callable[[tuple[str, str]], dict[str, list[dict]]],
+) -> list[dict]:
     implementation = vp.get("implementedVia", {})
     target = implementation.get("target", {})
     intermediate_class = target.get("class")
@@ -111,14 +142,14 @@ def _build_nested_shape_entry(vp: dict, enhanced_form_fields: dict) -> list[dict
     intermediate_entity_key = find_matching_form_field(
         class_uri=intermediate_class,
         shape_uri=specific_shape,
-        form_fields=enhanced_form_fields,
+        form_fields=entity_keys,
     )
 
     nested_shape_list: list[dict] = []
     if not intermediate_entity_key:
         return nested_shape_list
 
-    nested_shape_data = enhanced_form_fields.get(intermediate_entity_key, {})
+    nested_shape_data = fields_for(intermediate_entity_key)
     field_overrides = implementation.get("fieldOverrides", {})
 
     for nested_prop_uri, nested_details_list in nested_shape_data.items():
@@ -136,62 +167,58 @@ def _build_nested_shape_entry(vp: dict, enhanced_form_fields: dict) -> list[dict
     return nested_shape_list
 
 
-def add_virtual_properties_to_form_fields_internal(form_fields: dict) -> dict:
-    enhanced_form_fields = form_fields.copy() if form_fields else {}
+def _add_virtual_properties(
+    entity_key: tuple[str, str],
+    fields: dict[str, list[dict]],
+    entity_keys: dict,
+    fields_for: Callable[[tuple[str, str]], dict[str, list[dict]]],
+) -> None:
+    entity_class, entity_shape = entity_key
 
-    for entity_key in enhanced_form_fields:
-        entity_class, entity_shape = entity_key
+    virtual_properties = get_virtual_properties_for_entity(entity_class, entity_shape)
 
-        virtual_properties = get_virtual_properties_for_entity(
-            entity_class, entity_shape
-        )
+    if not virtual_properties:
+        return
 
-        if not virtual_properties:
+    for display_name, prop_config in virtual_properties:
+        if not prop_config.get("shouldBeDisplayed", True):
             continue
 
-        for display_name, prop_config in virtual_properties:
-            if not prop_config.get("shouldBeDisplayed", True):
-                continue
-
-            nested_shape_list = _build_nested_shape_entry(
-                prop_config, enhanced_form_fields
-            )
-
-            virtual_form_field = {
-                "displayName": prop_config.get("displayName", display_name),
-                "uri": display_name,
-                "is_virtual": True,
-                "min": 0,
-                "max": None,
-                "datatypes": [],
-                "optionalValues": [],
-                "orderedBy": None,
-                "nodeShape": None,
-                "subjectClass": None,
-                "subjectShape": None,
-                "objectClass": None,
-                "entityType": None,
-                "nestedShape": nested_shape_list,
-                "or": None,
-            }
-
-            enhanced_form_fields[entity_key][display_name] = [virtual_form_field]
-
-    return enhanced_form_fields
+        nested_shape_list = _build_nested_shape_entry(
+            prop_config, entity_keys, fields_for
+        )
+
+        virtual_form_field = {
+            "displayName": prop_config.get("displayName", display_name),
+            "uri": display_name,
+            "is_virtual": True,
+            "min": 0,
+            "max": None,
+            "datatypes": [],
+            "optionalValues": [],
+            "orderedBy": None,
+            "nodeShape": None,
+            "subjectClass": None,
+            "subjectShape": None,
+            "objectClass": None,
+            "entityType": None,
+            "nestedShape": nested_shape_list,
+            "or": None,
+        }
+
+        fields[display_name] = [virtual_form_field]
 
 
 def _get_shapes_for_class(shacl_graph: Graph, class_uri: str) -> list[str]:
-    per_graph = _class_shapes_cache.setdefault(shacl_graph, {})
-    if class_uri not in per_graph:
-        query_string = f"""
-            SELECT DISTINCT ?shape WHERE {{
-                ?shape <http://www.w3.org/ns/shacl#targetClass> <{class_uri}> .
-            }}
-        """
+    return list(shacl_index_for(shacl_graph).shapes_for_class(class_uri))
+
 
-        results = shacl_graph.query(query_string)
-        per_graph[class_uri] = [str(row.shape) for row in select_results(results)]
-    return per_graph[class_uri]
+def get_shapes_for_class(class_uri: str) -> list[str]:
+    """Return the SHACL shapes targeting a class."""
+    shacl_graph = get_shacl_graph()
+    if not shacl_graph:
+        return []
+    return _get_shapes_for_class(shacl_graph, class_uri)
 
 
 def determine_shape_for_classes(class_list: list[str]) -> str | None:
@@ -317,44 +344,13 @@ def _get_shape_properties(shacl_graph: Graph, shape_uri: str) -> set:
     Returns:
         Set of property URIs defined in the shape
     """
-    per_graph = _shape_properties_cache.setdefault(shacl_graph, {})
-    if shape_uri not in per_graph:
-        query_string = f"""
-            PREFIX sh: <http://www.w3.org/ns/shacl#>
-            SELECT DISTINCT ?property WHERE {{
-                <{shape_uri}> sh:property ?propertyShape .
-                ?propertyShape sh:path ?property .
-            }}
-        """
-
-        results = shacl_graph.query(query_string)
-        per_graph[shape_uri] = {str(row.property) for row in select_results(results)}
-
-    return per_graph[shape_uri]
+    return shacl_index_for(shacl_graph).shape_properties(shape_uri)
 
 
 def _get_hasvalue_constraints(
     shacl_graph: Graph, shape_uri: str
 ) -> list[tuple[str, str]]:
-    per_graph = _hasvalue_constraints_cache.setdefault(shacl_graph, {})
-    if shape_uri not in per_graph:
-        query_string = f"""
-            PREFIX sh: <http://www.w3.org/ns/shacl#>
-            SELECT DISTINCT ?property ?value WHERE {{
-                <{shape_uri}> sh:property ?propertyShape .
-                ?propertyShape sh:path ?property .
-                {{ ?propertyShape sh:hasValue ?value . }}
-                UNION
-                {{ ?propertyShape sh:qualifiedValueShape/sh:hasValue ?value . }}
-            }}
-        """
-
-        results = shacl_graph.query(query_string)
-        per_graph[shape_uri] = [
-            (str(row.property), str(row.value)) for row in select_results(results)
-        ]
-
-    return per_graph[shape_uri]
+    return shacl_index_for(shacl_graph).has_value_constraints(shape_uri)
 
 
 def _check_hasvalue_constraints(
@@ -390,6 +386,131 @@ def _check_hasvalue_constraints(
     return satisfied_constraints
 
 
+def get_shape_discriminator(class_uri: str, shape_uri: str) -> str | None:
+    """
+    Build a SPARQL pattern selecting the entities of a class that
+    determine_shape_for_entity_triples assigns to one of its shapes.
+
+    Only the sh:hasValue constraints and the properties that tell the shapes of
+    the class apart are checked, and their counts are compared the way
+    determine_shape_for_entity_triples compares them. The pattern is exact for
+    entities that have no other class with shapes of its own, since those
+    shapes would compete too.
+
+    Args:
+        class_uri: URI of the class being listed
+        shape_uri: URI of one of the shapes targeting the class
+
+    Returns:
+        A group pattern constraining ?subject, or None if the shape does not
+        target the class
+    """
+    shacl_graph = get_shacl_graph()
+    if not shacl_graph:
+        return None
+
+    per_graph = _shape_discriminators_cache.setdefault(shacl_graph, {})
+    key = (class_uri, shape_uri)
+    if key not in per_graph:
+        per_graph[key] = _build_shape_discriminator(shacl_graph, class_uri, shape_uri)
+    return per_graph[key]
+
+
+def _is_iri(path: str) -> bool:
+    # Complex sh:path values are blank nodes, which never match a predicate.
+    return ":" in path
+
+
+def _build_shape_discriminator(
+    shacl_graph: Graph, class_uri: str, shape_uri: str
+) -> str | None:
+    shapes = _get_shapes_for_class(shacl_graph, class_uri)
+    if shape_uri not in shapes:
+        return None
+
+    hasvalues = {
+        shape: {
+            constraint
+            for constraint in _get_hasvalue_constraints(shacl_graph, shape)
+            if _is_iri(constraint[0])
+        }
+        for shape in shapes
+    }
+    properties = {
+        shape: {p for p in _get_shape_properties(shacl_graph, shape) if _is_iri(p)}
+        for shape in shapes
+    }
+
+    # Checks shared by every shape add the same amount to every score.
+    hasvalue_checks = sorted(
+        set().union(*hasvalues.values()) - set.intersection(*hasvalues.values())
+    )
+    property_checks = sorted(
+        set().union(*properties.values()) - set.intersection(*properties.values())
+    )
+
+    binds = []
+    for index, (property_uri, value) in enumerate(hasvalue_checks):
+        binds.append(
+            f"BIND(IF(EXISTS {{ ?subject <{property_uri}> ?shapeValue{index} . "
+            f"FILTER(STR(?shapeValue{index}) = {Literal(value).n3()}) }}, 1, 0) "
+            f"AS ?shapeHasValue{index})"
+        )
+    binds.extend(
+        f"BIND(IF(EXISTS {{ ?subject <{property_uri}> [] }}, 1, 0) "
+        f"AS ?shapeProperty{index})"
+        for index, property_uri in enumerate(property_checks)
+    )
+
+    def scores(shape: str) -> tuple[str, str]:
+        hasvalue_score = " + ".join(
+            f"?shapeHasValue{index}"
+            for index, check in enumerate(hasvalue_checks)
+            if check in hasvalues[shape]
+        )
+        property_score = " + ".join(
+            f"?shapeProperty{index}"
+            for index, check in enumerate(property_checks)
+            if check in properties[shape]
+        )
+        return f"({hasvalue_score or 0})", f"({property_score or 0})"
+
+    # Equal scores go to the shape with the highest priority, and then to the
+    # one found first, as max() does in determine_shape_for_entity_triples.
+    def rank(shape: str) -> tuple[float, int]:
+        return get_class_priority((class_uri, shape)), shapes.index(shape)
+
+    selected_hasvalue, selected_properties = scores(shape_uri)
+    conditions = []
+    for other in shapes:
+        if other == shape_uri:
+            continue
+        other_hasvalue, other_properties = scores(other)
+        comparison = ">=" if rank(shape_uri) < rank(other) else ">"
+        conditions.append(
+            f"({selected_hasvalue} > {other_hasvalue}"
+            f" || ({selected_hasvalue} = {other_hasvalue}"
+            f" && {selected_properties} {comparison} {other_properties}))"
+        )
+
+    if not conditions:
+        return ""
+    return "\n".join([*binds, f"FILTER({' && '.join(conditions)})"])
+
+
+def get_shaped_classes() -> set[str]:
+    """Return every class targeted by at least one SHACL shape."""
+    shacl_graph = get_shacl_graph()
+    if not shacl_graph:
+        return set()
+    return {
+        str(target_class)
+        for target_class in shacl_graph.objects(
+            None, URIRef("http://www.w3.org/ns/shacl#targetClass"), unique=True
+        )
+    }
+
+
 def ensure_display_names(form_fields: dict) -> None:
     """
     Ensures all form fields have a displayName, using URI formatting as fallback.
@@ -537,7 +658,7 @@ def get_entity_position_in_sequence(
     subject_uri: str,
     predicate_uri: str,
     order_property: str,
-    snapshot: Graph | None = None,
+    snapshot: Graph | SnapshotGraph | None = None,
 ) -> int | None:
     """
     Get the position of an entity in an ordered sequence.
@@ -4,26 +4,27 @@
 
 from __future__ import annotations
 
-import re
 from collections import defaultdict
 from dataclasses import dataclass
 from typing import TYPE_CHECKING
 
 from flask_babel import gettext
 from rdflib import RDF, XSD, Dataset, Graph, Literal, URIRef
-from rdflib.plugins.sparql import prepareQuery
 
 if TYPE_CHECKING:
-    from collections.abc import Sequence
-
-    from rdflib.query import ResultRow
+    from collections.abc import Iterable, Sequence
 
 from heritrace.extensions import get_custom_filter, get_shacl_graph
-from heritrace.sparql import select_results
 from heritrace.utils.datatypes import DATATYPE_MAPPING
 from heritrace.utils.display_rules_utils import get_highest_priority_class
+from heritrace.utils.literal_validators import (
+    DATATYPE_VALIDATORS,
+    literal_validators_for,
+)
+from heritrace.utils.shacl_index import PropertyConstraint, shacl_index_for
 from heritrace.utils.sparql_utils import (
     fetch_data_graph_for_subject,
+    fetch_data_graph_for_subjects,
     get_triples_from_graph,
 )
 from heritrace.utils.uri_utils import is_valid_url
@@ -40,6 +41,7 @@ class ValidationContext:
     old_value: URIRef | Literal | None
     custom_filter: Filter
     entity_key: tuple[str, str]
+    object_graph: Graph | Dataset | None = None
 
 
 def _build_cardinality_metadata(
@@ -75,6 +77,69 @@ def _build_cardinality_metadata(
     return can_be_added, can_be_deleted, mandatory_values, optional_values
 
 
+@dataclass(frozen=True, slots=True)
+class _PredicateGroup:
+    predicate: str
+    datatype: str | None
+    max_count: str | None
+    min_count: str | None
+    has_value: str | None
+    optional_values: list[str]
+
+
+def _datatype_options(constraint: PropertyConstraint) -> dict[str | None, list[str]]:
+    """Map every datatype a property accepts to the values its sh:or allows."""
+    members = constraint.or_members + constraint.qualified_or_members
+    if constraint.datatypes:
+        return {
+            datatype: [
+                value
+                for member in members
+                if not member.datatypes or datatype in member.datatypes
+                for value in member.has_values
+            ]
+            for datatype in constraint.datatypes
+        }
+    options: dict[str | None, list[str]] = {}
+    for member in members:
+        for datatype in member.datatypes or (None,):
+            options.setdefault(datatype, []).extend(member.has_values)
+    return options or {None: []}
+
+
+def _group_predicate_constraints(
+    constraints: list[PropertyConstraint],
+) -> list[_PredicateGroup]:
+    """
+    Split the constraints by predicate, datatype, cardinality and sh:hasValue.
+
+    Each combination gets the sh:in values and the sh:or values of its
+    datatype. Property shapes whose path is not an IRI are left out.
+    """
+    groups: dict[tuple[str, str | None, str | None, str | None, str | None], list] = {}
+    for constraint in constraints:
+        if not constraint.path_is_iri:
+            continue
+        for datatype, or_values in _datatype_options(constraint).items():
+            for max_count in constraint.max_counts or (None,):
+                for min_count in constraint.min_counts or (None,):
+                    for has_value in constraint.has_values or (None,):
+                        key = (
+                            constraint.path,
+                            datatype,
+                            max_count,
+                            min_count,
+                            has_value,
+                        )
+                        groups.setdefault(key, []).extend(
+                            [*constraint.in_values, *or_values]
+                        )
+    return [
+        _PredicateGroup(*key, optional_values=list(dict.fromkeys(values)))
+        for key, values in groups.items()
+    ]
+
+
 def get_valid_predicates(
     triples: Sequence[tuple[URIRef, URIRef, URIRef | Literal]],
     highest_priority_class: URIRef,
@@ -103,71 +168,22 @@ def get_valid_predicates(
     if not s_types or not shacl:
         return fallback
 
-    query_string = f"""
-        SELECT ?predicate ?datatype ?maxCount ?minCount ?hasValue
-        (GROUP_CONCAT(?optionalValue; separator=",") AS ?optionalValues) WHERE {{
-            ?shape sh:targetClass ?type ;
-                   sh:property ?property .
-            VALUES ?type {{<{highest_priority_class}>}}
-            ?property sh:path ?predicate .
-            OPTIONAL {{?property sh:datatype ?datatype .}}
-            OPTIONAL {{
-                {{?property sh:maxCount ?maxCount .}}
-                UNION
-                {{?property sh:qualifiedMaxCount ?maxCount .}}
-            }}
-            OPTIONAL {{
-                {{?property sh:minCount ?minCount .}}
-                UNION
-                {{?property sh:qualifiedMinCount ?minCount .}}
-            }}
-            OPTIONAL {{
-                {{?property sh:hasValue ?hasValue .}}
-                UNION
-                {{?property sh:qualifiedValueShape/sh:hasValue ?hasValue .}}
-            }}
-            OPTIONAL {{
-                ?property sh:in ?list .
-                ?list rdf:rest*/rdf:first ?optionalValue .
-            }}
-            OPTIONAL {{
-                {{?property sh:or ?orList .}}
-                UNION
-                {{?property sh:qualifiedValueShape/sh:or ?orList .}}
-                ?orList rdf:rest*/rdf:first ?orConstraint .
-                OPTIONAL {{?orConstraint sh:datatype ?datatype .}}
-                OPTIONAL {{?orConstraint sh:hasValue ?optionalValue .}}
-            }}
-            FILTER (isURI(?predicate))
-        }}
-        GROUP BY ?predicate ?datatype ?maxCount ?minCount ?hasValue
-    """
-
-    query = prepareQuery(
-        query_string,
-        initNs={
-            "sh": "http://www.w3.org/ns/shacl#",
-            "rdf": "http://www.w3.org/1999/02/22-rdf-syntax-ns#",
-        },
+    predicate_groups = _group_predicate_constraints(
+        shacl_index_for(shacl).class_constraints([highest_priority_class])
     )
-    results = shacl.query(query)
-    results_list = list(select_results(results))
-
-    if not results_list:
+    if not predicate_groups:
         return fallback
 
     valid_predicates = [
         {
-            str(row.predicate): {
-                "min": 0 if row.minCount is None else int(row.minCount),
-                "max": None if row.maxCount is None else str(row.maxCount),
-                "hasValue": row.hasValue,
-                "optionalValues": (
-                    row.optionalValues.split(",") if row.optionalValues else []
-                ),
+            group.predicate: {
+                "min": 0 if group.min_count is None else int(group.min_count),
+                "max": group.max_count,
+                "hasValue": group.has_value,
+                "optionalValues": group.optional_values,
             }
         }
-        for row in results_list
+        for group in predicate_groups
     ]
 
     can_be_added, can_be_deleted, mandatory_values, optional_values = (
@@ -175,11 +191,8 @@ def get_valid_predicates(
     )
 
     datatypes = defaultdict(list)
-    for row in results_list:
-        if row.datatype:
-            datatypes[str(row.predicate)].append(str(row.datatype))
-        else:
-            datatypes[str(row.predicate)].append(str(XSD.string))
+    for group in predicate_groups:
+        datatypes[group.predicate].append(group.datatype or str(XSD.string))
 
     return (
         list(can_be_added),
@@ -209,7 +222,7 @@ def _coerce_value_without_shacl(
 def _collect_subject_types(
     data_graph: Graph | Dataset,
     subject: URIRef,
-    entity_types: str | list[str] | None,
+    entity_types: str | Sequence[str] | None,
 ) -> tuple[list[str], str | None]:
     s_types: list[str] = [
         str(triple[2])
@@ -218,7 +231,11 @@ def _collect_subject_types(
     highest_priority_class = get_highest_priority_class(s_types)
 
     if entity_types and not s_types:
-        s_types = entity_types if isinstance(entity_types, list) else [entity_types]
+        s_types = (
+            list(entity_types)
+            if isinstance(entity_types, (list, tuple))
+            else [entity_types]
+        )
 
     for _s, _p, _o in get_triples_from_graph(data_graph, (None, None, subject)):
         s_types.extend(
@@ -231,68 +248,11 @@ def _collect_subject_types(
     return s_types, highest_priority_class
 
 
-def _query_shacl_constraints(
+def _property_constraints(
     predicate: URIRef,
     s_types: list[str],
-) -> list[ResultRow]:
-    query = f"""
-        PREFIX sh: <http://www.w3.org/ns/shacl#>
-        SELECT DISTINCT ?path ?datatype ?a_class ?classIn ?maxCount ?minCount ?pattern
-        ?message ?shape
-            (GROUP_CONCAT(DISTINCT COALESCE(?optionalValue, ""); separator=",") AS
-            ?optionalValues)
-            (GROUP_CONCAT(DISTINCT COALESCE(?conditionPath, ""); separator=",") AS
-            ?conditionPaths)
-            (GROUP_CONCAT(DISTINCT COALESCE(?conditionValue, ""); separator=",") AS
-            ?conditionValues)
-        WHERE {{
-            ?shape sh:targetClass ?type ;
-                sh:property ?propertyShape .
-            ?propertyShape sh:path ?path .
-            FILTER(?path = <{predicate}>)
-            VALUES ?type {{<{"> <".join(str(t) for t in s_types)}>}}
-            OPTIONAL {{?propertyShape sh:datatype ?datatype .}}
-            OPTIONAL {{
-                {{?propertyShape sh:maxCount ?maxCount .}}
-                UNION
-                {{?propertyShape sh:qualifiedMaxCount ?maxCount .}}
-            }}
-            OPTIONAL {{
-                {{?propertyShape sh:minCount ?minCount .}}
-                UNION
-                {{?propertyShape sh:qualifiedMinCount ?minCount .}}
-            }}
-            OPTIONAL {{?propertyShape sh:class ?a_class .}}
-            OPTIONAL {{
-                ?propertyShape sh:or ?orList .
-                ?orList rdf:rest*/rdf:first ?orConstraint .
-                ?orConstraint sh:datatype ?datatype .
-                OPTIONAL {{?orConstraint sh:class ?class .}}
-            }}
-            OPTIONAL {{
-                ?propertyShape  sh:classIn ?classInList .
-                ?classInList rdf:rest*/rdf:first ?classIn .
-            }}
-            OPTIONAL {{
-                ?propertyShape sh:in ?list .
-                ?list rdf:rest*/rdf:first ?optionalValue .
-            }}
-            OPTIONAL {{
-                ?propertyShape sh:pattern ?pattern .
-                OPTIONAL {{?propertyShape sh:message ?message .}}
-            }}
-            OPTIONAL {{
-                ?propertyShape sh:condition ?conditionNode .
-                ?conditionNode sh:path ?conditionPath ;
-                             sh:hasValue ?conditionValue .
-            }}
-        }}
-        GROUP BY ?path ?datatype ?a_class ?classIn
-            ?maxCount ?minCount ?pattern ?message ?shape
-    """
-    shacl = get_shacl_graph()
-    results = shacl.query(query)
-    return list(select_results(results))
+) -> list[PropertyConstraint]:
+    return shacl_index_for(get_shacl_graph()).constraints_for(s_types, predicate)
 
 
 def _validate_cardinality(
@@ -344,36 +304,31 @@ def _validate_cardinality(
 
 
 def _validate_pattern_constraints(
-    results_list: list[ResultRow],
+    constraints: list[PropertyConstraint],
     new_value: str | URIRef | None,
     old_value: URIRef | Literal | None,
     data_graph: Graph | Dataset,
     subject: URIRef,
 ) -> tuple[URIRef | Literal | None, URIRef | Literal | None, str] | None:
-    for row in results_list:
-        if not row.pattern:
-            continue
-        condition_paths = row.conditionPaths.split(",") if row.conditionPaths else []
-        condition_values = row.conditionValues.split(",") if row.conditionValues else []
-        conditions_met = True
-
-        for path, value in zip(condition_paths, condition_values, strict=False):
-            if path and value:
-                condition_exists = any(
-                    get_triples_from_graph(
-                        data_graph, (subject, URIRef(path), URIRef(value))
-                    )
+    literal_validators = literal_validators_for(get_shacl_graph())
+    for constraint in constraints:
+        conditions_met = all(
+            any(
+                get_triples_from_graph(
+                    data_graph, (subject, URIRef(path), URIRef(value))
                 )
-                if not condition_exists:
-                    conditions_met = False
-                    break
-
-        if conditions_met:
-            pattern = str(row.pattern)
-            if new_value is None or not re.match(pattern, str(new_value)):
+            )
+            for path, value in constraint.conditions
+        )
+        if not conditions_met:
+            continue
+        for pattern in constraint.patterns:
+            if new_value is None or not literal_validators.pattern(pattern).match(
+                str(new_value)
+            ):
                 error_message = (
-                    str(row.message)
-                    if row.message
+                    constraint.messages[0]
+                    if constraint.messages
                     else f"Value must match pattern: {pattern}"
                 )
                 return None, old_value, error_message
@@ -416,7 +371,7 @@ def _validate_class_constraint(
     if not is_valid_url(str(new_value) if new_value is not None else None):
         return _class_error()
     valid_value = convert_to_matching_class(
-        str(new_value), classes, entity_types=s_types
+        str(new_value), classes, entity_types=s_types, data_graph=ctx.object_graph
     )
     if valid_value is None:
         return _class_error()
@@ -487,25 +442,49 @@ def _resolve_old_value(
 
 
 def _extract_shacl_constraints(
-    results_list: list[ResultRow],
+    constraints: list[PropertyConstraint],
 ) -> tuple[list[URIRef], list[URIRef], list[str], int | None, int | None]:
-    datatypes: list[URIRef] = [
-        URIRef(str(row.datatype)) for row in results_list if row.datatype is not None
-    ]
+    datatypes: list[URIRef] = []
+    for constraint in constraints:
+        if constraint.datatypes:
+            datatypes.extend(URIRef(datatype) for datatype in constraint.datatypes)
+        else:
+            datatypes.extend(
+                URIRef(datatype)
+                for member in constraint.or_members
+                for datatype in member.datatypes
+            )
     classes: list[URIRef] = [
-        URIRef(str(row.a_class)) for row in results_list if row.a_class
+        URIRef(class_uri)
+        for constraint in constraints
+        for class_uri in (*constraint.classes, *constraint.class_in)
     ]
-    classes.extend(URIRef(str(row.classIn)) for row in results_list if row.classIn)
-    optional_values_str = [
-        row.optionalValues for row in results_list if row.optionalValues
-    ]
-    optional_values_str = optional_values_str[0] if optional_values_str else ""
-    optional_values = [value for value in optional_values_str.split(",") if value]
-
-    max_count_list = [row.maxCount for row in results_list if row.maxCount]
-    min_count_list = [row.minCount for row in results_list if row.minCount]
-    max_count = int(max_count_list[0]) if max_count_list else None
-    min_count = int(min_count_list[0]) if min_count_list else None
+    optional_values = next(
+        (
+            list(constraint.in_values)
+            for constraint in constraints
+            if constraint.in_values
+        ),
+        [],
+    )
+    max_count = next(
+        (
+            int(count)
+            for constraint in constraints
+            for count in constraint.max_counts
+            if int(count)
+        ),
+        None,
+    )
+    min_count = next(
+        (
+            int(count)
+            for constraint in constraints
+            for count in constraint.min_counts
+            if int(count)
+        ),
+        None,
+    )
 
     return datatypes, classes, optional_values, max_count, min_count
 
@@ -542,80 +521,267 @@ def _validate_optional_values(
     )
 
 
-def validate_new_triple(  # noqa: PLR0911, PLR0913
-    subject: URIRef,
-    predicate: URIRef,
-    new_value: str | URIRef | None,
-    action: str,
-    old_value: URIRef | Literal | None = None,
-    entity_types: str | list[str] | None = None,
-) -> tuple[URIRef | Literal | None, URIRef | Literal | None, str]:
-    data_graph = fetch_data_graph_for_subject(subject)
-    old_value = _resolve_old_value(data_graph, subject, predicate, old_value)
-    if not len(get_shacl_graph()):
-        return _coerce_value_without_shacl(new_value, old_value)
+@dataclass(frozen=True, slots=True)
+class TripleChange:
+    """A triple an editor is about to create, update or delete."""
 
-    s_types, highest_priority_class = _collect_subject_types(
-        data_graph, subject, entity_types
-    )
+    subject: URIRef
+    predicate: URIRef
+    new_value: str | URIRef | None
+    action: str
+    old_value: URIRef | Literal | None = None
+    entity_types: str | tuple[str, ...] | None = None
 
-    results_list = _query_shacl_constraints(predicate, s_types)
-    property_exists = [row.path for row in results_list]
-    shapes = [row.shape for row in results_list if row.shape is not None]
-    current_shape = shapes[0] if shapes else None
-    entity_key = (
-        str(highest_priority_class or ""),
-        str(current_shape or ""),
-    )
 
-    ctx = ValidationContext(
-        data_graph=data_graph,
-        subject=subject,
-        predicate=predicate,
-        old_value=old_value,
-        custom_filter=get_custom_filter(),
-        entity_key=entity_key,
-    )
+@dataclass(frozen=True, slots=True)
+class TripleValidation:
+    """The values to write for a change, or the reason why it is not valid."""
 
-    if not property_exists:
-        if not s_types:
-            return (None, old_value, gettext("No entity type specified"))
-        return _coerce_value_without_shacl(new_value, old_value, XSD.string)
+    change: TripleChange
+    new_value: URIRef | Literal | None
+    old_value: URIRef | Literal | None
+    error: str
 
-    datatypes, classes, optional_values, max_count, min_count = (
-        _extract_shacl_constraints(results_list)
-    )
+    def as_tuple(
+        self,
+    ) -> tuple[URIRef | Literal | None, URIRef | Literal | None, str]:
+        return self.new_value, self.old_value, self.error
 
-    cardinality_error = _validate_cardinality(ctx, action, max_count, min_count)
-    if cardinality_error:
-        return cardinality_error
 
-    if action == "delete":
-        return None, old_value, ""
+@dataclass(frozen=True, slots=True)
+class _ConstraintGroup:
+    constraints: list[PropertyConstraint]
+    current_shape: str | None
+    datatypes: list[URIRef]
+    classes: list[URIRef]
+    optional_values: list[str]
+    max_count: int | None
+    min_count: int | None
+
+
+def _subject_graph(data_graph: Graph | Dataset, subject: URIRef) -> Graph | Dataset:
+    if isinstance(data_graph, Dataset):
+        subject_dataset = Dataset()
+        for quad in data_graph.quads((subject, None, None, None)):
+            subject_dataset.add(quad)
+        return subject_dataset
+    subject_graph = Graph()
+    for triple in data_graph.triples((subject, None, None)):
+        subject_graph.add(triple)
+    return subject_graph
+
+
+class TripleValidator:
+    """
+    Validate triples against the SHACL shapes and the stored data.
 
-    optional_error = _validate_optional_values(new_value, ctx, optional_values)
-    if optional_error:
-        return optional_error
+    The stored state of the subjects of a batch is read with one query, then
+    kept, so a validator should not outlive the request it serves. The
+    constraints of the changes sharing the subject types and the predicate are
+    resolved once per group. Changes can be planned in advance: the first one
+    asked for is then validated together with all of them.
+    """
 
-    pattern_error = _validate_pattern_constraints(
-        results_list, new_value, old_value, data_graph, subject
-    )
-    if pattern_error:
-        return pattern_error
+    def __init__(self) -> None:
+        self._data_graphs: dict[str, Graph | Dataset] = {}
+        self._subject_types: dict[
+            tuple[str, str | tuple[str, ...] | None], tuple[list[str], str | None]
+        ] = {}
+        self._groups: dict[tuple[tuple[str, ...], str], _ConstraintGroup] = {}
+        self._results: dict[TripleChange, TripleValidation] = {}
+        self._planned: list[TripleChange] = []
+
+    @property
+    def errors(self) -> list[str]:
+        """The distinct errors of the changes validated so far."""
+        return list(
+            dict.fromkeys(
+                validation.error
+                for validation in self._results.values()
+                if validation.error
+            )
+        )
+
+    def add_new_subject(self, subject: URIRef) -> None:
+        """Record a subject that is not stored yet, so its state is not read."""
+        self._data_graphs.setdefault(str(subject), Graph())
+
+    def plan(self, changes: Iterable[TripleChange]) -> None:
+        """Queue changes to validate together with the next one asked for."""
+        self._planned.extend(changes)
+
+    def validate(self, change: TripleChange) -> TripleValidation:
+        if change not in self._results:
+            planned, self._planned = self._planned, []
+            self.validate_all([*planned, change])
+        return self._results[change]
+
+    def validate_all(self, changes: Sequence[TripleChange]) -> list[TripleValidation]:
+        """Validate changes in one batch and return their results in order."""
+        pending = [
+            change for change in dict.fromkeys(changes) if change not in self._results
+        ]
+        self._prefetch(change.subject for change in pending)
+        if pending and len(get_shacl_graph()):
+            self._prefetch(self._class_values(pending))
+        for change in pending:
+            self._results[change] = TripleValidation(change, *self._check(change))
+        return [self._results[change] for change in changes]
+
+    def _prefetch(self, subjects: Iterable[str | URIRef]) -> None:
+        missing = [
+            URIRef(subject)
+            for subject in dict.fromkeys(str(subject) for subject in subjects)
+            if subject not in self._data_graphs
+        ]
+        if missing[1:]:
+            data_graph = fetch_data_graph_for_subjects(missing)
+            for subject in missing:
+                self._data_graphs[str(subject)] = _subject_graph(data_graph, subject)
+
+    def _data_graph(self, subject: URIRef) -> Graph | Dataset:
+        data_graph = self._data_graphs.get(str(subject))
+        if data_graph is None:
+            data_graph = fetch_data_graph_for_subject(subject)
+            self._data_graphs[str(subject)] = data_graph
+        return data_graph
+
+    def _types(
+        self, subject: URIRef, entity_types: str | tuple[str, ...] | None
+    ) -> tuple[list[str], str | None]:
+        key = (str(subject), entity_types)
+        if key not in self._subject_types:
+            self._subject_types[key] = _collect_subject_types(
+                self._data_graph(subject), subject, entity_types
+            )
+        return self._subject_types[key]
+
+    def _group(self, predicate: URIRef, s_types: list[str]) -> _ConstraintGroup:
+        key = (tuple(s_types), str(predicate))
+        if key not in self._groups:
+            constraints = _property_constraints(predicate, s_types)
+            datatypes, classes, optional_values, max_count, min_count = (
+                _extract_shacl_constraints(constraints)
+            )
+            self._groups[key] = _ConstraintGroup(
+                constraints=constraints,
+                current_shape=constraints[0].shape if constraints else None,
+                datatypes=datatypes,
+                classes=classes,
+                optional_values=optional_values,
+                max_count=max_count,
+                min_count=min_count,
+            )
+        return self._groups[key]
+
+    def _class_values(self, changes: list[TripleChange]) -> list[str]:
+        """Return the values whose types a class constraint will check."""
+        return [
+            str(change.new_value)
+            for change in changes
+            if change.action != "delete"
+            and change.new_value is not None
+            and is_valid_url(str(change.new_value))
+            and self._group(
+                change.predicate,
+                self._types(change.subject, change.entity_types)[0],
+            ).classes
+        ]
+
+    def _check(  # noqa: PLR0911
+        self, change: TripleChange
+    ) -> tuple[URIRef | Literal | None, URIRef | Literal | None, str]:
+        subject, predicate, new_value = (
+            change.subject,
+            change.predicate,
+            change.new_value,
+        )
+        data_graph = self._data_graph(subject)
+        old_value = _resolve_old_value(data_graph, subject, predicate, change.old_value)
+        if not len(get_shacl_graph()):
+            return _coerce_value_without_shacl(new_value, old_value)
+
+        s_types, highest_priority_class = self._types(subject, change.entity_types)
+        group = self._group(predicate, s_types)
+        entity_key = (
+            str(highest_priority_class or ""),
+            str(group.current_shape or ""),
+        )
 
-    if classes:
-        return _validate_class_constraint(
-            new_value, ctx, classes, s_types, current_shape
+        ctx = ValidationContext(
+            data_graph=data_graph,
+            subject=subject,
+            predicate=predicate,
+            old_value=old_value,
+            custom_filter=get_custom_filter(),
+            entity_key=entity_key,
+            object_graph=self._data_graphs.get(str(new_value)),
         )
-    if datatypes:
-        return _validate_datatype_constraint(new_value, ctx, datatypes)
-    return _infer_value_type(new_value, old_value)
+
+        if not group.constraints:
+            if not s_types:
+                return (None, old_value, gettext("No entity type specified"))
+            return _coerce_value_without_shacl(new_value, old_value, XSD.string)
+
+        cardinality_error = _validate_cardinality(
+            ctx, change.action, group.max_count, group.min_count
+        )
+        if cardinality_error:
+            return cardinality_error
+
+        if change.action == "delete":
+            return None, old_value, ""
+
+        optional_error = _validate_optional_values(
+            new_value, ctx, group.optional_values
+        )
+        if optional_error:
+            return optional_error
+
+        pattern_error = _validate_pattern_constraints(
+            group.constraints, new_value, old_value, data_graph, subject
+        )
+        if pattern_error:
+            return pattern_error
+
+        if group.classes:
+            return _validate_class_constraint(
+                new_value, ctx, group.classes, s_types, group.current_shape
+            )
+        if group.datatypes:
+            return _validate_datatype_constraint(new_value, ctx, group.datatypes)
+        return _infer_value_type(new_value, old_value)
+
+
+def validate_triples(changes: Sequence[TripleChange]) -> list[TripleValidation]:
+    """Validate a list of changes and return the results of all of them."""
+    return TripleValidator().validate_all(changes)
+
+
+def validate_new_triple(  # noqa: PLR0913
+    subject: URIRef,
+    predicate: URIRef,
+    new_value: str | URIRef | None,
+    action: str,
+    old_value: URIRef | Literal | None = None,
+    entity_types: str | list[str] | None = None,
+) -> tuple[URIRef | Literal | None, URIRef | Literal | None, str]:
+    change = TripleChange(
+        subject,
+        predicate,
+        new_value,
+        action,
+        old_value,
+        tuple(entity_types) if isinstance(entity_types, list) else entity_types,
+    )
+    return TripleValidator().validate(change).as_tuple()
 
 
 def convert_to_matching_class(
     object_value: str | URIRef,
     classes: list[URIRef],
     entity_types: list[URIRef | Literal | str] | None = None,
+    data_graph: Graph | Dataset | None = None,
 ) -> URIRef | None:
     # Handle edge cases
     if not classes or object_value is None:
@@ -625,8 +791,9 @@ def convert_to_matching_class(
     if not is_valid_url(str(object_value)):
         return None
 
-    # Fetch data graph and get types
-    data_graph = fetch_data_graph_for_subject(URIRef(object_value))
+    # Fetch data graph, unless the caller already read it, and get types
+    if data_graph is None:
+        data_graph = fetch_data_graph_for_subject(URIRef(object_value))
     o_types = {
         str(c[2])
         for c in get_triples_from_graph(
@@ -664,9 +831,7 @@ def convert_to_matching_literal(
         return None
 
     for datatype in datatypes:
-        validation_func = next(
-            (d[1] for d in DATATYPE_MAPPING if str(d[0]) == str(datatype)), None
-        )
+        validation_func = DATATYPE_VALIDATORS.get(str(datatype))
         if validation_func is None:
             return Literal(object_value, datatype=XSD.string)
         is_valid_datatype = validation_func(object_value)
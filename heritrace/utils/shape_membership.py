@@ -0,0 +1,417 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+"""
+Shape membership of the entities of classes with multiple shapes.
+
+When the shapes of a class can be told apart in SPARQL, the catalogue filters
+by shape in the listing query itself. Otherwise the shape of every entity of
+the class is read from the persistent shape index, built by the shape-index
+build command and kept current by the editor. Classes that are not indexed
+fall back to a per-process index, worked out from the triples of every entity
+in a background thread and rebuilt there once it expires. Until the first one
+is ready, the shapes of the entities of a page are worked out from their
+triples as the listing is read.
+"""
+
+import contextvars
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from typing import TypeVar
+
+from rdflib import Literal
+from SPARQLWrapper import JSON
+
+from heritrace.extensions import get_shape_index, get_sparql
+from heritrace.sparql import get_sparql_bindings, use_private_wrappers
+from heritrace.utils.shacl_utils import (
+    determine_shape_for_entity_triples,
+    get_shape_discriminator,
+    get_shaped_classes,
+    get_shapes_for_class,
+)
+
+logger = logging.getLogger(__name__)
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+SHAPE_MEMBERSHIP_TTL_SECONDS = 300
+SHAPE_MEMBERSHIP_CHUNK_SIZE = 1000
+
+
+@dataclass(frozen=True, slots=True)
+class _Membership:
+    shapes: dict[str, str | None]
+    members: dict[str | None, list[str]]
+
+    @classmethod
+    def of(cls, shapes: dict[str, str | None]) -> "_Membership":
+        members: dict[str | None, list[str]] = {}
+        for subject, shape in shapes.items():
+            members.setdefault(shape, []).append(subject)
+        for subjects in members.values():
+            subjects.sort()
+        return cls(shapes, members)
+
+
+@dataclass(slots=True)
+class _ShapeMemberships:
+    indexes: dict[str, tuple[_Membership, float]] = field(default_factory=dict)
+    building: set[str] = field(default_factory=set)
+    counts: dict[tuple[str, str], tuple[int, float]] = field(default_factory=dict)
+    foreign_shapes: dict[str, tuple[bool, float]] = field(default_factory=dict)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    build_lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+_shape_memberships = _ShapeMemberships()
+
+
+def _forget_inherited_locks() -> None:
+    _shape_memberships.lock = threading.Lock()
+    _shape_memberships.build_lock = threading.Lock()
+    _shape_memberships.building = set()
+
+
+os.register_at_fork(after_in_child=_forget_inherited_locks)
+
+
+def _get_fresh(entries: dict[K, tuple[V, float]], key: K) -> V | None:
+    with _shape_memberships.lock:
+        cached = entries.get(key)
+    if cached and time.monotonic() - cached[1] < SHAPE_MEMBERSHIP_TTL_SECONDS:
+        return cached[0]
+    return None
+
+
+def _store(entries: dict[K, tuple[V, float]], key: K, value: V) -> None:
+    with _shape_memberships.lock:
+        entries[key] = (value, time.monotonic())
+
+
+def fetch_entity_shapes(
+    class_uri: str, subjects: Iterable[str]
+) -> dict[str, str | None]:
+    """
+    Determine the shape of some entities of a class from their triples.
+
+    Args:
+        class_uri: URI of the class the entities belong to
+        subjects: URIs of the entities
+
+    Returns:
+        The shape of every entity that still belongs to the class
+    """
+    values = " ".join(f"<{subject}>" for subject in subjects)
+    if not values:
+        return {}
+
+    sparql = get_sparql()
+    sparql.setQuery(f"""
+        SELECT ?subject ?p ?o
+        WHERE {{
+            VALUES ?subject {{ {values} }}
+            ?subject a <{class_uri}> .
+            ?subject ?p ?o .
+        }}
+    """)
+    sparql.setReturnFormat(JSON)
+
+    entities_triples: dict[str, list[tuple[str, str, str]]] = {}
+    for binding in get_sparql_bindings(sparql.query().convert()):
+        subject = binding["subject"]["value"]
+        entities_triples.setdefault(subject, []).append(
+            (subject, binding["p"]["value"], binding["o"]["value"])
+        )
+    return {
+        subject: determine_shape_for_entity_triples(triples)
+        for subject, triples in entities_triples.items()
+    }
+
+
+def get_shape_membership(
+    class_uri: str, *, wait: bool = False
+) -> dict[str, str | None] | None:
+    """
+    Return the shape of every entity of a class, once its index is built.
+
+    Args:
+        class_uri: URI of the class
+        wait: Build a missing index before returning, for callers that are
+            already off the request path
+
+    Returns:
+        The shape of every entity of the class, or None while the index is
+        being built
+    """
+    membership = _get_membership(class_uri, wait=wait)
+    return membership.shapes if membership is not None else None
+
+
+def _get_membership(class_uri: str, *, wait: bool) -> _Membership | None:
+    """
+    Return the membership index of a class, building it in the background.
+
+    A missing or expired index is built by a background thread, while the
+    expired one keeps being served. Only one index is built at a time.
+    """
+    with _shape_memberships.lock:
+        cached = _shape_memberships.indexes.get(class_uri)
+        expired = (
+            cached is None
+            or time.monotonic() - cached[1] >= SHAPE_MEMBERSHIP_TTL_SECONDS
+        )
+        start_build = (
+            expired
+            and class_uri not in _shape_memberships.building
+            and not (cached is None and wait)
+        )
+        if start_build:
+            _shape_memberships.building.add(class_uri)
+
+    if cached is None and wait:
+        return _build_shape_membership(class_uri)
+    if start_build:
+        context = contextvars.copy_context()
+        threading.Thread(
+            target=context.run,
+            args=(_build_in_background, class_uri),
+            name="heritrace-shape-membership",
+            daemon=True,
+        ).start()
+    return cached[0] if cached is not None else None
+
+
+def _build_in_background(class_uri: str) -> None:
+    # The build queries alongside the request thread.
+    use_private_wrappers()
+    try:
+        _build_shape_membership(class_uri)
+    except Exception:
+        logger.exception("Building the shape membership of %s failed", class_uri)
+    finally:
+        with _shape_memberships.lock:
+            _shape_memberships.building.discard(class_uri)
+
+
+def _build_shape_membership(class_uri: str) -> _Membership:
+    with _shape_memberships.build_lock:
+        with _shape_memberships.lock:
+            cached = _shape_memberships.indexes.get(class_uri)
+        if (
+            cached is not None
+            and time.monotonic() - cached[1] < SHAPE_MEMBERSHIP_TTL_SECONDS
+        ):
+            return cached[0]
+        shapes: dict[str, str | None] = {}
+        for chunk in iter_shape_membership(class_uri):
+            shapes.update(chunk)
+        membership = _Membership.of(shapes)
+        _store(_shape_memberships.indexes, class_uri, membership)
+        return membership
+
+
+def iter_shape_membership(class_uri: str) -> Iterator[dict[str, str | None]]:
+    """
+    Determine the shape of every entity of a class, one chunk at a time.
+
+    Entities are read in chunks ordered by subject, so that no more than one
+    chunk of triples is held in memory.
+    """
+    sparql = get_sparql()
+    last_subject = None
+    while True:
+        after = (
+            f"FILTER(STR(?subject) > {Literal(last_subject).n3()})"
+            if last_subject
+            else ""
+        )
+        sparql.setQuery(f"""
+            SELECT ?subject
+            WHERE {{
+                ?subject a <{class_uri}> .
+                {after}
+            }}
+            ORDER BY ASC(?subject)
+            LIMIT {SHAPE_MEMBERSHIP_CHUNK_SIZE}
+        """)
+        sparql.setReturnFormat(JSON)
+        subjects = [
+            binding["subject"]["value"]
+            for binding in get_sparql_bindings(sparql.query().convert())
+        ]
+        yield fetch_entity_shapes(class_uri, subjects)
+        if len(subjects) < SHAPE_MEMBERSHIP_CHUNK_SIZE:
+            return
+        last_subject = subjects[-1]
+
+
+def count_shape_members(class_uri: str, shape_uri: str, discriminator: str) -> int:
+    """Count the entities of a class selected by a shape discriminator."""
+    count = _get_fresh(_shape_memberships.counts, (class_uri, shape_uri))
+    if count is not None:
+        return count
+
+    sparql = get_sparql()
+    sparql.setQuery(f"""
+        SELECT (COUNT(?subject) AS ?count)
+        WHERE {{
+            ?subject a <{class_uri}> .
+            {discriminator}
+        }}
+    """)
+    sparql.setReturnFormat(JSON)
+    bindings = get_sparql_bindings(sparql.query().convert())
+    count = int(bindings[0]["count"]["value"]) if bindings else 0
+    _store(_shape_memberships.counts, (class_uri, shape_uri), count)
+    return count
+
+
+def has_foreign_shaped_entities(class_uri: str) -> bool:
+    """
+    Tell whether some entity of a class also belongs to another class with
+    shapes, whose shapes would then compete in determining its own.
+    """
+    other_classes = get_shaped_classes() - {class_uri}
+    if not other_classes:
+        return False
+
+    found = _get_fresh(_shape_memberships.foreign_shapes, class_uri)
+    if found is not None:
+        return found
+
+    values = " ".join(f"<{other_class}>" for other_class in sorted(other_classes))
+    sparql = get_sparql()
+    sparql.setQuery(f"""
+        SELECT ?subject
+        WHERE {{
+            VALUES ?otherClass {{ {values} }}
+            ?subject a <{class_uri}> , ?otherClass .
+        }}
+        LIMIT 1
+    """)
+    sparql.setReturnFormat(JSON)
+    found = bool(get_sparql_bindings(sparql.query().convert()))
+    _store(_shape_memberships.foreign_shapes, class_uri, found)
+    return found
+
+
+def _indexed_counts(class_uri: str) -> dict[str, int] | None:
+    shape_index = get_shape_index()
+    return shape_index.counts(class_uri) if shape_index is not None else None
+
+
+def count_shape(class_uri: str, shape_uri: str) -> int | None:
+    """
+    Count the entities of a class that belong to one of its shapes.
+
+    Returns:
+        The count, or None while the shapes of the entities of the class are
+        still being worked out
+    """
+    counts = _indexed_counts(class_uri)
+    if counts is not None:
+        return counts.get(shape_uri, 0)
+    return _count_unindexed_shape(class_uri, shape_uri, wait=False)
+
+
+def _count_unindexed_shape(class_uri: str, shape_uri: str, *, wait: bool) -> int | None:
+    discriminator = get_shape_discriminator(class_uri, shape_uri)
+    if discriminator is not None and not has_foreign_shaped_entities(class_uri):
+        return count_shape_members(class_uri, shape_uri, discriminator)
+    membership = _get_membership(class_uri, wait=wait)
+    if membership is None:
+        return None
+    return len(membership.members.get(shape_uri, ()))
+
+
+def count_shapes(class_uri: str) -> dict[str, int]:
+    """
+    Count the entities of a class that belong to each of its shapes.
+
+    The class list computing these counts runs off the request path, so a
+    missing membership index is built before counting.
+
+    Returns:
+        Counts keyed by shape, only for shapes with at least one entity
+    """
+    counts = _indexed_counts(class_uri)
+    if counts is None:
+        counts = {
+            shape_uri: _count_unindexed_shape(class_uri, shape_uri, wait=True) or 0
+            for shape_uri in get_shapes_for_class(class_uri)
+        }
+    return {shape_uri: count for shape_uri, count in counts.items() if count}
+
+
+def lookup_entity_shapes(class_uri: str, subjects: list[str]) -> dict[str, str | None]:
+    """
+    Return the shape of some entities of a class.
+
+    Entities missing from the index, such as those created outside the
+    editor, are classified from their triples and added to it.
+    """
+    shape_index = get_shape_index()
+    known = (
+        shape_index.shapes_of(class_uri, subjects) if shape_index is not None else None
+    )
+    if known is None:
+        known = get_shape_membership(class_uri) or {}
+    shapes = {subject: known[subject] for subject in subjects if subject in known}
+    classified = fetch_entity_shapes(
+        class_uri, [subject for subject in subjects if subject not in known]
+    )
+    if classified and shape_index is not None:
+        shape_index.record(class_uri, classified)
+    return shapes | classified
+
+
+def page_shape_members(  # noqa: PLR0913
+    class_uri: str,
+    shape_uri: str,
+    *,
+    after: str | None,
+    skip: int,
+    limit: int,
+    descending: bool,
+) -> list[str] | None:
+    """
+    Read a page of the entities of a shape, ordered by URI.
+
+    Returns:
+        The page, or None while the shapes of the entities of the class are
+        still being worked out
+    """
+    shape_index = get_shape_index()
+    page = (
+        shape_index.members(
+            class_uri,
+            shape_uri,
+            after=after,
+            skip=skip,
+            limit=limit,
+            descending=descending,
+        )
+        if shape_index is not None
+        else None
+    )
+    if page is not None:
+        return page
+
+    membership = _get_membership(class_uri, wait=False)
+    if membership is None:
+        return None
+    members = membership.members.get(shape_uri, [])
+    if descending:
+        end = bisect_left(members, after) if after else len(members)
+        end -= skip
+        return members[max(end - limit, 0) : max(end, 0)][::-1]
+    start = (bisect_right(members, after) if after else 0) + skip
+    return members[start : start + limit]
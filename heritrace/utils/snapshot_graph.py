@@ -0,0 +1,167 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+"""
+Read-only states of entities reconstructed from their provenance.
+
+time-agnostic-library returns every state as a set of tuples of N3 terms. The
+states of a history share most of their terms, so the terms are decoded once
+per request by an N3TermDecoder and the states keep the interned terms in a
+SnapshotGraph, which answers triple pattern lookups from its indexes. An rdflib
+graph is only built for the snapshots that are queried with SPARQL.
+"""
+
+from collections.abc import Generator, Iterable, Iterator
+from typing import Any
+
+from rdflib import Dataset, Graph
+from rdflib.graph import DATASET_DEFAULT_GRAPH_ID
+from rdflib.term import Node
+from rdflib.util import from_n3
+
+Triple = tuple[Node, Node, Node]
+Quad = tuple[Node, Node, Node, Node]
+
+_QUAD_LENGTH = 4
+
+
+def parse_n3(value: str) -> Node:
+    result = from_n3(value)
+    if not isinstance(result, Node):
+        msg = f"Cannot parse N3 value: {value}"
+        raise TypeError(msg)
+    return result
+
+
+class N3TermDecoder:
+    """Decode N3 terms, parsing every distinct term only once.
+
+    Decoded terms are interned: the same N3 string always yields the same
+    object, so the snapshots decoded with one decoder share their terms.
+    """
+
+    __slots__ = ("_terms",)
+
+    def __init__(self) -> None:
+        self._terms: dict[str, Node] = {}
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    def decode(self, value: str) -> Node:
+        term = self._terms.get(value)
+        if term is None:
+            term = parse_n3(value)
+            self._terms[value] = term
+        return term
+
+
+class SnapshotGraph:
+    """The state of an entity at a snapshot, as an immutable set of quads.
+
+    Lookups by subject and by subject and predicate are served from indexes;
+    any other triple pattern scans the quads. SPARQL queries run on an rdflib
+    graph built the first time the snapshot is queried. In a triplestore the
+    graph of every quad is DATASET_DEFAULT_GRAPH_ID.
+    """
+
+    __slots__ = (
+        "_by_subject",
+        "_by_subject_predicate",
+        "_graph",
+        "_quads",
+        "is_quadstore",
+    )
+
+    def __init__(self, quads: Iterable[Quad], *, is_quadstore: bool) -> None:
+        self.is_quadstore = is_quadstore
+        self._quads: tuple[Quad, ...] = tuple(dict.fromkeys(quads))
+        self._by_subject: dict[Node, list[int]] = {}
+        self._by_subject_predicate: dict[tuple[Node, Node], list[int]] = {}
+        for position, (s, p, _, _) in enumerate(self._quads):
+            self._by_subject.setdefault(s, []).append(position)
+            self._by_subject_predicate.setdefault((s, p), []).append(position)
+        self._graph: Graph | Dataset | None = None
+
+    @classmethod
+    def from_n3(
+        cls,
+        n3_set: Iterable[tuple[str, ...]],
+        decoder: N3TermDecoder,
+        *,
+        is_quadstore: bool,
+    ) -> "SnapshotGraph":
+        """Build a snapshot from the N3 tuples returned by time-agnostic-library."""
+        quads = []
+        for n3_tuple in sorted(n3_set):
+            s, p, o = (decoder.decode(value) for value in n3_tuple[:3])
+            g = (
+                decoder.decode(n3_tuple[3])
+                if is_quadstore and len(n3_tuple) == _QUAD_LENGTH
+                else DATASET_DEFAULT_GRAPH_ID
+            )
+            quads.append((s, p, o, g))
+        return cls(quads, is_quadstore=is_quadstore)
+
+    def __len__(self) -> int:
+        return len(self._quads)
+
+    def __iter__(self) -> Iterator[Triple]:
+        return self.triples((None, None, None))
+
+    def _candidates(self, s: Node | None, p: Node | None) -> Iterable[Quad]:
+        if s is None:
+            return self._quads
+        positions = (
+            self._by_subject.get(s, [])
+            if p is None
+            else self._by_subject_predicate.get((s, p), [])
+        )
+        return (self._quads[position] for position in positions)
+
+    def quads(
+        self, pattern: tuple[Node | None, Node | None, Node | None]
+    ) -> Generator[Quad]:
+        s, p, o = pattern
+        for quad in self._candidates(s, p):
+            if (p is None or quad[1] == p) and (o is None or quad[2] == o):
+                yield quad
+
+    def triples(
+        self, pattern: tuple[Node | None, Node | None, Node | None]
+    ) -> Generator[Triple]:
+        for s, p, o, _ in self.quads(pattern):
+            yield (s, p, o)
+
+    def updated(
+        self, deletions: Iterable[Triple], additions: Iterable[Triple]
+    ) -> "SnapshotGraph":
+        """
+        Return a copy of the snapshot with some triples removed and others added.
+
+        A deleted triple is removed from every graph, an added one goes to the
+        default graph, as when the same changes are applied to a Dataset.
+        """
+        deleted = set(deletions)
+        quads = [quad for quad in self._quads if quad[:3] not in deleted]
+        quads.extend((s, p, o, DATASET_DEFAULT_GRAPH_ID) for s, p, o in additions)
+        return SnapshotGraph(quads, is_quadstore=self.is_quadstore)
+
+    def to_rdflib(self) -> Graph | Dataset:
+        """Return the snapshot as an rdflib graph, built on first use."""
+        if self._graph is None:
+            if self.is_quadstore:
+                dataset = Dataset(default_union=True)
+                for quad in self._quads:
+                    dataset.add(quad)  # type: ignore[arg-type]
+                self._graph = dataset
+            else:
+                graph = Graph()
+                for s, p, o, _ in self._quads:
+                    graph.add((s, p, o))
+                self._graph = graph
+        return self._graph
+
+    def query(self, query: str, **kwargs: Any) -> Any:  # noqa: ANN401
+        return self.to_rdflib().query(query, **kwargs)
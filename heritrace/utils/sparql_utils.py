@@ -5,105 +5,137 @@
 import atexit
 import logging
 import os
-import re
+import threading
 import time
-from collections import defaultdict, deque
-from collections.abc import Generator
+from collections import OrderedDict, defaultdict
+from collections.abc import Callable, Generator, Iterable, Iterator
 from concurrent.futures import ProcessPoolExecutor
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from functools import partial
 
 from flask import current_app
 from rdflib import RDF, Dataset, Graph, Literal, URIRef
-from rdflib.plugins.sparql.algebra import translateUpdate
-from rdflib.plugins.sparql.parser import parseUpdate
 from rdflib.term import Node
-from rdflib.util import from_n3
 from SPARQLWrapper import JSON
-from SPARQLWrapper.SPARQLExceptions import SPARQLWrapperException
 
-from heritrace.editor import Editor
+from heritrace.editor import Editor, EntityImportResult
 from heritrace.extensions import (
+    get_class_counts,
     get_classes_with_multiple_shapes,
     get_custom_filter,
     get_dataset_is_quadstore,
+    get_deletion_index,
     get_display_rules,
     get_provenance_sparql,
     get_shacl_graph,
+    get_shared_cache,
     get_sparql,
 )
+from heritrace.services.deletion_index import (
+    RDF_TYPE_STATEMENT,
+    DeletionRecord,
+    deleted_entity_types,
+)
 from heritrace.sparql import get_sparql_bindings
+from heritrace.utils.catalogue_cursor import (
+    CatalogueCursor,
+    CatalogueListing,
+    build_keyset_filter,
+    build_order_clause,
+    cursor_from_binding,
+    decode_cursor,
+    encode_cursor,
+    recall_page_cursor,
+    remember_page_cursor,
+)
+from heritrace.utils.converters import convert_to_datetime
 from heritrace.utils.display_rules_utils import (
     find_matching_rule,
     get_highest_priority_class,
     get_sortable_properties,
     is_entity_type_visible,
 )
+from heritrace.utils.label_query_utils import label_query_predicates
+from heritrace.utils.query_executor import run_concurrently
 from heritrace.utils.shacl_utils import (
     determine_shape_for_classes,
-    determine_shape_for_entity_triples,
+    get_shape_discriminator,
+)
+from heritrace.utils.shape_membership import (
+    count_shape,
+    count_shapes,
+    has_foreign_shaped_entities,
+    lookup_entity_shapes,
+    page_shape_members,
 )
+from heritrace.utils.snapshot_graph import N3TermDecoder, SnapshotGraph
+from heritrace.utils.update_queries import parse_sparql_update
 from heritrace.utils.virtuoso_utils import VIRTUOSO_EXCLUDED_GRAPHS, is_virtuoso
 
-_cache: dict[str, tuple[list[dict[str, str | int]], float] | None] = {
-    "available_classes": None,
-    "deleted_classes": None,
-}
-AVAILABLE_CLASSES_TTL_SECONDS = 60
-
-
-def _parse_n3(value: str) -> Node:
-    result = from_n3(value)
-    if not isinstance(result, Node):
-        msg = f"Cannot parse N3 value: {value}"
-        raise TypeError(msg)
-    return result
+_cache_generations: dict[str, int] = {}
 
 
 def n3_set_to_graph(
     n3_set: set[tuple[str, ...]],
     *,
     is_quadstore: bool,
+    decoder: N3TermDecoder | None = None,
 ) -> Graph | Dataset:
+    decode = (decoder or N3TermDecoder()).decode
     if is_quadstore:
         g = Dataset(default_union=True)
         for tup in n3_set:
-            quad = (
-                _parse_n3(tup[0]),
-                _parse_n3(tup[1]),
-                _parse_n3(tup[2]),
-                _parse_n3(tup[3]),
-            )
+            quad = (decode(tup[0]), decode(tup[1]), decode(tup[2]), decode(tup[3]))
             g.add(quad)  # type: ignore[arg-type]
     else:
         g = Graph()
         for tup in n3_set:
-            g.add((_parse_n3(tup[0]), _parse_n3(tup[1]), _parse_n3(tup[2])))
+            g.add((decode(tup[0]), decode(tup[1]), decode(tup[2])))
     return g
 
 
 def convert_to_rdflib_graphs(snapshots: dict, *, is_quadstore: bool) -> dict:
+    decoder = N3TermDecoder()
     converted = {}
     for entity_uri, timestamps in snapshots.items():
         converted[entity_uri] = {}
         for ts, n3_set in timestamps.items():
             converted[entity_uri][ts] = n3_set_to_graph(
-                n3_set, is_quadstore=is_quadstore
+                n3_set, is_quadstore=is_quadstore, decoder=decoder
             )
     return converted
 
 
+def convert_to_snapshot_graphs(
+    snapshots: dict, *, is_quadstore: bool
+) -> dict[str, dict[str, SnapshotGraph]]:
+    """
+    Decode the states returned by time-agnostic-library into SnapshotGraphs.
+
+    The terms are decoded once for all the states, which share them.
+    """
+    decoder = N3TermDecoder()
+    return {
+        entity_uri: {
+            ts: SnapshotGraph.from_n3(n3_set, decoder, is_quadstore=is_quadstore)
+            for ts, n3_set in timestamps.items()
+        }
+        for entity_uri, timestamps in snapshots.items()
+    }
+
+
 def get_triples_from_graph(
-    graph_or_dataset: Graph | Dataset,
+    graph_or_dataset: Graph | Dataset | SnapshotGraph,
     pattern: tuple[URIRef | None, URIRef | None, Node | None],
 ) -> Generator[tuple[Node, Node, Node]]:
     """
     Get triples from a Graph or Dataset, handling both cases correctly.
 
     For Dataset (quadstore), converts quads to triples by extracting (s, p, o).
-    For Graph (triplestore), uses triples() directly.
+    For Graph (triplestore) and SnapshotGraph, uses triples() directly.
 
     Args:
-        graph_or_dataset: Graph or Dataset instance
+        graph_or_dataset: Graph, Dataset or SnapshotGraph instance
         pattern: Triple pattern tuple (s, p, o) where each can be None
 
     Returns:
@@ -114,11 +146,14 @@ def get_triples_from_graph(
         for s, p, o, _g in graph_or_dataset.quads(pattern):
             yield (s, p, o)
     else:
-        # For Graph, use triples() directly
+        # For Graph and SnapshotGraph, use triples() directly
         yield from graph_or_dataset.triples(pattern)
 
 
 COUNT_LIMIT = int(os.getenv("COUNT_LIMIT", "10000"))
+STATE_FETCH_BATCH_SIZE = 100
+DELETION_INDEX_CHUNK_SIZE = 1000
+SHAPE_FILL_WINDOW_FACTOR = 4
 
 
 @dataclass(slots=True)
@@ -169,114 +204,45 @@ def _wrap_virtuoso_graph_pattern(pattern: str) -> str:
     return pattern
 
 
-def _build_count_query_with_limit(class_uri: str, limit: int) -> str:
-    """Build a COUNT query with LIMIT for a specific class."""
+def _build_class_counts_query(class_uris: list[str], limit: int) -> str:
+    """
+    Build one query counting the instances of every class, up to a limit each.
 
-    return f"""
-        SELECT (COUNT(?subject) as ?count)
-        WHERE {{
-            {{
-                SELECT DISTINCT ?subject
+    Every class is counted in its own UNION branch, so that the limit caps
+    each class on its own rather than the classes together.
+    """
+    branches = " UNION ".join(
+        f"""{{
+                SELECT DISTINCT ?class ?subject
                 WHERE {{
-                    ?subject a <{class_uri}> .
+                    VALUES ?class {{ <{class_uri}> }}
+                    ?subject a ?class .
                 }}
                 LIMIT {limit}
-            }}
-        }}
-    """
-
-
-def _count_class_instances(class_uri: str, limit: int = COUNT_LIMIT) -> tuple:
-    """
-    Count instances of a class up to a limit.
-
-    Returns:
-        tuple: (display_count, numeric_count) where display_count may be "LIMIT+"
-    """
-    sparql = get_sparql()
-    query = _build_count_query_with_limit(class_uri, limit + 1)
-
-    sparql.setQuery(query)
-    sparql.setReturnFormat(JSON)
-    bindings = get_sparql_bindings(sparql.query().convert())
-
-    count = int(bindings[0]["count"]["value"])
-
-    if count > limit:
-        return f"{limit}+", limit
-    return str(count), count
-
-
-def _get_entities_with_enhanced_shape_detection(
-    class_uri: str, classes_with_multiple_shapes: set[str], limit: int = COUNT_LIMIT
-) -> defaultdict[str, list[dict[str, str]]]:
-    """
-    Get entities for a class using enhanced shape detection
-    for classes with multiple shapes.
-    Uses LIMIT to avoid loading all entities.
-    """
-    # Early exit if no classes have multiple shapes
-    if (
-        not classes_with_multiple_shapes
-        or class_uri not in classes_with_multiple_shapes
-    ):
-        return defaultdict(list)
-
-    sparql = get_sparql()
-
-    subjects_query = f"""
-        SELECT DISTINCT ?subject
+            }}"""
+        for class_uri in class_uris
+    )
+    return f"""
+        SELECT ?class (COUNT(?subject) AS ?count)
         WHERE {{
-            ?subject a <{class_uri}> .
+            {branches}
         }}
-        LIMIT {limit}
+        GROUP BY ?class
     """
 
-    sparql.setQuery(subjects_query)
-    sparql.setReturnFormat(JSON)
-    subjects_bindings = get_sparql_bindings(sparql.query().convert())
-
-    subjects = [r["subject"]["value"] for r in subjects_bindings]
-
-    if not subjects:
-        return defaultdict(list)
 
-    # Fetch triples only for these specific subjects
-    subjects_filter = " ".join([f"(<{s}>)" for s in subjects])
-    pattern_with_filter = (
-        f"?subject a <{class_uri}> . ?subject ?p ?o"
-        f" . VALUES (?subject) {{ {subjects_filter} }}"
-    )
+def _count_classes_instances(class_uris: list[str], limit: int) -> dict[str, int]:
+    """Count the instances of several classes, up to a limit each, in one query."""
+    if not class_uris:
+        return {}
 
-    triples_query = f"""
-        SELECT ?subject ?p ?o
-        WHERE {{
-            {pattern_with_filter}
-        }}
-    """
-
-    sparql.setQuery(triples_query)
+    sparql = get_sparql()
+    sparql.setQuery(_build_class_counts_query(class_uris, limit))
     sparql.setReturnFormat(JSON)
-    triples_bindings = get_sparql_bindings(sparql.query().convert())
-
-    entities_triples = defaultdict(list)
-    for binding in triples_bindings:
-        subject = binding["subject"]["value"]
-        predicate = binding["p"]["value"]
-        obj = binding["o"]["value"]
-        entities_triples[subject].append((subject, predicate, obj))
-
-    shape_to_entities = defaultdict(list)
-    for subject_uri, triples in entities_triples.items():
-        shape_uri = determine_shape_for_entity_triples(triples)
-        if shape_uri:
-            entity_key = (class_uri, shape_uri)
-            if is_entity_type_visible(entity_key):
-                shape_to_entities[shape_uri].append(
-                    {"uri": subject_uri, "class": class_uri, "shape": shape_uri}
-                )
-
-    return shape_to_entities
+    counts = dict.fromkeys(class_uris, 0)
+    for binding in get_sparql_bindings(sparql.query().convert()):
+        counts[binding["class"]["value"]] = int(binding["count"]["value"])
+    return counts
 
 
 def get_classes_from_shacl_or_display_rules() -> list[str]:
@@ -328,19 +294,37 @@ def _get_classes_from_sparql() -> list[str]:
     return [r["class"]["value"] for r in class_bindings]
 
 
+def _get_shared(
+    name: str, compute: Callable[[], list[dict[str, str | int]]]
+) -> list[dict[str, str | int]]:
+    shared_cache = get_shared_cache()
+    if shared_cache is None:
+        return compute()
+    return shared_cache.get(name, compute)
+
+
 def get_available_classes() -> list[dict[str, str | int]]:
-    cached = _cache["available_classes"]
-    if cached is not None:
-        available_classes, computed_at = cached
-        if time.monotonic() - computed_at < AVAILABLE_CLASSES_TTL_SECONDS:
-            return available_classes
+    generation = get_class_counts().generation
+    shared_cache = get_shared_cache()
+    if (
+        shared_cache is not None
+        and _cache_generations.setdefault("available_classes", generation) != generation
+    ):
+        # The counts changed in this worker: publish them to all.
+        shared_cache.refresh("available_classes", _compute_available_classes)
+    return _get_shared("available_classes", _compute_available_classes)
 
+
+def _compute_available_classes() -> list[dict[str, str | int]]:
+    class_counts = get_class_counts()
     custom_filter = get_custom_filter()
     class_uris = _get_classes_from_config()
 
+    counts = class_counts.get(class_uris, _count_classes_instances)
+    _cache_generations["available_classes"] = class_counts.generation
     classes_with_counts = []
     for class_uri in class_uris:
-        display_count, numeric_count = _count_class_instances(class_uri)
+        display_count, numeric_count = class_counts.display(counts[class_uri])
         classes_with_counts.append(
             {
                 "uri": class_uri,
@@ -358,24 +342,20 @@ def get_available_classes() -> list[dict[str, str | int]]:
         class_uri = class_data["uri"]
 
         if classes_with_multiple_shapes and class_uri in classes_with_multiple_shapes:
-            shape_to_entities = _get_entities_with_enhanced_shape_detection(
-                class_uri, classes_with_multiple_shapes, limit=COUNT_LIMIT
-            )
-
-            for shape_uri, entities in shape_to_entities.items():
-                if entities:
-                    entity_key = (class_uri, shape_uri)
-                    available_classes.append(
-                        {
-                            "uri": class_uri,
-                            "label": custom_filter.human_readable_class(entity_key),
-                            "count": f"{len(entities)}+"
-                            if len(entities) >= COUNT_LIMIT
-                            else str(len(entities)),
-                            "count_numeric": len(entities),
-                            "shape": shape_uri,
-                        }
-                    )
+            for shape_uri, shape_count in count_shapes(class_uri).items():
+                entity_key = (class_uri, shape_uri)
+                if not is_entity_type_visible(entity_key):
+                    continue
+                display_count, numeric_count = class_counts.display(shape_count)
+                available_classes.append(
+                    {
+                        "uri": class_uri,
+                        "label": custom_filter.human_readable_class(entity_key),
+                        "count": display_count,
+                        "count_numeric": numeric_count,
+                        "shape": shape_uri,
+                    }
+                )
         else:
             shape_uri = determine_shape_for_classes([class_uri])
             entity_key = (class_uri, shape_uri)
@@ -392,7 +372,6 @@ def get_available_classes() -> list[dict[str, str | int]]:
                 )
 
     available_classes.sort(key=lambda x: x["label"].lower())
-    _cache["available_classes"] = (available_classes, time.monotonic())
     return available_classes
 
 
@@ -436,6 +415,14 @@ class CatalogQuery:
     sort_property: str | None = None
     sort_direction: str = "ASC"
     selected_shape: str | None = None
+    cursor: str | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class CatalogPage:
+    entities: list[dict[str, str]]
+    total_count: int
+    next_cursor: str | None = None
 
 
 def _fetch_entity_labels(
@@ -444,8 +431,11 @@ def _fetch_entity_labels(
     if not subject_uris:
         return []
 
-    if _worker_pool.executor is None:
-        return [_fetch_entity_label(uri, entity_key) for uri in subject_uris]
+    custom_filter = get_custom_filter()
+    if _worker_pool.executor is None or custom_filter.can_batch_entity_labels(
+        entity_key
+    ):
+        return custom_filter.human_readable_entities(subject_uris, entity_key)
     return list(
         _worker_pool.executor.map(
             _fetch_entity_label, subject_uris, [entity_key] * len(subject_uris)
@@ -457,116 +447,91 @@ def _fetch_entity_label(uri: str, entity_key: tuple[str | None, str | None]) ->
     return get_custom_filter().human_readable_entity(uri, entity_key, None)
 
 
-def _get_entities_with_shape_filtering(
+def get_entities_for_class(
     query: CatalogQuery,
+    available_classes: list[dict[str, str | int]],
 ) -> tuple[list[dict[str, str]], int]:
-    sparql = get_sparql()
-    selected_class = query.selected_class
-    selected_shape = query.selected_shape
-    offset = (query.page - 1) * query.per_page
-    fetch_limit = query.per_page * 5
+    page = get_catalog_page(query, available_classes)
+    return page.entities, page.total_count
 
-    subjects_query = f"""
-        SELECT DISTINCT ?subject
-        WHERE {{
-            ?subject a <{selected_class}> .
-        }}
-        LIMIT {fetch_limit}
-        OFFSET {offset}
-    """
 
-    sparql.setQuery(subjects_query)
-    sparql.setReturnFormat(JSON)
-    subjects_bindings = get_sparql_bindings(sparql.query().convert())
+_TYPED_SORT_TYPES = {"date", "number", "boolean"}
 
-    subjects = [r["subject"]["value"] for r in subjects_bindings]
 
-    if not subjects:
-        return [], 0
+def _get_sort_type(query: CatalogQuery) -> str:
+    sortable_properties = get_sortable_properties(
+        (str(query.selected_class), query.selected_shape)
+    )
+    return next(
+        (
+            prop.get("sortType", "string")
+            for prop in sortable_properties
+            if prop["property"] == query.sort_property
+        ),
+        "string",
+    )
 
-    subjects_filter = " ".join([f"(<{s}>)" for s in subjects])
 
-    triples_query = f"""
-        SELECT ?subject ?p ?o
-        WHERE {{
-            ?subject a <{selected_class}> . ?subject ?p ?o . VALUES (?subject) {{
-            {subjects_filter} }}
-        }}
+def get_catalog_page(
+    query: CatalogQuery,
+    available_classes: list[dict[str, str | int]],
+) -> CatalogPage:
     """
+    Fetch one page of the entities of a class.
 
-    sparql.setQuery(triples_query)
-    sparql.setReturnFormat(JSON)
-    triples_bindings = get_sparql_bindings(sparql.query().convert())
-
-    entities_triples = defaultdict(list)
-    for binding in triples_bindings:
-        subject = binding["subject"]["value"]
-        predicate = binding["p"]["value"]
-        obj = binding["o"]["value"]
-        entities_triples[subject].append((subject, predicate, obj))
-
-    matching_uris = [
-        subject_uri
-        for subject_uri, triples in entities_triples.items()
-        if determine_shape_for_entity_triples(list(triples)) == selected_shape
-    ]
-    labels = _fetch_entity_labels(matching_uris, (selected_class, selected_shape))
-    filtered_entities = [
-        {"uri": uri, "label": label}
-        for uri, label in zip(matching_uris, labels, strict=True)
-    ]
-
-    if query.sort_property and query.sort_direction:
-        reverse_sort = query.sort_direction.upper() == "DESC"
-        filtered_entities.sort(key=lambda x: x["label"].lower(), reverse=reverse_sort)
+    Pages are located by keyset when a cursor is given, or when the start of
+    the requested page number is remembered from serving the previous one,
+    and by OFFSET otherwise.
 
-    total_count = len(filtered_entities)
-    return filtered_entities[: query.per_page], total_count
-
-
-def get_entities_for_class(
-    query: CatalogQuery,
-    available_classes: list[dict[str, str | int]],
-) -> tuple[list[dict[str, str]], int]:
+    Raises:
+        InvalidCursorError: If the cursor is malformed or belongs to another
+            listing
+    """
     if query.selected_class is None:
         msg = "selected_class must not be None"
         raise ValueError(msg)
-    sparql = get_sparql()
     classes_with_multiple_shapes = get_classes_with_multiple_shapes()
 
     selected_class: str = query.selected_class
     selected_shape = query.selected_shape
-    page = query.page
-    per_page = query.per_page
     sort_property = query.sort_property
-    sort_direction = query.sort_direction
 
-    use_shape_filtering = (
-        selected_shape and selected_class in classes_with_multiple_shapes
+    sort_clause = ""
+    if sort_property:
+        sort_clause = build_sort_clause(sort_property, selected_class, selected_shape)
+    sorted_listing = bool(sort_clause)
+    listing = CatalogueListing(
+        selected_class=selected_class,
+        selected_shape=selected_shape,
+        sort_property=sort_property if sorted_listing else None,
+        descending=query.sort_direction.upper() == "DESC",
+        lexical_sort=not sorted_listing
+        or _get_sort_type(query) not in _TYPED_SORT_TYPES,
     )
+    cursor = _resolve_cursor(query, listing)
+    listed_count = _listed_count(available_classes, selected_class, selected_shape)
 
-    if use_shape_filtering:
-        return _get_entities_with_shape_filtering(query)
+    if selected_shape and selected_class in classes_with_multiple_shapes:
+        return _get_entities_with_shape_filtering(
+            query, listing, sort_clause, cursor, listed_count
+        )
 
-    offset = (page - 1) * per_page
-    sort_clause = ""
-    order_clause = ""
+    entities_bindings = _query_listing(
+        listing,
+        sort_clause,
+        cursor=cursor,
+        limit=query.per_page,
+        offset=(query.page - 1) * query.per_page,
+    )
 
-    if sort_property:
-        sort_clause = build_sort_clause(sort_property, selected_class, selected_shape)
-        if sort_clause:
-            order_clause = f"ORDER BY {sort_direction}(?sortValue)"
+    return _build_catalog_page(query, listing, entities_bindings, listed_count)
 
-    entities_query = f"""
-        SELECT ?subject {"?sortValue" if sort_property else ""}
-        WHERE {{
-            ?subject a <{selected_class}> . {sort_clause}
-        }}
-        {order_clause}
-        LIMIT {per_page}
-        OFFSET {offset}
-    """
 
+def _listed_count(
+    available_classes: list[dict[str, str | int]],
+    selected_class: str,
+    selected_shape: str | None,
+) -> int:
     class_info = next(
         (
             c
@@ -575,29 +540,173 @@ def get_entities_for_class(
         ),
         None,
     )
-    total_count = int(class_info["count_numeric"]) if class_info else 0
+    return int(class_info["count_numeric"]) if class_info else 0
+
+
+def _resolve_cursor(
+    query: CatalogQuery, listing: CatalogueListing
+) -> CatalogueCursor | None:
+    cursor_token = query.cursor
+    if cursor_token is None and query.page > 1:
+        cursor_token = recall_page_cursor(listing, query.per_page, query.page)
+    if cursor_token is None:
+        return None
+    return decode_cursor(cursor_token, listing)
+
+
+def _query_listing(
+    listing: CatalogueListing,
+    patterns: str,
+    *,
+    cursor: CatalogueCursor | None,
+    limit: int,
+    offset: int = 0,
+) -> list[dict[str, dict[str, str]]]:
+    if cursor is not None:
+        keyset_filter = build_keyset_filter(cursor, listing)
+        paging_clause = f"LIMIT {limit}"
+    else:
+        keyset_filter = ""
+        paging_clause = f"LIMIT {limit} OFFSET {offset}"
+
+    entities_query = f"""
+        SELECT ?subject {"?sortValue" if listing.sort_property else ""}
+        WHERE {{
+            ?subject a <{listing.selected_class}> . {patterns}
+            {keyset_filter}
+        }}
+        {build_order_clause(listing)}
+        {paging_clause}
+    """
 
+    sparql = get_sparql()
     sparql.setQuery(entities_query)
     sparql.setReturnFormat(JSON)
-    entities_bindings = get_sparql_bindings(sparql.query().convert())
+    return get_sparql_bindings(sparql.query().convert())
+
+
+def _build_catalog_page(
+    query: CatalogQuery,
+    listing: CatalogueListing,
+    entities_bindings: list[dict[str, dict[str, str]]],
+    total_count: int,
+) -> CatalogPage:
+    next_cursor = None
+    if len(entities_bindings) == query.per_page:
+        next_cursor = encode_cursor(
+            cursor_from_binding(entities_bindings[-1], listing), listing
+        )
+        # A page requested by cursor may not be the page its number says, so
+        # only pages located by number tell where the next one starts.
+        if query.cursor is None:
+            remember_page_cursor(listing, query.per_page, query.page + 1, next_cursor)
 
-    shape = selected_shape or determine_shape_for_classes([selected_class])
+    shape = listing.selected_shape or determine_shape_for_classes(
+        [listing.selected_class]
+    )
     subject_uris = [result["subject"]["value"] for result in entities_bindings]
-    labels = _fetch_entity_labels(subject_uris, (selected_class, shape))
+    labels = _fetch_entity_labels(subject_uris, (listing.selected_class, shape))
     entities = [
         {"uri": uri, "label": label}
         for uri, label in zip(subject_uris, labels, strict=True)
     ]
 
-    return entities, total_count
+    return CatalogPage(entities, total_count, next_cursor)
+
+
+def _get_entities_with_shape_filtering(
+    query: CatalogQuery,
+    listing: CatalogueListing,
+    sort_clause: str,
+    cursor: CatalogueCursor | None,
+    listed_count: int,
+) -> CatalogPage:
+    """
+    Fetch one page of the entities of a class that belong to one of its shapes.
+
+    The shape is checked in the listing query whenever SPARQL can reproduce
+    determine_shape_for_entity_triples for every entity of the class, and
+    read from the shape index of the class otherwise. While the shapes of the
+    class are still being worked out, the page is filled by walking the
+    listing and the count shown in the class list is reported.
+    """
+    selected_class = listing.selected_class
+    selected_shape = str(listing.selected_shape)
+    total_count = count_shape(selected_class, selected_shape)
+    if total_count is None:
+        total_count = listed_count
+
+    discriminator = get_shape_discriminator(selected_class, selected_shape)
+    if discriminator is not None and not has_foreign_shaped_entities(selected_class):
+        entities_bindings = _query_listing(
+            listing,
+            f"{sort_clause}\n{discriminator}",
+            cursor=cursor,
+            limit=query.per_page,
+            offset=(query.page - 1) * query.per_page,
+        )
+    else:
+        # Without a sort property the listing is ordered by subject alone,
+        # which the index can answer without querying the triplestore.
+        page_subjects = (
+            None
+            if listing.sort_property
+            else page_shape_members(
+                selected_class,
+                selected_shape,
+                after=cursor.subject if cursor else None,
+                skip=0 if cursor else (query.page - 1) * query.per_page,
+                limit=query.per_page,
+                descending=listing.descending,
+            )
+        )
+        if page_subjects is None:
+            entities_bindings = _fill_shape_page(query, listing, sort_clause, cursor)
+        else:
+            entities_bindings = [
+                {"subject": {"type": "uri", "value": uri}} for uri in page_subjects
+            ]
+    return _build_catalog_page(query, listing, entities_bindings, total_count)
+
+
+def _fill_shape_page(
+    query: CatalogQuery,
+    listing: CatalogueListing,
+    sort_clause: str,
+    cursor: CatalogueCursor | None,
+) -> list[dict[str, dict[str, str]]]:
+    """
+    Walk the sorted listing of the class in windows until a page of entities
+    of the selected shape is filled or the class is exhausted.
+    """
+    window = query.per_page * SHAPE_FILL_WINDOW_FACTOR
+    to_skip = 0 if cursor else (query.page - 1) * query.per_page
+    matches: list[dict[str, dict[str, str]]] = []
+    while True:
+        bindings = _query_listing(listing, sort_clause, cursor=cursor, limit=window)
+        shapes = lookup_entity_shapes(
+            listing.selected_class,
+            [binding["subject"]["value"] for binding in bindings],
+        )
+        for binding in bindings:
+            if shapes.get(binding["subject"]["value"]) != listing.selected_shape:
+                continue
+            if to_skip:
+                to_skip -= 1
+                continue
+            matches.append(binding)
+            if len(matches) == query.per_page:
+                return matches
+        if len(bindings) < window:
+            return matches
+        cursor = cursor_from_binding(bindings[-1], listing)
 
 
 def get_catalog_data(
     query: CatalogQuery,
     available_classes: list[dict[str, str | int]],
 ) -> dict:
-    entities = []
-    total_count = 0
+    catalog_page = CatalogPage([], 0)
     sortable_properties = []
     sort_property = query.sort_property
 
@@ -616,11 +725,13 @@ def get_catalog_data(
             sort_property=sort_property,
             sort_direction=query.sort_direction,
             selected_shape=query.selected_shape,
+            cursor=query.cursor,
         )
-        entities, total_count = get_entities_for_class(inner_query, available_classes)
+        catalog_page = get_catalog_page(inner_query, available_classes)
 
+    total_count = catalog_page.total_count
     return {
-        "entities": entities,
+        "entities": catalog_page.entities,
         "total_pages": (
             (total_count + query.per_page - 1) // query.per_page
             if total_count > 0
@@ -629,6 +740,7 @@ def get_catalog_data(
         "current_page": query.page,
         "per_page": query.per_page,
         "total_count": total_count,
+        "next_cursor": catalog_page.next_cursor,
         "sort_property": sort_property,
         "sort_direction": query.sort_direction,
         "sortable_properties": sortable_properties,
@@ -684,91 +796,102 @@ def _binding_to_node(binding: dict[str, str]) -> Literal | URIRef:
 
 
 def fetch_data_graph_for_subject(subject: URIRef) -> Graph | Dataset:
-    g = Dataset() if get_dataset_is_quadstore() else Graph()
-    sparql = get_sparql()
+    return fetch_data_graph_for_subjects([subject])
+
 
+def _fetch_state_bindings(subjects: list[str], *, is_quadstore: bool) -> list[dict]:
+    values = " ".join(f"<{subject}>" for subject in subjects)
     if is_virtuoso():
         # For virtuoso we need to explicitly query the graph
         query = f"""
-        SELECT ?predicate ?object ?g WHERE {{
+        SELECT ?subject ?predicate ?object ?g WHERE {{
+            VALUES ?subject {{ {values} }}
             GRAPH ?g {{
-                <{subject}> ?predicate ?object.
+                ?subject ?predicate ?object.
             }}
             FILTER(?g NOT IN (<{">, <".join(VIRTUOSO_EXCLUDED_GRAPHS)}>))
         }}
         """
-    elif get_dataset_is_quadstore():
+    elif is_quadstore:
         # For non-virtuoso quadstore, we need to query all graphs
         query = f"""
-            SELECT ?predicate ?object ?g WHERE {{
+            SELECT ?subject ?predicate ?object ?g WHERE {{
+                VALUES ?subject {{ {values} }}
                 GRAPH ?g {{
-                    <{subject}> ?predicate ?object.
+                    ?subject ?predicate ?object.
                 }}
             }}
             """
     else:
         # For regular triplestore
         query = f"""
-            SELECT ?predicate ?object WHERE {{
-                <{subject}> ?predicate ?object.
+            SELECT ?subject ?predicate ?object WHERE {{
+                VALUES ?subject {{ {values} }}
+                ?subject ?predicate ?object.
             }}
             """
 
+    sparql = get_sparql()
     sparql.setQuery(query)
     sparql.setReturnFormat(JSON)
-    bindings = get_sparql_bindings(sparql.query().convert())
+    return get_sparql_bindings(sparql.query().convert())
 
-    for result in bindings:
-        value = _binding_to_node(result["object"])
 
-        # Add triple/quad based on store type
-        if get_dataset_is_quadstore():
-            graph_uri = URIRef(result["g"]["value"])
-            g.add(
-                (  # type: ignore[arg-type]
-                    subject,
-                    URIRef(result["predicate"]["value"]),
-                    value,
-                    graph_uri,
-                )
+def _fetch_states(subjects: Iterable[str], *, is_quadstore: bool) -> list[dict]:
+    """
+    Read the current state of many subjects, as the bindings of their triples.
+
+    The subjects are read STATE_FETCH_BATCH_SIZE at a time, and the queries of
+    the batches run concurrently, up to the configured QUERY_CONCURRENCY.
+    """
+    unique_subjects = list(dict.fromkeys(subjects))
+    results = run_concurrently(
+        [
+            partial(
+                _fetch_state_bindings,
+                unique_subjects[start : start + STATE_FETCH_BATCH_SIZE],
+                is_quadstore=is_quadstore,
             )
-        else:
-            g.add((subject, URIRef(result["predicate"]["value"]), value))
+            for start in range(0, len(unique_subjects), STATE_FETCH_BATCH_SIZE)
+        ]
+    )
+    return [binding for bindings in results for binding in bindings]
 
-    return g
 
+def _add_state_bindings(
+    graph: Graph | Dataset,
+    bindings: list[dict],
+    to_node: Callable[[dict], Node] = _binding_to_node,
+) -> None:
+    for result in bindings:
+        triple = (
+            URIRef(result["subject"]["value"]),
+            URIRef(result["predicate"]["value"]),
+            to_node(result["object"]),
+        )
+        # Add triple/quad based on store type
+        if isinstance(graph, Dataset):
+            graph.add((*triple, URIRef(result["g"]["value"])))  # type: ignore[arg-type]
+        else:
+            graph.add(triple)
 
-def parse_sparql_update(query: str) -> dict[str, list[tuple[Node, Node, Node]]]:
-    parsed = parseUpdate(query)
-    translated = translateUpdate(parsed).algebra
-    modifications = {}
 
-    def extract_quads(
-        quads: defaultdict[Node, list[tuple[Node, Node, Node]]],
-    ) -> list[tuple[Node, Node, Node]]:
-        return [
-            (triple[0], triple[1], triple[2])
-            for triples in quads.values()
-            for triple in triples
-        ]
+def fetch_data_graph_for_subjects(subjects: Iterable[URIRef]) -> Graph | Dataset:
+    """
+    Fetch the current state of many subjects into one graph.
 
-    for operation in translated:
-        if operation.name == "DeleteData":
-            if hasattr(operation, "quads") and operation.quads:
-                deletions = extract_quads(operation.quads)
-            else:
-                deletions = operation.triples
-            if deletions:
-                modifications.setdefault("Deletions", []).extend(deletions)
-        elif operation.name == "InsertData":
-            if hasattr(operation, "quads") and operation.quads:
-                additions = extract_quads(operation.quads)
-            else:
-                additions = operation.triples
-            if additions:
-                modifications.setdefault("Additions", []).extend(additions)
-
-    return modifications
+    Returns:
+        A Dataset on a quadstore, a Graph otherwise
+    """
+    is_quadstore = get_dataset_is_quadstore()
+    g = Dataset() if is_quadstore else Graph()
+    _add_state_bindings(
+        g,
+        _fetch_states(
+            (str(subject) for subject in subjects), is_quadstore=is_quadstore
+        ),
+    )
+    return g
 
 
 def fetch_current_state_with_related_entities(
@@ -785,20 +908,9 @@ def fetch_current_state_with_related_entities(
     Returns:
         Dataset: A graph containing the current state of all entities
     """
-    combined_graph = Dataset() if get_dataset_is_quadstore() else Graph()
-
-    # Fetch state for all entities mentioned in provenance
-    for entity_uri in provenance:
-        current_graph = fetch_data_graph_for_subject(URIRef(entity_uri))
-
-        if get_dataset_is_quadstore():
-            for quad in current_graph.quads():  # type: ignore[union-attr]
-                combined_graph.add(quad)  # type: ignore[call-overload]
-        else:
-            for triple in current_graph:
-                combined_graph.add(triple)  # type: ignore[call-overload]
-
-    return combined_graph
+    return fetch_data_graph_for_subjects(
+        URIRef(entity_uri) for entity_uri in provenance
+    )
 
 
 @dataclass(frozen=True, slots=True)
@@ -812,13 +924,26 @@ class DeletedEntitiesQuery:
 
 PROV = "http://www.w3.org/ns/prov#"
 OCO_HAS_UPDATE_QUERY = "https://w3id.org/oc/ontology/hasUpdateQuery"
-RDF_TYPE_STATEMENT = "<http://www.w3.org/1999/02/22-rdf-syntax-ns#type>"
 DELETION_TIME_PROPERTY = {
     "property": "deletionTime",
     "displayName": "Deletion Time",
     "sortType": "date",
 }
 RELATED_STATE_DEPTH = 5
+RELATED_STATE_BATCH_SIZE = 100
+RELATED_STATE_TTL_SECONDS = 60
+RELATED_STATE_MAX_ENTRIES = 10000
+
+
+@dataclass(slots=True)
+class _RelatedStateCache:
+    entries: OrderedDict[
+        tuple[str, frozenset[str]], tuple[list[tuple[URIRef, Node]], float]
+    ] = field(default_factory=OrderedDict)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+_related_state_cache = _RelatedStateCache()
 
 
 def _deletion_snapshots_pattern(selected_class: str | None) -> str:
@@ -846,21 +971,75 @@ def _deletion_snapshots_pattern(selected_class: str | None) -> str:
                 }}{class_pattern}"""
 
 
-def _deleted_entity_types(entity_uri: str, update_query: str) -> list[str]:
-    """Read the entity types out of the DELETE DATA recorded by the snapshot."""
-    statement = re.escape(f"<{entity_uri}> {RDF_TYPE_STATEMENT} ")
-    return re.findall(f"{statement}<([^>]+)>", update_query)
+def iter_deletion_records(
+    chunk_size: int = DELETION_INDEX_CHUNK_SIZE,
+) -> Iterator[list[DeletionRecord]]:
+    """Read the record of every deleted entity from the provenance, in chunks."""
+    provenance_sparql = get_provenance_sparql()
+    offset = 0
+    while True:
+        provenance_sparql.setQuery(f"""
+            SELECT ?entity ?snapshot ?deletionTime ?agent ?lastValidSnapshot
+                ?updateQuery
+            WHERE {{
+                {{
+                    SELECT ?snapshot ?deletionTime
+                    WHERE {{{_deletion_snapshots_pattern(None)}
+                    }}
+                    ORDER BY ?snapshot
+                    LIMIT {chunk_size}
+                    OFFSET {offset}
+                }}
+                ?snapshot <{PROV}specializationOf> ?entity ;
+                          <{PROV}wasDerivedFrom> ?lastValidSnapshot ;
+                          <{OCO_HAS_UPDATE_QUERY}> ?updateQuery .
+                OPTIONAL {{ ?snapshot <{PROV}wasAttributedTo> ?agent . }}
+            }}
+        """)
+        provenance_sparql.setReturnFormat(JSON)
+        bindings = get_sparql_bindings(provenance_sparql.query().convert())
+        if not bindings:
+            return
+        records = []
+        for binding in bindings:
+            deletion_time = convert_to_datetime(binding["deletionTime"]["value"])
+            if deletion_time is None:
+                continue
+            entity_uri = binding["entity"]["value"]
+            records.append(
+                DeletionRecord(
+                    entity=entity_uri,
+                    snapshot=binding["snapshot"]["value"],
+                    classes=tuple(
+                        deleted_entity_types(
+                            entity_uri, binding["updateQuery"]["value"]
+                        )
+                    ),
+                    deletion_time=deletion_time.isoformat(),
+                    agent=binding["agent"]["value"] if "agent" in binding else None,
+                    last_valid_snapshot=binding["lastValidSnapshot"]["value"],
+                )
+            )
+        yield records
+        offset += chunk_size
 
 
 def _count_deleted_class_instances(
     class_uri: str, limit: int = COUNT_LIMIT
 ) -> tuple[str, int]:
     """
-    Count deleted entities of a class up to a limit.
+    Count deleted entities of a class, up to a limit unless they are indexed.
 
     Returns:
         tuple: (display_count, numeric_count) where display_count may be "LIMIT+"
     """
+    deletion_index = get_deletion_index()
+    indexed_count = (
+        deletion_index.count(class_uri) if deletion_index is not None else None
+    )
+    if indexed_count is not None:
+        return str(indexed_count), indexed_count
+
     provenance_sparql = get_provenance_sparql()
     provenance_sparql.setQuery(f"""
         SELECT (COUNT(?snapshot) AS ?count)
@@ -884,13 +1063,20 @@ def _count_deleted_class_instances(
 
 
 def get_deleted_available_classes() -> list[dict[str, str | int]]:
-    """Count the deleted entities of every class the configuration displays."""
-    cached = _cache["deleted_classes"]
-    if cached is not None:
-        deleted_classes, computed_at = cached
-        if time.monotonic() - computed_at < AVAILABLE_CLASSES_TTL_SECONDS:
-            return deleted_classes
+    """
+    Count the deleted entities of every class the configuration displays.
 
+    The counts are read from the deletion index when it is served, which keeps
+    them current at the cost of a lookup per class, and shared across workers
+    otherwise.
+    """
+    deletion_index = get_deletion_index()
+    if deletion_index is not None and deletion_index.is_built():
+        return _compute_deleted_available_classes()
+    return _get_shared("deleted_classes", _compute_deleted_available_classes)
+
+
+def _compute_deleted_available_classes() -> list[dict[str, str | int]]:
     custom_filter = get_custom_filter()
 
     deleted_classes = []
@@ -915,7 +1101,6 @@ def get_deleted_available_classes() -> list[dict[str, str | int]]:
         )
 
     deleted_classes.sort(key=lambda x: str(x["label"]).lower())
-    _cache["deleted_classes"] = (deleted_classes, time.monotonic())
     return deleted_classes
 
 
@@ -929,51 +1114,145 @@ def warm_time_vault() -> None:
     )
 
 
-def _referenced_uris(graph: Graph) -> set[str]:
+def _label_predicates(entity_keys: Iterable[tuple[str, str | None]]) -> frozenset[str]:
+    """Collect the predicates the fetchUriDisplay queries of some entities follow."""
+    predicates: set[str] = set()
+    for class_uri, shape_uri in entity_keys:
+        rule = find_matching_rule(class_uri, shape_uri)
+        if rule and "fetchUriDisplay" in rule:
+            predicates |= label_query_predicates(rule["fetchUriDisplay"])
+    return frozenset(predicates)
+
+
+def _linked_uris(
+    triples: Iterable[tuple[Node, Node, Node]], predicates: frozenset[str]
+) -> set[str]:
     return {
         str(obj)
-        for _, predicate, obj in graph
-        if isinstance(obj, URIRef) and predicate != RDF.type
+        for _, predicate, obj in triples
+        if isinstance(obj, URIRef) and str(predicate) in predicates
     }
 
 
-def _expand_with_current_state(graph: Graph) -> None:
+def _recall_related_states(
+    uris: Iterable[str], predicates: frozenset[str]
+) -> dict[str, list[tuple[URIRef, Node]]]:
+    recalled = {}
+    now = time.monotonic()
+    with _related_state_cache.lock:
+        for uri in uris:
+            entry = _related_state_cache.entries.get((uri, predicates))
+            if entry is None:
+                continue
+            if now - entry[1] >= RELATED_STATE_TTL_SECONDS:
+                del _related_state_cache.entries[(uri, predicates)]
+                continue
+            recalled[uri] = entry[0]
+    return recalled
+
+
+def _remember_related_states(
+    states: dict[str, list[tuple[URIRef, Node]]], predicates: frozenset[str]
+) -> None:
+    now = time.monotonic()
+    with _related_state_cache.lock:
+        for uri, state in states.items():
+            key = (uri, predicates)
+            _related_state_cache.entries[key] = (state, now)
+            _related_state_cache.entries.move_to_end(key)
+        while len(_related_state_cache.entries) > RELATED_STATE_MAX_ENTRIES:
+            _related_state_cache.entries.popitem(last=False)
+
+
+def _fetch_related_states(
+    uris: list[str], predicates: frozenset[str]
+) -> dict[str, list[tuple[URIRef, Node]]]:
+    subject_values = " ".join(f"<{uri}>" for uri in uris)
+    # rdf:type is read as well, since a query may test the class of a neighbour
+    # even though it never leads to one.
+    predicate_values = " ".join(
+        f"<{predicate}>" for predicate in sorted(predicates | {str(RDF.type)})
+    )
+    pattern = f"""VALUES ?subject {{ {subject_values} }}
+                VALUES ?predicate {{ {predicate_values} }}
+                ?subject ?predicate ?object ."""
+    sparql = get_sparql()
+    sparql.setQuery(f"""
+        SELECT ?subject ?predicate ?object
+        WHERE {{
+            {_wrap_virtuoso_graph_pattern(pattern)}
+        }}
+    """)
+    sparql.setReturnFormat(JSON)
+    states: dict[str, list[tuple[URIRef, Node]]] = {uri: [] for uri in uris}
+    for binding in get_sparql_bindings(sparql.query().convert()):
+        states[binding["subject"]["value"]].append(
+            (
+                URIRef(binding["predicate"]["value"]),
+                _binding_to_node(binding["object"]),
+            )
+        )
+    return states
+
+
+def _related_states(
+    uris: set[str], predicates: frozenset[str]
+) -> dict[str, list[tuple[URIRef, Node]]]:
+    """
+    Read the current state of some entities, restricted to a set of predicates.
+
+    States read in the last RELATED_STATE_TTL_SECONDS are reused, so that the
+    neighbours shared by consecutive Time Vault pages are read once. The others
+    are read RELATED_STATE_BATCH_SIZE at a time, with concurrent queries.
+    """
+    states = _recall_related_states(uris, predicates)
+    missing = sorted(uris - states.keys())
+    if not missing:
+        return states
+    fetched: dict[str, list[tuple[URIRef, Node]]] = {}
+    for chunk_states in run_concurrently(
+        [
+            partial(
+                _fetch_related_states,
+                missing[start : start + RELATED_STATE_BATCH_SIZE],
+                predicates,
+            )
+            for start in range(0, len(missing), RELATED_STATE_BATCH_SIZE)
+        ]
+    ):
+        fetched.update(chunk_states)
+    _remember_related_states(fetched, predicates)
+    states.update(fetched)
+    return states
+
+
+def _expand_with_current_state(graph: Graph, predicates: frozenset[str]) -> None:
     """
     Add the entities the deleted ones point at, so that display rules reaching
     into neighbours can still resolve a label. The neighbours are read from the
     dataset at their current state: only the deleted entities themselves are
     gone from it.
+
+    Only the links the labels can follow are expanded: the predicates mentioned
+    by the fetchUriDisplay queries of the deleted entities.
     """
-    sparql = get_sparql()
+    if not predicates:
+        return
     known = {str(subject) for subject in graph.subjects()}
-    frontier = _referenced_uris(graph) - known
+    frontier = _linked_uris(graph, predicates) - known
 
     for _ in range(RELATED_STATE_DEPTH):
         if not frontier:
             return
-
-        values = " ".join(f"<{uri}>" for uri in frontier)
-        pattern = f"VALUES ?subject {{ {values} }} ?subject ?predicate ?object ."
-        sparql.setQuery(f"""
-            SELECT ?subject ?predicate ?object
-            WHERE {{
-                {_wrap_virtuoso_graph_pattern(pattern)}
-            }}
-        """)
-        sparql.setReturnFormat(JSON)
-        bindings = get_sparql_bindings(sparql.query().convert())
-
-        for binding in bindings:
-            graph.add(
-                (
-                    URIRef(binding["subject"]["value"]),
-                    URIRef(binding["predicate"]["value"]),
-                    _binding_to_node(binding["object"]),
-                )
-            )
-
+        added = [
+            (URIRef(uri), predicate, obj)
+            for uri, state in _related_states(frontier, predicates).items()
+            for predicate, obj in state
+        ]
+        for triple in added:
+            graph.add(triple)
         known |= frontier
-        frontier = _referenced_uris(graph) - known
+        frontier = _linked_uris(added, predicates) - known
 
 
 def process_deleted_entities(bindings: list[dict]) -> list[dict[str, str]]:
@@ -991,22 +1270,38 @@ def process_deleted_entities(bindings: list[dict]) -> list[dict[str, str]]:
     for binding in bindings:
         entity_uri = binding["entity"]["value"]
         update_query = binding["updateQuery"]["value"]
-        entity_types = _deleted_entity_types(entity_uri, update_query)
+        entity_types = deleted_entity_types(entity_uri, update_query)
         highest_priority_type = get_highest_priority_class(entity_types)
         if not highest_priority_type:
             continue
         for triple in parse_sparql_update(update_query)["Deletions"]:
             state.add(triple)
-        typed_bindings.append((binding, entity_uri, highest_priority_type))
-
-    _expand_with_current_state(state)
-
-    entities = []
-    for binding, entity_uri, highest_priority_type in typed_bindings:
         entity_key = (
             highest_priority_type,
             determine_shape_for_classes([highest_priority_type]),
         )
+        typed_bindings.append((binding, entity_uri, entity_key))
+
+    uris_by_entity_key: defaultdict[tuple[str, str | None], list[str]] = defaultdict(
+        list
+    )
+    for _, entity_uri, entity_key in typed_bindings:
+        uris_by_entity_key[entity_key].append(entity_uri)
+
+    _expand_with_current_state(state, _label_predicates(uris_by_entity_key))
+
+    labels: dict[str, str] = {}
+    for entity_key, entity_uris in uris_by_entity_key.items():
+        labels.update(
+            zip(
+                entity_uris,
+                custom_filter.human_readable_entities(entity_uris, entity_key, state),
+                strict=True,
+            )
+        )
+
+    entities = []
+    for binding, entity_uri, entity_key in typed_bindings:
         entities.append(
             {
                 "uri": entity_uri,
@@ -1016,11 +1311,9 @@ def process_deleted_entities(bindings: list[dict]) -> list[dict[str, str]]:
                 ),
                 "lastValidSnapshotTime": binding["lastValidSnapshotTime"]["value"],
                 "type": custom_filter.human_readable_predicate(
-                    highest_priority_type, entity_key
-                ),
-                "label": custom_filter.human_readable_entity(
-                    entity_uri, entity_key, state
+                    entity_key[0], entity_key
                 ),
+                "label": labels[entity_uri],
             }
         )
 
@@ -1060,6 +1353,80 @@ def get_deleted_entities_with_filtering(
     direction = "ASC" if query.sort_direction.upper() == "ASC" else "DESC"
     offset = (query.page - 1) * query.per_page
 
+    deletion_index = get_deletion_index()
+    records = (
+        deletion_index.page(
+            selected_class,
+            offset=offset,
+            limit=query.per_page,
+            descending=direction == "DESC",
+        )
+        if deletion_index is not None
+        else None
+    )
+    bindings = (
+        _deletion_bindings(records)
+        if records is not None
+        else _query_deleted_entities(selected_class, direction, query.per_page, offset)
+    )
+
+    return (
+        process_deleted_entities(bindings),
+        available_classes,
+        selected_class,
+        selected_shape,
+        sortable_properties,
+        total_count,
+    )
+
+
+def _deletion_bindings(records: list[DeletionRecord]) -> list[dict]:
+    """
+    Complete the indexed records of a page of deleted entities.
+
+    The update query of each deletion snapshot and the time of the snapshot it
+    invalidated are read with one query for the whole page. Records whose
+    snapshot is no longer in the provenance are left out.
+    """
+    if not records:
+        return []
+    values = " ".join(
+        f"(<{record.snapshot}> <{record.last_valid_snapshot}>)" for record in records
+    )
+    provenance_sparql = get_provenance_sparql()
+    provenance_sparql.setQuery(f"""
+        SELECT ?snapshot ?lastValidSnapshotTime ?updateQuery
+        WHERE {{
+            VALUES (?snapshot ?lastValidSnapshot) {{ {values} }}
+            ?snapshot <{OCO_HAS_UPDATE_QUERY}> ?updateQuery .
+            ?lastValidSnapshot <{PROV}generatedAtTime> ?lastValidSnapshotTime .
+        }}
+    """)
+    provenance_sparql.setReturnFormat(JSON)
+    found = {
+        binding["snapshot"]["value"]: binding
+        for binding in get_sparql_bindings(provenance_sparql.query().convert())
+    }
+
+    bindings = []
+    for record in records:
+        if record.snapshot not in found:
+            continue
+        binding = {
+            "entity": {"value": record.entity},
+            "deletionTime": {"value": record.deletion_time},
+            "lastValidSnapshotTime": found[record.snapshot]["lastValidSnapshotTime"],
+            "updateQuery": found[record.snapshot]["updateQuery"],
+        }
+        if record.agent is not None:
+            binding["agent"] = {"value": record.agent}
+        bindings.append(binding)
+    return bindings
+
+
+def _query_deleted_entities(
+    selected_class: str, direction: str, limit: int, offset: int
+) -> list[dict]:
     provenance_sparql = get_provenance_sparql()
     provenance_sparql.setQuery(f"""
         SELECT ?entity ?deletionTime ?agent ?lastValidSnapshotTime ?updateQuery
@@ -1069,7 +1436,7 @@ def get_deleted_entities_with_filtering(
                 WHERE {{{_deletion_snapshots_pattern(selected_class)}
                 }}
                 ORDER BY {direction}(?deletionTime)
-                LIMIT {query.per_page}
+                LIMIT {limit}
                 OFFSET {offset}
             }}
             ?snapshot <{PROV}specializationOf> ?entity ;
@@ -1081,16 +1448,7 @@ def get_deleted_entities_with_filtering(
         ORDER BY {direction}(?deletionTime)
     """)
     provenance_sparql.setReturnFormat(JSON)
-    bindings = get_sparql_bindings(provenance_sparql.query().convert())
-
-    return (
-        process_deleted_entities(bindings),
-        available_classes,
-        selected_class,
-        selected_shape,
-        sortable_properties,
-        total_count,
-    )
+    return get_sparql_bindings(provenance_sparql.query().convert())
 
 
 def find_orphaned_entities(
@@ -1193,81 +1551,103 @@ def find_orphaned_entities(
     return orphaned, intermediate_orphans
 
 
-def import_entity_graph(
-    editor: Editor,
-    subject: URIRef,
-    max_depth: int = 5,
-    *,
-    include_referencing_entities: bool = False,
-) -> Editor:
-    imported_subjects: set[str] = set()
-    subject_str = str(subject)
+def _binding_to_imported_node(binding: dict[str, str]) -> Literal | URIRef:
+    # Imported triples are saved back, so language tags must survive as the
+    # Reader of rdflib-ocdm keeps them.
+    if "xml:lang" in binding:
+        return Literal(binding["value"], lang=binding["xml:lang"])
+    return _binding_to_node(binding)
 
-    if include_referencing_entities:
-        sparql = get_sparql()
 
-        if editor.dataset_is_quadstore:
-            query = f"""
-            SELECT DISTINCT ?s
-            WHERE {{
-                GRAPH ?g {{
-                    ?s ?p <{subject}> .
-                }}
-                FILTER(?p != <http://www.w3.org/1999/02/22-rdf-syntax-ns#type>)
-            }}
-            """
-        else:
-            query = f"""
-            SELECT DISTINCT ?s
-            WHERE {{
-                ?s ?p <{subject}> .
-                FILTER(?p != <http://www.w3.org/1999/02/22-rdf-syntax-ns#type>)
-            }}
-            """
-
-        sparql.setQuery(query)
-        sparql.setReturnFormat(JSON)
-        ref_bindings = get_sparql_bindings(sparql.query().convert())
-
-        for result in ref_bindings:
-            referencing_subject = result["s"]["value"]
-            if (
-                referencing_subject != subject_str
-                and referencing_subject not in imported_subjects
-            ):
-                imported_subjects.add(referencing_subject)
-                editor.import_entity(URIRef(referencing_subject))
-
-    # Breadth-first traversal so each entity is visited at its minimal distance
-    # from the subject: a depth-first walk would consume one level per hop along
-    # ordering chains (e.g. oco:hasNext) and silently skip entities pushed beyond
-    # max_depth, leaving them without provenance snapshots.
-    queue: deque[tuple[str, int]] = deque([(subject_str, 1)])
-    while queue:
-        current_subject, current_depth = queue.popleft()
-        if current_depth > max_depth or current_subject in imported_subjects:
-            continue
-
-        imported_subjects.add(current_subject)
-        editor.import_entity(URIRef(current_subject))
+def _referencing_subjects(subject: URIRef, *, is_quadstore: bool) -> list[str]:
+    sparql = get_sparql()
 
+    if is_quadstore:
         query = f"""
-            SELECT ?p ?o
-            WHERE {{
-                <{current_subject}> ?p ?o .
-                FILTER(isIRI(?o))
-                FILTER(?p != <http://www.w3.org/1999/02/22-rdf-syntax-ns#type>)
+        SELECT DISTINCT ?s
+        WHERE {{
+            GRAPH ?g {{
+                ?s ?p <{subject}> .
             }}
+            FILTER(?p != <http://www.w3.org/1999/02/22-rdf-syntax-ns#type>)
+        }}
+        """
+    else:
+        query = f"""
+        SELECT DISTINCT ?s
+        WHERE {{
+            ?s ?p <{subject}> .
+            FILTER(?p != <http://www.w3.org/1999/02/22-rdf-syntax-ns#type>)
+        }}
         """
 
-        sparql = get_sparql()
-        sparql.setQuery(query)
-        sparql.setReturnFormat(JSON)
-        inner_bindings = get_sparql_bindings(sparql.query().convert())
+    sparql.setQuery(query)
+    sparql.setReturnFormat(JSON)
+    return [
+        result["s"]["value"]
+        for result in get_sparql_bindings(sparql.query().convert())
+        if result["s"]["value"] != str(subject)
+    ]
 
-        for result in inner_bindings:
-            queue.append((result["o"]["value"], current_depth + 1))
 
+def import_entity_graph(
+    editor: Editor,
+    subject: URIRef,
+    max_depth: int = 5,
+    *,
+    include_referencing_entities: bool = False,
+) -> Editor:
+    """
+    Import an entity and the entities it links to, up to max_depth links away.
+
+    The traversal is breadth first and level-synchronous: the triples of every
+    entity of a level, which also hold the links to the next level, are read
+    together with chunked queries, and the whole graph is loaded into the
+    editor at the end. A traversal of max_depth levels thus takes about
+    max_depth rounds of queries, whatever the number of entities.
+    """
+    is_quadstore = editor.dataset_is_quadstore
+    graph = Dataset() if is_quadstore else Graph()
+    # Referencing entities are imported, but the links they hold are not
+    # followed.
+    imported_subjects: set[str] = (
+        set(_referencing_subjects(subject, is_quadstore=is_quadstore))
+        if include_referencing_entities
+        else set()
+    )
+    pending = list(imported_subjects)
+
+    # Each entity is visited at its minimal distance from the subject: a
+    # depth-first walk would consume one level per hop along ordering chains
+    # (e.g. oco:hasNext) and silently skip entities pushed beyond max_depth,
+    # leaving them without provenance snapshots.
+    frontier = [str(subject)]
+    for _ in range(max_depth):
+        frontier = [
+            uri for uri in dict.fromkeys(frontier) if uri not in imported_subjects
+        ]
+        if not frontier:
+            break
+        imported_subjects.update(frontier)
+        level = set(frontier)
+        bindings = _fetch_states([*pending, *frontier], is_quadstore=is_quadstore)
+        pending = []
+        _add_state_bindings(graph, bindings, _binding_to_imported_node)
+        frontier = [
+            result["object"]["value"]
+            for result in bindings
+            if result["subject"]["value"] in level
+            and result["object"]["type"] == "uri"
+            and result["predicate"]["value"] != str(RDF.type)
+        ]
+    if pending:
+        _add_state_bindings(
+            graph,
+            _fetch_states(pending, is_quadstore=is_quadstore),
+            _binding_to_imported_node,
+        )
+
+    editor.import_graph(graph)
     return editor
 
 
@@ -1333,13 +1713,19 @@ def collect_referenced_entities(
 def import_referenced_entities(
     editor: Editor,
     structured_data: dict[str, str | dict | list] | list | str,
-) -> None:
+) -> EntityImportResult:
+    """
+    Import into the editor the existing entities referenced by structured data.
+
+    The entities are read in a few chunked queries; the ones that could not be
+    imported are logged together and reported in the result.
+    """
     referenced_entities = collect_referenced_entities(structured_data)
-    for entity_uri in referenced_entities:
-        try:
-            editor.import_entity(URIRef(entity_uri))
-        except (SPARQLWrapperException, OSError, ValueError):  # noqa: PERF203
-            logging.getLogger(__name__).debug(
-                "Failed to import referenced entity %s", entity_uri
-            )
-            continue
+    result = editor.import_entities(URIRef(uri) for uri in referenced_entities)
+    if result.not_imported:
+        logging.getLogger(__name__).debug(
+            "Failed to import referenced entities: missing %s, failed %s",
+            [str(uri) for uri in result.missing],
+            [str(uri) for uri in result.failed],
+        )
+    return result
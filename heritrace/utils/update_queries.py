@@ -0,0 +1,210 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+"""
+Parsing of the update queries recorded in provenance snapshots.
+
+rdflib-ocdm records every change as DELETE DATA and INSERT DATA operations
+whose statements are the N-Triples serialisation of the changed triples,
+optionally wrapped in a GRAPH block. That form is read by a dedicated
+tokenizer; any other update query goes through the full rdflib parser. Since
+the update query of a snapshot never changes, parsed queries are kept in a
+bounded LRU cache.
+"""
+
+import re
+from collections import defaultdict
+from functools import lru_cache
+
+from rdflib import Literal, URIRef
+from rdflib.plugins.sparql.algebra import translateUpdate
+from rdflib.plugins.sparql.parser import parseUpdate
+from rdflib.term import Node
+
+UPDATE_QUERY_CACHE_SIZE = 1024
+
+_IRI = r'<([^<>"{}|^`\\\s]*)>'
+_UPDATE_TOKEN_RE = re.compile(
+    r"\s*(?:"
+    rf"{_IRI}"
+    r'|"((?:[^"\\\n\r]|\\.)*)"(?:@([a-zA-Z]+(?:-[a-zA-Z0-9]+)*)|\^\^' + _IRI + ")?"
+    r"|(DELETE|INSERT)\s+DATA\b"
+    r"|(GRAPH)\b"
+    r"|([{}.;])"
+    r")",
+    re.IGNORECASE,
+)
+_ESCAPE_RE = re.compile(r"\\(?:u([0-9A-Fa-f]{4})|U([0-9A-Fa-f]{8})|(.))", re.DOTALL)
+_ESCAPED_CHARACTERS = {
+    "t": "\t",
+    "b": "\b",
+    "n": "\n",
+    "r": "\r",
+    "f": "\f",
+    '"': '"',
+    "'": "'",
+    "\\": "\\",
+}
+
+Triple = tuple[Node, Node, Node]
+
+
+class _UnsupportedUpdateError(Exception):
+    """The update query is not in the form recorded by rdflib-ocdm."""
+
+
+def _unescape(value: str) -> str:
+    def replace(match: re.Match) -> str:
+        code = match.group(1) or match.group(2)
+        if code is not None:
+            return chr(int(code, 16))
+        character = match.group(3)
+        if character not in _ESCAPED_CHARACTERS:
+            raise _UnsupportedUpdateError
+        return _ESCAPED_CHARACTERS[character]
+
+    return _ESCAPE_RE.sub(replace, value) if "\\" in value else value
+
+
+def _tokenize(query: str) -> list[tuple[str, Node | str]]:
+    tokens: list[tuple[str, Node | str]] = []
+    position = 0
+    while True:
+        match = _UPDATE_TOKEN_RE.match(query, position)
+        if match is None:
+            if query[position:].strip():
+                raise _UnsupportedUpdateError
+            return tokens
+        position = match.end()
+        iri, lexical, language, datatype, operation, graph, punctuation = match.groups()
+        if iri is not None:
+            tokens.append(("iri", URIRef(iri)))
+        elif lexical is not None:
+            tokens.append(
+                (
+                    "literal",
+                    Literal(
+                        _unescape(lexical),
+                        lang=language,
+                        datatype=URIRef(datatype) if datatype is not None else None,
+                    ),
+                )
+            )
+        elif operation is not None:
+            tokens.append(("operation", operation.upper()))
+        elif graph is not None:
+            tokens.append(("graph", graph))
+        else:
+            tokens.append(("punctuation", punctuation))
+
+
+def _expect(tokens: list[tuple[str, Node | str]], position: int, kind: str) -> Node:
+    if position >= len(tokens) or tokens[position][0] != kind:
+        raise _UnsupportedUpdateError
+    return tokens[position][1]  # type: ignore[return-value]
+
+
+def _read_block(
+    tokens: list[tuple[str, Node | str]],
+    position: int,
+    triples: list[Triple],
+    *,
+    allow_graphs: bool,
+) -> int:
+    """Read the statements between braces, returning the position after them."""
+    if _expect(tokens, position, "punctuation") != "{":
+        raise _UnsupportedUpdateError
+    position += 1
+    while position < len(tokens):
+        kind, value = tokens[position]
+        if kind == "punctuation" and value == "}":
+            return position + 1
+        if kind == "graph" and allow_graphs:
+            _expect(tokens, position + 1, "iri")
+            position = _read_block(tokens, position + 2, triples, allow_graphs=False)
+            continue
+        subject = _expect(tokens, position, "iri")
+        predicate = _expect(tokens, position + 1, "iri")
+        if position + 2 >= len(tokens) or tokens[position + 2][0] not in {
+            "iri",
+            "literal",
+        }:
+            raise _UnsupportedUpdateError
+        triples.append((subject, predicate, tokens[position + 2][1]))  # type: ignore[arg-type]
+        position += 3
+        if position < len(tokens) and tokens[position] == ("punctuation", "."):
+            position += 1
+    raise _UnsupportedUpdateError
+
+
+def _parse_ocdm_update(query: str) -> dict[str, list[Triple]]:
+    tokens = _tokenize(query)
+    modifications: dict[str, list[Triple]] = {}
+    position = 0
+    while position < len(tokens):
+        kind, value = tokens[position]
+        if kind == "punctuation" and value == ";":
+            position += 1
+            continue
+        if kind != "operation":
+            raise _UnsupportedUpdateError
+        triples: list[Triple] = []
+        position = _read_block(tokens, position + 1, triples, allow_graphs=True)
+        if triples:
+            key = "Deletions" if value == "DELETE" else "Additions"
+            modifications.setdefault(key, []).extend(triples)
+    return modifications
+
+
+def _parse_with_rdflib(query: str) -> dict[str, list[Triple]]:
+    parsed = parseUpdate(query)
+    translated = translateUpdate(parsed).algebra
+    modifications = {}
+
+    def extract_quads(
+        quads: defaultdict[Node, list[Triple]],
+    ) -> list[Triple]:
+        return [
+            (triple[0], triple[1], triple[2])
+            for triples in quads.values()
+            for triple in triples
+        ]
+
+    for operation in translated:
+        if operation.name == "DeleteData":
+            if hasattr(operation, "quads") and operation.quads:
+                deletions = extract_quads(operation.quads)
+            else:
+                deletions = operation.triples
+            if deletions:
+                modifications.setdefault("Deletions", []).extend(deletions)
+        elif operation.name == "InsertData":
+            if hasattr(operation, "quads") and operation.quads:
+                additions = extract_quads(operation.quads)
+            else:
+                additions = operation.triples
+            if additions:
+                modifications.setdefault("Additions", []).extend(additions)
+
+    return modifications
+
+
+@lru_cache(maxsize=UPDATE_QUERY_CACHE_SIZE)
+def _parse_cached(query: str) -> dict[str, tuple[Triple, ...]]:
+    try:
+        modifications = _parse_ocdm_update(query)
+    except _UnsupportedUpdateError:
+        modifications = _parse_with_rdflib(query)
+    return {key: tuple(triples) for key, triples in modifications.items()}
+
+
+def parse_sparql_update(query: str) -> dict[str, list[Triple]]:
+    """
+    Parse the triples deleted and inserted by an update query.
+
+    Returns:
+        The deleted triples under "Deletions" and the inserted ones under
+        "Additions", each key present only if the query has such triples
+    """
+    return {key: list(triples) for key, triples in _parse_cached(query).items()}
@@ -16,12 +16,11 @@ from heritrace.utils.shacl_display import (
     execute_shacl_query,
     get_object_class,
     order_fields,
-    process_query_results,
-)
-from heritrace.utils.shacl_utils import (
-    get_form_fields_from_shacl,
     process_nested_shapes,
+    process_query_results,
 )
+from heritrace.utils.shacl_index import PropertyConstraint
+from heritrace.utils.shacl_utils import get_form_fields_from_shacl
 from heritrace.utils.shacl_validation import (
     convert_to_matching_class,
     convert_to_matching_literal,
@@ -1379,29 +1378,25 @@ def test_validate_new_triple_with_pattern_validation(
                 "http://www.essepuntato.it/2010/06/literalreification/hasLiteralValue"
             )
 
-            class MockRow:
-                def __init__(
-                    self, pattern, message=None, condition_paths="", condition_values=""
-                ) -> None:
-                    self.pattern = pattern
-                    self.message = message
-                    self.conditionPaths = condition_paths
-                    self.conditionValues = condition_values
-                    self.datatype = XSD.string
-                    self.path = predicate
-                    self.a_class = None
-                    self.classIn = None
-                    self.maxCount = None
-                    self.minCount = None
-                    self.optionalValues = ""
-                    self.shape = URIRef("http://example.org/TestShape")
-
-            mock_results = [
-                MockRow(r"10\.[0-9]{4,}/[a-zA-Z0-9.]+", "Invalid DOI format")
+            def pattern_constraint(pattern, message=None) -> PropertyConstraint:
+                return PropertyConstraint(
+                    shape="http://example.org/TestShape",
+                    path=str(predicate),
+                    path_is_iri=True,
+                    datatypes=(str(XSD.string),),
+                    patterns=(pattern,),
+                    messages=(message,) if message else (),
+                )
+
+            constraints = [
+                pattern_constraint(r"10\.[0-9]{4,}/[a-zA-Z0-9.]+", "Invalid DOI format")
             ]
 
             with (
-                patch("rdflib.graph.Graph.query", return_value=mock_results),
+                patch(
+                    "heritrace.utils.shacl_validation._property_constraints",
+                    return_value=constraints,
+                ),
                 patch("re.match") as mock_re_match,
             ):
                 # For invalid pattern
@@ -1435,8 +1430,11 @@ def test_validate_new_triple_with_pattern_validation(
                 assert error == ""
 
                 # Test with no message in the pattern constraint
-                mock_results = [MockRow(r"10\.[0-9]{4,}/[a-zA-Z0-9.]+", None)]
-                with patch("rdflib.graph.Graph.query", return_value=mock_results):
+                constraints = [pattern_constraint(r"10\.[0-9]{4,}/[a-zA-Z0-9.]+")]
+                with patch(
+                    "heritrace.utils.shacl_validation._property_constraints",
+                    return_value=constraints,
+                ):
                     # For invalid pattern without custom message
                     mock_re_match.return_value = None
                     new_value = "invalid-doi"
@@ -1566,29 +1564,18 @@ def test_validate_new_triple_with_literal_conversion(
         data_graph.add((URIRef(subject), URIRef(predicate), old_literal))
         mock_fetch_data_graph.return_value = data_graph
 
-        # Create a mock SPARQL query result for literal conversion
-        class MockRow:
-            def __init__(self, datatype=None, pattern=None, message=None) -> None:
-                self.datatype = datatype
-                self.pattern = pattern
-                self.message = message
-                self.path = predicate
-                self.conditionPaths = ""
-                self.conditionValues = ""
-                self.a_class = None
-                self.classIn = None
-                self.maxCount = None
-                self.minCount = None
-                self.pattern = None
-                self.message = None
-                self.optionalValues = ""
-                self.shape = URIRef("http://example.org/TestShape")
-
-        # Create a mock result with a datatype constraint
-        mock_results = [MockRow(datatype=XSD.string)]
+        def constraint(datatype=None) -> PropertyConstraint:
+            return PropertyConstraint(
+                shape="http://example.org/TestShape",
+                path=str(predicate),
+                path_is_iri=True,
+                datatypes=(str(datatype),) if datatype else (),
+            )
 
-        # Mock the query result
-        with patch("rdflib.graph.Graph.query", return_value=mock_results):
+        with patch(
+            "heritrace.utils.shacl_validation._property_constraints",
+            return_value=[constraint(XSD.string)],
+        ):
             # Test with existing Literal value
             old_value = Literal("Old Title", datatype=XSD.string)
             new_value = "New Title"
@@ -1614,11 +1601,10 @@ def test_validate_new_triple_with_literal_conversion(
                 data_graph.add((URIRef(subject), URIRef(predicate), old_uri))
                 mock_fetch_data_graph.return_value = data_graph
 
-                # Create a mock result for URIRef test
-                mock_results = [MockRow()]
-
-                # Mock the query result again for the URIRef test
-                with patch("rdflib.graph.Graph.query", return_value=mock_results):
+                with patch(
+                    "heritrace.utils.shacl_validation._property_constraints",
+                    return_value=[constraint()],
+                ):
                     old_value = URIRef("https://example.org/old-value")
                     new_value = None
                     valid_value, old_value, error = validate_new_triple(
@@ -1824,28 +1810,12 @@ def test_validate_new_triple_with_datatype_conversion_failure() -> None:
             )
         )
 
-        class MockRow:
-            def __init__(self, shape, predicate, datatypes=None) -> None:
-                self.shape = shape
-                self.predicate = predicate
-                self.path = predicate
-                self.datatypes = datatypes
-                self.datatype = datatypes[0] if datatypes else None
-                self.a_class = None
-                self.classIn = None
-                self.maxCount = None
-                self.minCount = None
-                self.pattern = None
-                self.message = None
-                self.optionalValues = ""
-                self.conditionPaths = ""
-                self.conditionValues = ""
-
-        mock_results = [
-            MockRow(
-                "http://example.org/shapes/PersonShape",
-                "http://xmlns.com/foaf/0.1/age",
-                datatypes=["http://www.w3.org/2001/XMLSchema#integer"],
+        constraints = [
+            PropertyConstraint(
+                shape="http://example.org/shapes/PersonShape",
+                path="http://xmlns.com/foaf/0.1/age",
+                path_is_iri=True,
+                datatypes=("http://www.w3.org/2001/XMLSchema#integer",),
             )
         ]
 
@@ -1866,7 +1836,10 @@ def test_validate_new_triple_with_datatype_conversion_failure() -> None:
                 "heritrace.utils.shacl_validation.get_custom_filter",
                 return_value=mock_custom_filter,
             ),
-            patch("rdflib.graph.Graph.query", return_value=mock_results),
+            patch(
+                "heritrace.utils.shacl_validation._property_constraints",
+                return_value=constraints,
+            ),
             patch("validators.url", return_value=False),
             patch(
                 "heritrace.utils.shacl_validation.convert_to_matching_literal",
@@ -1903,29 +1876,11 @@ def test_validate_new_triple_with_invalid_url() -> None:
             )
         )
 
-        class MockRow:
-            def __init__(self, shape, predicate, classes=None) -> None:
-                self.shape = shape
-                self.predicate = predicate
-                self.path = predicate
-                self.classes = classes
-                self.datatypes = None
-                self.datatype = None
-                self.a_class = None
-                self.classIn = None
-                self.maxCount = None
-                self.minCount = None
-                self.pattern = None
-                self.message = None
-                self.optionalValues = None
-                self.conditionPaths = None
-                self.conditionValues = None
-
-        mock_results = [
-            MockRow(
-                "http://example.org/shapes/WebsiteShape",
-                "http://xmlns.com/foaf/0.1/homepage",
-                classes=["http://xmlns.com/foaf/0.1/Document"],
+        constraints = [
+            PropertyConstraint(
+                shape="http://example.org/shapes/WebsiteShape",
+                path="http://xmlns.com/foaf/0.1/homepage",
+                path_is_iri=True,
             )
         ]
 
@@ -1945,7 +1900,10 @@ def test_validate_new_triple_with_invalid_url() -> None:
                 "heritrace.utils.shacl_validation.get_custom_filter",
                 return_value=mock_custom_filter,
             ),
-            patch("rdflib.graph.Graph.query", return_value=mock_results),
+            patch(
+                "heritrace.utils.shacl_validation._property_constraints",
+                return_value=constraints,
+            ),
             patch("validators.url", return_value=False),
             patch("flask_babel.gettext", return_value="Invalid URL error message"),
         ):
@@ -19,6 +19,7 @@ from rdflib import RDF, XSD, Graph, Literal, URIRef
 from redis import Redis
 
 from heritrace.routes.api import (
+    NESTED_FORM_MAX_DEPTH,
     ChangeOperation,
     CreateEntityData,
     create_logic,
@@ -783,8 +784,8 @@ def test_validate_literal_no_matching_datatypes(api_client: FlaskClient) -> None
     """
     Test the validate_literal endpoint with a value that has no matching datatypes.
     """
-    # Mock the DATATYPE_MAPPING to ensure no datatypes match
-    with patch("heritrace.routes.api.DATATYPE_MAPPING", []):
+    # Mock the datatype validators to ensure no datatypes match
+    with patch("heritrace.utils.literal_validators.DATATYPE_VALIDATORS", {}):
         response = api_client.post(
             "/api/validate-literal",
             json={"value": "test value that won't match any datatype"},
@@ -795,6 +796,67 @@ def test_validate_literal_no_matching_datatypes(api_client: FlaskClient) -> None
         assert "No matching datatypes found" in data["error"]
 
 
+LITERAL_SHAPES = r"""
+@prefix sh: <http://www.w3.org/ns/shacl#> .
+
+<http://example.org/EventShape> a sh:NodeShape ;
+    sh:targetClass <http://example.org/Event> ;
+    sh:property [
+        sh:path <http://example.org/date> ;
+        sh:pattern "^\\d{4}-\\d{2}-\\d{2}$" ;
+    ] .
+"""
+
+
+@patch(
+    "heritrace.routes.api.get_shacl_graph",
+    return_value=Graph().parse(data=LITERAL_SHAPES, format="turtle"),
+)
+def test_validate_literals(_mock_shacl, api_client: FlaskClient) -> None:
+    """Test the validate_literals endpoint with several values at once."""
+    date_field = {
+        "shape": "http://example.org/EventShape",
+        "property": "http://example.org/date",
+    }
+    response = api_client.post(
+        "/api/validate-literals",
+        json={
+            "values": [
+                {"value": "42", "datatypes": [str(XSD.integer)]},
+                {"value": "forty-two", "datatypes": [str(XSD.integer)]},
+                {"value": "2024-05-01", "pattern": r"^\d{4}-\d{2}-\d{2}$"},
+                {"value": "May 2024", **date_field},
+            ]
+        },
+    )
+    assert response.status_code == 200
+    results = json.loads(response.data)["results"]
+    assert results[0] == {"valid_datatypes": [str(XSD.integer)], "valid": True}
+    assert results[1] == {"valid_datatypes": [], "valid": False}
+    assert results[2]["valid"] is True
+    assert str(XSD.date) in results[2]["valid_datatypes"]
+    assert results[3]["valid"] is False
+
+
+@patch(
+    "heritrace.routes.api.get_shacl_graph",
+    return_value=Graph().parse(data=LITERAL_SHAPES, format="turtle"),
+)
+def test_validate_literals_invalid_request(
+    _mock_shacl, api_client: FlaskClient
+) -> None:
+    """Test the validate_literals endpoint with malformed values or patterns."""
+    response = api_client.post("/api/validate-literals", json={"values": [42]})
+    assert response.status_code == 400
+
+    # Only the sh:pattern values of the shapes are accepted.
+    response = api_client.post(
+        "/api/validate-literals",
+        json={"values": [{"value": "aaaa!", "pattern": "^(a+)+$"}]},
+    )
+    assert response.status_code == 400
+
+
 def test_check_orphans_no_changes(api_client: FlaskClient) -> None:
     """Test the check_orphans endpoint with no changes."""
     response = api_client.post(
@@ -1227,6 +1289,24 @@ def test_get_human_readable_entity(
     )
 
 
+@patch("heritrace.routes.api.get_label_cache")
+def test_get_label_cache_stats(mock_get_label_cache, api_client: FlaskClient) -> None:
+    stats = {"hits": 3, "misses": 1, "hit_rate": 0.75, "entries": 2}
+    mock_get_label_cache.return_value.get_stats.return_value = stats
+
+    response = api_client.get("/api/label-cache-stats")
+
+    assert response.status_code == 200
+    assert response.json == stats
+
+
+@patch("heritrace.routes.api.get_label_cache", return_value=None)
+def test_get_label_cache_stats_disabled(_mock_get_label_cache, api_client) -> None:
+    response = api_client.get("/api/label-cache-stats")
+
+    assert response.status_code == 404
+
+
 def test_get_human_readable_entity_missing_params(api_client: FlaskClient) -> None:
     """Test the get_human_readable_entity endpoint with missing parameters."""
     # Make the request without required parameters
@@ -1663,6 +1743,7 @@ def test_create_logic_with_parent(
             RDF.type,
             "http://example.org/type/1",
             "create",
+            None,
             entity_types="http://example.org/type/1",
         )
 
@@ -1672,6 +1753,7 @@ def test_create_logic_with_parent(
             URIRef("http://example.org/property/hasChild"),
             URIRef("http://example.org/entity/new"),
             "create",
+            None,
             entity_types="http://example.org/type/parent",
         )
 
@@ -2526,6 +2608,38 @@ def test_render_form_fields_html_success(
     assert b"Form HTML" in response.data
 
 
+@patch("heritrace.routes.api.get_form_fragments")
+@patch("heritrace.routes.api.get_form_fields")
+@patch("heritrace.routes.api.render_template_string")
+def test_render_form_fields_html_reuses_fragment(
+    mock_render, mock_get_form_fields, mock_get_form_fragments, api_client: FlaskClient
+) -> None:
+    """Test that render_form_fields_html renders a shape once per locale."""
+    mock_get_form_fields.return_value = OrderedDict(
+        {
+            ("http://example.org/class", "http://example.org/shape"): OrderedDict(
+                {"http://example.org/property1": [{"type": "literal"}]}
+            )
+        }
+    )
+    mock_get_form_fragments.return_value = OrderedDict()
+    mock_render.return_value = "<div>Form HTML</div>"
+    payload = {"entity_key": ["http://example.org/class", "http://example.org/shape"]}
+
+    first = api_client.post("/api/render-form-fields", json=payload)
+    second = api_client.post("/api/render-form-fields", json=payload)
+    with api_client.session_transaction() as session:
+        session["lang"] = "it"
+    third = api_client.post("/api/render-form-fields", json=payload)
+
+    assert first.data == second.data == third.data == b"<div>Form HTML</div>"
+    assert mock_render.call_count == 2
+    assert set(mock_get_form_fragments.return_value) == {
+        ("form-fields", "http://example.org/class", "http://example.org/shape", "en"),
+        ("form-fields", "http://example.org/class", "http://example.org/shape", "it"),
+    }
+
+
 @patch("heritrace.routes.api.get_form_fields")
 def test_render_form_fields_html_missing_data(
     mock_get_form_fields, api_client: FlaskClient
@@ -2639,6 +2753,83 @@ def test_render_nested_form_html_success(
     assert b"Nested Form HTML" in response.data
 
 
+@patch("heritrace.routes.api.get_form_fragments")
+@patch("heritrace.routes.api.get_form_fields")
+@patch("heritrace.routes.api.render_template_string")
+def test_render_nested_form_html_normalises_fragment_key(
+    mock_render, mock_get_form_fields, mock_get_form_fragments, api_client: FlaskClient
+) -> None:
+    """Test that depth and is_template cannot multiply the cached fragments."""
+    mock_get_form_fields.return_value = OrderedDict(
+        {
+            ("http://example.org/parent", "http://example.org/parent_shape"): {
+                "http://example.org/predicate": [
+                    {
+                        "or": [
+                            {
+                                "entityType": "http://example.org/child",
+                                "nodeShape": "http://example.org/child_shape",
+                            }
+                        ]
+                    }
+                ]
+            }
+        }
+    )
+    mock_get_form_fragments.return_value = OrderedDict()
+    mock_render.return_value = "<div>Nested Form HTML</div>"
+    payload = {
+        "parent_entity_class": "http://example.org/parent",
+        "parent_entity_shape": "http://example.org/parent_shape",
+        "entity_class": "http://example.org/child",
+        "entity_shape": "http://example.org/child_shape",
+        "predicate_uri": "http://example.org/predicate",
+    }
+
+    for depth, is_template in [(7, ["x"]), (10**6, {"a": 1}), (50, "true")]:
+        response = api_client.post(
+            "/api/render-nested-form",
+            json={**payload, "depth": depth, "is_template": is_template},
+        )
+        assert response.status_code == 200
+    invalid = api_client.post(
+        "/api/render-nested-form", json={**payload, "depth": "deep"}
+    )
+
+    assert invalid.status_code == 400
+    mock_render.assert_called_once()
+    assert mock_render.call_args.kwargs["depth"] == NESTED_FORM_MAX_DEPTH + 1
+    assert mock_render.call_args.kwargs["is_template"] is False
+
+
+@patch("heritrace.routes.api.FORM_FRAGMENTS_MAX_ENTRIES", 1)
+@patch("heritrace.routes.api.get_form_fragments")
+@patch("heritrace.routes.api.get_form_fields")
+@patch("heritrace.routes.api.render_template_string")
+def test_render_form_fields_html_keeps_the_latest_fragments(
+    mock_render, mock_get_form_fields, mock_get_form_fragments, api_client: FlaskClient
+) -> None:
+    """Test that the least recently used fragments are dropped."""
+    mock_get_form_fields.return_value = OrderedDict(
+        {
+            ("http://example.org/class", "http://example.org/shape"): OrderedDict(),
+            ("http://example.org/other", "http://example.org/shape"): OrderedDict(),
+        }
+    )
+    mock_get_form_fragments.return_value = OrderedDict()
+    mock_render.return_value = "<div>Form HTML</div>"
+
+    for entity_class in ["http://example.org/class", "http://example.org/other"]:
+        api_client.post(
+            "/api/render-form-fields",
+            json={"entity_key": [entity_class, "http://example.org/shape"]},
+        )
+
+    assert list(mock_get_form_fragments.return_value) == [
+        ("form-fields", "http://example.org/other", "http://example.org/shape", "en")
+    ]
+
+
 @patch("heritrace.routes.api.get_form_fields")
 def test_render_nested_form_html_missing_fields(
     mock_get_form_fields, api_client: FlaskClient
@@ -0,0 +1,134 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+import threading
+import time
+from collections.abc import Iterator
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from heritrace.batched_storer import (
+    DEFAULT_UPDATE_BATCH_BYTES,
+    DEFAULT_UPDATE_BATCH_STATEMENTS,
+    DEFAULT_UPDATE_CONCURRENCY,
+    BatchedStorer,
+    configure_batched_upload,
+    update_batches,
+)
+
+ENDPOINT = "http://localhost:9999/sparql"
+
+
+def _change_set(queries: dict[str, tuple[str, int, int]]) -> MagicMock:
+    a_set = MagicMock()
+    a_set.all_entities = set(queries)
+    return a_set
+
+
+@pytest.fixture
+def update_queries() -> Iterator[dict[str, tuple[str, int, int]]]:
+    queries: dict[str, tuple[str, int, int]] = {}
+    with patch(
+        "heritrace.batched_storer.get_update_query",
+        side_effect=lambda _a_set, entity, _entity_type: queries[entity],
+    ):
+        yield queries
+
+
+@pytest.fixture
+def upload_settings() -> Iterator[None]:
+    configure_batched_upload(20, 5, 2)
+    yield
+    configure_batched_upload(
+        DEFAULT_UPDATE_BATCH_BYTES,
+        DEFAULT_UPDATE_BATCH_STATEMENTS,
+        DEFAULT_UPDATE_CONCURRENCY,
+    )
+
+
+def test_batches_close_before_either_budget_is_exceeded(update_queries) -> None:
+    update_queries.update(
+        {
+            "a": ("a" * 8, 2, 0),
+            "b": ("b" * 8, 1, 0),
+            "c": ("c" * 8, 1, 1),
+            "d": ("", 0, 0),
+            "e": ("e" * 30, 1, 0),
+        }
+    )
+    a_set = _change_set(update_queries)
+    a_set.all_entities = ["a", "b", "c", "d", "e"]
+
+    batches = list(update_batches(a_set, max_bytes=20, max_statements=4))
+
+    assert [batch.query for batch in batches] == [
+        "a" * 8 + " ; " + "b" * 8,
+        "c" * 8,
+        "e" * 30,
+    ]
+    assert [(batch.entities, batch.statements) for batch in batches] == [
+        (2, 3),
+        (1, 2),
+        (1, 1),
+    ]
+    assert [batch.size for batch in batches] == [len(batch.query) for batch in batches]
+
+
+@pytest.mark.usefixtures("upload_settings")
+def test_upload_keeps_the_batches_in_flight_within_the_limit(update_queries) -> None:
+    update_queries.update({str(i): (f"INSERT DATA {{ {i} }}", 5, 0) for i in range(6)})
+    lock = threading.Lock()
+    in_flight = 0
+    peak = 0
+
+    def send() -> None:
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        time.sleep(0.02)
+        with lock:
+            in_flight -= 1
+
+    with patch("heritrace.batched_storer.SPARQLWrapperWithRetry") as mock_wrapper:
+        mock_wrapper.return_value.query.side_effect = send
+        storer = BatchedStorer(_change_set(update_queries))
+
+        assert storer.upload_all(ENDPOINT)
+
+    assert peak == 2
+    assert len(storer.timings) == 6
+    assert all(timing.uploaded and timing.seconds > 0 for timing in storer.timings)
+
+
+def test_upload_reports_failed_batches_after_sending_the_others(
+    update_queries,
+) -> None:
+    update_queries.update(
+        {str(i): (f"INSERT DATA {{ {i} }}", 6_000, 0) for i in range(3)}
+    )
+
+    with patch("heritrace.batched_storer.SPARQLWrapperWithRetry") as mock_wrapper:
+        mock_wrapper.return_value.query.side_effect = [None, OSError, None]
+        storer = BatchedStorer(_change_set(update_queries))
+
+        assert not storer.upload_all(ENDPOINT)
+
+    assert mock_wrapper.return_value.query.call_count == 3
+    assert sorted(timing.uploaded for timing in storer.timings) == [False, True, True]
+
+
+def test_empty_change_sets_upload_nothing(update_queries) -> None:
+    update_queries["a"] = ("", 0, 0)
+
+    with patch("heritrace.batched_storer.SPARQLWrapperWithRetry") as mock_wrapper:
+        assert BatchedStorer(_change_set(update_queries)).upload_all(ENDPOINT)
+
+    mock_wrapper.assert_not_called()
+
+
+def test_configuration_rejects_empty_batches() -> None:
+    with pytest.raises(ValueError, match="UPDATE_BATCH_BYTES"):
+        configure_batched_upload(0, 1, 1)
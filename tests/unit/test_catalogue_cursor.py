@@ -0,0 +1,153 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+import json
+
+import pytest
+from rdflib import RDF, XSD, Graph, Literal, Namespace
+
+from heritrace.utils.catalogue_cursor import (
+    CatalogueCursor,
+    CatalogueListing,
+    InvalidCursorError,
+    build_keyset_filter,
+    build_order_clause,
+    cursor_from_binding,
+    decode_cursor,
+    encode_cursor,
+    recall_page_cursor,
+    remember_page_cursor,
+)
+
+EX = Namespace("http://example.org/")
+PAGE_SIZE = 7
+
+
+TITLES = [
+    Literal("alpha"),
+    Literal("beta"),
+    Literal("alpha", lang="en"),
+    Literal("gamma", lang="en"),
+    Literal("t1"),
+    None,
+]
+
+
+@pytest.fixture(scope="module")
+def graph() -> Graph:
+    # Ties, language tags, plain literals and missing values are interleaved so
+    # that every page boundary falls inside a run of equal sort values.
+    g = Graph()
+    for index in range(50):
+        subject = EX[f"br{(index * 17) % 50:03d}"]
+        g.add((subject, RDF.type, EX.Document))
+        title = TITLES[index % len(TITLES)]
+        if title is not None:
+            g.add((subject, EX.title, title))
+        if index % 5:
+            g.add((subject, EX.year, Literal(index % 4, datatype=XSD.integer)))
+    return g
+
+
+def _listing(
+    sort_property: str | None = None,
+    *,
+    descending: bool = False,
+    lexical_sort: bool = True,
+    selected_shape: str | None = None,
+) -> CatalogueListing:
+    return CatalogueListing(
+        selected_class=str(EX.Document),
+        selected_shape=selected_shape,
+        sort_property=sort_property,
+        descending=descending,
+        lexical_sort=lexical_sort,
+    )
+
+
+def _listing_query(listing: CatalogueListing, extra: str = "") -> str:
+    sort_clause = (
+        f"OPTIONAL {{ ?subject <{listing.sort_property}> ?sortValue }}"
+        if listing.sort_property
+        else ""
+    )
+    return f"""
+        SELECT ?subject {"?sortValue" if listing.sort_property else ""}
+        WHERE {{ ?subject a <{EX.Document}> . {sort_clause} {extra} }}
+        {build_order_clause(listing)}
+    """
+
+
+def _page_through(graph: Graph, listing: CatalogueListing) -> list[str]:
+    subjects: list[str] = []
+    token = None
+    while True:
+        keyset_filter = (
+            build_keyset_filter(decode_cursor(token, listing), listing) if token else ""
+        )
+        result = graph.query(
+            _listing_query(listing, keyset_filter) + f" LIMIT {PAGE_SIZE}"
+        )
+        bindings = json.loads(result.serialize(format="json"))["results"]["bindings"]
+        subjects.extend(binding["subject"]["value"] for binding in bindings)
+        if len(bindings) < PAGE_SIZE:
+            return subjects
+        token = encode_cursor(cursor_from_binding(bindings[-1], listing), listing)
+
+
+@pytest.mark.parametrize("descending", [False, True])
+@pytest.mark.parametrize(
+    ("sort_property", "lexical_sort"),
+    [(None, True), (str(EX.title), True), (str(EX.year), False)],
+)
+def test_keyset_pages_match_full_ordering(
+    graph: Graph, sort_property: str | None, *, lexical_sort: bool, descending: bool
+) -> None:
+    listing = _listing(sort_property, descending=descending, lexical_sort=lexical_sort)
+    expected = [str(row[0]) for row in graph.query(_listing_query(listing))]
+
+    assert _page_through(graph, listing) == expected
+
+
+def test_cursor_round_trip_keeps_typed_sort_value() -> None:
+    listing = _listing(str(EX.year), lexical_sort=False)
+    binding = {
+        "subject": {"type": "uri", "value": str(EX.br001)},
+        "sortValue": {"type": "literal", "value": "3", "datatype": str(XSD.integer)},
+    }
+
+    cursor = decode_cursor(
+        encode_cursor(cursor_from_binding(binding, listing), listing), listing
+    )
+
+    assert cursor == CatalogueCursor(subject=str(EX.br001), sort_value=Literal(3).n3())
+
+
+def test_cursor_of_another_listing_is_rejected() -> None:
+    by_title = _listing(str(EX.title))
+    by_title_desc = _listing(str(EX.title), descending=True)
+    token = encode_cursor(CatalogueCursor(subject=str(EX.br001)), by_title)
+
+    with pytest.raises(InvalidCursorError, match="does not match"):
+        decode_cursor(token, by_title_desc)
+
+
+@pytest.mark.parametrize("token", ["not-base64!", "bnVsbA==", "WzEsMiwzXQ=="])
+def test_malformed_cursor_is_rejected(token: str) -> None:
+    listing = _listing()
+
+    with pytest.raises(InvalidCursorError, match="Malformed"):
+        decode_cursor(token, listing)
+
+
+def test_page_cursors_are_remembered_per_listing_and_page_size() -> None:
+    listing = _listing(selected_shape=str(EX.Shape))
+    other = _listing()
+
+    remember_page_cursor(listing, 50, 3, "token")
+
+    assert recall_page_cursor(listing, 50, 3) == "token"
+    assert recall_page_cursor(listing, 100, 3) is None
+    assert recall_page_cursor(listing, 50, 4) is None
+    assert recall_page_cursor(other, 50, 3) is None
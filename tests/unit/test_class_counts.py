@@ -0,0 +1,108 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+import threading
+import time
+from collections.abc import Callable
+from unittest.mock import MagicMock, patch
+
+from heritrace.services.class_counts import ClassCounts
+from heritrace.sparql import SPARQLWrapperWithRetry, resolve_thread_wrapper
+
+PERSON = "http://example.org/Person"
+DOCUMENT = "http://example.org/Document"
+
+
+def _wait_until(condition: Callable[[], bool]) -> None:
+    deadline = time.monotonic() + 5
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_first_count_is_taken_synchronously() -> None:
+    counts = ClassCounts(limit=100)
+    recount = MagicMock(return_value={PERSON: 3})
+
+    assert counts.get([PERSON, DOCUMENT], recount) == {PERSON: 3, DOCUMENT: 0}
+    recount.assert_called_once_with([PERSON, DOCUMENT], 101)
+
+
+def test_fresh_counts_are_not_recounted() -> None:
+    counts = ClassCounts(limit=100)
+    recount = MagicMock(return_value={PERSON: 3})
+    counts.get([PERSON], recount)
+
+    assert counts.get([PERSON], recount) == {PERSON: 3}
+    recount.assert_called_once()
+
+
+def test_stale_counts_are_served_while_recounting_in_the_background() -> None:
+    counts = ClassCounts(limit=100, max_age=0)
+    counts.get([PERSON], lambda _uris, _limit: {PERSON: 3})
+    release = threading.Event()
+
+    def slow_recount(_class_uris: list[str], _limit: int) -> dict[str, int]:
+        release.wait(timeout=5)
+        return {PERSON: 4}
+
+    assert counts.get([PERSON], slow_recount) == {PERSON: 3}
+    # A refresh is already running, so no second one is started.
+    assert counts.get([PERSON], MagicMock(side_effect=AssertionError)) == {PERSON: 3}
+
+    generation = counts.generation
+    release.set()
+    _wait_until(lambda: counts.generation != generation)
+    assert counts.get([PERSON], MagicMock(return_value={PERSON: 4})) == {PERSON: 4}
+
+
+def test_background_recount_does_not_share_the_request_wrapper() -> None:
+    shared = SPARQLWrapperWithRetry("http://example.org/sparql")
+    counts = ClassCounts(limit=100, max_age=0)
+    counts.get([PERSON], lambda _uris, _limit: {PERSON: 3})
+    used: list[SPARQLWrapperWithRetry] = []
+
+    def recount(_class_uris: list[str], _limit: int) -> dict[str, int]:
+        used.append(resolve_thread_wrapper(shared))
+        return {PERSON: 4}
+
+    counts.get([PERSON], recount)
+    _wait_until(lambda: bool(used))
+
+    assert resolve_thread_wrapper(shared) is shared
+    assert used[0] is not shared
+
+
+def test_failed_background_recount_keeps_previous_counts() -> None:
+    counts = ClassCounts(limit=100, max_age=0)
+    counts.get([PERSON], lambda _uris, _limit: {PERSON: 3})
+
+    def failing_recount(_class_uris: list[str], _limit: int) -> dict[str, int]:
+        msg = "endpoint down"
+        raise RuntimeError(msg)
+
+    with patch("heritrace.services.class_counts.logger") as mock_logger:
+        counts.get([PERSON], failing_recount)
+        _wait_until(lambda: mock_logger.exception.called)
+
+    mock_logger.exception.assert_called_once()
+    assert counts.get([PERSON], MagicMock(return_value={PERSON: 3})) == {PERSON: 3}
+
+
+def test_adjustments_apply_to_counts_below_the_limit() -> None:
+    counts = ClassCounts(limit=10)
+    counts.get([PERSON, DOCUMENT], lambda _uris, _limit: {PERSON: 11, DOCUMENT: 1})
+    generation = counts.generation
+
+    counts.adjust({PERSON: -1, DOCUMENT: -2, "http://example.org/Other": 1})
+
+    assert counts.get([PERSON, DOCUMENT], MagicMock()) == {PERSON: 11, DOCUMENT: 0}
+    assert counts.generation == generation + 1
+
+
+def test_capped_counts_are_displayed_with_a_plus() -> None:
+    counts = ClassCounts(limit=10)
+
+    assert counts.display(11) == ("10+", 10)
+    assert counts.display(10) == ("10", 10)
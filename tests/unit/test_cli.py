@@ -2,7 +2,7 @@
 #
 # SPDX-License-Identifier: ISC
 
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
 import pytest
 from flask import Flask
@@ -136,3 +136,65 @@ def test_translate_init_init_failure(mock_unlink, mock_system, app) -> None:
     assert isinstance(result.exception, RuntimeError)
     assert str(result.exception) == "init command failed"
     mock_unlink.assert_not_called()
+
+
+def test_shape_index_build_indexes_every_class_with_multiple_shapes(app) -> None:
+    """Test that shape-index build indexes each class with multiple shapes"""
+    shape_index = MagicMock()
+    shape_index.build.side_effect = [3, 5]
+    runner = app.test_cli_runner()
+
+    with (
+        patch("heritrace.cli.get_shape_index", return_value=shape_index),
+        patch(
+            "heritrace.cli.get_classes_with_multiple_shapes",
+            return_value={"http://example.org/Role", "http://example.org/Agent"},
+        ),
+        patch("heritrace.cli.iter_shape_membership") as mock_iter,
+    ):
+        result = runner.invoke(args=["shape-index", "build"])
+
+    assert result.exit_code == 0
+    assert [c.args[0] for c in shape_index.build.call_args_list] == [
+        "http://example.org/Agent",
+        "http://example.org/Role",
+    ]
+    mock_iter.assert_any_call("http://example.org/Role")
+    assert "Indexed 3 entities of http://example.org/Agent" in result.output
+    assert "Indexed 5 entities of http://example.org/Role" in result.output
+
+
+def test_shape_index_build_of_selected_classes(app) -> None:
+    """Test that shape-index build can be limited to some classes"""
+    shape_index = MagicMock()
+    shape_index.build.return_value = 1
+    runner = app.test_cli_runner()
+
+    with (
+        patch("heritrace.cli.get_shape_index", return_value=shape_index),
+        patch("heritrace.cli.iter_shape_membership"),
+    ):
+        result = runner.invoke(
+            args=["shape-index", "build", "--class", "http://example.org/Role"]
+        )
+
+    assert result.exit_code == 0
+    shape_index.build.assert_called_once()
+    assert shape_index.build.call_args.args[0] == "http://example.org/Role"
+
+
+def test_deletion_index_build_indexes_every_deleted_entity(app) -> None:
+    """Test that deletion-index build indexes the deletions in the provenance"""
+    deletion_index = MagicMock()
+    deletion_index.build.return_value = 7
+    runner = app.test_cli_runner()
+
+    with (
+        patch("heritrace.cli.get_deletion_index", return_value=deletion_index),
+        patch("heritrace.cli.iter_deletion_records") as mock_iter,
+    ):
+        result = runner.invoke(args=["deletion-index", "build"])
+
+    assert result.exit_code == 0
+    deletion_index.build.assert_called_once_with(mock_iter.return_value)
+    assert "Indexed 7 deleted entities" in result.output
@@ -0,0 +1,249 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+import json
+from dataclasses import asdict
+from unittest.mock import MagicMock, call
+
+import pytest
+from rdflib import XSD, Graph, Literal, URIRef
+from redis import RedisError
+
+from heritrace.services.deletion_index import (
+    OCO_HAS_UPDATE_QUERY,
+    PROV,
+    DeletionIndex,
+    DeletionRecord,
+    deletion_records,
+)
+
+ARTICLE = "http://example.org/Article"
+PERSON = "http://example.org/Person"
+ENTITY_1 = "http://example.org/br/1"
+ENTITY_2 = "http://example.org/br/2"
+AGENT = "https://orcid.org/0000-0000-0000-0000"
+
+RECORD_1 = DeletionRecord(
+    entity=ENTITY_1,
+    snapshot=f"{ENTITY_1}/prov/se/2",
+    classes=(ARTICLE,),
+    deletion_time="2024-01-02T00:00:00+00:00",
+    agent=AGENT,
+    last_valid_snapshot=f"{ENTITY_1}/prov/se/1",
+)
+RECORD_2 = DeletionRecord(
+    entity=ENTITY_2,
+    snapshot=f"{ENTITY_2}/prov/se/2",
+    classes=(ARTICLE, PERSON),
+    deletion_time="2024-01-03T00:00:00+00:00",
+    agent=None,
+    last_valid_snapshot=f"{ENTITY_2}/prov/se/1",
+)
+
+
+def _dump(record: DeletionRecord) -> str:
+    return json.dumps(asdict(record))
+
+
+@pytest.fixture
+def mock_redis():
+    """Create a mock Redis client whose pipeline is the client itself."""
+    redis_mock = MagicMock()
+    redis_mock.get.return_value = "current"
+    redis_mock.pipeline.return_value = redis_mock
+    redis_mock.execute.return_value = []
+    return redis_mock
+
+
+@pytest.fixture
+def deletion_index(mock_redis) -> DeletionIndex:
+    return DeletionIndex(mock_redis)
+
+
+def test_deletion_records_describe_the_deletion_snapshots() -> None:
+    provenance = Graph()
+    entity = URIRef(ENTITY_1)
+    creation = URIRef(RECORD_1.last_valid_snapshot)
+    deletion = URIRef(RECORD_1.snapshot)
+    deleted_at = Literal("2024-01-02T00:00:00+00:00", datatype=XSD.dateTime)
+    provenance.add((creation, PROV.specializationOf, entity))
+    provenance.add((creation, PROV.invalidatedAtTime, deleted_at))
+    provenance.add((deletion, PROV.specializationOf, entity))
+    provenance.add((deletion, PROV.generatedAtTime, deleted_at))
+    provenance.add((deletion, PROV.invalidatedAtTime, deleted_at))
+    provenance.add((deletion, PROV.wasDerivedFrom, creation))
+    provenance.add((deletion, PROV.wasAttributedTo, URIRef(AGENT)))
+    provenance.add(
+        (
+            deletion,
+            OCO_HAS_UPDATE_QUERY,
+            Literal(
+                f"DELETE DATA {{ <{ENTITY_1}> "
+                "<http://www.w3.org/1999/02/22-rdf-syntax-ns#type> "
+                f"<{ARTICLE}> . }}"
+            ),
+        )
+    )
+
+    assert deletion_records(provenance, [entity]) == [RECORD_1]
+
+
+def test_deletion_snapshots_without_derivation_are_left_out() -> None:
+    provenance = Graph()
+    entity = URIRef(ENTITY_1)
+    deletion = URIRef(RECORD_1.snapshot)
+    deleted_at = Literal("2024-01-02T00:00:00+00:00", datatype=XSD.dateTime)
+    provenance.add((deletion, PROV.specializationOf, entity))
+    provenance.add((deletion, PROV.generatedAtTime, deleted_at))
+    provenance.add((deletion, PROV.invalidatedAtTime, deleted_at))
+
+    assert deletion_records(provenance, [entity]) == []
+
+
+def test_build_switches_to_the_new_generation_once_complete(
+    deletion_index: DeletionIndex, mock_redis
+) -> None:
+    mock_redis.execute.side_effect = [[], ["previous", 1]]
+    mock_redis.smembers.return_value = {ARTICLE}
+
+    indexed = deletion_index.build([[RECORD_1, RECORD_2]])
+
+    assert indexed == 2
+    generation = mock_redis.set.call_args.args[1]
+    mock_redis.set.assert_called_once_with("deletion_index:building", generation)
+    mock_redis.zadd.assert_has_calls(
+        [
+            call(
+                f"deletion_index:{generation}:class:{ARTICLE}",
+                {ENTITY_1: RECORD_1.score()},
+            ),
+            call(
+                f"deletion_index:{generation}:class:{PERSON}",
+                {ENTITY_2: RECORD_2.score()},
+            ),
+        ],
+        any_order=True,
+    )
+    mock_redis.hset.assert_called_once_with(
+        f"deletion_index:{generation}:records",
+        mapping={ENTITY_1: _dump(RECORD_1), ENTITY_2: _dump(RECORD_2)},
+    )
+    mock_redis.getset.assert_called_once_with("deletion_index:generation", generation)
+    mock_redis.delete.assert_has_calls(
+        [
+            call("deletion_index:building"),
+            call(
+                "deletion_index:previous:records",
+                "deletion_index:previous:classes",
+                f"deletion_index:previous:class:{ARTICLE}",
+            ),
+        ]
+    )
+
+
+def test_failed_build_drops_the_partial_generation(
+    deletion_index: DeletionIndex, mock_redis
+) -> None:
+    def records():
+        yield [RECORD_1]
+        msg = "provenance unavailable"
+        raise RuntimeError(msg)
+
+    mock_redis.smembers.return_value = set()
+
+    with pytest.raises(RuntimeError):
+        deletion_index.build(records())
+
+    generation = mock_redis.set.call_args.args[1]
+    mock_redis.getset.assert_not_called()
+    mock_redis.delete.assert_has_calls(
+        [
+            call("deletion_index:building"),
+            call(
+                f"deletion_index:{generation}:records",
+                f"deletion_index:{generation}:classes",
+            ),
+        ]
+    )
+
+
+def test_counts_are_read_from_the_class_sorted_set(
+    deletion_index: DeletionIndex, mock_redis
+) -> None:
+    mock_redis.zcard.return_value = 42
+
+    assert deletion_index.count(ARTICLE) == 42
+    mock_redis.zcard.assert_called_once_with(f"deletion_index:current:class:{ARTICLE}")
+
+
+def test_nothing_is_served_before_the_first_build(
+    deletion_index: DeletionIndex, mock_redis
+) -> None:
+    mock_redis.get.return_value = None
+
+    assert not deletion_index.is_built()
+    assert deletion_index.count(ARTICLE) is None
+    assert deletion_index.page(ARTICLE, offset=0, limit=10, descending=True) is None
+
+
+@pytest.mark.parametrize(
+    ("descending", "method"), [(True, "zrevrange"), (False, "zrange")]
+)
+def test_pages_follow_the_deletion_time(
+    deletion_index: DeletionIndex, mock_redis, *, descending: bool, method: str
+) -> None:
+    getattr(mock_redis, method).return_value = [ENTITY_2, ENTITY_1]
+    mock_redis.hmget.return_value = [_dump(RECORD_2), _dump(RECORD_1)]
+
+    page = deletion_index.page(ARTICLE, offset=20, limit=10, descending=descending)
+
+    assert page == [RECORD_2, RECORD_1]
+    getattr(mock_redis, method).assert_called_once_with(
+        f"deletion_index:current:class:{ARTICLE}", 20, 29
+    )
+    mock_redis.hmget.assert_called_once_with(
+        "deletion_index:current:records", [ENTITY_2, ENTITY_1]
+    )
+
+
+def test_saves_reach_the_served_and_the_building_generations(
+    deletion_index: DeletionIndex, mock_redis
+) -> None:
+    mock_redis.mget.return_value = ["current", "next"]
+    mock_redis.hmget.return_value = [None, _dump(RECORD_1)]
+
+    deletion_index.record_saves([RECORD_2], [ENTITY_1])
+
+    for generation in ("current", "next"):
+        mock_redis.zrem.assert_any_call(
+            f"deletion_index:{generation}:class:{ARTICLE}", ENTITY_1
+        )
+        mock_redis.hdel.assert_any_call(
+            f"deletion_index:{generation}:records", ENTITY_1
+        )
+        mock_redis.zadd.assert_any_call(
+            f"deletion_index:{generation}:class:{PERSON}",
+            {ENTITY_2: RECORD_2.score()},
+        )
+        mock_redis.sadd.assert_any_call(f"deletion_index:{generation}:classes", PERSON)
+
+
+def test_saves_without_deletions_or_restorations_skip_redis(
+    deletion_index: DeletionIndex, mock_redis
+) -> None:
+    deletion_index.record_saves([], [])
+
+    mock_redis.mget.assert_not_called()
+
+
+def test_redis_errors_fall_back_to_sparql(
+    deletion_index: DeletionIndex, mock_redis
+) -> None:
+    mock_redis.get.side_effect = RedisError("connection refused")
+    mock_redis.mget.side_effect = RedisError("connection refused")
+
+    assert not deletion_index.is_built()
+    assert deletion_index.count(ARTICLE) is None
+    assert deletion_index.page(ARTICLE, offset=0, limit=10, descending=True) is None
+    deletion_index.record_saves([RECORD_1], [])
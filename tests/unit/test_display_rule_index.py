@@ -0,0 +1,89 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+from rdflib import URIRef
+
+from heritrace.utils.display_rule_index import (
+    MAX_COMPILED_INDEXES,
+    DisplayRuleIndex,
+    display_rule_index_for,
+    forget_display_rule_index,
+)
+
+ARTICLE = "http://example.org/Article"
+ARTICLE_SHAPE = "http://example.org/ArticleShape"
+BOOK = "http://example.org/Book"
+BOOK_SHAPE = "http://example.org/BookShape"
+
+
+def test_exact_rule_comes_first() -> None:
+    class_rule = {"target": {"class": ARTICLE}, "priority": 0}
+    exact_rule = {"target": {"class": ARTICLE, "shape": ARTICLE_SHAPE}, "priority": 5}
+    later_exact_rule = {"target": {"class": ARTICLE, "shape": ARTICLE_SHAPE}}
+    index = DisplayRuleIndex([class_rule, exact_rule, later_exact_rule])
+
+    assert index.match(URIRef(ARTICLE), URIRef(ARTICLE_SHAPE)) is exact_rule
+    assert index.match(ARTICLE, BOOK_SHAPE) is class_rule
+    assert index.match(ARTICLE, None) is class_rule
+
+
+def test_lowest_priority_wins_and_shape_wins_ties() -> None:
+    low = {"target": {"class": ARTICLE}, "priority": 1}
+    lower = {"target": {"class": ARTICLE}, "priority": 0}
+    shape_rule = {"target": {"shape": ARTICLE_SHAPE}}
+    index = DisplayRuleIndex([low, lower, shape_rule])
+
+    assert index.match(ARTICLE, None) is lower
+    assert index.match(None, ARTICLE_SHAPE) is shape_rule
+    assert index.match(ARTICLE, ARTICLE_SHAPE) is shape_rule
+
+
+def test_class_and_shape_rules_are_scanned_in_list_order() -> None:
+    first_shape = {"target": {"shape": ARTICLE_SHAPE}, "priority": 1}
+    class_rule = {"target": {"class": ARTICLE}, "priority": 5}
+    second_shape = {"target": {"shape": ARTICLE_SHAPE}, "priority": 3}
+    index = DisplayRuleIndex([first_shape, class_rule, second_shape])
+
+    # The class rule raises the priority to beat, so the second shape rule
+    # replaces the first one, as the linear scan did.
+    assert index.match(ARTICLE, ARTICLE_SHAPE) is second_shape
+    assert index.match(None, ARTICLE_SHAPE) is first_shape
+
+
+def test_no_matching_rule() -> None:
+    index = DisplayRuleIndex([{"target": {"class": ARTICLE, "shape": ARTICLE_SHAPE}}])
+
+    assert index.match(BOOK, BOOK_SHAPE) is None
+    assert index.match(ARTICLE, None) is None
+    assert index.match(None, None) is None
+
+
+def test_index_is_compiled_once_per_list() -> None:
+    rules = [{"target": {"class": ARTICLE}}]
+
+    assert display_rule_index_for(rules) is display_rule_index_for(rules)
+    assert display_rule_index_for(rules) is not display_rule_index_for(list(rules))
+
+
+def test_only_the_last_indexes_are_kept() -> None:
+    rules = [{"target": {"class": BOOK}}]
+    index = display_rule_index_for(rules)
+
+    for _ in range(MAX_COMPILED_INDEXES):
+        display_rule_index_for([{"target": {"class": ARTICLE}}])
+
+    assert display_rule_index_for(rules) is not index
+    assert display_rule_index_for(rules).match(BOOK, None) is rules[0]
+
+
+def test_forgotten_index_is_compiled_again() -> None:
+    rules = [{"target": {"class": ARTICLE}}]
+    index = display_rule_index_for(rules)
+    rules.append({"target": {"class": BOOK}})
+
+    forget_display_rule_index(rules)
+
+    assert display_rule_index_for(rules) is not index
+    assert display_rule_index_for(rules).match(BOOK, None) is rules[1]
+    forget_display_rule_index([{"target": {"class": BOOK}}])
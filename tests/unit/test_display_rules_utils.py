@@ -6,6 +6,8 @@
 Tests for display_rules_utils.py
 """
 
+import threading
+import time
 from collections import OrderedDict
 from unittest.mock import MagicMock, patch
 
@@ -29,6 +31,10 @@ from heritrace.utils.display_rules_utils import (
     process_ordering,
     uses_inverse_relations,
 )
+from heritrace.utils.query_executor import (
+    DEFAULT_QUERY_DEADLINE,
+    configure_query_executor,
+)
 
 _RDFS_LABEL = "http://www.w3.org/2000/01/rdf-schema#label"
 _FETCH_LABEL_ENTITY_QUERY = (
@@ -710,6 +716,14 @@ class TestGetGroupedTriples:
         )
         self.mock_find_matching_rule = self.find_matching_rule_patch.start()
 
+        # Ordered properties are prefetched outside of process_ordering when
+        # queries run concurrently.
+        self.fetch_order_results_patch = patch(
+            "heritrace.utils.display_rules_utils._fetch_order_results",
+            return_value=[],
+        )
+        self.mock_fetch_order_results = self.fetch_order_results_patch.start()
+
         self.mock_display_rules = [
             {
                 "target": {
@@ -803,6 +817,7 @@ class TestGetGroupedTriples:
         self.get_highest_priority_class_patch.stop()
         self.determine_shape_for_classes_patch.stop()
         self.find_matching_rule_patch.stop()
+        self.fetch_order_results_patch.stop()
 
     def test_get_grouped_triples_with_rules(
         self,
@@ -2609,3 +2624,127 @@ class TestUsesInverseRelations:
 
         assert uses_inverse_relations(rules) is False
         assert "not valid SPARQL" in caplog.text
+
+
+class TestConcurrentPrefetch:
+    """Tests for the concurrent fetching of the queries of a live entity."""
+
+    SUBJECT = URIRef("http://example.org/br1")
+    AUTHOR = "http://example.org/author"
+    NEXT = "http://example.org/next"
+    CITED_BY = "http://example.org/citedBy"
+
+    @pytest.fixture(autouse=True)
+    def concurrent_queries(self):
+        configure_query_executor(4, 3, 5.0)
+        yield
+        configure_query_executor(1, 1, DEFAULT_QUERY_DEADLINE)
+
+    @pytest.fixture
+    def display_rules(self):
+        return [
+            {
+                "target": {"class": "http://example.org/Article"},
+                "displayProperties": [
+                    {
+                        "property": self.AUTHOR,
+                        "displayName": "Author",
+                        "orderedBy": self.NEXT,
+                        "fetchValueFromQuery": _FETCH_LABEL_ENTITY_QUERY,
+                    },
+                    {
+                        "displayName": "Cited by",
+                        "isVirtual": True,
+                        "fetchValueFromQuery": _FETCH_LABEL_ENTITY_QUERY,
+                        "implementedVia": {
+                            "target": {"class": "http://example.org/Citation"},
+                            "fieldOverrides": {
+                                self.CITED_BY: {"value": "${currentEntity}"}
+                            },
+                        },
+                    },
+                ],
+            }
+        ]
+
+    def test_queries_are_fetched_once_and_grouped_in_order(self, display_rules):
+        triples = [
+            (self.SUBJECT, URIRef(self.AUTHOR), URIRef(f"http://example.org/ra{i}"))
+            for i in range(3)
+        ]
+        sparql_threads = set()
+        fetched_values = []
+
+        def fake_execute(_query, _subject, value):
+            sparql_threads.add(threading.current_thread())
+            fetched_values.append(value)
+            time.sleep(0.02)
+            return f"Label {value}", value
+
+        order_bindings = [
+            {
+                "orderedEntity": {"value": "http://example.org/ra2"},
+                "nextValue": {"value": "http://example.org/ra0"},
+            },
+            {
+                "orderedEntity": {"value": "http://example.org/ra0"},
+                "nextValue": {"value": "http://example.org/ra1"},
+            },
+            {
+                "orderedEntity": {"value": "http://example.org/ra1"},
+                "nextValue": {"value": "NONE"},
+            },
+        ]
+        citation_bindings = [{"entity": {"value": "http://example.org/ci1"}}]
+
+        def new_sparql():
+            sparql = MagicMock()
+            sparql.query.return_value.convert.side_effect = lambda: {
+                "results": {
+                    "bindings": order_bindings
+                    if "orderedEntity" in sparql.setQuery.call_args[0][0]
+                    else citation_bindings
+                }
+            }
+            return sparql
+
+        with (
+            patch(
+                "heritrace.utils.display_rules_utils.get_display_rules",
+                return_value=display_rules,
+            ),
+            patch(
+                "heritrace.utils.display_rules_utils.get_form_fields",
+                return_value={},
+            ),
+            patch(
+                "heritrace.utils.display_rules_utils.get_sparql",
+                side_effect=new_sparql,
+            ),
+            patch(
+                "heritrace.utils.display_rules_utils.execute_sparql_query",
+                side_effect=fake_execute,
+            ),
+        ):
+            grouped_triples, _relevant_properties = get_grouped_triples(
+                self.SUBJECT,
+                triples,
+                [self.AUTHOR],
+                entity_key=("http://example.org/Article", None),
+            )
+
+        assert sorted(fetched_values) == [
+            "http://example.org/ci1",
+            "http://example.org/ra0",
+            "http://example.org/ra1",
+            "http://example.org/ra2",
+        ]
+        assert len(sparql_threads - {threading.current_thread()}) > 1
+        assert [t["object"] for t in grouped_triples["Author"]["triples"]] == [
+            "http://example.org/ra2",
+            "http://example.org/ra0",
+            "http://example.org/ra1",
+        ]
+        assert [t["triple"][2] for t in grouped_triples["Cited by"]["triples"]] == [
+            "Label http://example.org/ci1"
+        ]
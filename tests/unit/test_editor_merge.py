@@ -6,7 +6,7 @@ from functools import partial
 from unittest.mock import MagicMock, call, patch
 
 import pytest
-from rdflib import Graph, Literal, URIRef
+from rdflib import Dataset, Graph, Literal, URIRef
 from rdflib.namespace import RDF
 from rdflib_ocdm.counter_handler.counter_handler import CounterHandler
 from rdflib_ocdm.ocdm_graph import OCDMDataset, OCDMGraph
@@ -14,6 +14,14 @@ from SPARQLWrapper import JSON
 
 from heritrace.counter_handler import TransactionalCounterHandler
 from heritrace.editor import Editor, EditorError, EndpointConfig
+from heritrace.save_plugin import (
+    CacheUpdates,
+    ClassCountsAdjustment,
+    DeletionIndexUpdate,
+    LabelCacheInvalidation,
+    SavePlugins,
+    ShapeIndexUpdate,
+)
 
 DATASET_ENDPOINT = "http://localhost:9999/blazegraph/sparql"
 PROVENANCE_ENDPOINT = "http://localhost:9998/blazegraph/sparql"
@@ -90,8 +98,8 @@ def mock_reader():
 
 @pytest.fixture
 def mock_storer():
-    """Fixture for mocking Storer class and its methods."""
-    with patch("heritrace.editor.Storer") as mock_storer_cls:
+    """Fixture for mocking the BatchedStorer class and its methods."""
+    with patch("heritrace.editor.BatchedStorer") as mock_storer_cls:
         mock_instance = MagicMock()
         mock_storer_cls.return_value = mock_instance
         mock_instance.upload_all.return_value = True
@@ -251,6 +259,273 @@ def test_save_rolls_back_transactional_counter_on_failure(mock_storer) -> None:
     commit_changes.assert_not_called()
 
 
+def test_save_plugins_run_in_order_skipping_missing_ones() -> None:
+    events = []
+    first = MagicMock()
+    first.persist.side_effect = lambda _graph: events.append("first")
+    second = MagicMock()
+    second.persist.side_effect = lambda _graph: events.append("second")
+    graph_set = MagicMock()
+
+    SavePlugins(first, None, second).persist(graph_set)
+
+    assert events == ["first", "second"]
+    second.persist.assert_called_once_with(graph_set)
+
+
+def test_failed_cache_update_does_not_fail_the_save(mock_storer) -> None:
+    counter_handler = MagicMock(spec=TransactionalCounterHandler)
+    deletion_index = MagicMock()
+    label_cache = MagicMock()
+    editor = Editor(
+        EndpointConfig(
+            dataset=DATASET_ENDPOINT,
+            provenance=PROVENANCE_ENDPOINT,
+            is_quadstore=True,
+        ),
+        counter_handler,
+        RESP_AGENT,
+        save_plugin=SavePlugins(
+            CacheUpdates(
+                DeletionIndexUpdate(deletion_index),
+                LabelCacheInvalidation(label_cache),
+            )
+        ),
+    )
+
+    with (
+        patch.object(editor.g_set, "generate_provenance"),
+        patch.object(editor.g_set, "commit_changes") as commit_changes,
+        patch(
+            "heritrace.save_plugin.deletion_records",
+            side_effect=ValueError("malformed provenance"),
+        ),
+    ):
+        editor.save()
+
+    assert mock_storer.return_value.upload_all.call_count == 2
+    label_cache.invalidate.assert_called_once()
+    commit_changes.assert_called_once_with()
+    counter_handler.commit_counter_transaction.assert_called_once_with()
+    counter_handler.rollback_counter_transaction.assert_not_called()
+
+
+def test_save_invalidates_labels_of_saved_entities(
+    mock_counter_handler, mock_storer
+) -> None:
+    label_cache = MagicMock()
+    editor = Editor(
+        EndpointConfig(
+            dataset=DATASET_ENDPOINT,
+            provenance=PROVENANCE_ENDPOINT,
+            is_quadstore=False,
+        ),
+        mock_counter_handler,
+        RESP_AGENT,
+        save_plugin=LabelCacheInvalidation(label_cache),
+    )
+    editor.create(KEEP_URI, PROP_LITERAL, LITERAL_VALUE)
+
+    editor.save()
+
+    assert mock_storer.return_value.upload_all.call_count == 2
+    label_cache.invalidate.assert_called_once_with([KEEP_URI])
+
+
+def test_save_keeps_labels_when_upload_fails(mock_counter_handler, mock_storer) -> None:
+    label_cache = MagicMock()
+    editor = Editor(
+        EndpointConfig(
+            dataset=DATASET_ENDPOINT,
+            provenance=PROVENANCE_ENDPOINT,
+            is_quadstore=False,
+        ),
+        mock_counter_handler,
+        RESP_AGENT,
+        save_plugin=LabelCacheInvalidation(label_cache),
+    )
+    editor.create(KEEP_URI, PROP_LITERAL, LITERAL_VALUE)
+    mock_storer.return_value.upload_all.return_value = False
+
+    with (
+        patch.object(editor.g_set, "generate_provenance"),
+        pytest.raises(EditorError),
+    ):
+        editor.save()
+
+    label_cache.invalidate.assert_not_called()
+
+
+@pytest.mark.parametrize("is_quadstore", [False, True])
+def test_save_adjusts_counts_of_created_and_deleted_classes(
+    mock_counter_handler, mock_storer, *, is_quadstore: bool
+) -> None:
+    class_counts = MagicMock()
+    editor = Editor(
+        EndpointConfig(
+            dataset=DATASET_ENDPOINT,
+            provenance=PROVENANCE_ENDPOINT,
+            is_quadstore=is_quadstore,
+        ),
+        mock_counter_handler,
+        RESP_AGENT,
+        save_plugin=ClassCountsAdjustment(class_counts),
+    )
+    graph = GRAPH_URI if is_quadstore else None
+    editor.create(DELETE_URI, RDF.type, TYPE_TO_DELETE_URI, graph)
+    editor.create(DELETE_URI, PROP_LITERAL, LITERAL_VALUE, graph)
+    editor.create(INCOMING_SUBJ_URI, RDF.type, TYPE_TO_DELETE_URI, graph)
+    editor.preexisting_finished()
+
+    editor.delete(DELETE_URI)
+    editor.create(KEEP_URI, RDF.type, URIRef("http://example.org/Person"), graph)
+    editor.create(INCOMING_SUBJ_URI, PROP_LITERAL, LITERAL_VALUE, graph)
+    editor.save()
+
+    class_counts.adjust.assert_called_once_with(
+        {str(TYPE_TO_DELETE_URI): -1, "http://example.org/Person": 1}
+    )
+    assert mock_storer.return_value.upload_all.call_count == 2
+
+
+def test_save_records_saved_entities_in_the_shape_index(
+    mock_counter_handler, mock_storer
+) -> None:
+    shape_index = MagicMock()
+    editor = Editor(
+        EndpointConfig(
+            dataset=DATASET_ENDPOINT,
+            provenance=PROVENANCE_ENDPOINT,
+            is_quadstore=False,
+        ),
+        mock_counter_handler,
+        RESP_AGENT,
+        save_plugin=ShapeIndexUpdate(shape_index),
+    )
+    editor.create(DELETE_URI, RDF.type, TYPE_TO_DELETE_URI)
+    editor.preexisting_finished()
+
+    editor.delete(DELETE_URI)
+    editor.create(KEEP_URI, RDF.type, TYPE_TO_DELETE_URI)
+    editor.create(KEEP_URI, PROP_LITERAL, LITERAL_VALUE)
+    editor.save()
+
+    previous_classes, current_triples = shape_index.record_saves.call_args.args
+    assert previous_classes == {
+        str(DELETE_URI): {str(TYPE_TO_DELETE_URI)},
+        str(KEEP_URI): set(),
+    }
+    assert current_triples[str(DELETE_URI)] == []
+    assert set(current_triples[str(KEEP_URI)]) == {
+        (KEEP_URI, RDF.type, TYPE_TO_DELETE_URI),
+        (KEEP_URI, PROP_LITERAL, LITERAL_VALUE),
+    }
+
+
+@pytest.mark.parametrize("is_quadstore", [False, True])
+def test_import_graph_loads_the_triples_into_the_editor(
+    mock_counter_handler, *, is_quadstore: bool
+) -> None:
+    editor = Editor(
+        EndpointConfig(
+            dataset=DATASET_ENDPOINT,
+            provenance=PROVENANCE_ENDPOINT,
+            is_quadstore=is_quadstore,
+        ),
+        mock_counter_handler,
+        RESP_AGENT,
+    )
+    graph = Dataset() if is_quadstore else Graph()
+    if is_quadstore:
+        graph.add((KEEP_URI, RDF.type, TYPE_TO_DELETE_URI, GRAPH_URI))
+        graph.add((KEEP_URI, PROP_LITERAL, LITERAL_VALUE, GRAPH_URI))
+    else:
+        graph.add((KEEP_URI, RDF.type, TYPE_TO_DELETE_URI))
+        graph.add((KEEP_URI, PROP_LITERAL, LITERAL_VALUE))
+
+    editor.import_graph(graph)
+
+    imported = (
+        editor.g_set.quads((KEEP_URI, None, None, None))
+        if is_quadstore
+        else editor.g_set.triples((KEEP_URI, None, None))
+    )
+    assert {(p, o) for _s, p, o, *_ in imported} == {
+        (RDF.type, TYPE_TO_DELETE_URI),
+        (PROP_LITERAL, LITERAL_VALUE),
+    }
+    assert KEEP_URI in editor.g_set.entity_index
+    if is_quadstore:
+        assert editor.g_set.entity_index[KEEP_URI]["graph_iri"] == GRAPH_URI
+
+
+def test_import_entities_reads_the_subjects_in_chunks(mock_counter_handler) -> None:
+    editor = Editor(
+        EndpointConfig(
+            dataset=DATASET_ENDPOINT, provenance=PROVENANCE_ENDPOINT, is_quadstore=False
+        ),
+        mock_counter_handler,
+        RESP_AGENT,
+    )
+    editor.g_set.add((KEEP_URI, RDF.type, TYPE_TO_DELETE_URI))
+    agents = [URIRef(f"http://example.org/agent/{i}") for i in range(5)]
+
+    def import_chunk(g_set, _endpoint, chunk) -> None:
+        if agents[4] in chunk:
+            msg = "No entities were found."
+            raise ValueError(msg)
+        if agents[2] in chunk:
+            raise OSError
+        for subject in chunk:
+            if subject != agents[1]:
+                g_set.add((subject, RDF.type, TYPE_TO_DELETE_URI))
+
+    with patch(
+        "heritrace.editor.Reader.import_entities_from_triplestore",
+        side_effect=import_chunk,
+    ) as mock_import:
+        result = editor.import_entities([*agents, KEEP_URI, agents[0]], batch_size=2)
+
+    assert [call.args[2] for call in mock_import.call_args_list] == [
+        agents[:2],
+        agents[2:4],
+        agents[4:],
+    ]
+    assert result.imported == (KEEP_URI, agents[0])
+    assert result.missing == (agents[1], agents[4])
+    assert result.failed == (agents[2], agents[3])
+    assert result.not_imported == (agents[1], agents[4], agents[2], agents[3])
+
+
+def test_save_records_deletions_in_the_deletion_index(
+    mock_counter_handler, mock_storer
+) -> None:
+    deletion_index = MagicMock()
+    editor = Editor(
+        EndpointConfig(
+            dataset=DATASET_ENDPOINT,
+            provenance=PROVENANCE_ENDPOINT,
+            is_quadstore=False,
+        ),
+        mock_counter_handler,
+        RESP_AGENT,
+        save_plugin=DeletionIndexUpdate(deletion_index),
+    )
+    editor.create(DELETE_URI, RDF.type, TYPE_TO_DELETE_URI)
+    editor.create(KEEP_URI, RDF.type, TYPE_TO_DELETE_URI)
+    editor.preexisting_finished()
+
+    editor.delete(DELETE_URI)
+    editor.create(KEEP_URI, PROP_LITERAL, LITERAL_VALUE)
+    editor.save()
+
+    deletions, restored = deletion_index.record_saves.call_args.args
+    assert [record.entity for record in deletions] == [str(DELETE_URI)]
+    assert deletions[0].classes == (str(TYPE_TO_DELETE_URI),)
+    assert deletions[0].agent == str(RESP_AGENT)
+    assert restored == []
+
+
 @pytest.mark.parametrize(
     ("upload_results", "expected_error", "expected_calls"),
     [
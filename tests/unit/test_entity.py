@@ -7,6 +7,7 @@ Unit tests for entity-related functions in entity.py.
 These tests focus on the modification, references, and snapshot functionality.
 """
 
+import json
 from datetime import datetime, timezone
 from unittest.mock import MagicMock, patch
 
@@ -35,7 +36,14 @@ from heritrace.routes.entity import (
 from heritrace.routes.entity._creation import (
     _process_ordered_entity_value,
 )
+from heritrace.routes.entity._history import (
+    _fetch_snapshot_metadata,
+    _history_window,
+    _reconstruct_snapshots,
+)
+from heritrace.services.snapshot_cache import SnapshotCache
 from heritrace.utils.filters import Filter
+from heritrace.utils.snapshot_graph import N3TermDecoder
 
 # ===== Entity Tests =====
 
@@ -2021,3 +2029,294 @@ def test_process_unordered_properties_empty_values(mock_process_entity) -> None:
 
     # Verify process_entity_value was not called
     mock_process_entity.assert_not_called()
+
+
+HISTORY_ENTITY = "http://example.org/entity/1"
+
+
+def _history_metadata(count: int, *, deleted: bool = False) -> list[tuple[str, dict]]:
+    return [
+        (
+            f"{HISTORY_ENTITY}/prov/se/{i + 1}",
+            {
+                "generatedAtTime": f"2024-01-{i + 1:02d}T00:00:00+00:00",
+                "invalidatedAtTime": (
+                    "2024-02-01T00:00:00+00:00" if deleted and i == count - 1 else None
+                ),
+                "wasAttributedTo": "http://example.org/agent",
+                "hadPrimarySource": None,
+                "description": f"Snapshot {i + 1}",
+                "hasUpdateQuery": None,
+                "wasDerivedFrom": [],
+            },
+        )
+        for i in range(count)
+    ]
+
+
+def test_fetch_snapshot_metadata_groups_rows_of_the_same_snapshot() -> None:
+    """Test that snapshot metadata is read in one query and sorted by time."""
+
+    def binding(snapshot: int, time: str, derived: str | None = None) -> dict:
+        row = {
+            "snapshot": {"value": f"{HISTORY_ENTITY}/prov/se/{snapshot}"},
+            "time": {"value": time},
+            "agent": {"value": "http://example.org/agent"},
+            "description": {"value": "Merged"},
+        }
+        if derived:
+            row["derived"] = {"value": derived}
+        return row
+
+    with patch(
+        "heritrace.routes.entity._history.get_provenance_sparql"
+    ) as mock_get_provenance_sparql:
+        mock_sparql = mock_get_provenance_sparql.return_value
+        mock_sparql.query.return_value.convert.return_value = {
+            "results": {
+                "bindings": [
+                    binding(2, "2024-01-02T00:00:00Z", "http://example.org/b"),
+                    binding(1, "2024-01-01T00:00:00Z"),
+                    binding(2, "2024-01-02T00:00:00Z", "http://example.org/a"),
+                ]
+            }
+        }
+
+        metadata = _fetch_snapshot_metadata(HISTORY_ENTITY)
+
+    assert [snapshot for snapshot, _ in metadata] == [
+        f"{HISTORY_ENTITY}/prov/se/1",
+        f"{HISTORY_ENTITY}/prov/se/2",
+    ]
+    assert metadata[1][1]["generatedAtTime"] == "2024-01-02T00:00:00+00:00"
+    assert metadata[1][1]["wasDerivedFrom"] == [
+        "http://example.org/a",
+        "http://example.org/b",
+    ]
+    assert "hasUpdateQuery" not in mock_sparql.setQuery.call_args.args[0]
+
+
+def test_snapshots_without_agent_or_description_are_kept() -> None:
+    """Test that the agent and the description of a snapshot are optional."""
+    with patch(
+        "heritrace.routes.entity._history.get_provenance_sparql"
+    ) as mock_get_provenance_sparql:
+        mock_sparql = mock_get_provenance_sparql.return_value
+        mock_sparql.query.return_value.convert.return_value = {
+            "results": {
+                "bindings": [
+                    {
+                        "snapshot": {"value": f"{HISTORY_ENTITY}/prov/se/1"},
+                        "time": {"value": "2024-01-01T00:00:00Z"},
+                    }
+                ]
+            }
+        }
+
+        metadata = _fetch_snapshot_metadata(HISTORY_ENTITY)
+
+    query = mock_sparql.setQuery.call_args.args[0]
+    assert "OPTIONAL { ?snapshot <http://www.w3.org/ns/prov#wasAttributedTo>" in query
+    assert metadata[0][1]["wasAttributedTo"] is None
+    assert metadata[0][1]["description"] is None
+    assert (
+        _format_snapshot_description(metadata[0][1], MagicMock(), MagicMock(), 0) == ""
+    )
+
+
+def _title_update(old: str, new: str) -> str:
+    graph = f"GRAPH <{HISTORY_ENTITY}/>"
+    triple = f"<{HISTORY_ENTITY}> <http://purl.org/dc/terms/title>"
+    return (
+        f'DELETE DATA {{ {graph} {{ {triple} "{old}" . }} }}; '
+        f'INSERT DATA {{ {graph} {{ {triple} "{new}" . }} }}'
+    )
+
+
+@pytest.fixture
+def history_patches():
+    """Patch the services the reconstruction of past states relies on."""
+    mock_redis = MagicMock()
+    mock_redis.pipeline.return_value = mock_redis
+    mock_redis.hmget.return_value = [None]
+    with (
+        patch(
+            "heritrace.routes.entity._history.get_snapshot_cache",
+            return_value=SnapshotCache(mock_redis, checkpoint_interval=10),
+        ),
+        patch("heritrace.routes.entity._history.AgnosticEntity") as mock_agnostic,
+        patch("heritrace.routes.entity._history.get_change_tracking_config"),
+        patch(
+            "heritrace.routes.entity._history.get_display_rules_use_inverse_relations",
+            return_value=False,
+        ),
+        patch(
+            "heritrace.routes.entity._history.get_dataset_is_quadstore",
+            return_value=False,
+        ),
+        patch(
+            "heritrace.routes.entity._history.get_provenance_sparql"
+        ) as mock_get_provenance_sparql,
+    ):
+        yield mock_redis, mock_agnostic, mock_get_provenance_sparql.return_value
+
+
+def test_reconstruct_snapshots_caches_the_checkpoints_met(history_patches) -> None:
+    """Test that states are reconstructed from the checkpoint preceding them,
+    which is then cached, when no checkpoint is cached yet."""
+    mock_redis, mock_agnostic, _ = history_patches
+    sorted_metadata = _history_metadata(15)
+    timestamps = [metadata["generatedAtTime"] for _, metadata in sorted_metadata]
+    title = f"<{HISTORY_ENTITY}>", "<http://purl.org/dc/terms/title>"
+    mock_agnostic.return_value.get_state_at_time.return_value = (
+        {
+            HISTORY_ENTITY: {
+                timestamps[i].replace("+00:00", "Z"): {(*title, f'"Title {i}"')}
+                for i in range(10, 14)
+            }
+        },
+        {HISTORY_ENTITY: {sorted_metadata[13][0]: {"hasUpdateQuery": "query"}}},
+        None,
+    )
+
+    snapshots, update_queries = _reconstruct_snapshots(
+        HISTORY_ENTITY, sorted_metadata, 12, 13
+    )
+
+    mock_agnostic.return_value.get_state_at_time.assert_called_once_with(
+        (timestamps[10], timestamps[13]), include_prov_metadata=True
+    )
+    assert list(snapshots) == [timestamps[12], timestamps[13]]
+    assert update_queries == {sorted_metadata[13][0]: "query"}
+    stored = mock_redis.hset.call_args.kwargs["mapping"]
+    assert list(stored) == [sorted_metadata[10][0]]
+    assert json.loads(stored[sorted_metadata[10][0]]) == [[*title, '"Title 10"']]
+
+
+def test_reconstruct_snapshots_replays_the_changes_since_the_checkpoint(
+    history_patches,
+) -> None:
+    """Test that states following a cached checkpoint are rebuilt from it."""
+    mock_redis, mock_agnostic, mock_sparql = history_patches
+    sorted_metadata = _history_metadata(15)
+    timestamps = [metadata["generatedAtTime"] for _, metadata in sorted_metadata]
+    mock_redis.hmget.return_value = [
+        json.dumps(
+            [
+                [
+                    f"<{HISTORY_ENTITY}>",
+                    "<http://purl.org/dc/terms/title>",
+                    '"Title 10"',
+                ]
+            ]
+        )
+    ]
+    mock_sparql.query.return_value.convert.return_value = {
+        "results": {
+            "bindings": [
+                {
+                    "snapshot": {"value": sorted_metadata[i][0]},
+                    "query": {"value": _title_update(f"Title {i - 1}", f"Title {i}")},
+                }
+                for i in (11, 12)
+            ]
+        }
+    }
+
+    snapshots, update_queries = _reconstruct_snapshots(
+        HISTORY_ENTITY, sorted_metadata, 12, 12
+    )
+
+    mock_agnostic.assert_not_called()
+    mock_redis.hmget.assert_called_once_with(
+        f"snapshot_cache:{HISTORY_ENTITY}", [sorted_metadata[10][0]]
+    )
+    assert list(snapshots) == [timestamps[12]]
+    assert {str(o) for _, _, o in snapshots[timestamps[12]]} == {"Title 12"}
+    assert set(update_queries) == {sorted_metadata[11][0], sorted_metadata[12][0]}
+
+
+def test_reconstruct_snapshots_does_not_replay_changed_links(history_patches) -> None:
+    """Test that a change of the entities a state includes is not replayed."""
+    mock_redis, mock_agnostic, mock_sparql = history_patches
+    sorted_metadata = _history_metadata(12)
+    mock_redis.hmget.return_value = [json.dumps([])]
+    mock_sparql.query.return_value.convert.return_value = {
+        "results": {
+            "bindings": [
+                {
+                    "snapshot": {"value": sorted_metadata[11][0]},
+                    "query": {
+                        "value": (
+                            f"INSERT DATA {{ GRAPH <{HISTORY_ENTITY}/> {{ "
+                            f"<{HISTORY_ENTITY}> <http://example.org/author> "
+                            "<http://example.org/agent/1> . } }"
+                        )
+                    },
+                }
+            ]
+        }
+    }
+    mock_agnostic.return_value.get_state_at_time.return_value = ({}, {}, None)
+
+    _reconstruct_snapshots(HISTORY_ENTITY, sorted_metadata, 11, 11)
+
+    mock_agnostic.return_value.get_state_at_time.assert_called_once()
+
+
+@pytest.mark.parametrize(("deleted", "context_index"), [(False, 24), (True, 23)])
+def test_history_window_reconstructs_only_the_displayed_snapshots(
+    *, deleted: bool, context_index: int
+) -> None:
+    """Test that a window reads the states it displays, its predecessor and the
+    state the entity is labelled from, and nothing else."""
+    sorted_metadata = _history_metadata(25, deleted=deleted)
+    timestamps = [metadata["generatedAtTime"] for _, metadata in sorted_metadata]
+
+    def reconstruct(
+        _entity_uri: str,
+        _sorted_metadata: list,
+        first: int,
+        last: int,
+        _decoder: N3TermDecoder,
+    ) -> tuple[dict, dict]:
+        return (
+            {timestamp: Graph() for timestamp in timestamps[first : last + 1]},
+            {sorted_metadata[15][0]: "INSERT DATA {}"},
+        )
+
+    with (
+        patch(
+            "heritrace.routes.entity._history._reconstruct_snapshots",
+            side_effect=reconstruct,
+        ) as mock_reconstruct,
+        patch("heritrace.routes.entity._history.get_custom_filter"),
+        patch(
+            "heritrace.routes.entity._history.determine_shape_for_entity_triples",
+            return_value=None,
+        ),
+        patch(
+            "heritrace.routes.entity._history._format_event_text",
+            return_value="text",
+        ) as mock_format,
+    ):
+        events, history_ctx, _ = _history_window(
+            HISTORY_ENTITY, sorted_metadata, 10, 10
+        )
+
+    assert [c.args[:4] for c in mock_reconstruct.call_args_list] == [
+        (HISTORY_ENTITY, sorted_metadata, 9, 19),
+        (HISTORY_ENTITY, sorted_metadata, context_index, context_index),
+    ]
+    decoders = {id(c.args[4]) for c in mock_reconstruct.call_args_list}
+    assert len(decoders) == 1
+    assert [event["unique_id"] for event in events] == [
+        f"snapshot-{i}" for i in range(10, 20)
+    ]
+    assert set(history_ctx.history[HISTORY_ENTITY]) == {
+        *timestamps[9:20],
+        timestamps[context_index],
+    }
+    update_queries = [c.args[0]["hasUpdateQuery"] for c in mock_format.call_args_list]
+    assert update_queries[5] == "INSERT DATA {}"
+    assert update_queries.count(None) == 9
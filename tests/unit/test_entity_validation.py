@@ -252,3 +252,49 @@ def test_validate_entity_data_with_shape(
     # Should have one error about missing required property
     assert len(errors) == 1
     assert "residential" in str(errors[0]) or "required" in str(errors[0])
+
+
+@patch("heritrace.routes.entity._validation.get_custom_filter")
+@patch("heritrace.routes.entity._validation.get_form_fields")
+def test_validate_entity_data_nested_values_share_rules(
+    mock_get_form_fields, mock_get_custom_filter
+) -> None:
+    """Nested entities of the same type are checked with the same rules."""
+    mock_filter = MagicMock(spec=Filter)
+    mock_get_custom_filter.return_value = mock_filter
+    mock_filter.human_readable_predicate.side_effect = lambda uri, _key: uri
+
+    def person(age: str) -> dict:
+        return {
+            "entity_type": "http://example.org/Person",
+            "properties": {"http://example.org/age": [age]},
+        }
+
+    entity_data = {
+        "entity_type": "http://example.org/Document",
+        "properties": {
+            "http://example.org/author": [person("30"), person("old"), person("41")],
+        },
+    }
+    form_fields = {
+        ("http://example.org/Document", None): {
+            "http://example.org/author": [{"min": 0, "max": None}],
+        },
+        ("http://example.org/Person", None): {
+            "http://example.org/age": [
+                {"min": 1, "max": 1, "datatypes": [str(XSD.integer)]}
+            ],
+        },
+    }
+    mock_get_form_fields.return_value = form_fields
+
+    validate_integer = MagicMock(side_effect=str.isdigit)
+    with patch(
+        "heritrace.routes.entity._validation.DATATYPE_VALIDATORS",
+        {str(XSD.integer): validate_integer},
+    ):
+        errors = validate_entity_data(entity_data)
+
+    assert len(errors) == 1
+    assert '"old"' in errors[0]
+    assert validate_integer.call_count == 3
@@ -3,6 +3,7 @@
 # SPDX-License-Identifier: ISC
 
 import json
+import os
 import socket
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
@@ -14,7 +15,7 @@ from flask import Flask, g
 from flask_babel import Babel
 from flask_login import LoginManager
 from flask_login.signals import user_loaded_from_cookie
-from rdflib import Graph
+from rdflib import RDF, Graph, URIRef
 from redis import Redis
 from redis.exceptions import RedisError
 from SPARQLWrapper import SPARQLWrapper
@@ -35,6 +36,7 @@ from heritrace.extensions import (
     get_form_fields,
     get_provenance_endpoint,
     get_provenance_sparql,
+    get_save_plugin,
     get_shacl_graph,
     get_sparql,
     init_extensions,
@@ -44,6 +46,7 @@ from heritrace.extensions import (
     initialize_counter_handler,
     initialize_global_variables,
     need_initialization,
+    reload_shacl_if_changed,
     running_in_docker,
     update_cache,
 )
@@ -252,6 +255,51 @@ def test_getter_functions(app) -> None:
     assert get_classes_with_multiple_shapes() == {"http://example.org/Class1"}
 
 
+def test_save_plugin_keeps_caches_current(lightweight_app) -> None:
+    configured_plugin = MagicMock()
+    label_cache = MagicMock()
+    class_counts = MagicMock()
+    shape_index = MagicMock()
+    deletion_index = MagicMock()
+    lightweight_app.config["SAVE_PLUGIN"] = configured_plugin
+    lightweight_app.extensions["heritrace"] = AppState(
+        dataset_endpoint="dataset",
+        provenance_endpoint="provenance",
+        sparql=MagicMock(spec=SPARQLWrapperWithRetry),
+        provenance_sparql=MagicMock(spec=SPARQLWrapperWithRetry),
+        change_tracking_config={},
+        custom_filter=MagicMock(),
+        display_rules=[],
+        form_fields_cache={},
+        dataset_is_quadstore=False,
+        shacl_graph=Graph(),
+        classes_with_multiple_shapes=set(),
+        display_rules_use_inverse_relations=False,
+        label_cache=label_cache,
+        class_counts=class_counts,
+        shape_index=shape_index,
+        deletion_index=deletion_index,
+    )
+    saved = URIRef("http://example.org/saved")
+    graph_set = Graph()
+    graph_set.add((saved, RDF.type, URIRef("http://example.org/Person")))
+    graph_set.preexisting_graph = Graph()
+    graph_set.provenance = Graph()
+    graph_set.entity_index = {saved: {"to_be_deleted": False, "is_restored": False}}
+
+    with lightweight_app.app_context():
+        get_save_plugin().persist(graph_set)
+
+    configured_plugin.persist.assert_called_once_with(graph_set)
+    label_cache.invalidate.assert_called_once_with([saved])
+    class_counts.adjust.assert_called_once_with({"http://example.org/Person": 1})
+    shape_index.record_saves.assert_called_once_with(
+        {str(saved): set()},
+        {str(saved): [(saved, RDF.type, URIRef("http://example.org/Person"))]},
+    )
+    deletion_index.record_saves.assert_called_once_with([], [])
+
+
 def test_get_counter_handler_not_initialized(app) -> None:
     app.config.pop("URI_GENERATOR", None)
 
@@ -566,6 +614,80 @@ def test_initialize_lock_manager() -> None:
         assert hasattr(g, "resource_lock_manager")
 
 
+SHAPES = """
+@prefix sh: <http://www.w3.org/ns/shacl#> .
+@prefix ex: <http://example.org/> .
+ex:{shape} sh:targetClass ex:Article .
+"""
+
+
+@pytest.fixture
+def shacl_app(lightweight_app, tmp_path):
+    shacl_path = tmp_path / "shacl.ttl"
+    shacl_path.write_text(SHAPES.format(shape="ArticleShape"))
+    lightweight_app.config["SHACL_PATH"] = shacl_path
+    lightweight_app.extensions["heritrace"] = AppState(
+        dataset_endpoint="dataset_endpoint_value",
+        provenance_endpoint="provenance_endpoint_value",
+        sparql=MagicMock(spec=SPARQLWrapperWithRetry),
+        provenance_sparql=MagicMock(spec=SPARQLWrapperWithRetry),
+        change_tracking_config={},
+        custom_filter=MagicMock(),
+        display_rules=[],
+        form_fields_cache={"old": "fields"},
+        dataset_is_quadstore=False,
+        shacl_graph=Graph().parse(shacl_path, format="turtle"),
+        classes_with_multiple_shapes=set(),
+        display_rules_use_inverse_relations=False,
+        shacl_mtime_ns=shacl_path.stat().st_mtime_ns,
+    )
+    return lightweight_app
+
+
+def _touch(path: Path, content: str) -> None:
+    mtime_ns = path.stat().st_mtime_ns
+    path.write_text(content)
+    os.utime(path, ns=(mtime_ns + 1_000_000_000, mtime_ns + 1_000_000_000))
+
+
+def test_unchanged_shacl_is_not_reloaded(shacl_app) -> None:
+    state = shacl_app.extensions["heritrace"]
+
+    assert not reload_shacl_if_changed(shacl_app)
+    assert shacl_app.extensions["heritrace"] is state
+
+
+def test_changed_shacl_replaces_the_shapes(shacl_app) -> None:
+    shacl_path = shacl_app.config["SHACL_PATH"]
+    _touch(shacl_path, SHAPES.format(shape="PaperShape"))
+
+    with patch(
+        "heritrace.utils.shacl_utils.get_form_fields_from_shacl",
+        return_value={"new": "fields"},
+    ):
+        assert reload_shacl_if_changed(shacl_app)
+
+    state = shacl_app.extensions["heritrace"]
+    assert {str(shape) for shape in state.shacl_graph.subjects()} == {
+        "http://example.org/PaperShape"
+    }
+    assert state.form_fields_cache == {"new": "fields"}
+    assert state.shacl_mtime_ns == shacl_path.stat().st_mtime_ns
+
+
+def test_unparsable_shacl_keeps_the_previous_shapes(shacl_app) -> None:
+    previous = shacl_app.extensions["heritrace"]
+    shacl_path = shacl_app.config["SHACL_PATH"]
+    _touch(shacl_path, "ex:Broken sh:targetClass")
+
+    assert not reload_shacl_if_changed(shacl_app)
+
+    state = shacl_app.extensions["heritrace"]
+    assert state.shacl_graph is previous.shacl_graph
+    assert state.form_fields_cache == {"old": "fields"}
+    assert state.shacl_mtime_ns == shacl_path.stat().st_mtime_ns
+
+
 def test_initialize_global_variables_dataset_is_quadstore(app) -> None:
     app.config["DATASET_IS_QUADSTORE"] = True
 
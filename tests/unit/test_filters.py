@@ -6,10 +6,11 @@ import re
 from unittest.mock import MagicMock, patch
 
 import pytest
-from rdflib import Graph, URIRef
+from rdflib import Graph, Literal, URIRef
 from SPARQLWrapper.SPARQLExceptions import SPARQLWrapperException
 
 from heritrace.utils.filters import Filter
+from heritrace.utils.label_query_utils import build_batch_label_query
 
 _FETCH_URI_QUERY = (
     "SELECT ?display WHERE { [[uri]] <http://example.org/name> ?display }"
@@ -540,3 +541,183 @@ def test_human_readable_entity_malformed_rule(mock_filter) -> None:
     mock_find_rule.assert_called_once_with(
         entity_key[0], entity_key[1], mock_filter.display_rules
     )
+
+
+def _people_graph() -> Graph:
+    graph = Graph()
+    for index, name in enumerate(["Alice", "Bob", "Carol"], start=1):
+        graph.add(
+            (
+                URIRef(f"http://example.org/person/{index}"),
+                URIRef("http://example.org/name"),
+                Literal(name),
+            )
+        )
+    return graph
+
+
+def test_human_readable_entities_batches_fetch_uri_display(mock_filter) -> None:
+    """A rewritable fetchUriDisplay labels every URI with a single query."""
+    graph = _people_graph()
+    uris = [
+        "http://example.org/person/2",
+        "http://example.org/person/1",
+        "http://example.org/person/2",
+    ]
+    entity_key = ("http://example.org/Person", "http://example.org/PersonShape")
+
+    with patch.object(graph, "query", wraps=graph.query) as mock_query:
+        result = mock_filter.human_readable_entities(uris, entity_key, graph)
+
+    assert result == ["Bob", "Alice", "Bob"]
+    mock_query.assert_called_once()
+
+
+def test_human_readable_entities_falls_back_for_missing_labels(mock_filter) -> None:
+    """URIs the batch query cannot label go through the single-URI path."""
+    graph = _people_graph()
+    uris = ["http://example.org/person/1", "http://example.org/person/9"]
+    entity_key = ("http://example.org/Person", "http://example.org/PersonShape")
+
+    with pytest.raises(ValueError, match="person/9"):
+        mock_filter.human_readable_entities(uris, entity_key, graph)
+
+
+def test_human_readable_entities_without_fetch_uri_display(mock_filter) -> None:
+    uris = ["http://example.org/person/1", "http://example.org/person/2"]
+
+    with patch(
+        "heritrace.utils.display_rules_utils.find_matching_rule",
+        return_value={"displayName": "Person"},
+    ):
+        result = mock_filter.human_readable_entities(uris, ("x", None))
+
+    assert result == ["Person", "Person"]
+
+
+def test_get_fetch_uri_displays_uses_sparql_bindings(mock_filter) -> None:
+    uris = ["http://example.org/person/1", "http://example.org/person/2"]
+    rule = {"fetchUriDisplay": _FETCH_URI_QUERY}
+    mock_sparql = MagicMock()
+    mock_sparql.query.return_value.convert.return_value = {
+        "results": {
+            "bindings": [
+                {
+                    "heritraceUri": {"value": uri},
+                    "display": {"value": f"Label {index}"},
+                }
+                for index, uri in enumerate(uris)
+            ]
+        }
+    }
+
+    with patch.object(mock_filter, "_get_sparql", return_value=mock_sparql):
+        result = mock_filter.get_fetch_uri_displays(uris, rule)
+
+    assert result == ["Label 0", "Label 1"]
+    query = mock_sparql.setQuery.call_args[0][0]
+    assert "VALUES ?heritraceUri" in query
+    assert "<http://example.org/person/2>" in query
+
+
+def test_build_batch_label_query_projects_and_groups_uri() -> None:
+    query = build_batch_label_query(
+        "SELECT (GROUP_CONCAT(?name) AS ?display)"
+        " WHERE { [[uri]] <http://example.org/name> ?name }"
+    )
+
+    assert query is not None
+    assert "SELECT ?heritraceUri (GROUP_CONCAT" in query
+    assert "VALUES ?heritraceUri { [[values]] }" in query
+    assert query.endswith("GROUP BY ?heritraceUri")
+
+
+def test_build_batch_label_query_rejects_limit() -> None:
+    assert (
+        build_batch_label_query(
+            "SELECT ?display WHERE { [[uri]] <http://example.org/name> ?display }"
+            " LIMIT 1"
+        )
+        is None
+    )
+
+
+def test_human_readable_entities_reads_labels_from_cache(mock_filter) -> None:
+    label_cache = MagicMock()
+    label_cache.get_many.return_value = {"http://example.org/person/1": "Alice"}
+    mock_filter.label_cache = label_cache
+    entity_key = ("http://example.org/Person", "http://example.org/PersonShape")
+
+    with patch.object(mock_filter, "_get_sparql") as mock_get_sparql:
+        result = mock_filter.human_readable_entities(
+            ["http://example.org/person/1"], entity_key
+        )
+
+    assert result == ["Alice"]
+    mock_get_sparql.assert_not_called()
+    label_cache.get_many.assert_called_once_with(
+        ["http://example.org/person/1"], entity_key, _FETCH_URI_QUERY
+    )
+
+
+def test_human_readable_entity_caches_label_with_dependencies(mock_filter) -> None:
+    uri = "http://example.org/person/1"
+    entity_key = ("http://example.org/Person", "http://example.org/PersonShape")
+    label_cache = MagicMock()
+    label_cache.get_many.return_value = {}
+    label_cache.get_versions.return_value = {uri: 2}
+    mock_filter.label_cache = label_cache
+
+    with (
+        patch.object(
+            mock_filter, "get_label_dependencies", return_value={uri: {uri}}
+        ) as mock_dependencies,
+        patch.object(
+            mock_filter, "get_fetch_uri_display", return_value="Alice"
+        ) as mock_fetch,
+    ):
+        result = mock_filter.human_readable_entity(uri, entity_key)
+
+    assert result == "Alice"
+    mock_dependencies.assert_called_once_with([uri], mock_filter.display_rules[0])
+    mock_fetch.assert_called_once_with(uri, mock_filter.display_rules[0])
+    label_cache.set_many.assert_called_once_with(
+        {uri: "Alice"}, {uri: {uri: 2}}, entity_key, _FETCH_URI_QUERY
+    )
+
+
+def test_get_label_dependencies_follows_query_predicates(mock_filter) -> None:
+    article = "http://example.org/article/1"
+    role = "http://example.org/role/1"
+    agent = "http://example.org/agent/1"
+    rule = {
+        "fetchUriDisplay": (
+            "PREFIX ex: <http://example.org/>"
+            " SELECT ?display WHERE { [[uri]] ex:role ?role ."
+            ' ?role ex:heldBy ?agent . ?agent ex:name ?display . FILTER(?x != "a:b") }'
+        )
+    }
+    mock_sparql = MagicMock()
+    mock_sparql.query.return_value.convert.side_effect = [
+        {
+            "results": {
+                "bindings": [{"source": {"value": article}, "target": {"value": role}}]
+            }
+        },
+        {
+            "results": {
+                "bindings": [{"source": {"value": role}, "target": {"value": agent}}]
+            }
+        },
+        {"results": {"bindings": []}},
+    ]
+
+    with patch.object(mock_filter, "_get_sparql", return_value=mock_sparql):
+        dependencies = mock_filter.get_label_dependencies([article], rule)
+
+    assert dependencies == {article: {article, role, agent}}
+    first_query = mock_sparql.setQuery.call_args_list[0][0][0]
+    assert "<http://example.org/heldBy>" in first_query
+    assert "<http://example.org/role>" in first_query
+    assert "a:b" not in first_query
+    assert mock_sparql.setQuery.call_count == 3
@@ -0,0 +1,165 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+import json
+from unittest.mock import MagicMock, call
+
+import pytest
+from redis import RedisError
+
+from heritrace.services.label_cache import LabelCache
+
+ENTITY_URI = "http://example.org/article/1"
+AUTHOR_URI = "http://example.org/agent/1"
+ENTITY_KEY = ("http://example.org/Article", "http://example.org/ArticleShape")
+FETCH_QUERY = "SELECT ?display WHERE { [[uri]] <http://example.org/title> ?display }"
+
+
+@pytest.fixture
+def mock_redis():
+    """Create a mock Redis client whose pipeline is the client itself."""
+    redis_mock = MagicMock()
+    redis_mock.mget.return_value = []
+    redis_mock.pipeline.return_value = redis_mock
+    redis_mock.execute.return_value = []
+    redis_mock.zcard.return_value = 0
+    return redis_mock
+
+
+@pytest.fixture
+def label_cache(mock_redis) -> LabelCache:
+    return LabelCache(mock_redis, ttl=60, max_entries=2)
+
+
+def _entry(label: str, dependencies: dict[str, int]) -> str:
+    return json.dumps({"label": label, "dependencies": dependencies})
+
+
+def test_entry_key_depends_on_shape_and_rule(label_cache: LabelCache) -> None:
+    key = label_cache.generate_entry_key(ENTITY_URI, ENTITY_KEY, FETCH_QUERY)
+
+    assert key.startswith("label_cache:entry:")
+    assert key == label_cache.generate_entry_key(ENTITY_URI, ENTITY_KEY, FETCH_QUERY)
+    assert key != label_cache.generate_entry_key(
+        ENTITY_URI, (ENTITY_KEY[0], None), FETCH_QUERY
+    )
+    assert key != label_cache.generate_entry_key(
+        ENTITY_URI, ENTITY_KEY, FETCH_QUERY.replace("title", "name")
+    )
+
+
+def test_get_many_returns_entries_with_current_versions(
+    label_cache: LabelCache, mock_redis
+) -> None:
+    mock_redis.mget.side_effect = [
+        [_entry("Article", {ENTITY_URI: 0, AUTHOR_URI: 3})],
+        ["3", None],
+    ]
+
+    labels = label_cache.get_many([ENTITY_URI], ENTITY_KEY, FETCH_QUERY)
+
+    assert labels == {ENTITY_URI: "Article"}
+    mock_redis.incrby.assert_has_calls(
+        [call("label_cache:hits", 1), call("label_cache:misses", 0)]
+    )
+    mock_redis.zadd.assert_called_once()
+
+
+def test_get_many_misses_when_a_dependency_changed(
+    label_cache: LabelCache, mock_redis
+) -> None:
+    mock_redis.mget.side_effect = [
+        [_entry("Article", {ENTITY_URI: 0, AUTHOR_URI: 3}), None],
+        ["4", None],
+    ]
+
+    labels = label_cache.get_many(
+        [ENTITY_URI, "http://example.org/article/2"], ENTITY_KEY, FETCH_QUERY
+    )
+
+    assert labels == {}
+    mock_redis.incrby.assert_has_calls(
+        [call("label_cache:hits", 0), call("label_cache:misses", 2)]
+    )
+
+
+def test_get_many_degrades_to_miss_on_redis_error(
+    label_cache: LabelCache, mock_redis
+) -> None:
+    mock_redis.mget.side_effect = RedisError("Connection refused")
+
+    assert label_cache.get_many([ENTITY_URI], ENTITY_KEY, FETCH_QUERY) == {}
+
+
+def test_get_versions_defaults_to_zero(label_cache: LabelCache, mock_redis) -> None:
+    mock_redis.mget.return_value = ["2", None]
+
+    versions = label_cache.get_versions([ENTITY_URI, AUTHOR_URI])
+
+    assert versions == {ENTITY_URI: 2, AUTHOR_URI: 0}
+    mock_redis.mget.assert_called_once_with(
+        [f"label_cache:version:{ENTITY_URI}", f"label_cache:version:{AUTHOR_URI}"]
+    )
+
+
+def test_get_versions_returns_none_on_redis_error(
+    label_cache: LabelCache, mock_redis
+) -> None:
+    mock_redis.mget.side_effect = RedisError("Connection refused")
+
+    assert label_cache.get_versions([ENTITY_URI]) is None
+
+
+def test_set_many_stores_entries_with_ttl(label_cache: LabelCache, mock_redis) -> None:
+    label_cache.set_many(
+        {ENTITY_URI: "Article"},
+        {ENTITY_URI: {ENTITY_URI: 0, AUTHOR_URI: 3}},
+        ENTITY_KEY,
+        FETCH_QUERY,
+    )
+
+    key = label_cache.generate_entry_key(ENTITY_URI, ENTITY_KEY, FETCH_QUERY)
+    mock_redis.set.assert_called_once_with(
+        key, _entry("Article", {ENTITY_URI: 0, AUTHOR_URI: 3}), ex=60
+    )
+    mock_redis.zpopmin.assert_not_called()
+
+
+def test_set_many_evicts_least_recently_used_entries(
+    label_cache: LabelCache, mock_redis
+) -> None:
+    mock_redis.zcard.return_value = 3
+    mock_redis.zpopmin.return_value = [("label_cache:entry:old", 1.0)]
+
+    label_cache.set_many(
+        {ENTITY_URI: "Article"}, {ENTITY_URI: {ENTITY_URI: 0}}, ENTITY_KEY, FETCH_QUERY
+    )
+
+    mock_redis.zpopmin.assert_called_once_with("label_cache:index", 1)
+    mock_redis.delete.assert_called_once_with("label_cache:entry:old")
+
+
+def test_invalidate_bumps_entity_versions(label_cache: LabelCache, mock_redis) -> None:
+    label_cache.invalidate([ENTITY_URI, AUTHOR_URI, ENTITY_URI])
+
+    assert mock_redis.incr.call_args_list == [
+        call(f"label_cache:version:{ENTITY_URI}"),
+        call(f"label_cache:version:{AUTHOR_URI}"),
+    ]
+    mock_redis.expire.assert_any_call(f"label_cache:version:{AUTHOR_URI}", 60)
+    mock_redis.execute.assert_called_once()
+
+
+def test_get_stats(label_cache: LabelCache, mock_redis) -> None:
+    mock_redis.mget.return_value = ["3", "1"]
+    mock_redis.zcard.return_value = 2
+
+    assert label_cache.get_stats() == {
+        "hits": 3,
+        "misses": 1,
+        "hit_rate": 0.75,
+        "entries": 2,
+        "max_entries": 2,
+        "ttl": 60,
+    }
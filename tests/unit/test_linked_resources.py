@@ -70,8 +70,8 @@ def test_get_paginated_inverse_references_basic(
         mock_bindings, limit=limit, offset=offset
     )
     mock_get_sparql.return_value = mock_sparql_instance
-    mock_get_filter.return_value.human_readable_entity.side_effect = lambda s, _t: (
-        f"{s}_label"
+    mock_get_filter.return_value.human_readable_entities.side_effect = (
+        lambda uris, _key: [f"{s}_label" for s in uris]
     )
     # Updated to match the new tuple-based structure
     mock_get_filter.return_value.human_readable_predicate.side_effect = lambda p, _: (
@@ -123,8 +123,8 @@ def test_get_paginated_inverse_references_pagination_has_more(
         mock_bindings, limit=limit, offset=offset
     )
     mock_get_sparql.return_value = mock_sparql_instance
-    mock_get_filter.return_value.human_readable_entity.side_effect = lambda s, _t: (
-        f"{s}_label"
+    mock_get_filter.return_value.human_readable_entities.side_effect = (
+        lambda uris, _key: [f"{s}_label" for s in uris]
     )
     # Updated to match the new tuple-based structure
     mock_get_filter.return_value.human_readable_predicate.side_effect = lambda p, _: (
@@ -176,8 +176,8 @@ def test_get_paginated_inverse_references_pagination_no_more(
         all_bindings, limit=limit, offset=offset
     )
     mock_get_sparql.return_value = mock_sparql_instance
-    mock_get_filter.return_value.human_readable_entity.side_effect = lambda s, _t: (
-        f"{s}_label"
+    mock_get_filter.return_value.human_readable_entities.side_effect = (
+        lambda uris, _key: [f"{s}_label" for s in uris]
     )
     # Updated to match the new tuple-based structure
     mock_get_filter.return_value.human_readable_predicate.side_effect = lambda p, _: (
@@ -626,8 +626,8 @@ def test_get_paginated_inverse_references_with_proxy_entity(
         ["http://example.org/SourceType"],  # types for source
     ]
 
-    mock_get_filter.return_value.human_readable_entity.side_effect = lambda s, _t: (
-        f"{s}_label"
+    mock_get_filter.return_value.human_readable_entities.side_effect = (
+        lambda uris, _key: [f"{s}_label" for s in uris]
     )
     mock_get_filter.return_value.human_readable_predicate.side_effect = lambda p, _: (
         f"{p}_label"
@@ -697,8 +697,8 @@ def test_get_paginated_inverse_references_proxy_same_as_original(
     # Mock entity types - only called once since resolved == original
     mock_get_types.return_value = ["http://example.org/ProxyType"]
 
-    mock_get_filter.return_value.human_readable_entity.side_effect = lambda s, _t: (
-        f"{s}_label"
+    mock_get_filter.return_value.human_readable_entities.side_effect = (
+        lambda uris, _key: [f"{s}_label" for s in uris]
     )
     mock_get_filter.return_value.human_readable_predicate.side_effect = lambda p, _: (
         f"{p}_label"
@@ -743,8 +743,8 @@ def test_get_paginated_inverse_references_no_highest_priority_type(
     )
     mock_get_sparql.return_value = mock_sparql_instance
 
-    mock_get_filter.return_value.human_readable_entity.side_effect = lambda s, _t: (
-        f"{s}_label"
+    mock_get_filter.return_value.human_readable_entities.side_effect = (
+        lambda uris, _key: [f"{s}_label" for s in uris]
     )
     mock_get_filter.return_value.human_readable_predicate.side_effect = lambda p, _: (
         f"{p}_label"
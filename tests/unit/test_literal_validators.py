@@ -0,0 +1,113 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+import re
+from unittest.mock import MagicMock, patch
+
+import pytest
+from rdflib import XSD, Graph
+
+from heritrace.utils.literal_validators import (
+    DATATYPE_VALIDATORS,
+    compile_literal_validators,
+    literal_validators_for,
+)
+
+SHAPES = """
+@prefix sh: <http://www.w3.org/ns/shacl#> .
+@prefix xsd: <http://www.w3.org/2001/XMLSchema#> .
+
+<http://example.org/IdentifierShape> a sh:NodeShape ;
+    sh:targetClass <http://example.org/Identifier> ;
+    sh:property [
+        sh:path <http://example.org/doi> ;
+        sh:pattern "^10\\\\..+/.+$" ;
+    ] ;
+    sh:property [
+        sh:path <http://example.org/broken> ;
+        sh:pattern "(" ;
+    ] ;
+    sh:property [
+        sh:path <http://example.org/doi> ;
+        sh:pattern "^10\\\\.1000/.+$" ;
+        sh:condition [ sh:path <http://example.org/scheme> ; sh:hasValue "x" ] ;
+    ] .
+"""
+
+
+def _shapes() -> Graph:
+    return Graph().parse(data=SHAPES, format="turtle")
+
+
+def test_datatype_validators_cover_the_mapping() -> None:
+    assert DATATYPE_VALIDATORS[str(XSD.integer)]("42")
+    assert not DATATYPE_VALIDATORS[str(XSD.integer)]("forty-two")
+    assert str(XSD.int) in DATATYPE_VALIDATORS
+
+
+def test_patterns_of_the_shapes_are_precompiled() -> None:
+    validators = compile_literal_validators(_shapes())
+
+    with patch("heritrace.utils.literal_validators.re.compile") as mock_compile:
+        pattern = validators.pattern(r"^10\..+/.+$")
+
+    mock_compile.assert_not_called()
+    assert pattern.match("10.1000/xyz")
+
+
+def test_only_the_patterns_of_the_shapes_are_served() -> None:
+    validators = compile_literal_validators(_shapes())
+
+    assert validators.match(r"^10\..+/.+$", ["10.1/x", "a", None]) == [
+        True,
+        False,
+        False,
+    ]
+    with pytest.raises(re.error):
+        validators.pattern("(")
+    with pytest.raises(KeyError):
+        validators.pattern(r"^(a+)+$")
+
+
+def test_field_patterns_leave_out_conditional_ones() -> None:
+    validators = compile_literal_validators(_shapes())
+
+    assert validators.field_patterns(
+        "http://example.org/IdentifierShape", "http://example.org/doi"
+    ) == (r"^10\..+/.+$",)
+    assert validators.field_patterns("http://example.org/IdentifierShape", "x") == ()
+
+
+def test_validate_checks_every_distinct_value_once() -> None:
+    validators = compile_literal_validators(Graph())
+    validate_integer = MagicMock(side_effect=str.isdigit)
+
+    with patch(
+        "heritrace.utils.literal_validators.DATATYPE_VALIDATORS",
+        {str(XSD.integer): validate_integer},
+    ):
+        results = validators.validate(["1", "x", "1", "2"], str(XSD.integer))
+        unknown = validators.validate(["1"], "http://example.org/datatype")
+
+    assert results == [True, False, True, True]
+    assert validate_integer.call_count == 3
+    assert unknown == [False]
+
+
+def test_matching_datatypes() -> None:
+    validators = compile_literal_validators(Graph())
+
+    integer_types, text_types = validators.matching_datatypes(["42", "forty-two"])
+
+    assert str(XSD.integer) in integer_types
+    assert str(XSD.string) in integer_types
+    assert str(XSD.integer) not in text_types
+    assert str(XSD.string) in text_types
+
+
+def test_literal_validators_are_built_once_per_graph() -> None:
+    shapes = _shapes()
+
+    assert literal_validators_for(shapes) is literal_validators_for(shapes)
+    assert literal_validators_for(shapes) is not literal_validators_for(_shapes())
@@ -192,9 +192,11 @@ def merge_test_data():
     return_value="http://db/prov_merge_flash",
 )
 @patch("heritrace.routes.merge.get_dataset_is_quadstore", return_value=False)
+@patch("heritrace.routes.merge.get_save_plugin")
 @patch("flask_login.utils._get_user")
 def test_execute_merge_success_flash(
     mock_current_user,
+    mock_save_plugin,
     _mock_quadstore,
     _mock_prov,
     _mock_ds,
@@ -256,7 +258,7 @@ def test_execute_merge_success_flash(
         merge_test_data["resp_agent_uri"],
         URIRef("https://example.com/test-primary-source"),
         "2024-01-01T00:00:00+00:00",
-        save_plugin=None,
+        save_plugin=mock_save_plugin.return_value,
     )
     assert mock_import_entity_graph.call_args_list == [
         call(mock_editor_instance, URIRef(merge_test_data["entity1_uri"])),
@@ -772,9 +774,9 @@ def test_find_similar_resources_success(
     similarity_props = [similar_test_data["prop_name"], similar_test_data["prop_ref"]]
     mock_get_sim_props.return_value = similarity_props
     mock_filter_instance = MagicMock()
-    mock_filter_instance.human_readable_entity.return_value = similar_test_data[
-        "similar_label"
-    ]
+    mock_filter_instance.human_readable_entities.side_effect = lambda uris, _key: (
+        [similar_test_data["similar_label"]] * len(uris)
+    )
     mock_filter_instance.human_readable_predicate.side_effect = (
         lambda pred_uri, _entity_key: f"Label_{pred_uri.split('/')[-1]}"
     )
@@ -943,9 +945,9 @@ def test_find_similar_resources_literal_formatting(
     similarity_props = [prop_typed, prop_lang, prop_plain, prop_bnode]
     mock_get_sim_props.return_value = similarity_props
     mock_filter_instance = MagicMock()
-    mock_filter_instance.human_readable_entity.return_value = similar_test_data[
-        "similar_label"
-    ]
+    mock_filter_instance.human_readable_entities.side_effect = lambda uris, _key: (
+        [similar_test_data["similar_label"]] * len(uris)
+    )
     mock_filter_instance.human_readable_predicate.side_effect = (
         lambda pred_uri, _entity_key: f"Label_{pred_uri.split('/')[-1]}"
     )
@@ -1327,7 +1329,9 @@ def test_find_similar_resources_success_with_and_group(
     mock_get_sim_props.return_value = [{"and": [prop_a, prop_b]}]
 
     mock_filter_instance = MagicMock()
-    mock_filter_instance.human_readable_entity.return_value = "Similar AND Label"
+    mock_filter_instance.human_readable_entities.side_effect = lambda uris, _key: (
+        ["Similar AND Label"] * len(uris)
+    )
     mock_filter_instance.human_readable_predicate.side_effect = (
         lambda pred_uri, _entity_key: f"Label_{pred_uri.split('/')[-1]}"
     )
@@ -0,0 +1,125 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+import threading
+import time
+from collections.abc import Iterator
+from unittest.mock import MagicMock
+
+import pytest
+from flask import Flask, current_app
+
+from heritrace.sparql import SPARQLWrapperWithRetry
+from heritrace.utils.query_executor import (
+    DEFAULT_QUERY_DEADLINE,
+    configure_query_executor,
+    run_concurrently,
+    runs_concurrently,
+)
+
+
+@pytest.fixture
+def concurrent_queries() -> Iterator[None]:
+    configure_query_executor(4, 2, 5.0)
+    yield
+    configure_query_executor(1, 1, DEFAULT_QUERY_DEADLINE)
+
+
+def test_runs_inline_by_default() -> None:
+    caller = threading.current_thread()
+
+    results = run_concurrently([threading.current_thread, threading.current_thread])
+
+    assert not runs_concurrently()
+    assert results == [caller, caller]
+
+
+@pytest.mark.usefixtures("concurrent_queries")
+def test_results_follow_task_order() -> None:
+    def task(index: int, delay: float) -> int:
+        time.sleep(delay)
+        return index
+
+    results = run_concurrently(
+        [lambda: task(0, 0.05), lambda: task(1, 0.0), lambda: task(2, 0.02)]
+    )
+
+    assert results == [0, 1, 2]
+
+
+@pytest.mark.usefixtures("concurrent_queries")
+def test_caps_queries_in_flight_per_call() -> None:
+    lock = threading.Lock()
+    in_flight = 0
+    peak = 0
+
+    def task() -> None:
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        time.sleep(0.02)
+        with lock:
+            in_flight -= 1
+
+    run_concurrently([task] * 8)
+
+    assert peak == 2
+
+
+@pytest.mark.usefixtures("concurrent_queries")
+def test_first_failure_cancels_remaining_tasks() -> None:
+    started = []
+
+    def failing() -> None:
+        msg = "endpoint unavailable"
+        raise OSError(msg)
+
+    def task(index: int) -> int:
+        started.append(index)
+        time.sleep(0.05)
+        return index
+
+    with pytest.raises(OSError, match="endpoint unavailable"):
+        run_concurrently([failing, lambda: task(1), lambda: task(2), lambda: task(3)])
+
+    time.sleep(0.1)
+    assert 3 not in started
+
+
+def test_deadline_bounds_the_whole_call() -> None:
+    configure_query_executor(4, 2, 0.05)
+    try:
+        with pytest.raises(TimeoutError):
+            run_concurrently([lambda: time.sleep(0.2)] * 2)
+    finally:
+        configure_query_executor(1, 1, DEFAULT_QUERY_DEADLINE)
+
+
+@pytest.mark.usefixtures("concurrent_queries")
+def test_tasks_see_the_application_and_private_wrappers() -> None:
+    app = Flask(__name__)
+    shared = SPARQLWrapperWithRetry("http://example.org/sparql")
+    app.extensions["heritrace"] = MagicMock(sparql=shared)
+
+    def task() -> tuple[str, SPARQLWrapperWithRetry]:
+        from heritrace.extensions import get_sparql  # noqa: PLC0415
+
+        return current_app.name, get_sparql()
+
+    with app.app_context():
+        results = run_concurrently([task, task])
+
+    assert [name for name, _sparql in results] == [app.name, app.name]
+    assert all(sparql is not shared for _name, sparql in results)
+    assert all(sparql.endpoint == shared.endpoint for _name, sparql in results)
+
+
+def test_rejects_invalid_settings() -> None:
+    with pytest.raises(ValueError, match="QUERY_CONCURRENCY"):
+        configure_query_executor(4, 0, 5.0)
+    with pytest.raises(ValueError, match="QUERY_DEADLINE"):
+        configure_query_executor(4, 2, 0)
+    with pytest.raises(ValueError, match="max_workers must be at least 1"):
+        configure_query_executor(0, 1, 5.0)
@@ -1,21 +1,43 @@
-# SPDX-FileCopyrightText: 2025 Arcangelo Massari <arcangelo.massari@unibo.it>
+# SPDX-FileCopyrightText: 2025-2026 Arcangelo Massari <arcangelo.massari@unibo.it>
 #
 # SPDX-License-Identifier: ISC
 
 import unittest
-from unittest.mock import MagicMock, call, patch
+from unittest.mock import MagicMock, patch
 
-from rdflib import URIRef
+from rdflib import Dataset, Graph, URIRef
 
 from heritrace.editor import Editor
 from heritrace.utils.sparql_utils import import_entity_graph
 
+SUBJECT = "http://example.org/subject"
+OBJECT = "http://example.org/object"
+PREDICATE = "http://example.org/predicate"
+
+
+def _state(subject: str, obj: str, graph: str | None = None) -> dict:
+    binding = {
+        "subject": {"value": subject},
+        "predicate": {"value": PREDICATE},
+        "object": {"type": "uri", "value": obj},
+    }
+    if graph is not None:
+        binding["g"] = {"value": graph}
+    return binding
+
 
 class TestReferencingEntitiesImport(unittest.TestCase):
     def setUp(self) -> None:
         self.mock_editor = MagicMock(spec=Editor)
         self.mock_editor.dataset_endpoint = "http://example.org/sparql"
         self.mock_editor.dataset_is_quadstore = False
+        patcher = patch("heritrace.utils.sparql_utils.is_virtuoso", return_value=False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def imported_graph(self) -> Graph:
+        self.mock_editor.import_graph.assert_called_once()
+        return self.mock_editor.import_graph.call_args.args[0]
 
     @patch("heritrace.utils.sparql_utils.get_sparql")
     def test_import_entity_graph_without_referencing(self, mock_get_sparql) -> None:
@@ -23,60 +45,33 @@ class TestReferencingEntitiesImport(unittest.TestCase):
         Test that import_entity_graph works normally when not including referencing
         entities.
         """
-        # Setup mock SPARQL wrapper
         mock_sparql = MagicMock()
         mock_get_sparql.return_value = mock_sparql
-
-        # Mock the query results for the main subject
         mock_sparql.query.return_value.convert.side_effect = [
-            # First query for the main subject
-            {
-                "results": {
-                    "bindings": [
-                        {
-                            "p": {"value": "http://example.org/predicate"},
-                            "o": {"value": "http://example.org/object"},
-                        }
-                    ]
-                }
-            },
-            # Second query for the object (recursive call)
+            # State of the main subject, with its link to the object
+            {"results": {"bindings": [_state(SUBJECT, OBJECT)]}},
+            # State of the object, at the next level
             {"results": {"bindings": []}},
         ]
 
-        # Call the function
-        import_entity_graph(self.mock_editor, URIRef("http://example.org/subject"))
-
-        # Verify both subject and object were imported
-        expected_calls = [
-            call(URIRef("http://example.org/subject")),
-            call(URIRef("http://example.org/object")),
-        ]
-        self.mock_editor.import_entity.assert_has_calls(expected_calls, any_order=True)
+        import_entity_graph(self.mock_editor, URIRef(SUBJECT))
 
-        # Verify the SPARQL queries were made correctly
+        assert (URIRef(SUBJECT), URIRef(PREDICATE), URIRef(OBJECT)) in (
+            self.imported_graph()
+        )
         assert mock_sparql.setQuery.call_count == 2
-
-        # Check first query (main subject)
         query1 = mock_sparql.setQuery.call_args_list[0][0][0]
-        assert "<http://example.org/subject> ?p ?o" in query1
-        assert "FILTER(isIRI(?o))" in query1
-
-        # Check second query (object)
+        assert f"VALUES ?subject {{ <{SUBJECT}> }}" in query1
         query2 = mock_sparql.setQuery.call_args_list[1][0][0]
-        assert "<http://example.org/object> ?p ?o" in query2
-        assert "FILTER(isIRI(?o))" in query2
+        assert f"VALUES ?subject {{ <{OBJECT}> }}" in query2
 
     @patch("heritrace.utils.sparql_utils.get_sparql")
     def test_import_entity_graph_with_referencing(self, mock_get_sparql) -> None:
         """Test that import_entity_graph imports referencing entities when requested."""
-        # Setup mock SPARQL wrapper
         mock_sparql = MagicMock()
         mock_get_sparql.return_value = mock_sparql
-
-        # Mock the query results for the main subject
         mock_sparql.query.return_value.convert.side_effect = [
-            # First query for referencing entities
+            # Referencing entities
             {
                 "results": {
                     "bindings": [
@@ -85,53 +80,45 @@ class TestReferencingEntitiesImport(unittest.TestCase):
                     ]
                 }
             },
-            # Second query for the main subject's objects
+            # States of the referencing entities and of the main subject
             {
                 "results": {
                     "bindings": [
-                        {
-                            "p": {"value": "http://example.org/predicate"},
-                            "o": {"value": "http://example.org/object"},
-                        }
+                        _state("http://example.org/referencing1", SUBJECT),
+                        _state(
+                            "http://example.org/referencing2",
+                            "http://example.org/unrelated",
+                        ),
+                        _state(SUBJECT, OBJECT),
                     ]
                 }
             },
-            # Empty results for recursive calls on other entities
-            {"results": {"bindings": []}},
-            {"results": {"bindings": []}},
+            # State of the object
             {"results": {"bindings": []}},
         ]
 
-        # Call the function with include_referencing_entities=True
         import_entity_graph(
             self.mock_editor,
-            URIRef("http://example.org/subject"),
+            URIRef(SUBJECT),
             include_referencing_entities=True,
         )
 
-        # Verify all entities were imported
-        expected_calls = [
-            call(URIRef("http://example.org/referencing1")),
-            call(URIRef("http://example.org/referencing2")),
-            call(URIRef("http://example.org/subject")),
-            call(URIRef("http://example.org/object")),
-        ]
-        self.mock_editor.import_entity.assert_has_calls(expected_calls, any_order=True)
-
-        # Verify the SPARQL queries were made correctly
+        assert set(self.imported_graph().subjects()) == {
+            URIRef("http://example.org/referencing1"),
+            URIRef("http://example.org/referencing2"),
+            URIRef(SUBJECT),
+        }
         assert mock_sparql.setQuery.call_count == 3
 
-        # Check first query (referencing entities)
         query1 = mock_sparql.setQuery.call_args_list[0][0][0]
-        assert "?s ?p <http://example.org/subject>" in query1
+        assert f"?s ?p <{SUBJECT}>" in query1
         assert (
             "FILTER(?p != <http://www.w3.org/1999/02/22-rdf-syntax-ns#type>)" in query1
         )
 
-        # Check second query (main subject's objects)
-        query2 = mock_sparql.setQuery.call_args_list[1][0][0]
-        assert "<http://example.org/subject> ?p ?o" in query2
-        assert "FILTER(isIRI(?o))" in query2
+        # Links held by referencing entities are not followed
+        query3 = mock_sparql.setQuery.call_args_list[2][0][0]
+        assert f"VALUES ?subject {{ <{OBJECT}> }}" in query3
 
     @patch("heritrace.utils.sparql_utils.get_sparql")
     def test_import_entity_graph_with_quadstore(self, mock_get_sparql) -> None:
@@ -139,64 +126,48 @@ class TestReferencingEntitiesImport(unittest.TestCase):
         Test that import_entity_graph handles quadstore correctly when including
         referencing entities.
         """
-        # Setup mock SPARQL wrapper
         mock_sparql = MagicMock()
         mock_get_sparql.return_value = mock_sparql
-
-        # Mock the query results for the main subject
+        graph_uri = "http://example.org/graph"
         mock_sparql.query.return_value.convert.side_effect = [
-            # First query for referencing entities (quadstore format)
             {
                 "results": {
                     "bindings": [{"s": {"value": "http://example.org/referencing1"}}]
                 }
             },
-            # Second query for the main subject's objects
             {
                 "results": {
                     "bindings": [
-                        {
-                            "p": {"value": "http://example.org/predicate"},
-                            "o": {"value": "http://example.org/object"},
-                        }
+                        _state("http://example.org/referencing1", SUBJECT, graph_uri),
+                        _state(SUBJECT, OBJECT, graph_uri),
                     ]
                 }
             },
-            # Empty results for recursive calls on other entities
-            {"results": {"bindings": []}},
             {"results": {"bindings": []}},
         ]
-
-        # Set the editor to use quadstore
         self.mock_editor.dataset_is_quadstore = True
 
-        # Call the function with include_referencing_entities=True
         import_entity_graph(
             self.mock_editor,
-            URIRef("http://example.org/subject"),
+            URIRef(SUBJECT),
             include_referencing_entities=True,
         )
 
-        # Verify all entities were imported
-        expected_calls = [
-            call(URIRef("http://example.org/referencing1")),
-            call(URIRef("http://example.org/subject")),
-            call(URIRef("http://example.org/object")),
-        ]
-        self.mock_editor.import_entity.assert_has_calls(expected_calls, any_order=True)
-
-        # Verify the SPARQL queries were made correctly
-        assert mock_sparql.setQuery.call_count == 3
+        graph = self.imported_graph()
+        assert isinstance(graph, Dataset)
+        assert (
+            URIRef(SUBJECT),
+            URIRef(PREDICATE),
+            URIRef(OBJECT),
+            URIRef(graph_uri),
+        ) in set(graph.quads((None, None, None, None)))
 
-        # Check first query (referencing entities with GRAPH clause)
         query1 = mock_sparql.setQuery.call_args_list[0][0][0]
         assert "GRAPH ?g {" in query1
-        assert "?s ?p <http://example.org/subject>" in query1
+        assert f"?s ?p <{SUBJECT}>" in query1
+        query2 = mock_sparql.setQuery.call_args_list[1][0][0]
+        assert "GRAPH ?g {" in query2
         assert (
-            "FILTER(?p != <http://www.w3.org/1999/02/22-rdf-syntax-ns#type>)" in query1
+            f"VALUES ?subject {{ <http://example.org/referencing1> <{SUBJECT}> }}"
+            in query2
         )
-
-        # Check second query (main subject's objects)
-        query2 = mock_sparql.setQuery.call_args_list[1][0][0]
-        assert "<http://example.org/subject> ?p ?o" in query2
-        assert "FILTER(isIRI(?o))" in query2
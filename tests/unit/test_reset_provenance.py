@@ -397,6 +397,28 @@ def test_reset_entity_provenance_function(mock_resetter_class) -> None:
     mock_resetter_instance.reset_entity_provenance.assert_called_once_with(entity_uri)
 
 
+@pytest.mark.parametrize("success", [True, False])
+@patch("heritrace.scripts.reset_provenance.ProvenanceResetter")
+def test_reset_entity_provenance_drops_the_cached_snapshots(
+    mock_resetter_class, *, success: bool
+) -> None:
+    """Test that a successful reset drops the cached past states of the entity."""
+    mock_resetter_class.return_value.reset_entity_provenance.return_value = success
+    snapshot_cache = MagicMock()
+
+    reset_entity_provenance(
+        entity_uri=URIRef("http://example.org/entity/1"),
+        provenance_endpoint="http://example.org/sparql",
+        counter_handler=MagicMock(),
+        snapshot_cache=snapshot_cache,
+    )
+
+    if success:
+        snapshot_cache.invalidate.assert_called_once_with("http://example.org/entity/1")
+    else:
+        snapshot_cache.invalidate.assert_not_called()
+
+
 @patch("heritrace.scripts.reset_provenance.importlib.util")
 def test_load_config_success(mock_importlib_util) -> None:
     """Test load_config function with successful loading."""
@@ -442,6 +464,7 @@ def test_load_config_error(mock_exit, mock_logger, mock_importlib_util) -> None:
     mock_exit.assert_called_once_with(1)
 
 
+@patch("heritrace.scripts.reset_provenance.SnapshotCache")
 @patch("heritrace.scripts.reset_provenance.argparse.ArgumentParser")
 @patch("heritrace.scripts.reset_provenance.load_config")
 @patch("heritrace.scripts.reset_provenance.reset_entity_provenance")
@@ -453,6 +476,7 @@ def test_main_success(
     mock_reset_entity_provenance,
     mock_load_config,
     mock_argparse,
+    mock_snapshot_cache,
 ) -> None:
     """Test main function with successful execution."""
     # Mock the ArgumentParser
@@ -470,6 +494,7 @@ def test_main_success(
     mock_config_class = MagicMock()
     mock_config_class.PROVENANCE_DB_URL = "http://example.org/sparql"
     mock_config_class.COUNTER_HANDLER = MagicMock()
+    mock_config_class.REDIS_URL = "redis://localhost:6379/0"
     mock_config.Config = mock_config_class
     mock_load_config.return_value = mock_config
 
@@ -485,12 +510,14 @@ def test_main_success(
         entity_uri=URIRef("http://example.org/entity/1"),
         provenance_endpoint="http://example.org/sparql",
         counter_handler=mock_config_class.COUNTER_HANDLER,
+        snapshot_cache=mock_snapshot_cache.return_value,
     )
     mock_logger.info.assert_called()
     info_msg = mock_logger.info.call_args[0][0]
     assert info_msg == "Successfully reset provenance for entity %s"
 
 
+@patch("heritrace.scripts.reset_provenance.SnapshotCache")
 @patch("heritrace.scripts.reset_provenance.argparse.ArgumentParser")
 @patch("heritrace.scripts.reset_provenance.load_config")
 @patch("heritrace.scripts.reset_provenance.reset_entity_provenance")
@@ -502,6 +529,7 @@ def test_main_failure(
     mock_reset_entity_provenance,
     mock_load_config,
     mock_argparse,
+    mock_snapshot_cache,
 ) -> None:
     """Test main function with failure during execution."""
     # Mock the ArgumentParser
@@ -519,6 +547,7 @@ def test_main_failure(
     mock_config_class = MagicMock()
     mock_config_class.PROVENANCE_DB_URL = "http://example.org/sparql"
     mock_config_class.COUNTER_HANDLER = MagicMock()
+    mock_config_class.REDIS_URL = "redis://localhost:6379/0"
     mock_config.Config = mock_config_class
     mock_load_config.return_value = mock_config
 
@@ -534,6 +563,7 @@ def test_main_failure(
         entity_uri=URIRef("http://example.org/entity/1"),
         provenance_endpoint="http://example.org/sparql",
         counter_handler=mock_config_class.COUNTER_HANDLER,
+        snapshot_cache=mock_snapshot_cache.return_value,
     )
     mock_logger.error.assert_called()
     error_msg = mock_logger.error.call_args[0][0]
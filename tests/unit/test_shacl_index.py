@@ -0,0 +1,125 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+import pytest
+from rdflib import Graph
+
+from heritrace.utils.shacl_index import (
+    OrMember,
+    ShaclIndex,
+    compile_shacl_index,
+    shacl_index_for,
+)
+
+SHAPES = """
+@prefix sh: <http://www.w3.org/ns/shacl#> .
+@prefix xsd: <http://www.w3.org/2001/XMLSchema#> .
+@prefix ex: <http://example.org/> .
+
+ex:ArticleShape sh:targetClass ex:Article ;
+    sh:property [
+        sh:path ex:title ;
+        sh:datatype xsd:string ;
+        sh:minCount 1 ;
+        sh:maxCount 1 ;
+        sh:pattern "^[A-Z]" ;
+        sh:message "Titles start with a capital letter" ;
+    ] , [
+        sh:path ex:status ;
+        sh:in ( "draft" "published" ) ;
+    ] , [
+        sh:path ex:author ;
+        sh:class ex:Person ;
+    ] , [
+        sh:path ex:identifier ;
+        sh:node ex:IdentifierShape ;
+        sh:condition [ sh:path ex:scheme ; sh:hasValue ex:doi ] ;
+    ] , [
+        sh:path ex:date ;
+        sh:or ( [ sh:datatype xsd:date ] [ sh:datatype xsd:gYear ] ) ;
+    ] , [
+        sh:path ex:role ;
+        sh:qualifiedValueShape [ sh:hasValue ex:editor ] ;
+        sh:qualifiedMinCount 1 ;
+    ] , [
+        sh:path [ sh:inversePath ex:cites ] ;
+    ] .
+
+ex:IdentifierShape sh:targetClass ex:Identifier .
+ex:PaperShape sh:targetClass ex:Article , ex:Paper .
+"""
+
+EX = "http://example.org/"
+XSD = "http://www.w3.org/2001/XMLSchema#"
+
+
+@pytest.fixture(scope="module")
+def index() -> ShaclIndex:
+    return compile_shacl_index(Graph().parse(data=SHAPES, format="turtle"))
+
+
+def test_classes_and_shapes_are_indexed_both_ways(index: ShaclIndex) -> None:
+    assert set(index.shapes_for_class(f"{EX}Article")) == {
+        f"{EX}ArticleShape",
+        f"{EX}PaperShape",
+    }
+    assert set(index.target_classes(f"{EX}PaperShape")) == {
+        f"{EX}Article",
+        f"{EX}Paper",
+    }
+    assert index.shapes_for_class(f"{EX}Unknown") == ()
+
+
+def test_property_constraints_keep_every_shacl_feature(index: ShaclIndex) -> None:
+    constraints = {
+        constraint.path: constraint
+        for constraint in index.property_constraints(f"{EX}ArticleShape")
+        if constraint.path_is_iri
+    }
+
+    title = constraints[f"{EX}title"]
+    assert title.datatypes == (f"{XSD}string",)
+    assert (title.min_counts, title.max_counts) == (("1",), ("1",))
+    assert title.patterns == ("^[A-Z]",)
+    assert title.messages == ("Titles start with a capital letter",)
+    assert constraints[f"{EX}status"].in_values == ("draft", "published")
+    assert constraints[f"{EX}author"].classes == (f"{EX}Person",)
+    assert constraints[f"{EX}identifier"].node_classes == (f"{EX}Identifier",)
+    assert constraints[f"{EX}identifier"].conditions == ((f"{EX}scheme", f"{EX}doi"),)
+    assert constraints[f"{EX}date"].or_members == (
+        OrMember((f"{XSD}date",), (), (), ()),
+        OrMember((f"{XSD}gYear",), (), (), ()),
+    )
+    assert constraints[f"{EX}role"].has_values == (f"{EX}editor",)
+    assert constraints[f"{EX}role"].min_counts == ("1",)
+
+
+def test_shape_lookups(index: ShaclIndex) -> None:
+    assert f"{EX}title" in index.shape_properties(f"{EX}ArticleShape")
+    assert not all(
+        constraint.path_is_iri
+        for constraint in index.property_constraints(f"{EX}ArticleShape")
+    )
+    assert index.has_value_constraints(f"{EX}ArticleShape") == [
+        (f"{EX}role", f"{EX}editor")
+    ]
+    assert index.object_class(f"{EX}ArticleShape", f"{EX}identifier") == (
+        f"{EX}Identifier"
+    )
+    assert index.object_class(f"{EX}ArticleShape", f"{EX}author") == f"{EX}Person"
+    assert index.object_class(f"{EX}ArticleShape", f"{EX}title") is None
+
+
+def test_constraints_are_found_through_the_classes(index: ShaclIndex) -> None:
+    constraints = index.constraints_for([f"{EX}Paper", f"{EX}Article"], f"{EX}title")
+
+    assert [constraint.shape for constraint in constraints] == [f"{EX}ArticleShape"]
+    assert index.constraints_for([f"{EX}Paper"], f"{EX}title") == []
+
+
+def test_each_graph_is_compiled_once() -> None:
+    graph = Graph().parse(data=SHAPES, format="turtle")
+
+    assert shacl_index_for(graph) is shacl_index_for(graph)
+    assert shacl_index_for(graph) is not shacl_index_for(Graph())
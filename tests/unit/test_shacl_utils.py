@@ -16,17 +16,20 @@ from rdflib import RDF, XSD, Graph, Literal, Namespace, URIRef
 from heritrace.utils.shacl_display import (
     ShaclProcessingContext,
     apply_display_rules_to_nested_shapes,
+    extract_shacl_form_fields,
     get_shape_target_class,
     process_query_results,
 )
+from heritrace.utils.shacl_index import compile_shacl_index
 from heritrace.utils.shacl_utils import (
+    FormFields,
     _find_entity_position_in_order_map,
     _get_shape_properties,
     determine_shape_for_classes,
     determine_shape_for_entity_triples,
-    extract_shacl_form_fields,
     get_entity_position_in_sequence,
     get_form_fields_from_shacl,
+    get_shape_discriminator,
 )
 from heritrace.utils.shacl_validation import validate_new_triple
 
@@ -144,9 +147,9 @@ class TestShaclUtils:
             ),
         ]
 
-    @patch("heritrace.utils.shacl_utils.extract_shacl_form_fields")
-    @patch("heritrace.utils.shacl_utils.process_nested_shapes")
-    @patch("heritrace.utils.shacl_utils.apply_display_rules")
+    @patch("heritrace.utils.shacl_utils.extract_form_field_keys")
+    @patch("heritrace.utils.shacl_utils.extract_entity_form_fields")
+    @patch("heritrace.utils.shacl_utils.order_entity_keys")
     @patch("heritrace.utils.shacl_utils.order_form_fields")
     def test_get_form_fields_from_shacl_early_return(
         self, mock_order, mock_apply, mock_process, mock_extract
@@ -532,10 +535,6 @@ class TestShaclUtils:
         # Simula che non ci sono tipi nel grafo dei dati
         mock_data_graph.triples.side_effect = lambda _triple_pattern: []
 
-        mock_shacl = MagicMock()
-        # Simula che la query SHACL non restituisce risultati (per semplificare il test)
-        mock_shacl.query.return_value = []
-
         with (
             patch(
                 "heritrace.utils.shacl_validation.fetch_data_graph_for_subject",
@@ -543,35 +542,29 @@ class TestShaclUtils:
             ),
             patch(
                 "heritrace.utils.shacl_validation.get_shacl_graph",
-                return_value=mock_shacl,
+                return_value=MagicMock(),
             ),
             patch("heritrace.utils.shacl_validation.len", return_value=1),
             patch(
                 "heritrace.utils.shacl_validation.get_custom_filter"
             ) as mock_custom_filter,
+            patch(
+                "heritrace.utils.shacl_validation._property_constraints",
+                return_value=[],
+            ) as mock_constraints,
         ):
             # Configura il mock per custom_filter
             mock_filter = MagicMock()
             mock_filter.human_readable_predicate.return_value = "Human Readable"
             mock_custom_filter.return_value = mock_filter
 
-            # Verifica che entity_types venga convertito in lista
-            with patch(
-                "heritrace.utils.shacl_validation.isinstance",
-                side_effect=lambda obj, cls: (
-                    False if cls is list else isinstance(obj, cls)
-                ),
-            ):
-                validate_new_triple(
-                    subject, predicate, new_value, "create", None, entity_types
-                )
+            validate_new_triple(
+                subject, predicate, new_value, "create", None, entity_types
+            )
 
-                # Verifica che la query SHACL sia stata chiamata con entity_types
-                # convertito in lista
-                # Questo è difficile da testare direttamente, quindi verifichiamo che la
-                # funzione non generi errori
-                # e che la query SHACL sia stata chiamata
-                assert mock_shacl.query.called
+            # Verifica che i vincoli SHACL siano cercati con entity_types
+            # convertito in lista
+            mock_constraints.assert_called_once_with(predicate, [entity_types])
 
     def test_collect_inverse_types(self) -> None:
         """Test specifico per verificare la raccolta degli inverse types."""
@@ -695,30 +688,6 @@ class TestShaclUtils:
             f"inverse_type2 dovrebbe essere in inverse_types: {inverse_types}"
         )
 
-        # Mock per get_shacl_graph
-        mock_shacl = MagicMock()
-        mock_results = MagicMock()
-        mock_results.__iter__.return_value = []
-        mock_shacl.query.return_value = mock_results
-
-        # Creiamo una classe wrapper per intercettare la chiamata a query
-        class ShaclGraphWrapper:
-            def __init__(self, mock_shacl) -> None:
-                self.mock_shacl = mock_shacl
-                self.last_query = None
-                self.mock_results = MagicMock()
-                self.mock_results.__iter__.return_value = []
-
-            def query(self, query_string):
-                self.last_query = query_string
-                return self.mock_results
-
-            def __len__(self) -> int:
-                return 1
-
-        # Creiamo un wrapper per il grafo SHACL
-        shacl_wrapper = ShaclGraphWrapper(mock_shacl)
-
         with (
             patch(
                 "heritrace.utils.shacl_validation.fetch_data_graph_for_subject",
@@ -726,7 +695,7 @@ class TestShaclUtils:
             ),
             patch(
                 "heritrace.utils.shacl_validation.get_shacl_graph",
-                return_value=shacl_wrapper,
+                return_value=MagicMock(),
             ),
             patch("heritrace.utils.shacl_validation.len", return_value=1),
             patch(
@@ -736,6 +705,10 @@ class TestShaclUtils:
                 "heritrace.utils.shacl_validation.get_highest_priority_class",
                 return_value="http://example.org/DirectType",
             ),
+            patch(
+                "heritrace.utils.shacl_validation._property_constraints",
+                return_value=[],
+            ) as mock_constraints,
         ):
             # Configura il mock per custom_filter
             mock_filter = MagicMock()
@@ -745,29 +718,122 @@ class TestShaclUtils:
             # Chiama la funzione
             validate_new_triple(subject, predicate, new_value, "create")
 
-            # Verifica che la query SHACL sia stata eseguita
-            assert shacl_wrapper.last_query is not None
+            # Verifica che i vincoli siano cercati per il tipo diretto e per
+            # gli inverse types
+            mock_constraints.assert_called_once()
+            s_types = mock_constraints.call_args.args[1]
+            assert str(direct_type) in s_types
+            assert str(inverse_type1) in s_types
+            assert str(inverse_type2) in s_types
+
+
+JOURNAL_SHAPES = """
+@prefix sh: <http://www.w3.org/ns/shacl#> .
+@prefix schema: <http://schema.org/> .
+@prefix fabio: <http://purl.org/spar/fabio/> .
+@prefix dcterms: <http://purl.org/dc/terms/> .
+schema:JournalShape sh:targetClass fabio:Journal ;
+    sh:property [ sh:path dcterms:title ] .
+schema:IssueShape sh:targetClass fabio:JournalIssue ;
+    sh:property [ sh:path fabio:hasSequenceIdentifier ] .
+schema:SpecialIssueShape sh:targetClass fabio:JournalIssue ;
+    sh:property [ sh:path fabio:hasSequenceIdentifier ] , [ sh:path dcterms:title ] .
+"""
 
-            # Ottieni la query SPARQL dal wrapper
-            query_arg = shacl_wrapper.last_query
 
-            # Verifica che la query contenga VALUES ?type con tutti i tipi (diretto e
-            # inversi)
-            # Nella query SPARQL, i tipi vengono formattati come <URI>
-            assert f"<{direct_type}>" in query_arg, (
-                f"Il tipo diretto {direct_type} non è presente nella query"
-            )
+NESTED_SHAPES = """
+@prefix sh: <http://www.w3.org/ns/shacl#> .
+@prefix xsd: <http://www.w3.org/2001/XMLSchema#> .
+@prefix ex: <http://example.org/> .
 
-            # Estrai la sezione VALUES dalla query
-            values_section = query_arg.split("VALUES ?type {")[1].split("}")[0].strip()
+ex:ArticleShape a sh:NodeShape ;
+  sh:targetClass ex:Article ;
+  sh:property [ sh:path ex:title ; sh:datatype xsd:string ] ;
+  sh:property [ sh:path ex:author ; sh:node ex:PersonShape ] .
 
-            # Verifica che gli inverse types siano presenti nella sezione VALUES
-            assert f"<{inverse_type1}>" in values_section, (
-                f"L'inverse type {inverse_type1} non è presente nella query"
-            )
-            assert f"<{inverse_type2}>" in values_section, (
-                f"L'inverse type {inverse_type2} non è presente nella query"
-            )
+ex:BookShape a sh:NodeShape ;
+  sh:targetClass ex:Book ;
+  sh:property [ sh:path ex:author ; sh:node ex:PersonShape ] .
+
+ex:PersonShape a sh:NodeShape ;
+  sh:targetClass ex:Person ;
+  sh:property [ sh:path ex:name ; sh:datatype xsd:string ] .
+"""
+
+ARTICLE_KEY = ("http://example.org/Article", "http://example.org/ArticleShape")
+BOOK_KEY = ("http://example.org/Book", "http://example.org/BookShape")
+
+
+class TestFormFields:
+    """Test the lazily built form fields."""
+
+    @pytest.fixture
+    def app(self) -> Flask:
+        app = Flask(__name__)
+        app.config["DATASET_DB_URL"] = "http://example.org/sparql"
+        return app
+
+    @patch(
+        "heritrace.utils.shacl_utils.get_virtual_properties_for_entity",
+        return_value=[],
+    )
+    def test_fields_are_built_on_first_access(self, _mock_vp, app: Flask) -> None:
+        shacl = Graph().parse(data=NESTED_SHAPES, format="turtle")
+        form_fields = get_form_fields_from_shacl(shacl, None, app)
+
+        assert isinstance(form_fields, FormFields)
+        assert set(form_fields) == {
+            ARTICLE_KEY,
+            BOOK_KEY,
+            ("http://example.org/Person", "http://example.org/PersonShape"),
+        }
+        assert ARTICLE_KEY in form_fields
+        assert form_fields._fields == {}
+
+        article_fields = form_fields[ARTICLE_KEY]
+
+        assert list(form_fields._fields) == [ARTICLE_KEY]
+        assert form_fields[ARTICLE_KEY] is article_fields
+        author = article_fields["http://example.org/author"][0]
+        assert [field["uri"] for field in author["nestedShape"]] == [
+            "http://example.org/name"
+        ]
+        assert author["displayName"] == "author"
+
+    @patch(
+        "heritrace.utils.shacl_utils.get_virtual_properties_for_entity",
+        return_value=[],
+    )
+    def test_nested_shapes_are_shared(self, _mock_vp, app: Flask) -> None:
+        shacl = Graph().parse(data=NESTED_SHAPES, format="turtle")
+        form_fields = get_form_fields_from_shacl(shacl, None, app)
+
+        article_author = form_fields[ARTICLE_KEY]["http://example.org/author"][0]
+        book_author = form_fields[BOOK_KEY]["http://example.org/author"][0]
+
+        assert article_author["nestedShape"] is book_author["nestedShape"]
+
+    def test_unknown_entity(self, app: Flask) -> None:
+        shacl = Graph().parse(data=NESTED_SHAPES, format="turtle")
+        form_fields = get_form_fields_from_shacl(shacl, None, app)
+
+        assert ("http://example.org/Other", "http://example.org/Shape") not in (
+            form_fields
+        )
+        with pytest.raises(KeyError):
+            form_fields[("http://example.org/Other", "http://example.org/Shape")]
+
+    def test_display_rules_select_and_order_entities(self, app: Flask) -> None:
+        shacl = Graph().parse(data=NESTED_SHAPES, format="turtle")
+        display_rules = [
+            {"target": {"class": "http://example.org/Book"}},
+            {"target": {"shape": "http://example.org/ArticleShape"}},
+        ]
+
+        form_fields = get_form_fields_from_shacl(shacl, display_rules, app)
+
+        assert list(form_fields) == [BOOK_KEY, ARTICLE_KEY]
+        assert len(form_fields) == 2
 
 
 class TestDetermineShapeForEntityTriples:
@@ -807,11 +873,9 @@ class TestDetermineShapeForEntityTriples:
     @patch("heritrace.utils.shacl_utils.get_class_priority")
     def test_single_candidate_shape(self, _mock_get_priority, mock_get_shacl) -> None:
         """Test when only one candidate shape exists."""
-        mock_get_shacl.return_value = self.mock_shacl_graph
-
-        mock_result = MagicMock()
-        mock_result.shape = URIRef("http://schema.org/JournalShape")
-        self.mock_shacl_graph.query.return_value = [mock_result]
+        mock_get_shacl.return_value = Graph().parse(
+            data=JOURNAL_SHAPES, format="turtle"
+        )
 
         triples = [
             (URIRef("http://example.org/entity1"), RDF.type, FABIO.Journal),
@@ -824,9 +888,6 @@ class TestDetermineShapeForEntityTriples:
 
         result = determine_shape_for_entity_triples(triples)
 
-        assert self.mock_shacl_graph.query.call_count > 0
-        query_args = self.mock_shacl_graph.query.call_args[0][0]
-        assert str(FABIO.Journal) in query_args
         assert result == "http://schema.org/JournalShape"
 
     @patch("heritrace.utils.shacl_utils.get_shacl_graph")
@@ -839,16 +900,9 @@ class TestDetermineShapeForEntityTriples:
         Test distinguishing between SpecialIssueShape and IssueShape based on
         properties.
         """
-        mock_get_shacl.return_value = self.mock_shacl_graph
-
-        mock_issue_result = MagicMock()
-        mock_issue_result.shape = URIRef("http://schema.org/IssueShape")
-        mock_special_issue_result = MagicMock()
-        mock_special_issue_result.shape = URIRef("http://schema.org/SpecialIssueShape")
-        self.mock_shacl_graph.query.return_value = [
-            mock_issue_result,
-            mock_special_issue_result,
-        ]
+        mock_get_shacl.return_value = Graph().parse(
+            data=JOURNAL_SHAPES, format="turtle"
+        )
 
         def mock_properties_side_effect(_graph, shape_uri):
             if shape_uri == "http://schema.org/IssueShape":
@@ -895,8 +949,6 @@ class TestDetermineShapeForEntityTriples:
         """Test when no shapes are found for the entity classes."""
         mock_get_shacl.return_value = self.mock_shacl_graph
 
-        self.mock_shacl_graph.query.return_value = []
-
         triples = [
             (
                 URIRef("http://example.org/entity1"),
@@ -914,11 +966,9 @@ class TestDetermineShapeForEntityTriples:
         self, _mock_get_priority, mock_get_shacl
     ) -> None:
         """Test with actual RDFLib graph iterator (realistic scenario)."""
-        mock_get_shacl.return_value = self.mock_shacl_graph
-
-        mock_result = MagicMock()
-        mock_result.shape = URIRef("http://schema.org/JournalShape")
-        self.mock_shacl_graph.query.return_value = [mock_result]
+        mock_get_shacl.return_value = Graph().parse(
+            data=JOURNAL_SHAPES, format="turtle"
+        )
 
         test_graph = Graph()
         entity_uri = URIRef("http://example.org/entity1")
@@ -932,47 +982,115 @@ class TestDetermineShapeForEntityTriples:
         assert result == "http://schema.org/JournalShape"
 
 
-class TestGetShapeProperties:
-    """Test the _get_shape_properties helper function."""
+ROLE_SHAPES = """
+@prefix sh: <http://www.w3.org/ns/shacl#> .
+@prefix ex: <http://example.org/> .
+ex:AuthorShape sh:targetClass ex:Role ;
+    sh:property [ sh:path ex:agent ] , [ sh:path ex:withRole ; sh:hasValue ex:author ] .
+ex:EditorShape sh:targetClass ex:Role ;
+    sh:property [ sh:path ex:agent ] , [ sh:path ex:note ] ,
+        [ sh:path ex:withRole ; sh:hasValue ex:editor ] .
+ex:RoleShape sh:targetClass ex:Role ;
+    sh:property [ sh:path ex:agent ] , [ sh:path ex:note ] , [ sh:path ex:next ] .
+"""
 
-    def setup_method(self) -> None:
-        """Set up test fixtures."""
-        self.mock_shacl_graph = MagicMock()
 
-    def test_get_shape_properties(self) -> None:
-        """Test extracting properties from a SHACL shape."""
-        mock_results = []
-        properties = [
-            "http://purl.org/dc/terms/title",
-            "http://purl.org/dc/terms/abstract",
-            "http://purl.org/spar/fabio/hasSequenceIdentifier",
+class TestGetShapeDiscriminator:
+    """Test that shape discriminators agree with determine_shape_for_entity_triples."""
+
+    EX = Namespace("http://example.org/")
+
+    @pytest.fixture
+    def data(self) -> Graph:
+        ex = self.EX
+        graph = Graph()
+        optional_values = [
+            (ex.agent, ex.person),
+            (ex.note, Literal("note")),
+            (ex.next, ex.other),
+            (ex.withRole, ex.author),
+            (ex.withRole, ex.editor),
         ]
+        for index in range(2 ** len(optional_values)):
+            entity = ex[f"role{index}"]
+            graph.add((entity, RDF.type, ex.Role))
+            for position, (predicate, value) in enumerate(optional_values):
+                if index >> position & 1:
+                    graph.add((entity, predicate, value))
+        return graph
+
+    @pytest.mark.parametrize(
+        "priorities",
+        [
+            {},
+            {"http://example.org/RoleShape": 0},
+            {"http://example.org/AuthorShape": 2},
+        ],
+    )
+    @pytest.mark.parametrize("shape", ["AuthorShape", "EditorShape", "RoleShape"])
+    def test_selects_the_entities_assigned_to_the_shape(
+        self, data: Graph, shape: str, priorities: dict[str, int]
+    ) -> None:
+        shacl = Graph().parse(data=ROLE_SHAPES, format="turtle")
+        shape_uri = str(self.EX[shape])
 
-        for prop in properties:
-            mock_result = MagicMock()
-            mock_result.property = URIRef(prop)
-            mock_results.append(mock_result)
+        with (
+            patch("heritrace.utils.shacl_utils.get_shacl_graph", return_value=shacl),
+            patch(
+                "heritrace.utils.shacl_utils.get_class_priority",
+                side_effect=lambda entity_key: priorities.get(entity_key[1], 1),
+            ),
+        ):
+            expected = {
+                str(entity)
+                for entity in data.subjects(RDF.type, self.EX.Role)
+                if determine_shape_for_entity_triples(
+                    list(data.triples((entity, None, None)))
+                )
+                == shape_uri
+            }
+            discriminator = get_shape_discriminator(str(self.EX.Role), shape_uri)
 
-        self.mock_shacl_graph.query.return_value = mock_results
+        selected = {
+            str(row[0])
+            for row in data.query(
+                f"SELECT ?subject WHERE {{ ?subject a <{self.EX.Role}> . "
+                f"{discriminator} }}"
+            )
+        }
+        assert expected
+        assert selected == expected
 
-        result = _get_shape_properties(
-            self.mock_shacl_graph, "http://schema.org/TestShape"
-        )
+    def test_shape_of_another_class_has_no_discriminator(self) -> None:
+        shacl = Graph().parse(data=ROLE_SHAPES, format="turtle")
+
+        with patch("heritrace.utils.shacl_utils.get_shacl_graph", return_value=shacl):
+            discriminator = get_shape_discriminator(
+                "http://example.org/Agent", str(self.EX.AuthorShape)
+            )
 
-        expected = {
+        assert discriminator is None
+
+
+class TestGetShapeProperties:
+    """Test the _get_shape_properties helper function."""
+
+    def test_get_shape_properties(self) -> None:
+        """Test extracting properties from a SHACL shape."""
+        shacl = Graph().parse(data=JOURNAL_SHAPES, format="turtle")
+
+        result = _get_shape_properties(shacl, "http://schema.org/SpecialIssueShape")
+
+        assert result == {
             "http://purl.org/dc/terms/title",
-            "http://purl.org/dc/terms/abstract",
             "http://purl.org/spar/fabio/hasSequenceIdentifier",
         }
-        assert result == expected
 
     def test_get_shape_properties_empty(self) -> None:
         """Test when shape has no properties."""
-        self.mock_shacl_graph.query.return_value = []
+        shacl = Graph().parse(data=JOURNAL_SHAPES, format="turtle")
 
-        result = _get_shape_properties(
-            self.mock_shacl_graph, "http://schema.org/EmptyShape"
-        )
+        result = _get_shape_properties(shacl, "http://schema.org/EmptyShape")
         assert result == set()
 
 
@@ -1807,49 +1925,47 @@ class TestGetEntityPositionInSequence:
         assert result is None
 
 
-class TestShaclQueryMemoization:
-    """Tests for the per-graph memoization of static SHACL queries."""
+class TestShaclIndexMemoization:
+    """Tests for the per-graph compilation of the SHACL index."""
 
     @staticmethod
-    def _mock_graph_with_shape(shape_uri: str) -> MagicMock:
-        graph = MagicMock()
-        graph.__bool__ = MagicMock(return_value=True)
-        mock_result = MagicMock()
-        mock_result.shape = URIRef(shape_uri)
-        graph.query.return_value = [mock_result]
+    def _graph_with_shape(shape_uri: str) -> Graph:
+        graph = Graph()
+        graph.add((URIRef(shape_uri), SH.targetClass, FABIO.Journal))
         return graph
 
     @patch("heritrace.utils.shacl_utils.get_shacl_graph")
     @patch("heritrace.utils.shacl_utils.get_class_priority")
-    def test_repeated_calls_query_the_graph_once(
+    def test_repeated_calls_compile_the_graph_once(
         self, mock_get_priority, mock_get_shacl
     ) -> None:
         mock_get_priority.return_value = 1
-        graph = self._mock_graph_with_shape("http://schema.org/JournalShape")
-        mock_get_shacl.return_value = graph
+        mock_get_shacl.return_value = self._graph_with_shape(
+            "http://schema.org/JournalShape"
+        )
 
-        first = determine_shape_for_classes([str(FABIO.Journal)])
-        second = determine_shape_for_classes([str(FABIO.Journal)])
+        with patch(
+            "heritrace.utils.shacl_index.compile_shacl_index",
+            wraps=compile_shacl_index,
+        ) as mock_compile:
+            first = determine_shape_for_classes([str(FABIO.Journal)])
+            second = determine_shape_for_classes([str(FABIO.Journal)])
 
         assert first == "http://schema.org/JournalShape"
         assert second == "http://schema.org/JournalShape"
-        assert graph.query.call_count == 1
+        assert mock_compile.call_count == 1
 
     @patch("heritrace.utils.shacl_utils.get_shacl_graph")
     @patch("heritrace.utils.shacl_utils.get_class_priority")
-    def test_distinct_graphs_have_separate_caches(
+    def test_distinct_graphs_have_separate_indexes(
         self, mock_get_priority, mock_get_shacl
     ) -> None:
         mock_get_priority.return_value = 1
-        graph_a = self._mock_graph_with_shape("http://schema.org/ShapeA")
-        graph_b = self._mock_graph_with_shape("http://schema.org/ShapeB")
 
-        mock_get_shacl.return_value = graph_a
+        mock_get_shacl.return_value = self._graph_with_shape("http://schema.org/ShapeA")
         result_a = determine_shape_for_classes([str(FABIO.Journal)])
-        mock_get_shacl.return_value = graph_b
+        mock_get_shacl.return_value = self._graph_with_shape("http://schema.org/ShapeB")
         result_b = determine_shape_for_classes([str(FABIO.Journal)])
 
         assert result_a == "http://schema.org/ShapeA"
         assert result_b == "http://schema.org/ShapeB"
-        assert graph_a.query.call_count == 1
-        assert graph_b.query.call_count == 1
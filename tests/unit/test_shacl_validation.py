@@ -7,8 +7,35 @@ from unittest.mock import MagicMock, patch
 
 from rdflib import RDF, XSD, Graph, Literal, URIRef
 
+from heritrace.utils.shacl_index import shacl_index_for
 from heritrace.utils.shacl_utils import determine_shape_for_classes
-from heritrace.utils.shacl_validation import get_valid_predicates, validate_new_triple
+from heritrace.utils.shacl_validation import (
+    TripleChange,
+    TripleValidator,
+    get_valid_predicates,
+    validate_new_triple,
+    validate_triples,
+)
+
+EX = "http://example.org/"
+
+PERSON_SHAPES = f"""
+@prefix sh: <http://www.w3.org/ns/shacl#> .
+@prefix xsd: <http://www.w3.org/2001/XMLSchema#> .
+
+<{EX}PersonShape> a sh:NodeShape ;
+    sh:targetClass <{EX}Person> ;
+    sh:property [
+        sh:path <{EX}age> ;
+        sh:datatype xsd:integer ;
+        sh:maxCount 1 ;
+    ] ;
+    sh:property [
+        sh:path <{EX}name> ;
+        sh:datatype xsd:string ;
+        sh:minCount 1 ;
+    ] .
+"""
 
 
 class TestShaclValidation(unittest.TestCase):
@@ -210,3 +237,145 @@ class TestShaclValidation(unittest.TestCase):
         with patch("heritrace.utils.shacl_utils.get_shacl_graph", return_value=None):
             result = determine_shape_for_classes(class_list)
             assert result is None
+
+
+class TestTripleValidator(unittest.TestCase):
+    """Test the batch validation of triples."""
+
+    def setUp(self) -> None:
+        self.shacl = Graph().parse(data=PERSON_SHAPES, format="turtle")
+        self.stored = Graph()
+        for index in range(3):
+            person = URIRef(f"{EX}person/{index}")
+            self.stored.add((person, RDF.type, URIRef(f"{EX}Person")))
+            self.stored.add((person, URIRef(f"{EX}name"), Literal(f"Person {index}")))
+            self.stored.add(
+                (person, URIRef(f"{EX}age"), Literal(20 + index, datatype=XSD.integer))
+            )
+
+        custom_filter = MagicMock()
+        custom_filter.human_readable_predicate.side_effect = lambda uri, _key: str(uri)
+        patches = [
+            patch(
+                "heritrace.utils.shacl_validation.get_shacl_graph",
+                return_value=self.shacl,
+            ),
+            patch(
+                "heritrace.utils.shacl_validation.get_custom_filter",
+                return_value=custom_filter,
+            ),
+            patch(
+                "heritrace.utils.shacl_validation.get_highest_priority_class",
+                side_effect=lambda types: types[0] if types else None,
+            ),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _age_update(self, index: int, new_age: str) -> TripleChange:
+        return TripleChange(
+            URIRef(f"{EX}person/{index}"),
+            URIRef(f"{EX}age"),
+            new_age,
+            "update",
+            Literal(str(20 + index)),
+        )
+
+    def test_batch_reads_the_stored_state_once(self) -> None:
+        changes = [self._age_update(index, str(30 + index)) for index in range(3)]
+
+        with (
+            patch(
+                "heritrace.utils.shacl_validation.fetch_data_graph_for_subjects",
+                return_value=self.stored,
+            ) as mock_fetch_many,
+            patch(
+                "heritrace.utils.shacl_validation.fetch_data_graph_for_subject"
+            ) as mock_fetch_one,
+            patch(
+                "heritrace.utils.shacl_validation._property_constraints",
+                wraps=lambda predicate, s_types: shacl_index_for(
+                    self.shacl
+                ).constraints_for(s_types, predicate),
+            ) as mock_constraints,
+        ):
+            results = validate_triples(changes)
+
+        mock_fetch_many.assert_called_once()
+        mock_fetch_one.assert_not_called()
+        mock_constraints.assert_called_once()
+        assert [result.error for result in results] == ["", "", ""]
+        assert [result.new_value for result in results] == [
+            Literal(str(30 + index), datatype=XSD.integer) for index in range(3)
+        ]
+        assert results[1].old_value == Literal(21, datatype=XSD.integer)
+
+    def test_batch_returns_every_error(self) -> None:
+        changes = [
+            self._age_update(0, "not a number"),
+            self._age_update(1, "31"),
+            TripleChange(
+                URIRef(f"{EX}person/2"),
+                URIRef(f"{EX}age"),
+                "40",
+                "create",
+            ),
+        ]
+
+        with patch(
+            "heritrace.utils.shacl_validation.fetch_data_graph_for_subjects",
+            return_value=self.stored,
+        ):
+            validator = TripleValidator()
+            results = validator.validate_all(changes)
+
+        assert results[0].error
+        assert "not a number" in results[0].error
+        assert results[1].error == ""
+        assert "at most 1" in results[2].error
+        assert validator.errors == [results[0].error, results[2].error]
+
+    def test_planned_changes_are_validated_with_the_first_one(self) -> None:
+        changes = [self._age_update(index, str(30 + index)) for index in range(3)]
+
+        with patch(
+            "heritrace.utils.shacl_validation.fetch_data_graph_for_subjects",
+            return_value=self.stored,
+        ) as mock_fetch_many:
+            validator = TripleValidator()
+            validator.plan(changes)
+            first = validator.validate(changes[0])
+            last = validator.validate(changes[2])
+
+        mock_fetch_many.assert_called_once()
+        assert first.error == ""
+        assert last.new_value == Literal("32", datatype=XSD.integer)
+
+    def test_new_subjects_are_not_fetched(self) -> None:
+        subject = URIRef(f"{EX}person/new")
+
+        with (
+            patch(
+                "heritrace.utils.shacl_validation.fetch_data_graph_for_subjects"
+            ) as mock_fetch_many,
+            patch(
+                "heritrace.utils.shacl_validation.fetch_data_graph_for_subject"
+            ) as mock_fetch_one,
+        ):
+            validator = TripleValidator()
+            validator.add_new_subject(subject)
+            result = validator.validate(
+                TripleChange(
+                    subject,
+                    URIRef(f"{EX}name"),
+                    "Ada",
+                    "create",
+                    entity_types=f"{EX}Person",
+                )
+            )
+
+        mock_fetch_many.assert_not_called()
+        mock_fetch_one.assert_not_called()
+        assert result.error == ""
+        assert result.new_value == Literal("Ada", datatype=XSD.string)
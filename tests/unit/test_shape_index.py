@@ -0,0 +1,188 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+from unittest.mock import MagicMock, call
+
+import pytest
+from redis import RedisError
+
+from heritrace.services.shape_index import RDF_TYPE, ShapeIndex
+
+ROLE = "http://example.org/Role"
+AGENT = "http://example.org/Agent"
+AUTHOR_SHAPE = "http://example.org/AuthorShape"
+EDITOR_SHAPE = "http://example.org/EditorShape"
+ROLE_1 = "http://example.org/role/1"
+ROLE_2 = "http://example.org/role/2"
+
+
+@pytest.fixture
+def mock_redis():
+    """Create a mock Redis client whose pipeline is the client itself."""
+    redis_mock = MagicMock()
+    redis_mock.get.return_value = "current"
+    redis_mock.pipeline.return_value = redis_mock
+    redis_mock.execute.return_value = []
+    return redis_mock
+
+
+@pytest.fixture
+def shape_index(mock_redis) -> ShapeIndex:
+    return ShapeIndex(
+        mock_redis,
+        classify=lambda triples: (
+            AUTHOR_SHAPE
+            if any(str(o) == "http://example.org/author" for _s, _p, o in triples)
+            else EDITOR_SHAPE
+        ),
+    )
+
+
+def test_build_switches_to_the_new_generation_once_complete(
+    shape_index: ShapeIndex, mock_redis
+) -> None:
+    mock_redis.execute.side_effect = [[], ["previous", 1]]
+    mock_redis.smembers.return_value = {AUTHOR_SHAPE}
+
+    indexed = shape_index.build(ROLE, [{ROLE_1: AUTHOR_SHAPE, ROLE_2: None}])
+
+    assert indexed == 2
+    generation = mock_redis.set.call_args.args[1]
+    mock_redis.set.assert_called_once_with(f"shape_index:building:{ROLE}", generation)
+    mock_redis.zadd.assert_called_once_with(
+        f"shape_index:{generation}:members:{ROLE}:{AUTHOR_SHAPE}", {ROLE_1: 0}
+    )
+    mock_redis.hset.assert_called_once_with(
+        f"shape_index:{generation}:shape:{ROLE}",
+        mapping={ROLE_1: AUTHOR_SHAPE, ROLE_2: ""},
+    )
+    mock_redis.getset.assert_called_once_with(
+        f"shape_index:generation:{ROLE}", generation
+    )
+    mock_redis.delete.assert_has_calls(
+        [
+            call(f"shape_index:building:{ROLE}"),
+            call(
+                f"shape_index:previous:shape:{ROLE}",
+                f"shape_index:previous:shapes:{ROLE}",
+                f"shape_index:previous:members:{ROLE}:{AUTHOR_SHAPE}",
+            ),
+        ]
+    )
+
+
+def test_counts_of_a_class_not_indexed_are_unknown(
+    shape_index: ShapeIndex, mock_redis
+) -> None:
+    mock_redis.get.return_value = None
+
+    assert shape_index.counts(ROLE) is None
+    assert shape_index.shapes_of(ROLE, [ROLE_1]) is None
+    assert (
+        shape_index.members(
+            ROLE, AUTHOR_SHAPE, after=None, skip=0, limit=10, descending=False
+        )
+        is None
+    )
+
+
+def test_counts_are_read_from_the_members_of_every_shape(
+    shape_index: ShapeIndex, mock_redis
+) -> None:
+    mock_redis.smembers.return_value = {EDITOR_SHAPE, AUTHOR_SHAPE}
+    mock_redis.execute.return_value = [3, 0]
+
+    assert shape_index.counts(ROLE) == {AUTHOR_SHAPE: 3, EDITOR_SHAPE: 0}
+    mock_redis.zcard.assert_has_calls(
+        [
+            call(f"shape_index:current:members:{ROLE}:{AUTHOR_SHAPE}"),
+            call(f"shape_index:current:members:{ROLE}:{EDITOR_SHAPE}"),
+        ]
+    )
+
+
+def test_shapes_of_returns_only_indexed_entities(
+    shape_index: ShapeIndex, mock_redis
+) -> None:
+    mock_redis.hmget.return_value = [AUTHOR_SHAPE, "", None]
+
+    shapes = shape_index.shapes_of(ROLE, [ROLE_1, ROLE_2, "http://example.org/new"])
+
+    assert shapes == {ROLE_1: AUTHOR_SHAPE, ROLE_2: None}
+
+
+@pytest.mark.parametrize(
+    ("descending", "method", "bounds"),
+    [
+        (False, "zrangebylex", (f"({ROLE_1}", "+")),
+        (True, "zrevrangebylex", (f"({ROLE_1}", "-")),
+    ],
+)
+def test_members_are_paged_by_uri_after_the_cursor(
+    shape_index: ShapeIndex,
+    mock_redis,
+    method: str,
+    bounds: tuple[str, str],
+    *,
+    descending: bool,
+) -> None:
+    getattr(mock_redis, method).return_value = [ROLE_2]
+
+    page = shape_index.members(
+        ROLE, AUTHOR_SHAPE, after=ROLE_1, skip=0, limit=5, descending=descending
+    )
+
+    assert page == [ROLE_2]
+    getattr(mock_redis, method).assert_called_once_with(
+        f"shape_index:current:members:{ROLE}:{AUTHOR_SHAPE}", *bounds, 0, 5
+    )
+
+
+def test_saves_move_reclassified_entities_and_drop_removed_ones(
+    shape_index: ShapeIndex, mock_redis
+) -> None:
+    mock_redis.mget.return_value = [None, None, "current", None]
+    mock_redis.hmget.return_value = [EDITOR_SHAPE, AUTHOR_SHAPE]
+
+    shape_index.record_saves(
+        {ROLE_1: {ROLE}, ROLE_2: {ROLE}},
+        {
+            ROLE_1: [
+                (ROLE_1, RDF_TYPE, ROLE),
+                (ROLE_1, "http://example.org/withRole", "http://example.org/author"),
+            ],
+            ROLE_2: [(ROLE_2, RDF_TYPE, AGENT)],
+        },
+    )
+
+    mock_redis.mget.assert_called_once_with(
+        [
+            f"shape_index:generation:{AGENT}",
+            f"shape_index:building:{AGENT}",
+            f"shape_index:generation:{ROLE}",
+            f"shape_index:building:{ROLE}",
+        ]
+    )
+    mock_redis.hmget.assert_called_once_with(
+        f"shape_index:current:shape:{ROLE}", [ROLE_1, ROLE_2]
+    )
+    mock_redis.zrem.assert_has_calls(
+        [
+            call(f"shape_index:current:members:{ROLE}:{AUTHOR_SHAPE}", ROLE_2),
+            call(f"shape_index:current:members:{ROLE}:{EDITOR_SHAPE}", ROLE_1),
+        ]
+    )
+    mock_redis.hdel.assert_called_once_with(f"shape_index:current:shape:{ROLE}", ROLE_2)
+    mock_redis.zadd.assert_called_once_with(
+        f"shape_index:current:members:{ROLE}:{AUTHOR_SHAPE}", {ROLE_1: 0}
+    )
+
+
+def test_redis_errors_fall_back_to_unknown(shape_index: ShapeIndex, mock_redis) -> None:
+    mock_redis.get.side_effect = RedisError("down")
+    mock_redis.mget.side_effect = RedisError("down")
+
+    assert shape_index.counts(ROLE) is None
+    shape_index.record(ROLE, {ROLE_1: AUTHOR_SHAPE})
+    mock_redis.hset.assert_not_called()
@@ -0,0 +1,400 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+import threading
+from collections.abc import Iterator
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from heritrace.sparql import resolve_thread_wrapper
+from heritrace.utils import shape_membership
+from heritrace.utils.shape_membership import (
+    count_shape,
+    count_shape_members,
+    count_shapes,
+    fetch_entity_shapes,
+    get_shape_membership,
+    has_foreign_shaped_entities,
+    lookup_entity_shapes,
+    page_shape_members,
+)
+
+ROLE = "http://example.org/Role"
+AUTHOR_SHAPE = "http://example.org/AuthorShape"
+EDITOR_SHAPE = "http://example.org/EditorShape"
+RDF_TYPE = "http://www.w3.org/1999/02/22-rdf-syntax-ns#type"
+
+
+def _subjects(*subjects: str) -> dict:
+    return {"results": {"bindings": [{"subject": {"value": s}} for s in subjects]}}
+
+
+def _triples(*triples: tuple[str, str, str]) -> dict:
+    return {
+        "results": {
+            "bindings": [
+                {"subject": {"value": s}, "p": {"value": p}, "o": {"value": o}}
+                for s, p, o in triples
+            ]
+        }
+    }
+
+
+@pytest.fixture
+def mock_sparql() -> Iterator[MagicMock]:
+    with (
+        patch.object(
+            shape_membership,
+            "_shape_memberships",
+            shape_membership._ShapeMemberships(),  # noqa: SLF001
+        ),
+        patch("heritrace.utils.shape_membership.get_sparql") as mock_get_sparql,
+    ):
+        yield mock_get_sparql.return_value
+
+
+@pytest.fixture
+def shape_by_role() -> Iterator[MagicMock]:
+    with patch(
+        "heritrace.utils.shape_membership.determine_shape_for_entity_triples",
+        side_effect=lambda triples: (
+            AUTHOR_SHAPE
+            if any(o == "http://example.org/author" for _s, _p, o in triples)
+            else EDITOR_SHAPE
+        ),
+    ) as mock_determine:
+        yield mock_determine
+
+
+@pytest.mark.usefixtures("shape_by_role")
+def test_fetch_entity_shapes_classifies_entities_from_their_triples(
+    mock_sparql: MagicMock,
+) -> None:
+    mock_sparql.query.return_value.convert.return_value = _triples(
+        ("http://example.org/role/1", RDF_TYPE, ROLE),
+        ("http://example.org/role/1", "http://example.org/withRole", "author"),
+        ("http://example.org/role/2", RDF_TYPE, ROLE),
+        (
+            "http://example.org/role/2",
+            "http://example.org/withRole",
+            "http://example.org/author",
+        ),
+    )
+
+    shapes = fetch_entity_shapes(
+        ROLE, ["http://example.org/role/1", "http://example.org/role/2"]
+    )
+
+    assert shapes == {
+        "http://example.org/role/1": EDITOR_SHAPE,
+        "http://example.org/role/2": AUTHOR_SHAPE,
+    }
+    query = mock_sparql.setQuery.call_args.args[0]
+    assert (
+        "VALUES ?subject { <http://example.org/role/1> <http://example.org/role/2> }"
+        in query
+    )
+
+
+def test_fetch_entity_shapes_without_subjects_skips_the_query(
+    mock_sparql: MagicMock,
+) -> None:
+    assert fetch_entity_shapes(ROLE, []) == {}
+    mock_sparql.query.assert_not_called()
+
+
+@pytest.mark.usefixtures("shape_by_role")
+def test_membership_index_is_built_in_chunks_and_reused(
+    mock_sparql: MagicMock,
+) -> None:
+    mock_sparql.query.return_value.convert.side_effect = [
+        _subjects("http://example.org/role/1", "http://example.org/role/2"),
+        _triples(
+            ("http://example.org/role/1", RDF_TYPE, ROLE),
+            ("http://example.org/role/2", RDF_TYPE, ROLE),
+        ),
+        _subjects("http://example.org/role/3"),
+        _triples(
+            (
+                "http://example.org/role/3",
+                "http://example.org/withRole",
+                "http://example.org/author",
+            )
+        ),
+    ]
+
+    with patch.object(shape_membership, "SHAPE_MEMBERSHIP_CHUNK_SIZE", 2):
+        membership = get_shape_membership(ROLE, wait=True)
+        again = get_shape_membership(ROLE)
+
+    assert membership == {
+        "http://example.org/role/1": EDITOR_SHAPE,
+        "http://example.org/role/2": EDITOR_SHAPE,
+        "http://example.org/role/3": AUTHOR_SHAPE,
+    }
+    assert again is membership
+    assert mock_sparql.query.call_count == 4
+    second_chunk = mock_sparql.setQuery.call_args_list[2].args[0]
+    assert 'FILTER(STR(?subject) > "http://example.org/role/2")' in second_chunk
+    assert "LIMIT 2" in second_chunk
+
+
+@pytest.mark.usefixtures("shape_by_role")
+def test_membership_index_is_built_off_the_request_path(
+    mock_sparql: MagicMock,
+) -> None:
+    mock_sparql.query.return_value.convert.side_effect = [
+        _subjects("http://example.org/role/1"),
+        _triples(("http://example.org/role/1", RDF_TYPE, ROLE)),
+    ]
+    started: list[threading.Thread] = []
+    start = threading.Thread.start
+
+    def record_start(thread: threading.Thread) -> None:
+        started.append(thread)
+        start(thread)
+
+    # Holding the build lock keeps the build waiting until both reads are done.
+    with (
+        patch.object(threading.Thread, "start", record_start),
+        shape_membership._shape_memberships.build_lock,  # noqa: SLF001
+    ):
+        assert get_shape_membership(ROLE) is None
+        assert get_shape_membership(ROLE) is None
+    for thread in started:
+        thread.join()
+
+    assert len(started) == 1
+    assert get_shape_membership(ROLE) == {"http://example.org/role/1": EDITOR_SHAPE}
+
+
+@pytest.mark.usefixtures("shape_by_role")
+def test_background_build_does_not_share_the_request_wrapper() -> None:
+    shared = MagicMock()
+    private = shared.copy.return_value
+    private.query.return_value.convert.side_effect = [
+        _subjects("http://example.org/role/1"),
+        _triples(("http://example.org/role/1", RDF_TYPE, ROLE)),
+    ]
+    started: list[threading.Thread] = []
+    start = threading.Thread.start
+
+    def record_start(thread: threading.Thread) -> None:
+        started.append(thread)
+        start(thread)
+
+    with (
+        patch.object(
+            shape_membership,
+            "_shape_memberships",
+            shape_membership._ShapeMemberships(),  # noqa: SLF001
+        ),
+        patch(
+            "heritrace.utils.shape_membership.get_sparql",
+            side_effect=lambda: resolve_thread_wrapper(shared),
+        ),
+        patch.object(threading.Thread, "start", record_start),
+    ):
+        with shape_membership._shape_memberships.build_lock:  # noqa: SLF001
+            assert get_shape_membership(ROLE) is None
+            # A request queries while the membership is being built.
+            request_sparql = shape_membership.get_sparql()
+            request_sparql.setQuery("SELECT ?request WHERE {}")
+        for thread in started:
+            thread.join()
+        membership = get_shape_membership(ROLE)
+
+    assert request_sparql is shared
+    shared.setQuery.assert_called_once_with("SELECT ?request WHERE {}")
+    shared.query.assert_not_called()
+    assert private.query.call_count == 2
+    assert membership == {"http://example.org/role/1": EDITOR_SHAPE}
+
+
+def test_expired_membership_is_served_while_rebuilt(mock_sparql: MagicMock) -> None:
+    stale = {"http://example.org/role/1": EDITOR_SHAPE}
+    shape_membership._store(  # noqa: SLF001
+        shape_membership._shape_memberships.indexes,  # noqa: SLF001
+        ROLE,
+        shape_membership._Membership.of(stale),  # noqa: SLF001
+    )
+
+    with (
+        patch.object(shape_membership, "SHAPE_MEMBERSHIP_TTL_SECONDS", 0),
+        patch.object(shape_membership.threading, "Thread") as mock_thread,
+    ):
+        assert get_shape_membership(ROLE) == stale
+
+    mock_thread.return_value.start.assert_called_once()
+    mock_sparql.query.assert_not_called()
+
+
+def test_unindexed_shape_is_not_counted_or_paged_before_its_membership(
+    mock_sparql: MagicMock,
+) -> None:
+    with (
+        patch("heritrace.utils.shape_membership.get_shape_index", return_value=None),
+        patch(
+            "heritrace.utils.shape_membership.get_shape_discriminator",
+            return_value=None,
+        ),
+        patch.object(shape_membership.threading, "Thread"),
+    ):
+        assert count_shape(ROLE, AUTHOR_SHAPE) is None
+        assert (
+            page_shape_members(
+                ROLE, AUTHOR_SHAPE, after=None, skip=0, limit=2, descending=False
+            )
+            is None
+        )
+
+    mock_sparql.query.assert_not_called()
+
+
+def test_member_count_is_cached(mock_sparql: MagicMock) -> None:
+    mock_sparql.query.return_value.convert.return_value = {
+        "results": {"bindings": [{"count": {"value": "7"}}]}
+    }
+    discriminator = "FILTER(true)"
+
+    assert count_shape_members(ROLE, AUTHOR_SHAPE, discriminator) == 7
+    assert count_shape_members(ROLE, AUTHOR_SHAPE, discriminator) == 7
+    mock_sparql.query.assert_called_once()
+    assert discriminator in mock_sparql.setQuery.call_args.args[0]
+
+
+def test_foreign_shaped_entities_are_looked_up_once(mock_sparql: MagicMock) -> None:
+    mock_sparql.query.return_value.convert.return_value = _subjects(
+        "http://example.org/role/1"
+    )
+
+    with patch(
+        "heritrace.utils.shape_membership.get_shaped_classes",
+        return_value={ROLE, "http://example.org/Agent"},
+    ):
+        assert has_foreign_shaped_entities(ROLE)
+        assert has_foreign_shaped_entities(ROLE)
+
+    mock_sparql.query.assert_called_once()
+    query = mock_sparql.setQuery.call_args.args[0]
+    assert "VALUES ?otherClass { <http://example.org/Agent> }" in query
+
+
+def test_no_other_shaped_class_needs_no_query(mock_sparql: MagicMock) -> None:
+    with patch(
+        "heritrace.utils.shape_membership.get_shaped_classes", return_value={ROLE}
+    ):
+        assert not has_foreign_shaped_entities(ROLE)
+
+    mock_sparql.query.assert_not_called()
+
+
+def test_shape_counts_are_read_from_the_shape_index() -> None:
+    shape_index = MagicMock()
+    shape_index.counts.return_value = {AUTHOR_SHAPE: 3, EDITOR_SHAPE: 0}
+
+    with patch(
+        "heritrace.utils.shape_membership.get_shape_index", return_value=shape_index
+    ):
+        assert count_shapes(ROLE) == {AUTHOR_SHAPE: 3}
+        assert count_shape(ROLE, EDITOR_SHAPE) == 0
+
+
+def test_unindexed_shape_counts_use_discriminators_when_available(
+    mock_sparql: MagicMock,
+) -> None:
+    mock_sparql.query.return_value.convert.return_value = {
+        "results": {"bindings": [{"count": {"value": "4"}}]}
+    }
+
+    with (
+        patch("heritrace.utils.shape_membership.get_shape_index", return_value=None),
+        patch(
+            "heritrace.utils.shape_membership.get_shapes_for_class",
+            return_value=[AUTHOR_SHAPE],
+        ),
+        patch(
+            "heritrace.utils.shape_membership.get_shape_discriminator",
+            return_value="FILTER(true)",
+        ),
+        patch(
+            "heritrace.utils.shape_membership.has_foreign_shaped_entities",
+            return_value=False,
+        ),
+    ):
+        assert count_shapes(ROLE) == {AUTHOR_SHAPE: 4}
+
+
+@pytest.mark.usefixtures("shape_by_role")
+def test_entities_missing_from_the_index_are_classified_and_recorded(
+    mock_sparql: MagicMock,
+) -> None:
+    shape_index = MagicMock()
+    shape_index.shapes_of.return_value = {"http://example.org/role/1": EDITOR_SHAPE}
+    mock_sparql.query.return_value.convert.return_value = _triples(
+        (
+            "http://example.org/role/2",
+            "http://example.org/withRole",
+            "http://example.org/author",
+        )
+    )
+
+    with patch(
+        "heritrace.utils.shape_membership.get_shape_index", return_value=shape_index
+    ):
+        shapes = lookup_entity_shapes(
+            ROLE, ["http://example.org/role/1", "http://example.org/role/2"]
+        )
+
+    assert shapes == {
+        "http://example.org/role/1": EDITOR_SHAPE,
+        "http://example.org/role/2": AUTHOR_SHAPE,
+    }
+    shape_index.record.assert_called_once_with(
+        ROLE, {"http://example.org/role/2": AUTHOR_SHAPE}
+    )
+
+
+@pytest.mark.parametrize(
+    ("descending", "after", "skip", "expected"),
+    [
+        (False, None, 1, ["http://example.org/role/3", "http://example.org/role/5"]),
+        (False, "http://example.org/role/3", 0, ["http://example.org/role/5"]),
+        (True, None, 1, ["http://example.org/role/3", "http://example.org/role/1"]),
+        (
+            True,
+            "http://example.org/role/5",
+            0,
+            ["http://example.org/role/3", "http://example.org/role/1"],
+        ),
+    ],
+)
+def test_unindexed_members_are_paged_from_the_membership(
+    after: str | None, skip: int, expected: list[str], *, descending: bool
+) -> None:
+    membership = {
+        f"http://example.org/role/{index}": (
+            AUTHOR_SHAPE if index % 2 else EDITOR_SHAPE
+        )
+        for index in range(7)
+    }
+
+    with (
+        patch("heritrace.utils.shape_membership.get_shape_index", return_value=None),
+        patch(
+            "heritrace.utils.shape_membership._get_membership",
+            return_value=shape_membership._Membership.of(membership),  # noqa: SLF001
+        ),
+    ):
+        page = page_shape_members(
+            ROLE,
+            AUTHOR_SHAPE,
+            after=after,
+            skip=skip,
+            limit=2,
+            descending=descending,
+        )
+
+    assert page == expected
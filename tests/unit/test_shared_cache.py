@@ -0,0 +1,208 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+import json
+import time
+from collections.abc import Callable
+from unittest.mock import MagicMock, patch
+
+import pytest
+from redis import RedisError
+
+from heritrace.services.shared_cache import SharedCache
+from heritrace.sparql import SPARQLWrapperWithRetry, resolve_thread_wrapper
+
+VALUE_KEY = "shared_cache:value:available_classes"
+
+
+def _entry(value: object, age: float) -> str:
+    return json.dumps({"value": value, "computed_at": time.time() - age})
+
+
+def _wait_until(condition: Callable[[], bool]) -> None:
+    deadline = time.monotonic() + 5
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def mock_redis():
+    """Create a mock Redis client whose locks are free."""
+    redis_mock = MagicMock()
+    redis_mock.get.return_value = None
+    redis_mock.lock.return_value.acquire.return_value = True
+    return redis_mock
+
+
+@pytest.fixture
+def shared_cache(mock_redis) -> SharedCache:
+    return SharedCache(mock_redis, max_age=60)
+
+
+def test_missing_value_is_computed_and_published(
+    shared_cache: SharedCache, mock_redis
+) -> None:
+    assert shared_cache.get("available_classes", lambda: ["Person"]) == ["Person"]
+
+    key, raw_entry = mock_redis.set.call_args.args
+    assert key == VALUE_KEY
+    assert json.loads(raw_entry)["value"] == ["Person"]
+    mock_redis.lock.assert_called_once_with(
+        "shared_cache:lock:available_classes", timeout=300, blocking=False
+    )
+    mock_redis.lock.return_value.release.assert_called_once()
+
+
+def test_fresh_value_is_served_without_computing(
+    shared_cache: SharedCache, mock_redis
+) -> None:
+    mock_redis.get.return_value = _entry(["Person"], age=1)
+    compute = MagicMock()
+
+    assert shared_cache.get("available_classes", compute) == ["Person"]
+    compute.assert_not_called()
+    mock_redis.lock.assert_not_called()
+
+
+def test_stale_value_is_served_while_refreshing_in_the_background(
+    shared_cache: SharedCache, mock_redis
+) -> None:
+    mock_redis.get.return_value = _entry(["Person"], age=61)
+
+    assert shared_cache.get("available_classes", lambda: ["Document"]) == ["Person"]
+
+    _wait_until(lambda: mock_redis.lock.return_value.release.called)
+    assert json.loads(mock_redis.set.call_args.args[1])["value"] == ["Document"]
+
+
+def test_stale_value_is_refreshed_by_one_worker_only(
+    shared_cache: SharedCache, mock_redis
+) -> None:
+    mock_redis.get.return_value = _entry(["Person"], age=61)
+    mock_redis.lock.return_value.acquire.return_value = False
+    compute = MagicMock()
+
+    assert shared_cache.get("available_classes", compute) == ["Person"]
+    compute.assert_not_called()
+
+
+def test_missing_value_computed_elsewhere_is_awaited(
+    shared_cache: SharedCache, mock_redis
+) -> None:
+    mock_redis.get.side_effect = [None, None, _entry(["Person"], age=0)]
+    mock_redis.lock.return_value.acquire.return_value = False
+    compute = MagicMock()
+
+    with patch("heritrace.services.shared_cache.SHARED_CACHE_POLL_INTERVAL", 0):
+        assert shared_cache.get("available_classes", compute) == ["Person"]
+
+    compute.assert_not_called()
+    mock_redis.set.assert_not_called()
+
+
+def test_wait_for_another_worker_is_bounded(mock_redis) -> None:
+    shared_cache = SharedCache(mock_redis, max_age=60, wait_timeout=0)
+    mock_redis.lock.return_value.acquire.return_value = False
+    compute = MagicMock(return_value=["Person"])
+
+    assert shared_cache.get("available_classes", compute) == ["Person"]
+    assert shared_cache.get("available_classes", compute) == ["Person"]
+
+    compute.assert_called_once()
+    mock_redis.set.assert_not_called()
+
+
+def test_refresh_publishes_in_the_background(
+    shared_cache: SharedCache, mock_redis
+) -> None:
+    shared_cache.refresh("available_classes", lambda: ["Person"])
+
+    _wait_until(lambda: mock_redis.set.called)
+    assert json.loads(mock_redis.set.call_args.args[1])["value"] == ["Person"]
+
+
+def test_background_refresh_does_not_share_the_request_wrapper(
+    shared_cache: SharedCache, mock_redis
+) -> None:
+    shared = SPARQLWrapperWithRetry("http://example.org/sparql")
+    used: list[SPARQLWrapperWithRetry] = []
+
+    def compute() -> list[str]:
+        used.append(resolve_thread_wrapper(shared))
+        return ["Person"]
+
+    shared_cache.refresh("available_classes", compute)
+    _wait_until(lambda: mock_redis.set.called)
+
+    assert resolve_thread_wrapper(shared) is shared
+    assert used[0] is not shared
+
+
+def test_refresh_under_way_elsewhere_is_not_repeated(
+    shared_cache: SharedCache, mock_redis
+) -> None:
+    mock_redis.lock.return_value.acquire.return_value = False
+    compute = MagicMock(return_value=["Person"])
+
+    shared_cache.refresh("available_classes", compute)
+
+    compute.assert_not_called()
+
+
+def test_unreachable_redis_falls_back_to_a_local_copy(
+    shared_cache: SharedCache, mock_redis
+) -> None:
+    mock_redis.get.side_effect = RedisError("down")
+    compute = MagicMock(return_value=["Person"])
+
+    assert shared_cache.get("available_classes", compute) == ["Person"]
+    assert shared_cache.get("available_classes", compute) == ["Person"]
+    compute.assert_called_once()
+
+
+def test_task_runs_once_and_records_its_duration(
+    shared_cache: SharedCache, mock_redis
+) -> None:
+    mock_redis.exists.return_value = 0
+    task = MagicMock()
+
+    assert shared_cache.run_once("startup_warm_up", task, validity=600)
+
+    task.assert_called_once()
+    key, _duration = mock_redis.set.call_args.args
+    assert key == "shared_cache:run:startup_warm_up"
+    assert mock_redis.set.call_args.kwargs == {"ex": 600}
+    mock_redis.lock.return_value.release.assert_called_once()
+
+
+@pytest.mark.parametrize(("recorded", "locked"), [(1, False), (0, True)])
+def test_task_run_or_running_elsewhere_is_skipped(
+    shared_cache: SharedCache, mock_redis, recorded: int, *, locked: bool
+) -> None:
+    mock_redis.exists.return_value = recorded
+    mock_redis.lock.return_value.acquire.return_value = not locked
+    task = MagicMock()
+
+    assert not shared_cache.run_once("startup_warm_up", task, validity=600)
+    task.assert_not_called()
+
+
+def test_task_runs_when_redis_is_unreachable(
+    shared_cache: SharedCache, mock_redis
+) -> None:
+    mock_redis.exists.side_effect = RedisError("down")
+    task = MagicMock()
+
+    assert shared_cache.run_once("startup_warm_up", task, validity=600)
+    task.assert_called_once()
+
+
+def test_last_run_reports_the_recorded_duration(
+    shared_cache: SharedCache, mock_redis
+) -> None:
+    mock_redis.get.return_value = "12.5"
+
+    assert shared_cache.last_run("startup_warm_up") == 12.5
+    mock_redis.get.assert_called_once_with("shared_cache:run:startup_warm_up")
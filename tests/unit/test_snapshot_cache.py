@@ -0,0 +1,93 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+import json
+from unittest.mock import MagicMock
+
+import pytest
+from redis import RedisError
+
+from heritrace.services.snapshot_cache import SnapshotCache
+
+ENTITY = "http://example.org/br/1"
+SNAPSHOT_1 = f"{ENTITY}/prov/se/1"
+SNAPSHOT_11 = f"{ENTITY}/prov/se/11"
+TITLE = (f"<{ENTITY}>", "<http://purl.org/dc/terms/title>", '"Title"')
+
+
+@pytest.fixture
+def mock_redis():
+    """Create a mock Redis client whose pipeline is the client itself."""
+    redis_mock = MagicMock()
+    redis_mock.pipeline.return_value = redis_mock
+    return redis_mock
+
+
+@pytest.fixture
+def snapshot_cache(mock_redis) -> SnapshotCache:
+    return SnapshotCache(mock_redis, checkpoint_interval=10, ttl=60)
+
+
+def test_checkpoints_are_every_interval_snapshots(
+    snapshot_cache: SnapshotCache,
+) -> None:
+    assert snapshot_cache.checkpoint_before(0) == 0
+    assert snapshot_cache.checkpoint_before(19) == 10
+    assert snapshot_cache.is_checkpoint(20)
+    assert not snapshot_cache.is_checkpoint(21)
+
+
+def test_get_many_returns_only_cached_states(
+    snapshot_cache: SnapshotCache, mock_redis
+) -> None:
+    mock_redis.hmget.return_value = [json.dumps([list(TITLE)]), None]
+
+    states = snapshot_cache.get_many(ENTITY, [SNAPSHOT_1, SNAPSHOT_11])
+
+    assert states == {SNAPSHOT_1: {TITLE}}
+    mock_redis.hmget.assert_called_once_with(
+        f"snapshot_cache:{ENTITY}", [SNAPSHOT_1, SNAPSHOT_11]
+    )
+
+
+def test_store_writes_the_states_and_renews_their_lifetime(
+    snapshot_cache: SnapshotCache, mock_redis
+) -> None:
+    snapshot_cache.store(ENTITY, {SNAPSHOT_11: {TITLE}})
+
+    mock_redis.hset.assert_called_once_with(
+        f"snapshot_cache:{ENTITY}", mapping={SNAPSHOT_11: json.dumps([list(TITLE)])}
+    )
+    mock_redis.expire.assert_called_once_with(f"snapshot_cache:{ENTITY}", 60)
+    mock_redis.execute.assert_called_once()
+
+
+def test_invalidation_reaches_the_checkpoints_holding_the_entity(
+    snapshot_cache: SnapshotCache, mock_redis
+) -> None:
+    author = "http://example.org/ra/1"
+    role = (f"<{author}>", "<http://xmlns.com/foaf/0.1/name>", '"Name"')
+    mock_redis.smembers.return_value = {ENTITY}
+
+    snapshot_cache.store(ENTITY, {SNAPSHOT_11: {TITLE, role}})
+    snapshot_cache.invalidate(author)
+
+    mock_redis.sadd.assert_called_once_with(f"snapshot_cache:related:{author}", ENTITY)
+    mock_redis.delete.assert_called_once_with(
+        f"snapshot_cache:{author}",
+        f"snapshot_cache:related:{author}",
+        f"snapshot_cache:{ENTITY}",
+    )
+
+
+def test_redis_errors_fall_back_to_no_checkpoint(
+    snapshot_cache: SnapshotCache, mock_redis
+) -> None:
+    mock_redis.hmget.side_effect = RedisError("down")
+    mock_redis.execute.side_effect = RedisError("down")
+    mock_redis.delete.side_effect = RedisError("down")
+
+    assert snapshot_cache.get_many(ENTITY, [SNAPSHOT_1]) == {}
+    snapshot_cache.store(ENTITY, {SNAPSHOT_1: {TITLE}})
+    snapshot_cache.invalidate(ENTITY)
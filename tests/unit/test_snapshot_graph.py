@@ -0,0 +1,114 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+from unittest.mock import patch
+
+import pytest
+from rdflib import RDF, Dataset, Literal, URIRef
+
+from heritrace.utils.snapshot_graph import N3TermDecoder, SnapshotGraph
+from heritrace.utils.sparql_utils import (
+    convert_to_snapshot_graphs,
+    get_triples_from_graph,
+    n3_set_to_graph,
+)
+
+ENTITY = URIRef("http://example.org/br/1")
+AUTHOR = URIRef("http://example.org/ar/1")
+TITLE = URIRef("http://purl.org/dc/terms/title")
+CONTRIBUTOR = URIRef("http://purl.org/dc/terms/contributor")
+DATA_GRAPH = URIRef("http://example.org/br/")
+
+QUADS = {
+    (ENTITY.n3(), RDF.type.n3(), "<http://purl.org/spar/fabio/Expression>"),
+    (ENTITY.n3(), TITLE.n3(), Literal("Title", lang="en").n3()),
+    (ENTITY.n3(), CONTRIBUTOR.n3(), AUTHOR.n3()),
+    (AUTHOR.n3(), RDF.type.n3(), "<http://purl.org/spar/pro/RoleInTime>"),
+}
+N3_QUADS = {(*triple, DATA_GRAPH.n3()) for triple in QUADS}
+
+PATTERNS = [
+    (None, None, None),
+    (ENTITY, None, None),
+    (ENTITY, TITLE, None),
+    (ENTITY, RDF.type, URIRef("http://purl.org/spar/fabio/Expression")),
+    (None, RDF.type, None),
+    (None, None, AUTHOR),
+    (AUTHOR, TITLE, None),
+]
+
+
+def test_decoder_parses_every_term_once() -> None:
+    decoder = N3TermDecoder()
+
+    with patch(
+        "heritrace.utils.snapshot_graph.from_n3",
+        wraps=lambda value: URIRef(value[1:-1]),
+    ) as mock_from_n3:
+        first = decoder.decode(ENTITY.n3())
+        second = decoder.decode(ENTITY.n3())
+
+    assert first is second
+    assert first == ENTITY
+    mock_from_n3.assert_called_once()
+
+
+@pytest.mark.parametrize(("n3_set", "is_quadstore"), [(QUADS, False), (N3_QUADS, True)])
+@pytest.mark.parametrize("pattern", PATTERNS)
+def test_pattern_lookups_match_rdflib(
+    n3_set: set, pattern: tuple, *, is_quadstore: bool
+) -> None:
+    snapshot = SnapshotGraph.from_n3(n3_set, N3TermDecoder(), is_quadstore=is_quadstore)
+    graph = n3_set_to_graph(n3_set, is_quadstore=is_quadstore)
+
+    assert sorted(get_triples_from_graph(snapshot, pattern)) == sorted(
+        get_triples_from_graph(graph, pattern)
+    )
+
+
+def test_snapshots_of_a_history_share_their_terms() -> None:
+    history = {
+        str(ENTITY): {
+            "2024-01-01T00:00:00+00:00": QUADS,
+            "2024-01-02T00:00:00+00:00": QUADS
+            | {(ENTITY.n3(), TITLE.n3(), Literal("New").n3())},
+        }
+    }
+
+    first, second = convert_to_snapshot_graphs(history, is_quadstore=False)[
+        str(ENTITY)
+    ].values()
+
+    first_entity = next(first.triples((None, TITLE, None)))[0]
+    assert all(s is first_entity for s, _, _ in second.triples((None, TITLE, None)))
+    assert len(second) == len(first) + 1
+
+
+def test_updated_applies_changes_as_a_dataset_does() -> None:
+    snapshot = SnapshotGraph.from_n3(N3_QUADS, N3TermDecoder(), is_quadstore=True)
+    dataset = n3_set_to_graph(N3_QUADS, is_quadstore=True)
+    deletions = [(ENTITY, TITLE, Literal("Title", lang="en"))]
+    additions = [(ENTITY, TITLE, Literal("New title", lang="en"))]
+    for triple in deletions:
+        dataset.remove(triple)
+    for triple in additions:
+        dataset.add(triple)
+
+    updated = snapshot.updated(deletions, additions)
+
+    assert sorted(updated) == sorted(get_triples_from_graph(dataset, (None,) * 3))
+    assert (ENTITY, TITLE, Literal("Title", lang="en")) in set(snapshot)
+
+
+def test_rdflib_graph_is_built_once_for_sparql_queries() -> None:
+    snapshot = SnapshotGraph.from_n3(N3_QUADS, N3TermDecoder(), is_quadstore=True)
+    query = f"SELECT ?title WHERE {{ <{ENTITY}> <{TITLE}> ?title }}"
+
+    first = [str(row[0]) for row in snapshot.query(query)]  # type: ignore[index]
+    graph = snapshot.to_rdflib()
+    second = [str(row[0]) for row in snapshot.query(query)]  # type: ignore[index]
+
+    assert first == second == ["Title"]
+    assert isinstance(graph, Dataset)
+    assert snapshot.to_rdflib() is graph
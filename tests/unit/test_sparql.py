@@ -0,0 +1,153 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+import json
+import threading
+import urllib.error
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from SPARQLWrapper import JSON
+from SPARQLWrapper.SPARQLExceptions import EndPointInternalError, QueryBadFormed
+
+from heritrace.sparql import (
+    SPARQLWrapperWithRetry,
+    configure_sparql_connection_pool,
+    get_sparql_bindings,
+    resolve_thread_wrapper,
+    use_private_wrappers,
+)
+
+RESULTS = {"head": {"vars": ["s"]}, "results": {"bindings": [{"s": {"value": "x"}}]}}
+
+
+class _EndpointHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self) -> None:
+        server = self.server
+        server.connections.add(self.client_address)  # type: ignore[attr-defined]
+        self.rfile.read(int(self.headers["Content-Length"]))
+        status = server.statuses.pop(0) if server.statuses else 200  # type: ignore[attr-defined]
+        body = json.dumps(RESULTS).encode() if status == 200 else b"error"
+        self.send_response(status)
+        self.send_header("Content-Type", "application/sparql-results+json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *_args: object) -> None:
+        pass
+
+
+@pytest.fixture
+def endpoint() -> Iterator[ThreadingHTTPServer]:
+    configure_sparql_connection_pool(2)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _EndpointHandler)
+    server.connections = set()  # type: ignore[attr-defined]
+    server.statuses = []  # type: ignore[attr-defined]
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    configure_sparql_connection_pool(10)
+
+
+def _wrapper(server: ThreadingHTTPServer) -> SPARQLWrapperWithRetry:
+    host, port = server.server_address[:2]
+    sparql = SPARQLWrapperWithRetry(
+        f"http://{host!s}:{port}/sparql", initial_delay=0.0, timeout=5.0
+    )
+    sparql.setReturnFormat(JSON)
+    sparql.setQuery("SELECT ?s WHERE { ?s ?p ?o }")
+    return sparql
+
+
+def test_queries_reuse_one_connection(endpoint) -> None:
+    first = _wrapper(endpoint)
+    second = _wrapper(endpoint)
+
+    for sparql in (first, second, first):
+        bindings = get_sparql_bindings(sparql.query().convert())
+        assert bindings == RESULTS["results"]["bindings"]
+
+    assert len(endpoint.connections) == 1
+
+
+def test_server_errors_are_retried(endpoint) -> None:
+    endpoint.statuses = [500, 500]
+
+    bindings = get_sparql_bindings(_wrapper(endpoint).query().convert())
+
+    assert bindings == RESULTS["results"]["bindings"]
+
+
+def test_persistent_server_error_raises_after_all_attempts(endpoint) -> None:
+    endpoint.statuses = [500, 500, 500]
+
+    with pytest.raises(EndPointInternalError):
+        _wrapper(endpoint).query()
+
+
+def test_bad_query_maps_to_sparqlwrapper_exception(endpoint) -> None:
+    endpoint.statuses = [400, 400, 400]
+
+    with pytest.raises(QueryBadFormed):
+        _wrapper(endpoint).query()
+
+
+def test_unreachable_endpoint_raises_url_error() -> None:
+    sparql = SPARQLWrapperWithRetry(
+        "http://127.0.0.1:9/sparql", max_attempts=2, initial_delay=0.0
+    )
+    sparql.setQuery("ASK { ?s ?p ?o }")
+
+    with pytest.raises(urllib.error.URLError):
+        sparql.query()
+
+
+def test_pool_size_must_be_positive() -> None:
+    with pytest.raises(ValueError, match="SPARQL_POOL_SIZE must be at least 1"):
+        configure_sparql_connection_pool(0)
+
+
+def test_copy_keeps_endpoint_retry_policy_and_credentials() -> None:
+    sparql = SPARQLWrapperWithRetry(
+        "http://example.org/sparql", max_attempts=5, initial_delay=0.5, timeout=12
+    )
+    sparql.setCredentials("user", "secret")
+    sparql.setQuery("SELECT * WHERE { ?s ?p ?o }")
+
+    clone = sparql.copy()
+
+    assert clone is not sparql
+    assert clone.endpoint == sparql.endpoint
+    assert clone.max_attempts == 5
+    assert clone.initial_delay == 0.5
+    assert clone.timeout == 12
+    assert (clone.user, clone.passwd) == ("user", "secret")
+    assert clone.queryString != sparql.queryString
+
+
+def test_private_wrappers_are_per_thread() -> None:
+    shared = SPARQLWrapperWithRetry("http://example.org/sparql")
+    resolved: list[SPARQLWrapperWithRetry] = []
+
+    def resolve_twice() -> None:
+        use_private_wrappers()
+        resolved.extend(
+            [resolve_thread_wrapper(shared), resolve_thread_wrapper(shared)]
+        )
+
+    thread = threading.Thread(target=resolve_twice)
+    thread.start()
+    thread.join()
+
+    assert resolve_thread_wrapper(shared) is shared
+    assert resolved[0] is resolved[1]
+    assert resolved[0] is not shared
+    assert resolved[0].endpoint == shared.endpoint
@@ -6,25 +6,33 @@
 Tests for the SPARQL utilities module.
 """
 
-import time
+from collections import OrderedDict
 from unittest.mock import MagicMock, call, patch
 
 import pytest
 from rdflib import Dataset, Graph, Literal, URIRef
 from SPARQLWrapper.SPARQLExceptions import SPARQLWrapperException
 
+from heritrace.services.class_counts import ClassCounts
+from heritrace.services.deletion_index import DeletionRecord, deleted_entity_types
 from heritrace.utils import sparql_utils
+from heritrace.utils.catalogue_cursor import (
+    CatalogueCursor,
+    CatalogueListing,
+    InvalidCursorError,
+    encode_cursor,
+    recall_page_cursor,
+)
 from heritrace.utils.sparql_utils import (
-    AVAILABLE_CLASSES_TTL_SECONDS,
     CatalogQuery,
     DeletedEntitiesQuery,
-    _deleted_entity_types,
+    _build_class_counts_query,
     _fetch_entity_label,
     _fetch_entity_labels,
-    _get_entities_with_enhanced_shape_detection,
     build_sort_clause,
     fetch_current_state_with_related_entities,
     fetch_data_graph_for_subject,
+    fetch_data_graph_for_subjects,
     find_orphaned_entities,
     get_available_classes,
     get_catalog_data,
@@ -32,6 +40,7 @@ from heritrace.utils.sparql_utils import (
     get_deleted_entities_with_filtering,
     get_entities_for_class,
     import_entity_graph,
+    iter_deletion_records,
     process_deleted_entities,
     warm_catalogue,
 )
@@ -61,6 +70,9 @@ def mock_custom_filter():
         # Configure the mock to return readable labels
         mock_filter.human_readable_predicate.return_value = "Human Readable Class"
         mock_filter.human_readable_entity.return_value = "Human Readable Entity"
+        mock_filter.human_readable_entities.side_effect = lambda uris, *_: (
+            ["Human Readable Entity"] * len(uris)
+        )
         mock_filter.human_readable_class.return_value = "Human Readable Class"
         mock_filter.format_agent_reference.return_value = "Test Agent"
 
@@ -93,6 +105,30 @@ def mock_display_rules():
         yield mock_rules_data
 
 
+@pytest.fixture(autouse=True)
+def no_shared_cache():
+    """Compute the catalogue class lists on every call, as a worker alone would."""
+    with (
+        patch("heritrace.utils.sparql_utils.get_shared_cache", return_value=None),
+        patch("heritrace.utils.sparql_utils.get_deletion_index", return_value=None),
+        patch.dict("heritrace.utils.sparql_utils._cache_generations", clear=True),
+    ):
+        yield
+
+
+@pytest.fixture
+def class_counts():
+    """Fresh class counts, as kept by the application state."""
+    counts = ClassCounts(limit=10000)
+    with patch("heritrace.utils.sparql_utils.get_class_counts", return_value=counts):
+        yield counts
+
+
+def mock_count_instances(class_uris, _limit):
+    known = {"http://example.org/Person": 10, "http://example.org/Document": 5}
+    return {class_uri: known.get(class_uri, 0) for class_uri in class_uris}
+
+
 @pytest.fixture
 def mock_virtuoso():
     """Mock virtuoso detection for testing."""
@@ -167,7 +203,11 @@ class TestWorkerPool:
         executor = MagicMock()
         executor.map.return_value = labels
 
-        with patch("heritrace.utils.sparql_utils._worker_pool.executor", executor):
+        with (
+            patch("heritrace.utils.sparql_utils._worker_pool.executor", executor),
+            patch("heritrace.utils.sparql_utils.get_custom_filter") as mock_get_filter,
+        ):
+            mock_get_filter.return_value.can_batch_entity_labels.return_value = False
             result = _fetch_entity_labels(uris, entity_key)
 
         assert result == labels
@@ -176,12 +216,41 @@ class TestWorkerPool:
         assert submitted_uris == uris
         assert list(submitted_keys) == [entity_key] * 50
 
+    def test_batches_rewritable_labels_instead_of_using_the_pool(self) -> None:
+        uris = [f"http://example.org/person/{index}" for index in range(50)]
+        entity_key = (
+            "http://example.org/Person",
+            "http://example.org/PersonShape",
+        )
+        labels = [f"Person {index}" for index in range(50)]
+        executor = MagicMock()
+
+        with (
+            patch("heritrace.utils.sparql_utils._worker_pool.executor", executor),
+            patch("heritrace.utils.sparql_utils.get_custom_filter") as mock_get_filter,
+        ):
+            mock_filter = mock_get_filter.return_value
+            mock_filter.can_batch_entity_labels.return_value = True
+            mock_filter.human_readable_entities.return_value = labels
+            result = _fetch_entity_labels(uris, entity_key)
+
+        assert result == labels
+        mock_filter.human_readable_entities.assert_called_once_with(uris, entity_key)
+        executor.map.assert_not_called()
+
     def test_label_error_propagates_from_shared_pool(self) -> None:
         executor = MagicMock()
         executor.map.side_effect = SPARQLWrapperException(b"query failed")
 
+        mock_filter = MagicMock()
+        mock_filter.can_batch_entity_labels.return_value = False
+
         with (
             patch("heritrace.utils.sparql_utils._worker_pool.executor", executor),
+            patch(
+                "heritrace.utils.sparql_utils.get_custom_filter",
+                return_value=mock_filter,
+            ),
             pytest.raises(SPARQLWrapperException, match="query failed"),
         ):
             _fetch_entity_labels(
@@ -190,6 +259,7 @@ class TestWorkerPool:
             )
 
 
+@pytest.mark.usefixtures("class_counts")
 class TestGetAvailableClasses:
     """Tests for the get_available_classes function."""
 
@@ -198,24 +268,12 @@ class TestGetAvailableClasses:
     ) -> None:
         """Test getting available classes from a Virtuoso store."""
 
-        # Mock the count function to return different counts for different classes
-        def mock_count_instances(class_uri, _limit=10000):
-            if class_uri == "http://example.org/Person":
-                return ("10", 10)
-            if class_uri == "http://example.org/Document":
-                return ("5", 5)
-            return ("0", 0)
-
         # Mock determine_shape_for_classes
         with (
             patch(
                 "heritrace.utils.sparql_utils.determine_shape_for_classes",
                 return_value="http://example.org/PersonShape",
             ),
-            patch.dict(
-                "heritrace.utils.sparql_utils._cache",
-                {"available_classes": None},
-            ),
             patch(
                 "heritrace.utils.sparql_utils.get_classes_from_shacl_or_display_rules",
                 return_value=[
@@ -224,7 +282,7 @@ class TestGetAvailableClasses:
                 ],
             ),
             patch(
-                "heritrace.utils.sparql_utils._count_class_instances",
+                "heritrace.utils.sparql_utils._count_classes_instances",
                 side_effect=mock_count_instances,
             ),
         ):
@@ -261,9 +319,9 @@ class TestGetAvailableClasses:
             assert person_class["count"] == "10"
             assert document_class["count"] == "5"
 
-    def test_fresh_cache_is_returned_without_recompute(self) -> None:
-        """Test that a cache entry younger than the TTL is returned as is."""
-        cached_classes = [
+    def test_shared_classes_are_returned_without_recompute(self) -> None:
+        """Test that the classes another worker published are served as they are."""
+        shared_classes = [
             {
                 "uri": "http://example.org/Person",
                 "label": "Person",
@@ -272,47 +330,97 @@ class TestGetAvailableClasses:
                 "shape": None,
             }
         ]
+        shared_cache = MagicMock()
+        shared_cache.get.return_value = shared_classes
         with (
-            patch.dict(
-                "heritrace.utils.sparql_utils._cache",
-                {"available_classes": (cached_classes, time.monotonic())},
+            patch(
+                "heritrace.utils.sparql_utils.get_shared_cache",
+                return_value=shared_cache,
             ),
-            patch("heritrace.utils.sparql_utils._count_class_instances") as mock_count,
+            patch(
+                "heritrace.utils.sparql_utils._count_classes_instances"
+            ) as mock_count,
         ):
             result = get_available_classes()
 
-        assert result == cached_classes
+        assert result == shared_classes
+        assert shared_cache.get.call_args.args[0] == "available_classes"
         mock_count.assert_not_called()
 
-    def test_expired_cache_is_recomputed_and_stored(self, mock_custom_filter) -> None:
-        """Test that a cache entry older than the TTL triggers a recompute."""
-        stale_classes = [
-            {
-                "uri": "http://example.org/Person",
-                "label": "Stale",
-                "count": "1",
-                "count_numeric": 1,
-                "shape": None,
-            }
-        ]
-        stale_entry = (
-            stale_classes,
-            time.monotonic() - (AVAILABLE_CLASSES_TTL_SECONDS + 1),
-        )
+    def test_shared_classes_are_republished_once_counts_change(
+        self, class_counts, mock_custom_filter
+    ) -> None:
+        """Test that a save adjusting the counts is published before the recount."""
         mock_custom_filter.human_readable_class.return_value = "Person"
+        shared_cache = MagicMock()
+        shared_cache.get.side_effect = lambda _name, compute: compute()
+        shared_cache.refresh.side_effect = lambda _name, compute: compute()
 
         with (
-            patch.dict(
-                "heritrace.utils.sparql_utils._cache",
-                {"available_classes": stale_entry},
+            patch(
+                "heritrace.utils.sparql_utils.get_shared_cache",
+                return_value=shared_cache,
+            ),
+            patch(
+                "heritrace.utils.sparql_utils.get_classes_from_shacl_or_display_rules",
+                return_value=["http://example.org/Person"],
+            ),
+            patch(
+                "heritrace.utils.sparql_utils._count_classes_instances",
+                side_effect=mock_count_instances,
+            ) as mock_count,
+            patch(
+                "heritrace.utils.sparql_utils.determine_shape_for_classes",
+                return_value=None,
+            ),
+            patch(
+                "heritrace.utils.sparql_utils.is_entity_type_visible",
+                return_value=True,
+            ),
+            patch(
+                "heritrace.utils.sparql_utils.get_classes_with_multiple_shapes",
+                return_value=set(),
             ),
+        ):
+            first = get_available_classes()
+            get_available_classes()
+            class_counts.adjust({"http://example.org/Person": 1})
+            second = get_available_classes()
+
+        assert first[0]["count"] == "10"
+        assert second[0]["count"] == "11"
+        shared_cache.refresh.assert_called_once()
+        mock_count.assert_called_once()
+
+    def test_class_counts_query_caps_every_class_on_its_own(self) -> None:
+        """Test that the limit is applied per class, not to the classes together."""
+        query = _build_class_counts_query(
+            ["http://example.org/Person", "http://example.org/Document"], 11
+        )
+
+        assert query.count("LIMIT 11") == 2
+        assert query.count(" UNION ") == 1
+        assert "VALUES ?class { <http://example.org/Person> }" in query
+        assert "VALUES ?class { <http://example.org/Document> }" in query
+        assert "GROUP BY ?class" in query
+
+    def test_stale_counts_are_served_while_recounted(
+        self, class_counts, mock_custom_filter
+    ) -> None:
+        """Test that stale counts are listed while recounted in the background."""
+        mock_custom_filter.human_readable_class.return_value = "Person"
+
+        with (
             patch(
                 "heritrace.utils.sparql_utils.get_classes_from_shacl_or_display_rules",
                 return_value=["http://example.org/Person"],
             ),
             patch(
-                "heritrace.utils.sparql_utils._count_class_instances",
-                return_value=("2", 2),
+                "heritrace.utils.sparql_utils._count_classes_instances",
+                side_effect=[
+                    {"http://example.org/Person": 1},
+                    {"http://example.org/Person": 2},
+                ],
             ) as mock_count,
             patch(
                 "heritrace.utils.sparql_utils.determine_shape_for_classes",
@@ -326,11 +434,17 @@ class TestGetAvailableClasses:
                 "heritrace.utils.sparql_utils.get_classes_with_multiple_shapes",
                 return_value=set(),
             ),
+            patch("heritrace.services.class_counts.threading.Thread") as mock_thread,
         ):
+            get_available_classes()
+            class_counts.max_age = 0
+            stale = get_available_classes()
+            recount = mock_thread.call_args.kwargs
+            recount["target"](*recount["args"])
             result = get_available_classes()
-            cached_value = sparql_utils._cache["available_classes"]  # noqa: SLF001
 
-        mock_count.assert_called_once_with("http://example.org/Person")
+        mock_count.assert_called_with(["http://example.org/Person"], 10001)
+        assert stale[0]["count"] == "1"
         assert result == [
             {
                 "uri": "http://example.org/Person",
@@ -340,32 +454,18 @@ class TestGetAvailableClasses:
                 "shape": None,
             }
         ]
-        assert cached_value is not None
-        assert cached_value[0] == result
 
     def test_get_available_classes_non_virtuoso(
         self, mock_sparql_wrapper, mock_custom_filter
     ) -> None:
         """Test getting available classes from a non-Virtuoso store."""
 
-        # Mock the count function to return different counts for different classes
-        def mock_count_instances(class_uri, _limit=10000):
-            if class_uri == "http://example.org/Person":
-                return ("10", 10)
-            if class_uri == "http://example.org/Document":
-                return ("5", 5)
-            return ("0", 0)
-
         # Mock determine_shape_for_classes
         with (
             patch(
                 "heritrace.utils.sparql_utils.determine_shape_for_classes",
                 return_value="http://example.org/PersonShape",
             ),
-            patch.dict(
-                "heritrace.utils.sparql_utils._cache",
-                {"available_classes": None},
-            ),
             patch(
                 "heritrace.utils.sparql_utils.get_classes_from_shacl_or_display_rules",
                 return_value=[
@@ -374,7 +474,7 @@ class TestGetAvailableClasses:
                 ],
             ),
             patch(
-                "heritrace.utils.sparql_utils._count_class_instances",
+                "heritrace.utils.sparql_utils._count_classes_instances",
                 side_effect=mock_count_instances,
             ),
         ):
@@ -635,9 +735,9 @@ class TestGetEntitiesForClass:
         entities_query = mock_sparql_wrapper.setQuery.call_args.args[0]
         assert f"LIMIT {per_page}" in entities_query
         assert f"OFFSET {per_page}" in entities_query
-        assert mock_custom_filter.human_readable_entity.call_args_list == [
-            call(uri, (selected_class, selected_shape), None) for uri in uris
-        ]
+        mock_custom_filter.human_readable_entities.assert_called_once_with(
+            uris, (selected_class, selected_shape)
+        )
 
     def test_get_entities_for_empty_class_skips_label_query(
         self, app, mock_sparql_wrapper, mock_custom_filter
@@ -675,7 +775,137 @@ class TestGetEntitiesForClass:
         assert entities == []
         assert total_count == 0
         mock_sparql_wrapper.setQuery.assert_called_once()
-        mock_custom_filter.human_readable_entity.assert_not_called()
+        mock_custom_filter.human_readable_entities.assert_not_called()
+
+    def test_page_after_a_full_page_seeks_by_cursor(
+        self, app, mock_sparql_wrapper, mock_custom_filter
+    ) -> None:
+        selected_class = "http://example.org/Cursor"
+        available_classes = [
+            {
+                "uri": selected_class,
+                "label": "Cursor",
+                "count": "5",
+                "count_numeric": 5,
+                "shape": None,
+            }
+        ]
+        mock_sparql_wrapper.query.return_value.convert.side_effect = [
+            {
+                "results": {
+                    "bindings": [
+                        {"subject": {"type": "uri", "value": f"{selected_class}/{i}"}}
+                        for i in range(3)
+                    ]
+                }
+            },
+            {
+                "results": {
+                    "bindings": [
+                        {"subject": {"type": "uri", "value": f"{selected_class}/{i}"}}
+                        for i in range(3, 5)
+                    ]
+                }
+            },
+        ]
+        with (
+            patch(
+                "heritrace.utils.sparql_utils.get_classes_with_multiple_shapes",
+                return_value=set(),
+            ),
+            patch(
+                "heritrace.utils.sparql_utils.determine_shape_for_classes",
+                return_value=None,
+            ),
+        ):
+            first = sparql_utils.get_catalog_page(
+                CatalogQuery(selected_class=selected_class, page=1, per_page=3),
+                available_classes,
+            )
+            second = sparql_utils.get_catalog_page(
+                CatalogQuery(selected_class=selected_class, page=2, per_page=3),
+                available_classes,
+            )
+
+        assert first.next_cursor is not None
+        assert second.next_cursor is None
+        assert [entity["uri"] for entity in second.entities] == [
+            f"{selected_class}/3",
+            f"{selected_class}/4",
+        ]
+        second_query = mock_sparql_wrapper.setQuery.call_args_list[1].args[0]
+        assert f'STR(?subject) > "{selected_class}/2"' in second_query
+        assert "OFFSET" not in second_query
+        assert "ORDER BY ASC(?subject)" in second_query
+
+    def test_page_requested_by_cursor_is_not_remembered(
+        self, app, mock_sparql_wrapper, mock_custom_filter
+    ) -> None:
+        selected_class = "http://example.org/Remembered"
+        listing = CatalogueListing(
+            selected_class=selected_class,
+            selected_shape=None,
+            sort_property=None,
+            descending=False,
+        )
+        mock_sparql_wrapper.query.return_value.convert.return_value = {
+            "results": {
+                "bindings": [
+                    {"subject": {"type": "uri", "value": f"{selected_class}/{i}"}}
+                    for i in range(120, 123)
+                ]
+            }
+        }
+        with (
+            patch(
+                "heritrace.utils.sparql_utils.get_classes_with_multiple_shapes",
+                return_value=set(),
+            ),
+            patch(
+                "heritrace.utils.sparql_utils.determine_shape_for_classes",
+                return_value=None,
+            ),
+        ):
+            page = sparql_utils.get_catalog_page(
+                CatalogQuery(
+                    selected_class=selected_class,
+                    page=2,
+                    per_page=3,
+                    cursor=encode_cursor(
+                        CatalogueCursor(subject=f"{selected_class}/119"), listing
+                    ),
+                ),
+                [],
+            )
+
+        assert page.next_cursor is not None
+        assert recall_page_cursor(listing, 3, 3) is None
+
+    def test_cursor_of_another_listing_is_rejected(self, app) -> None:
+        with (
+            patch(
+                "heritrace.utils.sparql_utils.get_classes_with_multiple_shapes",
+                return_value=set(),
+            ),
+            pytest.raises(InvalidCursorError),
+        ):
+            sparql_utils.get_catalog_page(
+                CatalogQuery(
+                    selected_class="http://example.org/Person",
+                    page=2,
+                    per_page=50,
+                    cursor=encode_cursor(
+                        CatalogueCursor(subject="http://example.org/person1"),
+                        CatalogueListing(
+                            selected_class="http://example.org/Document",
+                            selected_shape=None,
+                            sort_property=None,
+                            descending=False,
+                        ),
+                    ),
+                ),
+                [],
+            )
 
 
 class TestGetCatalogData:
@@ -844,6 +1074,7 @@ class TestFetchDataGraphForSubject:
             "results": {
                 "bindings": [
                     {
+                        "subject": {"value": "http://example.org/person1"},
                         "predicate": {
                             "value": "http://www.w3.org/1999/02/22-rdf-syntax-ns#type"
                         },
@@ -851,6 +1082,7 @@ class TestFetchDataGraphForSubject:
                         "g": {"value": "http://example.org/graph1"},
                     },
                     {
+                        "subject": {"value": "http://example.org/person1"},
                         "predicate": {"value": "http://example.org/name"},
                         "object": {"type": "literal", "value": "John Doe"},
                         "g": {"value": "http://example.org/graph1"},
@@ -869,7 +1101,8 @@ class TestFetchDataGraphForSubject:
         query = mock_sparql_wrapper.setQuery.call_args[0][0]
         assert "GRAPH ?g" in query
         assert "FILTER(?g NOT IN" in query
-        assert "<http://example.org/person1> ?predicate ?object" in query
+        assert "VALUES ?subject { <http://example.org/person1> }" in query
+        assert "?subject ?predicate ?object" in query
 
     def test_fetch_data_graph_non_virtuoso_triplestore(
         self, mock_sparql_wrapper
@@ -883,12 +1116,14 @@ class TestFetchDataGraphForSubject:
             "results": {
                 "bindings": [
                     {
+                        "subject": {"value": "http://example.org/person1"},
                         "predicate": {
                             "value": "http://www.w3.org/1999/02/22-rdf-syntax-ns#type"
                         },
                         "object": {"type": "uri", "value": "http://example.org/Person"},
                     },
                     {
+                        "subject": {"value": "http://example.org/person1"},
                         "predicate": {"value": "http://example.org/name"},
                         "object": {"type": "literal", "value": "John Doe"},
                     },
@@ -930,7 +1165,52 @@ class TestFetchDataGraphForSubject:
                 "GRAPH ?g" not in query
             )  # Regular triplestore query doesn't use GRAPH
             assert "FILTER(?g NOT IN" not in query
-            assert "<http://example.org/person1> ?predicate ?object" in query
+            assert "VALUES ?subject { <http://example.org/person1> }" in query
+        assert "?subject ?predicate ?object" in query
+
+    def test_fetches_many_subjects_in_concurrent_chunks(
+        self, mock_sparql_wrapper
+    ) -> None:
+        """Test that many subjects are read a chunk at a time into one graph."""
+        subjects = [URIRef(f"http://example.org/person{i}") for i in range(5)]
+        queries = []
+
+        def answer() -> dict:
+            query = queries[-1]
+            return {
+                "results": {
+                    "bindings": [
+                        {
+                            "subject": {"value": str(subject)},
+                            "predicate": {"value": "http://example.org/name"},
+                            "object": {"type": "literal", "value": str(subject)},
+                        }
+                        for subject in subjects
+                        if f"<{subject}>" in query
+                    ]
+                }
+            }
+
+        mock_sparql_wrapper.setQuery.side_effect = queries.append
+        mock_sparql_wrapper.query.return_value.convert.side_effect = answer
+
+        with (
+            patch("heritrace.utils.sparql_utils.is_virtuoso", return_value=False),
+            patch(
+                "heritrace.utils.sparql_utils.get_dataset_is_quadstore",
+                return_value=False,
+            ),
+            patch("heritrace.utils.sparql_utils.STATE_FETCH_BATCH_SIZE", 2),
+            patch(
+                "heritrace.utils.sparql_utils.run_concurrently",
+                side_effect=lambda tasks: [task() for task in tasks],
+            ) as mock_run,
+        ):
+            graph = fetch_data_graph_for_subjects([*subjects, subjects[0]])
+
+        assert len(mock_run.call_args.args[0]) == 3
+        assert len(queries) == 3
+        assert set(graph.subjects()) == set(subjects)
 
 
 class TestFindOrphanedEntities:
@@ -969,395 +1249,192 @@ class TestFindOrphanedEntities:
             assert mock_sparql_wrapper.setQuery.call_count == 2
 
 
+def state_bindings(triples: dict[str, list[tuple[str, str]]], query: str) -> dict:
+    """Answer a state query with the triples of the subjects it asks for."""
+    return {
+        "results": {
+            "bindings": [
+                {
+                    "subject": {"value": subject},
+                    "predicate": {"value": predicate},
+                    "object": {"type": "uri", "value": obj},
+                }
+                for subject, subject_triples in triples.items()
+                if f"<{subject}>" in query
+                for predicate, obj in subject_triples
+            ]
+        }
+    }
+
+
 class TestImportEntityGraph:
     """Tests for the import_entity_graph function."""
 
-    def test_import_entity_graph(self) -> None:
-        """Test importing an entity graph."""
+    @staticmethod
+    def import_graph(triples: dict[str, list[tuple[str, str]]], **kwargs) -> tuple:
         mock_editor = MagicMock()
+        mock_editor.dataset_is_quadstore = False
+        queries: list[str] = []
 
-        # Mock get_sparql to return a mock SPARQLWrapper
-        with patch("heritrace.utils.sparql_utils.get_sparql") as mock_get_sparql:
+        with (
+            patch("heritrace.utils.sparql_utils.get_sparql") as mock_get_sparql,
+            patch("heritrace.utils.sparql_utils.is_virtuoso", return_value=False),
+        ):
             mock_sparql_wrapper = mock_get_sparql.return_value
-            mock_sparql_wrapper.query.return_value.convert.return_value = {
-                "results": {
-                    "bindings": [
-                        {
-                            "p": {"value": "http://example.org/knows"},
-                            "o": {"value": "http://example.org/person2"},
-                        }
-                    ]
-                }
-            }
-
-            result = import_entity_graph(
-                mock_editor, URIRef("http://example.org/person1"), max_depth=2
-            )
-            assert mock_editor.import_entity.call_count == 2
-            mock_editor.import_entity.assert_any_call(
-                URIRef("http://example.org/person1")
-            )
-            mock_editor.import_entity.assert_any_call(
-                URIRef("http://example.org/person2")
+            mock_sparql_wrapper.setQuery.side_effect = queries.append
+            mock_sparql_wrapper.query.return_value.convert.side_effect = lambda: (
+                state_bindings(triples, queries[-1])
             )
+            result = import_entity_graph(mock_editor, **kwargs)
+
+        (graph,) = mock_editor.import_graph.call_args.args
+        return result, mock_editor, graph, queries
+
+    def test_import_entity_graph(self) -> None:
+        """Test importing an entity graph."""
+        result, mock_editor, graph, queries = self.import_graph(
+            {
+                "http://example.org/person1": [
+                    ("http://example.org/knows", "http://example.org/person2")
+                ],
+                "http://example.org/person2": [
+                    ("http://example.org/knows", "http://example.org/person3")
+                ],
+            },
+            subject=URIRef("http://example.org/person1"),
+            max_depth=2,
+        )
 
-            assert result == mock_editor
+        assert result == mock_editor
+        mock_editor.import_graph.assert_called_once()
+        assert set(graph.subjects()) == {
+            URIRef("http://example.org/person1"),
+            URIRef("http://example.org/person2"),
+        }
+        assert len(queries) == 2
 
     def test_import_entity_graph_imports_ordered_chain_at_minimal_depth(self) -> None:
         base = "http://example.org"
         br = f"{base}/br"
-        bindings_by_subject = {
+        triples = {
             br: [
-                {
-                    "p": {"value": "http://purl.org/spar/pro/isDocumentContextFor"},
-                    "o": {"value": f"{base}/ar{i}"},
-                }
+                ("http://purl.org/spar/pro/isDocumentContextFor", f"{base}/ar{i}")
                 for i in range(1, 6)
             ]
         }
         for i in range(1, 6):
-            rows = [
-                {
-                    "p": {"value": "http://purl.org/spar/pro/isHeldBy"},
-                    "o": {"value": f"{base}/ra{i}"},
-                }
-            ]
+            rows = [("http://purl.org/spar/pro/isHeldBy", f"{base}/ra{i}")]
             if i < 5:
                 rows.insert(
-                    0,
-                    {
-                        "p": {"value": "https://w3id.org/oc/ontology/hasNext"},
-                        "o": {"value": f"{base}/ar{i + 1}"},
-                    },
+                    0, ("https://w3id.org/oc/ontology/hasNext", f"{base}/ar{i + 1}")
                 )
-            bindings_by_subject[f"{base}/ar{i}"] = rows
-            bindings_by_subject[f"{base}/ra{i}"] = []
-
-        mock_editor = MagicMock()
-        current_query = {}
-
-        with patch("heritrace.utils.sparql_utils.get_sparql") as mock_get_sparql:
-            mock_sparql_wrapper = mock_get_sparql.return_value
-            mock_sparql_wrapper.setQuery.side_effect = lambda q: current_query.update(
-                query=q
-            )
-            mock_sparql_wrapper.query.return_value.convert.side_effect = lambda: {
-                "results": {
-                    "bindings": bindings_by_subject[
-                        current_query["query"].split("<")[1].split(">")[0]
-                    ]
-                }
-            }
+            triples[f"{base}/ar{i}"] = rows
+            triples[f"{base}/ra{i}"] = [
+                ("http://www.w3.org/1999/02/22-rdf-syntax-ns#type", f"{base}/Agent")
+            ]
 
-            import_entity_graph(mock_editor, URIRef(br))
+        _, _, graph, queries = self.import_graph(triples, subject=URIRef(br))
 
-        imported = {call.args[0] for call in mock_editor.import_entity.call_args_list}
         expected = (
             {URIRef(br)}
             | {URIRef(f"{base}/ar{i}") for i in range(1, 6)}
             | {URIRef(f"{base}/ra{i}") for i in range(1, 6)}
         )
-        assert imported == expected
+        assert set(graph.subjects()) == expected
+        # One round of queries per level, rdf:type links are not followed
+        assert len(queries) == 3
 
-
-class TestFetchCurrentStateWithRelatedEntities:
-    """Tests for the fetch_current_state_with_related_entities function."""
-
-    def test_fetch_current_state_with_related_entities_triplestore(
-        self, mock_quadstore
-    ) -> None:
-        """
-        Test fetching current state with related entities from a triplestore (not
-        quadstore).
-        """
-        # Configure mock to return False for quadstore check
-        mock_quadstore.return_value = False
-
-        # Create test data
-        provenance = {
-            "http://example.org/person1": {"version": "1"},
-            "http://example.org/person2": {"version": "2"},
-        }
-
-        # Create mock graphs to be returned by fetch_data_graph_for_subject
-        person1_graph = Graph()
-        person1_graph.add(
-            (
-                URIRef("http://example.org/person1"),
-                URIRef("http://example.org/name"),
-                Literal("Person 1"),
-            )
-        )
-
-        person2_graph = Graph()
-        person2_graph.add(
-            (
-                URIRef("http://example.org/person2"),
-                URIRef("http://example.org/name"),
-                Literal("Person 2"),
-            )
-        )
-
-        # Mock fetch_data_graph_for_subject to return our test graphs
-        with patch(
-            "heritrace.utils.sparql_utils.fetch_data_graph_for_subject"
-        ) as mock_fetch:
-            mock_fetch.side_effect = lambda uri: (
-                person1_graph
-                if uri == URIRef("http://example.org/person1")
-                else person2_graph
-            )
-
-            result = fetch_current_state_with_related_entities(provenance)
-
-            assert isinstance(result, Graph)
-            assert not isinstance(result, Dataset)
-
-            assert len(result) == 2
-            assert (
-                URIRef("http://example.org/person1"),
-                URIRef("http://example.org/name"),
-                Literal("Person 1"),
-            ) in result
-            assert (
-                URIRef("http://example.org/person2"),
-                URIRef("http://example.org/name"),
-                Literal("Person 2"),
-            ) in result
-
-            assert mock_fetch.call_count == 2
-            mock_fetch.assert_any_call(URIRef("http://example.org/person1"))
-            mock_fetch.assert_any_call(URIRef("http://example.org/person2"))
-
-
-class TestGetEntitiesWithEnhancedShapeDetection:
-    """Tests for the _get_entities_with_enhanced_shape_detection function."""
-
-    def test_get_entities_with_enhanced_shape_detection_virtuoso(self) -> None:
-        """Test enhanced shape detection with Virtuoso."""
-        class_uri = "http://example.org/Person"
-        classes_with_multiple_shapes = {"http://example.org/Person"}
-
-        # First query returns subjects
-        subjects_result = {
-            "results": {
-                "bindings": [
-                    {"subject": {"value": "http://example.org/person1"}},
-                    {"subject": {"value": "http://example.org/person2"}},
-                ]
-            }
-        }
-
-        # Second query returns triples
-        triples_result = {
-            "results": {
-                "bindings": [
-                    {
-                        "subject": {"value": "http://example.org/person1"},
-                        "p": {
-                            "value": "http://www.w3.org/1999/02/22-rdf-syntax-ns#type"
-                        },
-                        "o": {"value": "http://example.org/Person"},
-                    },
-                    {
-                        "subject": {"value": "http://example.org/person1"},
-                        "p": {"value": "http://example.org/name"},
-                        "o": {"value": "John Doe"},
-                    },
-                    {
-                        "subject": {"value": "http://example.org/person2"},
-                        "p": {
-                            "value": "http://www.w3.org/1999/02/22-rdf-syntax-ns#type"
-                        },
-                        "o": {"value": "http://example.org/Person"},
-                    },
-                    {
-                        "subject": {"value": "http://example.org/person2"},
-                        "p": {"value": "http://example.org/age"},
-                        "o": {"value": "30"},
-                    },
-                ]
-            }
-        }
-
-        with (
-            patch("heritrace.utils.sparql_utils.get_sparql") as mock_get_sparql,
-            patch("heritrace.utils.sparql_utils.is_virtuoso", return_value=True),
-            patch(
-                "heritrace.utils.sparql_utils.determine_shape_for_entity_triples"
-            ) as mock_determine_shape,
-            patch(
-                "heritrace.utils.sparql_utils.is_entity_type_visible", return_value=True
-            ),
-        ):
-            mock_sparql = mock_get_sparql.return_value
-            # Return different results for the two queries
-            mock_sparql.query.return_value.convert.side_effect = [
-                subjects_result,
-                triples_result,
-            ]
-
-            mock_determine_shape.side_effect = lambda triples: (
-                "http://example.org/PersonShapeA"
-                if any("name" in str(t) for t in triples)
-                else "http://example.org/PersonShapeB"
-            )
-
-            result = _get_entities_with_enhanced_shape_detection(
-                class_uri, classes_with_multiple_shapes
-            )
-
-            # Now expects 2 queries: one for subjects, one for triples
-            assert mock_sparql.setQuery.call_count == 2
-
-            # Verify the first query (subjects)
-            first_query = mock_sparql.setQuery.call_args_list[0][0][0]
-            assert "SELECT DISTINCT ?subject" in first_query
-            assert f"?subject a <{class_uri}>" in first_query
-
-            # Verify the second query (triples)
-            second_query = mock_sparql.setQuery.call_args_list[1][0][0]
-            assert "SELECT ?subject ?p ?o" in second_query
-            assert "VALUES (?subject)" in second_query
-
-            assert len(result) == 2
-            assert "http://example.org/PersonShapeA" in result
-            assert "http://example.org/PersonShapeB" in result
-
-            shape_a_entities = result["http://example.org/PersonShapeA"]
-            shape_b_entities = result["http://example.org/PersonShapeB"]
-
-            assert len(shape_a_entities) == 1
-            assert shape_a_entities[0]["uri"] == "http://example.org/person1"
-            assert shape_a_entities[0]["class"] == class_uri
-            assert shape_a_entities[0]["shape"] == "http://example.org/PersonShapeA"
-
-            assert len(shape_b_entities) == 1
-            assert shape_b_entities[0]["uri"] == "http://example.org/person2"
-            assert shape_b_entities[0]["class"] == class_uri
-            assert shape_b_entities[0]["shape"] == "http://example.org/PersonShapeB"
-
-    def test_get_entities_with_enhanced_shape_detection_non_virtuoso(self) -> None:
-        """Test enhanced shape detection with non-Virtuoso store."""
-        class_uri = "http://example.org/Document"
-        classes_with_multiple_shapes = {"http://example.org/Document"}
-
-        # First query returns subjects
-        subjects_result = {
-            "results": {
-                "bindings": [
-                    {"subject": {"value": "http://example.org/doc1"}},
-                ]
-            }
-        }
-
-        # Second query returns triples
-        triples_result = {
-            "results": {
-                "bindings": [
-                    {
-                        "subject": {"value": "http://example.org/doc1"},
-                        "p": {
-                            "value": "http://www.w3.org/1999/02/22-rdf-syntax-ns#type"
-                        },
-                        "o": {"value": "http://example.org/Document"},
-                    },
-                    {
-                        "subject": {"value": "http://example.org/doc1"},
-                        "p": {"value": "http://example.org/title"},
-                        "o": {"value": "Test Document"},
-                    },
-                ]
-            }
-        }
+    def test_keeps_language_tags_of_imported_literals(self) -> None:
+        mock_editor = MagicMock()
+        mock_editor.dataset_is_quadstore = False
 
         with (
             patch("heritrace.utils.sparql_utils.get_sparql") as mock_get_sparql,
             patch("heritrace.utils.sparql_utils.is_virtuoso", return_value=False),
-            patch(
-                "heritrace.utils.sparql_utils.determine_shape_for_entity_triples",
-                return_value="http://example.org/DocumentShape",
-            ),
-            patch(
-                "heritrace.utils.sparql_utils.is_entity_type_visible", return_value=True
-            ),
         ):
-            mock_sparql = mock_get_sparql.return_value
-            # Return different results for the two queries
-            mock_sparql.query.return_value.convert.side_effect = [
-                subjects_result,
-                triples_result,
-            ]
-
-            result = _get_entities_with_enhanced_shape_detection(
-                class_uri, classes_with_multiple_shapes
-            )
-
-            # Now expects 2 queries: one for subjects, one for triples
-            assert mock_sparql.setQuery.call_count == 2
+            mock_get_sparql.return_value.query.return_value.convert.return_value = {
+                "results": {
+                    "bindings": [
+                        {
+                            "subject": {"value": "http://example.org/br1"},
+                            "predicate": {"value": "http://example.org/title"},
+                            "object": {
+                                "type": "literal",
+                                "value": "Titolo",
+                                "xml:lang": "it",
+                            },
+                        }
+                    ]
+                }
+            }
+            import_entity_graph(mock_editor, URIRef("http://example.org/br1"))
 
-            # Verify the first query (subjects)
-            first_query = mock_sparql.setQuery.call_args_list[0][0][0]
-            assert "SELECT DISTINCT ?subject" in first_query
-            assert f"?subject a <{class_uri}>" in first_query
-            assert "GRAPH ?g" not in first_query
+        (graph,) = mock_editor.import_graph.call_args.args
+        assert (
+            URIRef("http://example.org/br1"),
+            URIRef("http://example.org/title"),
+            Literal("Titolo", lang="it"),
+        ) in graph
 
-            # Verify the second query (triples)
-            second_query = mock_sparql.setQuery.call_args_list[1][0][0]
-            assert "SELECT ?subject ?p ?o" in second_query
-            assert "VALUES (?subject)" in second_query
 
-            assert len(result) == 1
-            assert "http://example.org/DocumentShape" in result
-            assert len(result["http://example.org/DocumentShape"]) == 1
-            assert (
-                result["http://example.org/DocumentShape"][0]["uri"]
-                == "http://example.org/doc1"
-            )
+class TestFetchCurrentStateWithRelatedEntities:
+    """Tests for the fetch_current_state_with_related_entities function."""
 
-    def test_get_entities_with_enhanced_shape_detection_invisible_entities(
-        self,
+    def test_fetch_current_state_with_related_entities_triplestore(
+        self, mock_quadstore, mock_sparql_wrapper
     ) -> None:
-        """Test that invisible entities are filtered out."""
-        class_uri = "http://example.org/Person"
-        classes_with_multiple_shapes = {"http://example.org/Person"}
+        """
+        Test fetching current state with related entities from a triplestore (not
+        quadstore).
+        """
+        # Configure mock to return False for quadstore check
+        mock_quadstore.return_value = False
 
-        mock_sparql_results = {
+        # Create test data
+        provenance = {
+            "http://example.org/person1": {"version": "1"},
+            "http://example.org/person2": {"version": "2"},
+        }
+        mock_sparql_wrapper.query.return_value.convert.return_value = {
             "results": {
                 "bindings": [
                     {
-                        "subject": {"value": "http://example.org/person1"},
-                        "p": {
-                            "value": "http://www.w3.org/1999/02/22-rdf-syntax-ns#type"
-                        },
-                        "o": {"value": "http://example.org/Person"},
+                        "subject": {"value": f"http://example.org/person{i}"},
+                        "predicate": {"value": "http://example.org/name"},
+                        "object": {"type": "literal", "value": f"Person {i}"},
                     }
+                    for i in (1, 2)
                 ]
             }
         }
 
-        with (
-            patch("heritrace.utils.sparql_utils.get_sparql") as mock_get_sparql,
-            patch("heritrace.utils.sparql_utils.is_virtuoso", return_value=False),
-            patch(
-                "heritrace.utils.sparql_utils.determine_shape_for_entity_triples",
-                return_value="http://example.org/PersonShape",
-            ),
-            patch(
-                "heritrace.utils.sparql_utils.is_entity_type_visible",
-                return_value=False,
-            ),
-        ):
-            mock_sparql = mock_get_sparql.return_value
-            mock_sparql.query.return_value.convert.return_value = mock_sparql_results
+        with patch("heritrace.utils.sparql_utils.is_virtuoso", return_value=False):
+            result = fetch_current_state_with_related_entities(provenance)
 
-            result = _get_entities_with_enhanced_shape_detection(
-                class_uri, classes_with_multiple_shapes
-            )
+        assert isinstance(result, Graph)
+        assert not isinstance(result, Dataset)
 
-            assert len(result) == 0
+        assert len(result) == 2
+        assert (
+            URIRef("http://example.org/person1"),
+            URIRef("http://example.org/name"),
+            Literal("Person 1"),
+        ) in result
+        assert (
+            URIRef("http://example.org/person2"),
+            URIRef("http://example.org/name"),
+            Literal("Person 2"),
+        ) in result
+
+        mock_sparql_wrapper.setQuery.assert_called_once()
+        query = mock_sparql_wrapper.setQuery.call_args[0][0]
+        assert (
+            "VALUES ?subject { <http://example.org/person1> "
+            "<http://example.org/person2> }"
+        ) in query
 
 
+@pytest.mark.usefixtures("class_counts")
 class TestGetAvailableClassesMultipleShapes:
     """Tests for the multiple shapes branch in get_available_classes function."""
 
@@ -1378,36 +1455,11 @@ class TestGetAvailableClassesMultipleShapes:
             }
         }
 
-        mock_shape_to_entities = {
-            "http://example.org/PersonShapeA": [
-                {
-                    "uri": "http://example.org/person1",
-                    "class": "http://example.org/Person",
-                    "shape": "http://example.org/PersonShapeA",
-                },
-                {
-                    "uri": "http://example.org/person2",
-                    "class": "http://example.org/Person",
-                    "shape": "http://example.org/PersonShapeA",
-                },
-            ],
-            "http://example.org/PersonShapeB": [
-                {
-                    "uri": "http://example.org/person3",
-                    "class": "http://example.org/Person",
-                    "shape": "http://example.org/PersonShapeB",
-                }
-            ],
+        mock_shape_counts = {
+            "http://example.org/PersonShapeA": 2,
+            "http://example.org/PersonShapeB": 1,
         }
 
-        # Mock count function
-        def mock_count_instances(class_uri, _limit=10000):
-            if class_uri == "http://example.org/Person":
-                return ("10", 10)
-            if class_uri == "http://example.org/Document":
-                return ("5", 5)
-            return ("0", 0)
-
         with (
             patch("heritrace.utils.sparql_utils.get_sparql") as mock_get_sparql,
             patch("heritrace.utils.sparql_utils.get_custom_filter") as mock_get_filter,
@@ -1417,8 +1469,8 @@ class TestGetAvailableClassesMultipleShapes:
                 return_value={"http://example.org/Person"},
             ),
             patch(
-                "heritrace.utils.sparql_utils._get_entities_with_enhanced_shape_detection",
-                return_value=mock_shape_to_entities,
+                "heritrace.utils.sparql_utils.count_shapes",
+                return_value=mock_shape_counts,
             ),
             patch(
                 "heritrace.utils.sparql_utils.determine_shape_for_classes",
@@ -1427,10 +1479,6 @@ class TestGetAvailableClassesMultipleShapes:
             patch(
                 "heritrace.utils.sparql_utils.is_entity_type_visible", return_value=True
             ),
-            patch.dict(
-                "heritrace.utils.sparql_utils._cache",
-                {"available_classes": None},
-            ),
             patch(
                 "heritrace.utils.sparql_utils.get_classes_from_shacl_or_display_rules",
                 return_value=[
@@ -1439,7 +1487,7 @@ class TestGetAvailableClassesMultipleShapes:
                 ],
             ),
             patch(
-                "heritrace.utils.sparql_utils._count_class_instances",
+                "heritrace.utils.sparql_utils._count_classes_instances",
                 side_effect=mock_count_instances,
             ),
         ):
@@ -1498,7 +1546,7 @@ class TestGetAvailableClassesMultipleShapes:
 
     def test_get_available_classes_multiple_shapes_empty_results(self) -> None:
         """
-        Test get_available_classes when enhanced shape detection returns empty results.
+        Test get_available_classes when no entity belongs to any shape.
         """
         mock_classes_results = {
             "results": {
@@ -1511,8 +1559,6 @@ class TestGetAvailableClassesMultipleShapes:
             }
         }
 
-        mock_shape_to_entities = {}
-
         with (
             patch("heritrace.utils.sparql_utils.get_sparql") as mock_get_sparql,
             patch("heritrace.utils.sparql_utils.get_custom_filter"),
@@ -1521,14 +1567,7 @@ class TestGetAvailableClassesMultipleShapes:
                 "heritrace.utils.sparql_utils.get_classes_with_multiple_shapes",
                 return_value={"http://example.org/Person"},
             ),
-            patch(
-                "heritrace.utils.sparql_utils._get_entities_with_enhanced_shape_detection",
-                return_value=mock_shape_to_entities,
-            ),
-            patch.dict(
-                "heritrace.utils.sparql_utils._cache",
-                {"available_classes": None},
-            ),
+            patch("heritrace.utils.sparql_utils.count_shapes", return_value={}),
             patch(
                 "heritrace.utils.sparql_utils.get_classes_from_shacl_or_display_rules",
                 return_value=["http://example.org/Person"],
@@ -1545,404 +1584,217 @@ class TestGetAvailableClassesMultipleShapes:
 class TestGetEntitiesForClassShapeFiltering:
     """Tests for the shape filtering branch in get_entities_for_class function."""
 
-    def test_get_entities_for_class_with_shape_filtering_virtuoso(self, app) -> None:
-        """Test get_entities_for_class with shape filtering on Virtuoso."""
-        selected_class = "http://example.org/Person"
-        selected_shape = "http://example.org/PersonShapeA"
-        classes_with_multiple_shapes = {"http://example.org/Person"}
-
-        # First query returns subjects
-        subjects_result = {
-            "results": {
-                "bindings": [
-                    {"subject": {"value": "http://example.org/person1"}},
-                    {"subject": {"value": "http://example.org/person2"}},
-                ]
-            }
-        }
-
-        # Second query returns triples
-        triples_result = {
-            "results": {
-                "bindings": [
-                    {
-                        "subject": {"value": "http://example.org/person1"},
-                        "p": {
-                            "value": "http://www.w3.org/1999/02/22-rdf-syntax-ns#type"
-                        },
-                        "o": {"value": "http://example.org/Person"},
-                    },
-                    {
-                        "subject": {"value": "http://example.org/person1"},
-                        "p": {"value": "http://example.org/name"},
-                        "o": {"value": "John Doe"},
-                    },
-                    {
-                        "subject": {"value": "http://example.org/person2"},
-                        "p": {
-                            "value": "http://www.w3.org/1999/02/22-rdf-syntax-ns#type"
-                        },
-                        "o": {"value": "http://example.org/Person"},
-                    },
-                    {
-                        "subject": {"value": "http://example.org/person2"},
-                        "p": {"value": "http://example.org/age"},
-                        "o": {"value": "30"},
-                    },
-                ]
-            }
-        }
-
-        with (
-            patch("heritrace.utils.sparql_utils.get_sparql") as mock_get_sparql,
-            patch("heritrace.utils.sparql_utils.get_custom_filter") as mock_get_filter,
-            patch("heritrace.utils.sparql_utils.is_virtuoso", return_value=True),
-            patch(
-                "heritrace.utils.sparql_utils.get_classes_with_multiple_shapes",
-                return_value=classes_with_multiple_shapes,
-            ),
-            patch(
-                "heritrace.utils.sparql_utils.determine_shape_for_entity_triples"
-            ) as mock_determine_shape,
-        ):
-            mock_sparql = mock_get_sparql.return_value
-            # Return different results for the two queries
-            mock_sparql.query.return_value.convert.side_effect = [
-                subjects_result,
-                triples_result,
-            ]
-
-            mock_filter = mock_get_filter.return_value
-            mock_filter.human_readable_entity.side_effect = (
-                lambda uri, _entity_key, _graph: f"Entity {uri.split('/')[-1]}"
-            )
-
-            mock_determine_shape.side_effect = lambda triples: (
-                selected_shape
-                if any("name" in str(t) for t in triples)
-                else "http://example.org/PersonShapeB"
-            )
-
-            entities, total_count = get_entities_for_class(
-                CatalogQuery(
-                    selected_class=selected_class,
-                    page=1,
-                    per_page=10,
-                    selected_shape=selected_shape,
-                ),
-                [],
-            )
-
-            # Now expects 2 queries: one for subjects, one for triples
-            assert mock_sparql.setQuery.call_count == 2
-
-            # Verify the first query (subjects)
-            first_query = mock_sparql.setQuery.call_args_list[0][0][0]
-            assert "SELECT DISTINCT ?subject" in first_query
-            assert f"?subject a <{selected_class}>" in first_query
-
-            # Verify the second query (triples)
-            second_query = mock_sparql.setQuery.call_args_list[1][0][0]
-            assert "SELECT ?subject ?p ?o" in second_query
-            assert "VALUES (?subject)" in second_query
-
-            assert total_count == 1
-            assert len(entities) == 1
-            assert entities[0]["uri"] == "http://example.org/person1"
-            assert entities[0]["label"] == "Entity person1"
-
-    def test_get_entities_for_class_with_shape_filtering_non_virtuoso(
-        self, app
-    ) -> None:
-        """Test get_entities_for_class with shape filtering on non-Virtuoso."""
-        selected_class = "http://example.org/Document"
-        selected_shape = "http://example.org/DocumentShapeA"
-        classes_with_multiple_shapes = {"http://example.org/Document"}
-
-        # First query returns subjects
-        subjects_result = {
-            "results": {
-                "bindings": [
-                    {"subject": {"value": "http://example.org/doc1"}},
-                ]
-            }
-        }
-
-        # Second query returns triples
-        triples_result = {
-            "results": {
-                "bindings": [
-                    {
-                        "subject": {"value": "http://example.org/doc1"},
-                        "p": {
-                            "value": "http://www.w3.org/1999/02/22-rdf-syntax-ns#type"
-                        },
-                        "o": {"value": "http://example.org/Document"},
-                    },
-                    {
-                        "subject": {"value": "http://example.org/doc1"},
-                        "p": {"value": "http://example.org/title"},
-                        "o": {"value": "Document Title"},
-                    },
-                ]
-            }
-        }
+    selected_class = "http://example.org/Role"
+    selected_shape = "http://example.org/AuthorShape"
 
+    @pytest.fixture
+    def shape_listing(self, mock_sparql_wrapper, mock_custom_filter):
         with (
-            patch("heritrace.utils.sparql_utils.get_sparql") as mock_get_sparql,
-            patch("heritrace.utils.sparql_utils.get_custom_filter") as mock_get_filter,
-            patch("heritrace.utils.sparql_utils.is_virtuoso", return_value=False),
             patch(
                 "heritrace.utils.sparql_utils.get_classes_with_multiple_shapes",
-                return_value=classes_with_multiple_shapes,
+                return_value={self.selected_class},
             ),
             patch(
-                "heritrace.utils.sparql_utils.determine_shape_for_entity_triples",
-                return_value=selected_shape,
-            ),
-        ):
-            mock_sparql = mock_get_sparql.return_value
-            # Return different results for the two queries
-            mock_sparql.query.return_value.convert.side_effect = [
-                subjects_result,
-                triples_result,
-            ]
-
-            mock_filter = mock_get_filter.return_value
-            mock_filter.human_readable_entity.return_value = "Test Document"
-
-            entities, total_count = get_entities_for_class(
-                CatalogQuery(
-                    selected_class=selected_class,
-                    page=1,
-                    per_page=10,
-                    selected_shape=selected_shape,
-                ),
-                [],
-            )
-
-            # Now expects 2 queries: one for subjects, one for triples
-            assert mock_sparql.setQuery.call_count == 2
-
-            # Verify the first query (subjects)
-            first_query = mock_sparql.setQuery.call_args_list[0][0][0]
-            assert "SELECT DISTINCT ?subject" in first_query
-            assert f"?subject a <{selected_class}>" in first_query
-            assert "GRAPH ?g" not in first_query
-
-            # Verify the second query (triples)
-            second_query = mock_sparql.setQuery.call_args_list[1][0][0]
-            assert "SELECT ?subject ?p ?o" in second_query
-            assert "VALUES (?subject)" in second_query
-
-            assert total_count == 1
-            assert len(entities) == 1
-            assert entities[0]["uri"] == "http://example.org/doc1"
-            assert entities[0]["label"] == "Test Document"
-
-    def test_get_entities_for_class_with_shape_filtering_and_sorting(self, app) -> None:
-        """Test get_entities_for_class with shape filtering and sorting."""
-        selected_class = "http://example.org/Person"
-        selected_shape = "http://example.org/PersonShapeA"
-        classes_with_multiple_shapes = {"http://example.org/Person"}
+                "heritrace.utils.sparql_utils.build_sort_clause",
+                side_effect=lambda prop, *_: (
+                    f"OPTIONAL {{ ?subject <{prop}> ?sortValue }}"
+                ),
+            ),
+            patch("heritrace.utils.sparql_utils._get_sort_type", return_value="string"),
+        ):
+            yield mock_sparql_wrapper
 
-        mock_sparql_results = {
+    @staticmethod
+    def _bindings(*subjects: str) -> dict:
+        return {
             "results": {
                 "bindings": [
-                    {
-                        "subject": {"value": "http://example.org/person1"},
-                        "p": {"value": "http://example.org/name"},
-                        "o": {"value": "Alice"},
-                    },
-                    {
-                        "subject": {"value": "http://example.org/person2"},
-                        "p": {"value": "http://example.org/name"},
-                        "o": {"value": "Bob"},
-                    },
+                    {"subject": {"type": "uri", "value": subject}}
+                    for subject in subjects
                 ]
             }
         }
 
+    def test_discriminating_shapes_filter_in_the_listing_query(
+        self, shape_listing
+    ) -> None:
+        discriminator = "FILTER(EXISTS { ?subject <http://example.org/role> [] })"
+        shape_listing.query.return_value.convert.return_value = self._bindings(
+            "http://example.org/role/1", "http://example.org/role/2"
+        )
+
         with (
-            patch("heritrace.utils.sparql_utils.get_sparql") as mock_get_sparql,
-            patch("heritrace.utils.sparql_utils.get_custom_filter") as mock_get_filter,
-            patch("heritrace.utils.sparql_utils.is_virtuoso", return_value=False),
             patch(
-                "heritrace.utils.sparql_utils.get_classes_with_multiple_shapes",
-                return_value=classes_with_multiple_shapes,
+                "heritrace.utils.sparql_utils.get_shape_discriminator",
+                return_value=discriminator,
             ),
             patch(
-                "heritrace.utils.sparql_utils.determine_shape_for_entity_triples",
-                return_value=selected_shape,
+                "heritrace.utils.sparql_utils.has_foreign_shaped_entities",
+                return_value=False,
             ),
+            patch(
+                "heritrace.utils.sparql_utils.count_shape", return_value=42
+            ) as mock_count,
+            patch(
+                "heritrace.utils.sparql_utils.page_shape_members"
+            ) as mock_page_members,
         ):
-            mock_sparql = mock_get_sparql.return_value
-            mock_sparql.query.return_value.convert.return_value = mock_sparql_results
-
-            mock_filter = mock_get_filter.return_value
-            mock_filter.human_readable_entity.side_effect = (
-                lambda uri, _entity_key, _graph: uri.split("/")[-1]
-            )
-
-            entities_asc, total_count_asc = get_entities_for_class(
+            entities, total_count = get_entities_for_class(
                 CatalogQuery(
-                    selected_class=selected_class,
+                    selected_class=self.selected_class,
                     page=1,
                     per_page=10,
-                    sort_property="http://example.org/name",
-                    sort_direction="ASC",
-                    selected_shape=selected_shape,
+                    selected_shape=self.selected_shape,
                 ),
                 [],
             )
 
-            assert total_count_asc == 2
-            assert len(entities_asc) == 2
-            assert (
-                entities_asc[0]["uri"] == "http://example.org/person1"
-            )  # Alice should come first
-            assert (
-                entities_asc[1]["uri"] == "http://example.org/person2"
-            )  # Bob should come second
-
-            entities_desc, total_count_desc = get_entities_for_class(
+        assert [entity["uri"] for entity in entities] == [
+            "http://example.org/role/1",
+            "http://example.org/role/2",
+        ]
+        assert total_count == 42
+        shape_listing.setQuery.assert_called_once()
+        listing_query = shape_listing.setQuery.call_args.args[0]
+        assert discriminator in listing_query
+        assert "LIMIT 10" in listing_query
+        mock_count.assert_called_once_with(self.selected_class, self.selected_shape)
+        mock_page_members.assert_not_called()
+
+    def test_unsorted_pages_are_read_from_the_shape_index(self, shape_listing) -> None:
+        with (
+            patch(
+                "heritrace.utils.sparql_utils.get_shape_discriminator",
+                return_value=None,
+            ),
+            patch("heritrace.utils.sparql_utils.count_shape", return_value=5),
+            patch(
+                "heritrace.utils.sparql_utils.page_shape_members",
+                return_value=["http://example.org/role/5", "http://example.org/role/3"],
+            ) as mock_page_members,
+        ):
+            page = sparql_utils.get_catalog_page(
                 CatalogQuery(
-                    selected_class=selected_class,
-                    page=1,
-                    per_page=10,
-                    sort_property="http://example.org/name",
+                    selected_class=self.selected_class,
+                    page=2,
+                    per_page=2,
                     sort_direction="DESC",
-                    selected_shape=selected_shape,
+                    selected_shape=self.selected_shape,
                 ),
                 [],
             )
 
-            assert total_count_desc == 2
-            assert len(entities_desc) == 2
-            assert (
-                entities_desc[0]["uri"] == "http://example.org/person2"
-            )  # Bob should come first
-            assert (
-                entities_desc[1]["uri"] == "http://example.org/person1"
-            )  # Alice should come second
-
-    def test_get_entities_for_class_with_shape_filtering_pagination(self, app) -> None:
-        """Test get_entities_for_class with shape filtering and pagination."""
-        selected_class = "http://example.org/Person"
-        selected_shape = "http://example.org/PersonShapeA"
-        classes_with_multiple_shapes = {"http://example.org/Person"}
-
-        # First page: subjects query and triples query
-        subjects_result_page1 = {
-            "results": {
-                "bindings": [
-                    {"subject": {"value": f"http://example.org/person{i}"}}
-                    for i in range(1, 6)
-                ]
-            }
-        }
-
-        triples_result_page1 = {
-            "results": {
-                "bindings": [
-                    {
-                        "subject": {"value": f"http://example.org/person{i}"},
-                        "p": {"value": "http://example.org/name"},
-                        "o": {"value": f"Person {i}"},
-                    }
-                    for i in range(1, 6)
-                ]
-            }
-        }
-
-        # Second page: different subjects and triples
-        subjects_result_page2 = {
-            "results": {
-                "bindings": [
-                    {"subject": {"value": f"http://example.org/person{i}"}}
-                    for i in range(6, 11)
-                ]
-            }
-        }
+        assert [entity["uri"] for entity in page.entities] == [
+            "http://example.org/role/5",
+            "http://example.org/role/3",
+        ]
+        assert page.total_count == 5
+        assert page.next_cursor is not None
+        mock_page_members.assert_called_once_with(
+            self.selected_class,
+            self.selected_shape,
+            after=None,
+            skip=2,
+            limit=2,
+            descending=True,
+        )
+        shape_listing.setQuery.assert_not_called()
 
-        triples_result_page2 = {
-            "results": {
-                "bindings": [
-                    {
-                        "subject": {"value": f"http://example.org/person{i}"},
-                        "p": {"value": "http://example.org/name"},
-                        "o": {"value": f"Person {i}"},
-                    }
-                    for i in range(6, 11)
-                ]
-            }
-        }
+    def test_sorted_pages_are_filled_across_listing_windows(
+        self, shape_listing
+    ) -> None:
+        editor_shape = "http://example.org/EditorShape"
+        first_window = [f"http://example.org/role/{index}" for index in range(1, 9)]
+        shapes = dict.fromkeys(first_window, editor_shape)
+        shapes["http://example.org/role/2"] = self.selected_shape
+        shapes["http://example.org/role/9"] = self.selected_shape
+        shape_listing.query.return_value.convert.side_effect = [
+            self._bindings(*first_window),
+            self._bindings("http://example.org/role/9", "http://example.org/role/10"),
+        ]
 
         with (
-            patch("heritrace.utils.sparql_utils.get_sparql") as mock_get_sparql,
-            patch("heritrace.utils.sparql_utils.get_custom_filter") as mock_get_filter,
-            patch("heritrace.utils.sparql_utils.is_virtuoso", return_value=False),
             patch(
-                "heritrace.utils.sparql_utils.get_classes_with_multiple_shapes",
-                return_value=classes_with_multiple_shapes,
+                "heritrace.utils.sparql_utils.get_shape_discriminator",
+                return_value=None,
             ),
+            patch("heritrace.utils.sparql_utils.count_shape", return_value=2),
             patch(
-                "heritrace.utils.sparql_utils.determine_shape_for_entity_triples",
-                return_value=selected_shape,
-            ),
+                "heritrace.utils.sparql_utils.lookup_entity_shapes",
+                side_effect=lambda _class_uri, subjects: {
+                    subject: shapes.get(subject, editor_shape) for subject in subjects
+                },
+            ) as mock_lookup_shapes,
         ):
-            mock_sparql = mock_get_sparql.return_value
-            mock_filter = mock_get_filter.return_value
-            mock_filter.human_readable_entity.side_effect = (
-                lambda uri, _entity_key, _graph: f"Entity {uri.split('/')[-1]}"
-            )
-
-            # Page 1: return first set of subjects and triples
-            mock_sparql.query.return_value.convert.side_effect = [
-                subjects_result_page1,
-                triples_result_page1,
-            ]
-
-            entities_page1, total_count = get_entities_for_class(
+            page = sparql_utils.get_catalog_page(
                 CatalogQuery(
-                    selected_class=selected_class,
+                    selected_class=self.selected_class,
                     page=1,
-                    per_page=3,
-                    selected_shape=selected_shape,
+                    per_page=2,
+                    sort_property="http://example.org/name",
+                    selected_shape=self.selected_shape,
                 ),
                 [],
             )
 
-            assert total_count == 5
-            assert len(entities_page1) == 3
-            assert entities_page1[0]["uri"] == "http://example.org/person1"
-            assert entities_page1[1]["uri"] == "http://example.org/person2"
-            assert entities_page1[2]["uri"] == "http://example.org/person3"
+        assert [entity["uri"] for entity in page.entities] == [
+            "http://example.org/role/2",
+            "http://example.org/role/9",
+        ]
+        assert page.total_count == 2
+        assert page.next_cursor is not None
+        second_window = shape_listing.setQuery.call_args_list[1].args[0]
+        assert 'STR(?subject) > "http://example.org/role/8"' in second_window
+        assert "LIMIT 8" in second_window
+        mock_lookup_shapes.assert_called_with(
+            self.selected_class,
+            ["http://example.org/role/9", "http://example.org/role/10"],
+        )
 
-            # Page 2: return second set of subjects and triples
-            mock_sparql.query.return_value.convert.side_effect = [
-                subjects_result_page2,
-                triples_result_page2,
-            ]
+    def test_unsorted_pages_are_filled_while_the_membership_is_built(
+        self, shape_listing
+    ) -> None:
+        shape_listing.query.return_value.convert.return_value = self._bindings(
+            "http://example.org/role/1", "http://example.org/role/2"
+        )
 
-            entities_page2, total_count = get_entities_for_class(
+        with (
+            patch(
+                "heritrace.utils.sparql_utils.get_shape_discriminator",
+                return_value=None,
+            ),
+            patch("heritrace.utils.sparql_utils.count_shape", return_value=None),
+            patch("heritrace.utils.sparql_utils.page_shape_members", return_value=None),
+            patch(
+                "heritrace.utils.sparql_utils.lookup_entity_shapes",
+                side_effect=lambda _class_uri, subjects: dict.fromkeys(
+                    subjects, self.selected_shape
+                ),
+            ),
+        ):
+            page = sparql_utils.get_catalog_page(
                 CatalogQuery(
-                    selected_class=selected_class,
-                    page=2,
-                    per_page=3,
-                    selected_shape=selected_shape,
+                    selected_class=self.selected_class,
+                    page=1,
+                    per_page=2,
+                    selected_shape=self.selected_shape,
                 ),
-                [],
+                [
+                    {
+                        "uri": self.selected_class,
+                        "shape": self.selected_shape,
+                        "count_numeric": 7,
+                    }
+                ],
             )
 
-            # With shape filtering pagination, total_count is approximate
-            assert total_count == 5
-            assert (
-                len(entities_page2) == 3
-            )  # Returns 3 entities (person6-8) limited by per_page
-            assert entities_page2[0]["uri"] == "http://example.org/person6"
-            assert entities_page2[1]["uri"] == "http://example.org/person7"
-            assert entities_page2[2]["uri"] == "http://example.org/person8"
+        assert [entity["uri"] for entity in page.entities] == [
+            "http://example.org/role/1",
+            "http://example.org/role/2",
+        ]
+        assert page.total_count == 7
+        listing_query = shape_listing.setQuery.call_args.args[0]
+        assert "ORDER BY ASC(?subject)" in listing_query
 
 
 PERSON = "http://example.org/Person"
@@ -1976,13 +1828,6 @@ def deletion_binding(
     return binding
 
 
-@pytest.fixture(autouse=True)
-def clear_deleted_classes_cache():
-    sparql_utils._cache["deleted_classes"] = None  # noqa: SLF001
-    yield
-    sparql_utils._cache["deleted_classes"] = None  # noqa: SLF001
-
-
 @pytest.fixture
 def mock_provenance_sparql():
     """Mock provenance SPARQL wrapper for testing."""
@@ -2016,6 +1861,26 @@ def mock_shapes_and_visibility():
         yield mock_shape, mock_visible, mock_priority
 
 
+LABEL_RULE = {
+    "fetchUriDisplay": (
+        "SELECT ?display WHERE { [[uri]] <http://example.org/worksAt> ?org . "
+        "?org <http://example.org/name> ?display }"
+    )
+}
+
+
+@pytest.fixture
+def mock_label_rule():
+    """Label deleted entities through their workplace, with no state cached."""
+    with (
+        patch(
+            "heritrace.utils.sparql_utils.find_matching_rule", return_value=LABEL_RULE
+        ) as mock_rule,
+        patch.object(sparql_utils._related_state_cache, "entries", OrderedDict()),  # noqa: SLF001
+    ):
+        yield mock_rule
+
+
 class TestDeletedEntityTypes:
     """Tests for reading entity types out of a deletion update query."""
 
@@ -2026,7 +1891,7 @@ class TestDeletedEntityTypes:
             extra=f"<http://example.org/person1> {RDF_TYPE} <{DOCUMENT}> .",
         )
 
-        types = _deleted_entity_types("http://example.org/person1", update_query)
+        types = deleted_entity_types("http://example.org/person1", update_query)
 
         assert types == [PERSON, DOCUMENT]
 
@@ -2037,7 +1902,7 @@ class TestDeletedEntityTypes:
             extra=f"<http://example.org/other> {RDF_TYPE} <{DOCUMENT}> .",
         )
 
-        types = _deleted_entity_types("http://example.org/person1", update_query)
+        types = deleted_entity_types("http://example.org/person1", update_query)
 
         assert types == [PERSON]
 
@@ -2115,23 +1980,53 @@ class TestGetDeletedAvailableClasses:
 
         assert get_deleted_available_classes() == []
 
-    def test_reuses_the_cached_result(
+    def test_reuses_the_shared_result(self, mock_provenance_sparql) -> None:
+        shared_classes = [{"uri": PERSON, "count": "1", "count_numeric": 1}]
+        shared_cache = MagicMock()
+        shared_cache.get.return_value = shared_classes
+
+        with patch(
+            "heritrace.utils.sparql_utils.get_shared_cache", return_value=shared_cache
+        ):
+            assert get_deleted_available_classes() == shared_classes
+
+        assert shared_cache.get.call_args.args[0] == "deleted_classes"
+        mock_provenance_sparql.query.assert_not_called()
+
+    def test_reads_exact_counts_from_the_deletion_index(
         self,
         mock_provenance_sparql,
         mock_custom_filter,
         mock_shapes_and_visibility,
         mock_configured_classes,
     ) -> None:
-        mock_provenance_sparql.query.return_value.convert.return_value = (
-            self.count_result(1)
-        )
+        deletion_index = MagicMock()
+        deletion_index.count.side_effect = lambda class_uri: {
+            PERSON: sparql_utils.COUNT_LIMIT + 5,
+            DOCUMENT: 0,
+        }[class_uri]
+        shared_cache = MagicMock()
 
-        get_deleted_available_classes()
-        get_deleted_available_classes()
+        with (
+            patch(
+                "heritrace.utils.sparql_utils.get_deletion_index",
+                return_value=deletion_index,
+            ),
+            patch(
+                "heritrace.utils.sparql_utils.get_shared_cache",
+                return_value=shared_cache,
+            ),
+        ):
+            deleted_classes = get_deleted_available_classes()
 
-        assert mock_provenance_sparql.query.call_count == 2
+        assert [(c["uri"], c["count_numeric"]) for c in deleted_classes] == [
+            (PERSON, sparql_utils.COUNT_LIMIT + 5)
+        ]
+        shared_cache.get.assert_not_called()
+        mock_provenance_sparql.query.assert_not_called()
 
 
+@pytest.mark.usefixtures("mock_label_rule")
 class TestProcessDeletedEntities:
     """Tests for building the listing entries of a page of deleted entities."""
 
@@ -2153,7 +2048,7 @@ class TestProcessDeletedEntities:
         assert entities[0]["label"] == "Human Readable Entity"
         assert entities[0]["deletedBy"] == "Test Agent"
 
-        state = mock_custom_filter.human_readable_entity.call_args[0][2]
+        state = mock_custom_filter.human_readable_entities.call_args[0][2]
         assert (
             URIRef("http://example.org/person1"),
             URIRef("http://example.org/name"),
@@ -2222,7 +2117,117 @@ class TestProcessDeletedEntities:
 
         process_deleted_entities([binding])
 
-        state = mock_custom_filter.human_readable_entity.call_args[0][2]
+        state = mock_custom_filter.human_readable_entities.call_args[0][2]
+        assert (
+            URIRef("http://example.org/org1"),
+            URIRef("http://example.org/name"),
+            Literal("ACME"),
+        ) in state
+
+    @staticmethod
+    def linking_binding(entity_uri: str, *targets: tuple[str, str]) -> dict:
+        return deletion_binding(
+            entity_uri,
+            PERSON,
+            extra="".join(
+                f"<{entity_uri}> <http://example.org/{predicate}> <{target}> ."
+                for predicate, target in targets
+            ),
+        )
+
+    def test_follows_only_the_links_of_the_label_queries(
+        self,
+        mock_sparql_wrapper,
+        mock_custom_filter,
+        mock_shapes_and_visibility,
+        mock_virtuoso,
+    ) -> None:
+        binding = self.linking_binding(
+            "http://example.org/person1",
+            ("worksAt", "http://example.org/org1"),
+            ("knows", "http://example.org/person2"),
+        )
+
+        process_deleted_entities([binding])
+
+        query = mock_sparql_wrapper.setQuery.call_args[0][0]
+        assert "<http://example.org/org1>" in query
+        assert "<http://example.org/person2>" not in query
+        assert "<http://example.org/worksAt>" in query
+        assert "<http://example.org/knows>" not in query
+        assert mock_sparql_wrapper.query.call_count == 1
+
+    def test_skips_the_expansion_without_label_queries(
+        self,
+        mock_label_rule,
+        mock_sparql_wrapper,
+        mock_custom_filter,
+        mock_shapes_and_visibility,
+        mock_virtuoso,
+    ) -> None:
+        mock_label_rule.return_value = {"displayName": "Person"}
+        binding = self.linking_binding(
+            "http://example.org/person1", ("worksAt", "http://example.org/org1")
+        )
+
+        process_deleted_entities([binding])
+
+        mock_sparql_wrapper.query.assert_not_called()
+
+    def test_reads_large_frontiers_in_chunks(
+        self,
+        mock_sparql_wrapper,
+        mock_custom_filter,
+        mock_shapes_and_visibility,
+        mock_virtuoso,
+    ) -> None:
+        binding = self.linking_binding(
+            "http://example.org/person1",
+            ("worksAt", "http://example.org/org1"),
+            ("worksAt", "http://example.org/org2"),
+            ("worksAt", "http://example.org/org3"),
+        )
+
+        with patch("heritrace.utils.sparql_utils.RELATED_STATE_BATCH_SIZE", 2):
+            process_deleted_entities([binding])
+
+        queries = [c[0][0] for c in mock_sparql_wrapper.setQuery.call_args_list]
+        assert len(queries) == 2
+        assert all(
+            sum(f"<http://example.org/org{i}>" in query for query in queries) == 1
+            for i in range(1, 4)
+        )
+
+    def test_reuses_the_states_read_for_a_previous_page(
+        self,
+        mock_sparql_wrapper,
+        mock_custom_filter,
+        mock_shapes_and_visibility,
+        mock_virtuoso,
+    ) -> None:
+        mock_sparql_wrapper.query.return_value.convert.return_value = {
+            "results": {
+                "bindings": [
+                    {
+                        "subject": {"value": "http://example.org/org1"},
+                        "predicate": {"value": "http://example.org/name"},
+                        "object": {"type": "literal", "value": "ACME"},
+                    }
+                ]
+            }
+        }
+
+        for entity_uri in ("http://example.org/person1", "http://example.org/person2"):
+            process_deleted_entities(
+                [
+                    self.linking_binding(
+                        entity_uri, ("worksAt", "http://example.org/org1")
+                    )
+                ]
+            )
+
+        assert mock_sparql_wrapper.query.call_count == 1
+        state = mock_custom_filter.human_readable_entities.call_args[0][2]
         assert (
             URIRef("http://example.org/org1"),
             URIRef("http://example.org/name"),
@@ -2230,6 +2235,7 @@ class TestProcessDeletedEntities:
         ) in state
 
 
+@pytest.mark.usefixtures("mock_label_rule")
 class TestGetDeletedEntitiesWithFiltering:
     """Tests for the get_deleted_entities_with_filtering function."""
 
@@ -2342,3 +2348,89 @@ class TestGetDeletedEntitiesWithFiltering:
         query = mock_provenance_sparql.setQuery.call_args[0][0]
         assert "ORDER BY ASC(?deletionTime)" in query
         assert "DESC(?deletionTime)" not in query
+
+    def test_pages_are_read_from_the_deletion_index(
+        self,
+        mock_provenance_sparql,
+        mock_sparql_wrapper,
+        mock_custom_filter,
+        mock_shapes_and_visibility,
+        mock_configured_classes,
+        mock_virtuoso,
+    ) -> None:
+        entity_uri = "http://example.org/person1"
+        binding = deletion_binding(entity_uri, PERSON)
+        record = DeletionRecord(
+            entity=entity_uri,
+            snapshot=f"{entity_uri}/prov/se/2",
+            classes=(PERSON,),
+            deletion_time=binding["deletionTime"]["value"],
+            agent=binding["agent"]["value"],
+            last_valid_snapshot=f"{entity_uri}/prov/se/1",
+        )
+        deletion_index = MagicMock()
+        deletion_index.count.return_value = 1
+        deletion_index.page.return_value = [record]
+        mock_provenance_sparql.query.return_value.convert.return_value = {
+            "results": {
+                "bindings": [
+                    {
+                        "snapshot": {"value": record.snapshot},
+                        "lastValidSnapshotTime": binding["lastValidSnapshotTime"],
+                        "updateQuery": binding["updateQuery"],
+                    }
+                ]
+            }
+        }
+
+        with patch(
+            "heritrace.utils.sparql_utils.get_deletion_index",
+            return_value=deletion_index,
+        ):
+            entities, *_, total_count = get_deleted_entities_with_filtering(
+                DeletedEntitiesQuery(page=2, per_page=10, selected_class=PERSON)
+            )
+
+        deletion_index.page.assert_called_once_with(
+            PERSON, offset=10, limit=10, descending=True
+        )
+        query = mock_provenance_sparql.setQuery.call_args[0][0]
+        assert f"(<{record.snapshot}> <{record.last_valid_snapshot}>)" in query
+        assert mock_provenance_sparql.query.call_count == 1
+        assert total_count == 1
+        assert [e["uri"] for e in entities] == [entity_uri]
+        assert entities[0]["lastValidSnapshotTime"] == "2023-01-14T15:20:00+00:00"
+
+
+class TestIterDeletionRecords:
+    """Tests for reading the deletions to index out of the provenance."""
+
+    def test_reads_the_deletions_in_chunks(self, mock_provenance_sparql) -> None:
+        entity_uri = "http://example.org/person1"
+        binding = {
+            **deletion_binding(entity_uri, PERSON, "2023-01-15T10:30:00Z"),
+            "snapshot": {"value": f"{entity_uri}/prov/se/2"},
+            "lastValidSnapshot": {"value": f"{entity_uri}/prov/se/1"},
+        }
+        mock_provenance_sparql.query.return_value.convert.side_effect = [
+            {"results": {"bindings": [binding]}},
+            {"results": {"bindings": []}},
+        ]
+
+        chunks = list(iter_deletion_records(chunk_size=1))
+
+        assert chunks == [
+            [
+                DeletionRecord(
+                    entity=entity_uri,
+                    snapshot=f"{entity_uri}/prov/se/2",
+                    classes=(PERSON,),
+                    deletion_time="2023-01-15T10:30:00+00:00",
+                    agent="http://example.org/agent1",
+                    last_valid_snapshot=f"{entity_uri}/prov/se/1",
+                )
+            ]
+        ]
+        queries = [c[0][0] for c in mock_provenance_sparql.setQuery.call_args_list]
+        assert "OFFSET 0" in queries[0]
+        assert "OFFSET 1" in queries[1]
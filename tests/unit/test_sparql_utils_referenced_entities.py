@@ -8,11 +8,17 @@ Tests for referenced entities functions in sparql_utils module.
 
 from unittest.mock import MagicMock, patch
 
+from rdflib import URIRef
+
+from heritrace.editor import EntityImportResult
 from heritrace.utils.sparql_utils import (
     collect_referenced_entities,
     import_referenced_entities,
 )
 
+PERSON_1 = URIRef("http://example.org/person1")
+PERSON_2 = URIRef("http://example.org/person2")
+
 
 class TestCollectReferencedEntities:
     """Tests for the collect_referenced_entities function."""
@@ -90,45 +96,48 @@ class TestImportReferencedEntities:
 
     @patch("heritrace.utils.sparql_utils.collect_referenced_entities")
     def test_import_referenced_entities_success(self, mock_collect) -> None:
-        """Test successful import of referenced entities."""
+        """Test that the referenced entities are imported in one bulk call."""
         mock_editor = MagicMock()
+        mock_editor.import_entities.return_value = EntityImportResult(
+            imported=(PERSON_1, PERSON_2)
+        )
         structured_data = {"test": "data"}
-        referenced_entities = {
-            "http://example.org/person1",
-            "http://example.org/person2",
-        }
-
-        mock_collect.return_value = referenced_entities
+        mock_collect.return_value = {str(PERSON_1), str(PERSON_2)}
 
-        import_referenced_entities(mock_editor, structured_data)
+        result = import_referenced_entities(mock_editor, structured_data)
 
         mock_collect.assert_called_once_with(structured_data)
-        assert mock_editor.import_entity.call_count == 2
+        mock_editor.import_entities.assert_called_once()
+        assert set(mock_editor.import_entities.call_args.args[0]) == {
+            PERSON_1,
+            PERSON_2,
+        }
+        assert result.imported == (PERSON_1, PERSON_2)
 
     @patch("heritrace.utils.sparql_utils.collect_referenced_entities")
     def test_import_referenced_entities_with_error(self, mock_collect) -> None:
-        """Test import when one entity fails to import."""
+        """Test that the entities not imported are reported, not raised."""
         mock_editor = MagicMock()
-        structured_data = {"test": "data"}
-        referenced_entities = {"http://example.org/person1"}
-
-        mock_collect.return_value = referenced_entities
-        mock_editor.import_entity.side_effect = OSError("Import failed")
+        mock_editor.import_entities.return_value = EntityImportResult(
+            missing=(PERSON_1,), failed=(PERSON_2,)
+        )
+        mock_collect.return_value = {str(PERSON_1), str(PERSON_2)}
 
-        # Should not raise exception, should continue
-        import_referenced_entities(mock_editor, structured_data)
+        result = import_referenced_entities(mock_editor, {"test": "data"})
 
-        mock_editor.import_entity.assert_called_once()
+        assert result.not_imported == (PERSON_1, PERSON_2)
 
     @patch("heritrace.utils.sparql_utils.collect_referenced_entities")
     def test_import_referenced_entities_empty_set(self, mock_collect) -> None:
         """Test import when no referenced entities are found."""
         mock_editor = MagicMock()
+        mock_editor.import_entities.return_value = EntityImportResult()
         structured_data = {"test": "data"}
 
         mock_collect.return_value = set()
 
-        import_referenced_entities(mock_editor, structured_data)
+        result = import_referenced_entities(mock_editor, structured_data)
 
         mock_collect.assert_called_once_with(structured_data)
-        mock_editor.import_entity.assert_not_called()
+        assert list(mock_editor.import_entities.call_args.args[0]) == []
+        assert result.not_imported == ()
@@ -0,0 +1,116 @@
+# SPDX-FileCopyrightText: 2026 Arcangelo Massari <arcangelo.massari@unibo.it>
+#
+# SPDX-License-Identifier: ISC
+
+from unittest.mock import patch
+
+import pytest
+from rdflib import XSD, Graph, Literal, URIRef
+
+from heritrace.utils.update_queries import (
+    _parse_cached,
+    _parse_ocdm_update,
+    _parse_with_rdflib,
+    _UnsupportedUpdateError,
+    parse_sparql_update,
+)
+
+SUBJECT = URIRef("https://w3id.org/oc/meta/br/1")
+GRAPH_BLOCK = "GRAPH <https://w3id.org/oc/meta/br/>"
+
+
+def _statements(*triples: tuple) -> str:
+    graph = Graph()
+    for triple in triples:
+        graph.add(triple)
+    return graph.serialize(format="nt11").replace("\n", "")
+
+
+STATEMENTS = _statements(
+    (
+        SUBJECT,
+        URIRef("http://purl.org/dc/terms/title"),
+        Literal('A "quoted" title { with } braces;\nand a newline é', lang="en"),
+    ),
+    (
+        SUBJECT,
+        URIRef("http://prismstandard.org/namespaces/basic/2.0/publicationDate"),
+        Literal("2020-01-01", datatype=XSD.date),
+    ),
+    (
+        SUBJECT,
+        URIRef("http://purl.org/spar/pro/isDocumentContextFor"),
+        URIRef("https://w3id.org/oc/meta/ar/1"),
+    ),
+    (SUBJECT, URIRef("http://example.org/note"), Literal("DELETE DATA { . }")),
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    _parse_cached.cache_clear()
+    yield
+    _parse_cached.cache_clear()
+
+
+def _sorted(modifications: dict) -> dict:
+    return {key: sorted(triples) for key, triples in modifications.items()}
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        (
+            f"DELETE DATA {{ {GRAPH_BLOCK} {{ {STATEMENTS} }} }}; "
+            f"INSERT DATA {{ {GRAPH_BLOCK} {{ {STATEMENTS} }} }}"
+        ),
+        f"INSERT DATA {{ {STATEMENTS} }}",
+        f"delete data {{ {GRAPH_BLOCK} {{ {STATEMENTS} }} }}",
+        "DELETE DATA { }",
+    ],
+)
+def test_ocdm_update_queries_parse_like_rdflib(query: str) -> None:
+    assert _sorted(_parse_ocdm_update(query)) == _sorted(_parse_with_rdflib(query))
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "PREFIX ex: <http://example.org/> INSERT DATA { ex:a ex:b 'c' }",
+        "INSERT DATA { _:b0 <http://example.org/p> <http://example.org/o> . }",
+        "INSERT DATA { <http://example.org/s> <http://example.org/p> 42 . }",
+        "INSERT DATA { <http://example.org/s> <http://example.org/p> ",
+    ],
+)
+def test_other_update_queries_are_not_read_by_the_tokenizer(query: str) -> None:
+    with pytest.raises(_UnsupportedUpdateError):
+        _parse_ocdm_update(query)
+
+
+def test_other_update_queries_fall_back_to_rdflib() -> None:
+    query = "PREFIX ex: <http://example.org/> INSERT DATA { ex:a ex:b 'c' }"
+
+    assert parse_sparql_update(query) == {
+        "Additions": [
+            (
+                URIRef("http://example.org/a"),
+                URIRef("http://example.org/b"),
+                Literal("c"),
+            )
+        ]
+    }
+
+
+def test_parsed_queries_are_cached_and_returned_as_copies() -> None:
+    query = f"INSERT DATA {{ {GRAPH_BLOCK} {{ {STATEMENTS} }} }}"
+
+    with patch(
+        "heritrace.utils.update_queries._parse_ocdm_update",
+        wraps=_parse_ocdm_update,
+    ) as mock_parse:
+        first = parse_sparql_update(query)
+        first["Additions"].clear()
+        second = parse_sparql_update(query)
+
+    mock_parse.assert_called_once_with(query)
+    assert len(second["Additions"]) == 4